@@ -0,0 +1,65 @@
+"""scope event dedup and aggregation indexes by organization
+
+Revision ID: 179b5a00ba74
+Revises: c3d4e5f6g7h9
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "179b5a00ba74"
+down_revision = "c3d4e5f6g7h9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # transaction_id was globally unique; ingestion deduplicates per organization
+    op.drop_index("ix_events_transaction_id", table_name="events")
+    op.drop_constraint("events_transaction_id_key", "events", type_="unique")
+    op.create_unique_constraint(
+        "uq_events_organization_id_transaction_id",
+        "events",
+        ["organization_id", "transaction_id"],
+    )
+
+    # Replace the single-column and unscoped composite indexes with
+    # organization-leading composites used by aggregation and listing.
+    op.drop_index("ix_events_customer_code_timestamp", table_name="events")
+    op.drop_index("ix_events_external_customer_id", table_name="events")
+    op.drop_index("ix_events_code", table_name="events")
+    op.drop_index("ix_events_timestamp", table_name="events")
+    op.create_index(
+        "ix_events_org_customer_code_timestamp",
+        "events",
+        ["organization_id", "external_customer_id", "code", "timestamp"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_events_org_timestamp",
+        "events",
+        ["organization_id", "timestamp"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_org_timestamp", table_name="events")
+    op.drop_index("ix_events_org_customer_code_timestamp", table_name="events")
+    op.create_index("ix_events_timestamp", "events", ["timestamp"], unique=False)
+    op.create_index("ix_events_code", "events", ["code"], unique=False)
+    op.create_index(
+        "ix_events_external_customer_id", "events", ["external_customer_id"], unique=False
+    )
+    op.create_index(
+        "ix_events_customer_code_timestamp",
+        "events",
+        ["external_customer_id", "code", "timestamp"],
+        unique=False,
+    )
+
+    op.drop_constraint("uq_events_organization_id_transaction_id", "events", type_="unique")
+    op.create_unique_constraint("events_transaction_id_key", "events", ["transaction_id"])
+    op.create_index("ix_events_transaction_id", "events", ["transaction_id"], unique=True)
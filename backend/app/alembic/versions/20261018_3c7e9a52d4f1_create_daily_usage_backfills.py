@@ -0,0 +1,91 @@
+"""create daily usage backfills
+
+Revision ID: 3c7e9a52d4f1
+Revises: 8b3f6a1d2c9e
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c7e9a52d4f1"
+down_revision = "8b3f6a1d2c9e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_usage_backfills",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("organization_id", sa.String(length=36), nullable=False),
+        sa.Column("billable_metric_id", sa.String(length=36), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("total_days", sa.Integer(), nullable=False),
+        sa.Column("completed_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("record_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["organization_id"], ["organizations.id"], ondelete="RESTRICT"),
+        sa.ForeignKeyConstraint(
+            ["billable_metric_id"], ["billable_metrics.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_daily_usage_backfills_organization_id",
+        "daily_usage_backfills",
+        ["organization_id"],
+    )
+
+    op.create_table(
+        "daily_usage_backfill_shards",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("backfill_id", sa.String(length=36), nullable=False),
+        sa.Column("usage_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("record_count", sa.Integer(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["backfill_id"], ["daily_usage_backfills.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "backfill_id",
+            "usage_date",
+            name="uq_daily_usage_backfill_shards_backfill_date",
+        ),
+    )
+    op.create_index(
+        "ix_daily_usage_backfill_shards_backfill_id",
+        "daily_usage_backfill_shards",
+        ["backfill_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_daily_usage_backfill_shards_backfill_id",
+        table_name="daily_usage_backfill_shards",
+    )
+    op.drop_table("daily_usage_backfill_shards")
+    op.drop_index("ix_daily_usage_backfills_organization_id", table_name="daily_usage_backfills")
+    op.drop_table("daily_usage_backfills")
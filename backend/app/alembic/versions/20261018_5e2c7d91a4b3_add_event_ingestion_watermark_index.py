@@ -0,0 +1,29 @@
+"""add event ingestion watermark index
+
+Revision ID: 5e2c7d91a4b3
+Revises: 179b5a00ba74
+Create Date: 2026-10-18
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e2c7d91a4b3"
+down_revision = "179b5a00ba74"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # max(created_at) per customer keys the usage snapshot cache
+    op.create_index(
+        "ix_events_org_customer_created_at",
+        "events",
+        ["organization_id", "external_customer_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_org_customer_created_at", table_name="events")
@@ -0,0 +1,62 @@
+"""create invoice number sequences
+
+Revision ID: 6d1a8f3e7b25
+Revises: 3c7e9a52d4f1
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6d1a8f3e7b25"
+down_revision = "3c7e9a52d4f1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_number_sequences",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("organization_id", sa.String(length=36), nullable=False),
+        sa.Column("sequence_key", sa.String(length=50), nullable=False),
+        sa.Column("next_value", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["organization_id"], ["organizations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "organization_id", "sequence_key", name="uq_invoice_number_sequences_org_key"
+        ),
+    )
+
+    # Invoice numbers are now allocated per organization, so they are only
+    # unique within one
+    op.drop_constraint("invoices_invoice_number_key", "invoices", type_="unique")
+    op.drop_index("ix_invoices_invoice_number", table_name="invoices")
+    op.create_index("ix_invoices_invoice_number", "invoices", ["invoice_number"], unique=False)
+    op.create_unique_constraint(
+        "uq_invoices_organization_id_invoice_number",
+        "invoices",
+        ["organization_id", "invoice_number"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_invoices_organization_id_invoice_number", "invoices", type_="unique")
+    op.create_unique_constraint("invoices_invoice_number_key", "invoices", ["invoice_number"])
+    op.drop_index("ix_invoices_invoice_number", table_name="invoices")
+    op.create_index("ix_invoices_invoice_number", "invoices", ["invoice_number"], unique=True)
+    op.drop_table("invoice_number_sequences")
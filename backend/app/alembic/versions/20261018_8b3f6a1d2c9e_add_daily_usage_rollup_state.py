@@ -0,0 +1,57 @@
+"""add daily usage rollup state
+
+Revision ID: 8b3f6a1d2c9e
+Revises: 5e2c7d91a4b3
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b3f6a1d2c9e"
+down_revision = "5e2c7d91a4b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Mergeable per-day state, so period aggregations can combine closed days
+    op.add_column(
+        "daily_usages",
+        sa.Column("sum_value", sa.Numeric(precision=38, scale=12), nullable=True),
+    )
+    op.add_column(
+        "daily_usages",
+        sa.Column("max_value", sa.Numeric(precision=38, scale=12), nullable=True),
+    )
+    op.add_column("daily_usages", sa.Column("unique_values", sa.JSON(), nullable=True))
+    op.add_column(
+        "daily_usages",
+        sa.Column("rollup_watermark", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_daily_usages_metric_customer_date",
+        "daily_usages",
+        ["billable_metric_id", "external_customer_id", "usage_date"],
+        unique=False,
+    )
+    # Finds events ingested after their day was rolled up; BRIN stays tiny
+    # because created_at follows insertion order
+    op.create_index(
+        "ix_events_created_at",
+        "events",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_created_at", table_name="events")
+    op.drop_index("ix_daily_usages_metric_customer_date", table_name="daily_usages")
+    op.drop_column("daily_usages", "rollup_watermark")
+    op.drop_column("daily_usages", "unique_values")
+    op.drop_column("daily_usages", "max_value")
+    op.drop_column("daily_usages", "sum_value")
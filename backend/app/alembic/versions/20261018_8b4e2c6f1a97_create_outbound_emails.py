@@ -0,0 +1,66 @@
+"""create outbound emails
+
+Revision ID: 8b4e2c6f1a97
+Revises: 6d1a8f3e7b25
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b4e2c6f1a97"
+down_revision = "6d1a8f3e7b25"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbound_emails",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("organization_id", sa.String(length=36), nullable=False),
+        sa.Column("document_type", sa.String(length=20), nullable=False),
+        sa.Column("document_id", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["organization_id"], ["organizations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_outbound_emails_organization_id", "outbound_emails", ["organization_id"])
+    op.create_index(
+        "ix_outbound_emails_status_next_attempt_at",
+        "outbound_emails",
+        ["status", "next_attempt_at"],
+    )
+    op.create_index(
+        "ix_outbound_emails_document", "outbound_emails", ["document_type", "document_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_outbound_emails_document", table_name="outbound_emails")
+    op.drop_index("ix_outbound_emails_status_next_attempt_at", table_name="outbound_emails")
+    op.drop_index("ix_outbound_emails_organization_id", table_name="outbound_emails")
+    op.drop_table("outbound_emails")
@@ -0,0 +1,60 @@
+"""create wallet balance snapshots
+
+Revision ID: c2a7e94d1f58
+Revises: 4f9c1d7e2b63
+Create Date: 2026-10-18
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2a7e94d1f58"
+down_revision = "4f9c1d7e2b63"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_balance_snapshots",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("organization_id", sa.String(length=36), nullable=False),
+        sa.Column("wallet_id", sa.String(length=36), nullable=False),
+        sa.Column("as_of", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("balance_cents", sa.Numeric(12, 4), nullable=False, server_default="0"),
+        sa.Column("credits_balance", sa.Numeric(12, 4), nullable=False, server_default="0"),
+        sa.Column("inbound_amount_cents", sa.Numeric(12, 4), nullable=False, server_default="0"),
+        sa.Column("outbound_amount_cents", sa.Numeric(12, 4), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["organization_id"], ["organizations.id"], ondelete="RESTRICT"),
+        sa.ForeignKeyConstraint(["wallet_id"], ["wallets.id"], ondelete="RESTRICT"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("wallet_id", "as_of", name="uq_wallet_balance_snapshots_wallet_as_of"),
+    )
+    op.create_index(
+        "ix_wallet_balance_snapshots_organization_id",
+        "wallet_balance_snapshots",
+        ["organization_id"],
+    )
+    op.create_index(
+        "ix_wallet_transactions_wallet_id_created_at",
+        "wallet_transactions",
+        ["wallet_id", "created_at"],
+    )
+    op.create_index("ix_wallet_transactions_created_at", "wallet_transactions", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallet_transactions_created_at", table_name="wallet_transactions")
+    op.drop_index("ix_wallet_transactions_wallet_id_created_at", table_name="wallet_transactions")
+    op.drop_index(
+        "ix_wallet_balance_snapshots_organization_id", table_name="wallet_balance_snapshots"
+    )
+    op.drop_table("wallet_balance_snapshots")
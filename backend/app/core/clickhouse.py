@@ -1,10 +1,19 @@
 """ClickHouse client module for event storage and aggregation."""
 
+import asyncio
 import logging
+import threading
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any
 from urllib.parse import urlparse
 
 import clickhouse_connect
-from clickhouse_connect.driver import Client
+import redis
+from clickhouse_connect.driver import Client, httputil
+from clickhouse_connect.driver.query import QueryResult
+from urllib3 import BaseHTTPResponse, PoolManager
 
 from app.core.config import settings
 
@@ -12,9 +21,27 @@ logger = logging.getLogger(__name__)
 
 _client: Client | None = None
 _initialized: bool = False
+_daily_rollup_ready: bool = False
+_client_lock = threading.Lock()
 
 EVENTS_RAW_TABLE = "events_raw"
 
+# String-valued event properties, extracted from the JSON at insert time so
+# property filters read a typed column instead of parsing every row.
+_PROPERTIES_MAP_EXPR = (
+    "mapFilter((k, v) -> JSONType(properties, k) = 'String',"
+    " CAST(JSONExtractKeysAndValues(properties, 'String'), 'Map(String, String)'))"
+)
+_PROPERTIES_MAP_COLUMN = f"properties_map Map(String, String) MATERIALIZED {_PROPERTIES_MAP_EXPR}"
+_PROPERTIES_MAP_INDEXES = [
+    "idx_properties_keys mapKeys(properties_map) TYPE bloom_filter(0.01) GRANULARITY 1",
+    "idx_properties_values mapValues(properties_map) TYPE bloom_filter(0.01) GRANULARITY 1",
+]
+
+# Recent insert blocks remembered by events_raw, so a retried insert carrying
+# the same insert_deduplication_token is dropped before the daily view sees it.
+EVENTS_RAW_DEDUPLICATION_WINDOW = 1000
+
 CREATE_EVENTS_RAW_TABLE = f"""
 CREATE TABLE IF NOT EXISTS {EVENTS_RAW_TABLE} (
     organization_id String,
@@ -25,7 +52,10 @@ CREATE TABLE IF NOT EXISTS {EVENTS_RAW_TABLE} (
     properties String,
     value Nullable(String),
     decimal_value Nullable(Decimal(38, 26)),
-    created_at DateTime64(3) DEFAULT now()
+    created_at DateTime64(3) DEFAULT now(),
+    {_PROPERTIES_MAP_COLUMN},
+    INDEX {_PROPERTIES_MAP_INDEXES[0]},
+    INDEX {_PROPERTIES_MAP_INDEXES[1]}
 )
 ENGINE = ReplacingMergeTree(created_at)
 PRIMARY KEY (organization_id, code, external_customer_id, toDate(timestamp))
@@ -33,7 +63,88 @@ ORDER BY (
     organization_id, code, external_customer_id,
     toDate(timestamp), timestamp, transaction_id
 )
-SETTINGS index_granularity = 8192
+SETTINGS index_granularity = 8192,
+    non_replicated_deduplication_window = {EVENTS_RAW_DEDUPLICATION_WINDOW}
+"""
+
+# Brings tables created before the typed properties column up to date; parts
+# written earlier compute the column on read until they are merged.
+MIGRATE_EVENTS_RAW_TABLE = [
+    f"ALTER TABLE {EVENTS_RAW_TABLE} ADD COLUMN IF NOT EXISTS {_PROPERTIES_MAP_COLUMN}",
+    f"ALTER TABLE {EVENTS_RAW_TABLE} MODIFY SETTING"
+    f" non_replicated_deduplication_window = {EVENTS_RAW_DEDUPLICATION_WINDOW}",
+    *(
+        f"ALTER TABLE {EVENTS_RAW_TABLE} ADD INDEX IF NOT EXISTS {index}"
+        for index in _PROPERTIES_MAP_INDEXES
+    ),
+]
+
+# Daily partial aggregate states per (organization, code, customer), fed from
+# events_raw by a materialized view.  States are merged at query time, so
+# rows inserted for the same day in different blocks combine correctly.  The
+# view counts every inserted row, while events_raw only collapses duplicate
+# transactions when parts merge, so the event store never inserts a row that
+# events_raw already holds.
+EVENTS_DAILY_TABLE = "events_daily_aggregates"
+EVENTS_DAILY_VIEW = "events_daily_aggregates_mv"
+
+CREATE_EVENTS_DAILY_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {EVENTS_DAILY_TABLE} (
+    organization_id String,
+    code String,
+    external_customer_id String,
+    day Date,
+    events_count AggregateFunction(count),
+    sum_value AggregateFunction(sum, Nullable(Decimal(38, 26))),
+    max_value AggregateFunction(max, Nullable(Decimal(38, 26))),
+    latest_value AggregateFunction(argMax, Decimal(38, 26), DateTime64(3)),
+    unique_values AggregateFunction(uniq, Nullable(String)),
+    values_count AggregateFunction(count, Nullable(String))
+)
+ENGINE = AggregatingMergeTree
+ORDER BY (organization_id, code, external_customer_id, day)
+"""
+
+# Partial aggregate states over events_raw rows, matching EVENTS_DAILY_TABLE
+DAILY_STATE_COLUMNS = """
+    countState() AS events_count,
+    sumState(decimal_value) AS sum_value,
+    maxState(decimal_value) AS max_value,
+    argMaxState(ifNull(decimal_value, toDecimal128(0, 26)), timestamp) AS latest_value,
+    uniqState(value) AS unique_values,
+    countState(value) AS values_count
+"""
+
+# Staging table for the one-off backfill of events created before the view,
+# swapped into EVENTS_DAILY_TABLE in a single ATTACH PARTITION.
+EVENTS_DAILY_BACKFILL_TABLE = "events_daily_aggregates_backfill"
+
+# One row per one-off schema migration, holding the view cutoff of the daily
+# rollup and whether its backfill has completed.
+SCHEMA_MIGRATIONS_TABLE = "bxb_schema_migrations"
+
+CREATE_SCHEMA_MIGRATIONS_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {SCHEMA_MIGRATIONS_TABLE} (
+    name String,
+    cutoff DateTime64(3, 'UTC'),
+    completed UInt8,
+    updated_at DateTime64(3) DEFAULT now64(3)
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY name
+"""
+
+_DAILY_ROLLUP_MIGRATION = "events_daily_aggregates_backfill"
+_DAILY_ROLLUP_LOCK = "bxb:clickhouse:daily_rollup"
+_DAILY_ROLLUP_LOCK_SECONDS = 3600
+
+_DAILY_ROLLUP_SELECT = f"""
+SELECT
+    organization_id, code, external_customer_id, toDate(timestamp, 'UTC') AS day,
+    {DAILY_STATE_COLUMNS}
+FROM {EVENTS_RAW_TABLE}
+WHERE {{where}}
+GROUP BY organization_id, code, external_customer_id, day
 """
 
 
@@ -49,12 +160,46 @@ def _parse_clickhouse_url(url: str) -> dict[str, object]:
     }
 
 
+class _BoundedPoolManager(PoolManager):
+    """Pool manager that waits a bounded time for a free connection.
+
+    With ``block=True`` urllib3 otherwise waits indefinitely once every
+    pooled connection is checked out.
+    """
+
+    def __init__(self, pool_timeout: float, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.pool_timeout = pool_timeout
+
+    def urlopen(  # type: ignore[override]
+        self, method: str, url: str, redirect: bool = True, **kw: Any
+    ) -> BaseHTTPResponse:
+        kw.setdefault("pool_timeout", self.pool_timeout)
+        return super().urlopen(method, url, redirect=redirect, **kw)
+
+
+def _pool_manager() -> PoolManager:
+    options = httputil.get_pool_manager_options(
+        maxsize=settings.CLICKHOUSE_MAX_CONNECTIONS, num_pools=1, block=True
+    )
+    manager = _BoundedPoolManager(settings.CLICKHOUSE_POOL_TIMEOUT_SECONDS, **options)
+    # Registered like httputil.get_pool_manager, for connection expiry
+    httputil.all_managers[manager] = int(time.time())
+    return manager
+
+
 def get_clickhouse_client() -> Client | None:
-    """Get or create a ClickHouse client singleton.
+    """Get or create the pooled ClickHouse client singleton.
+
+    The client is safe to share across threads: it does not use a server
+    session, so concurrent queries each take a connection from a pool of
+    ``CLICKHOUSE_MAX_CONNECTIONS``, waiting at most
+    ``CLICKHOUSE_POOL_TIMEOUT_SECONDS`` for one to be free.  Tables are
+    created at startup by ``ensure_clickhouse_schema``.
 
     Returns None when CLICKHOUSE_URL is not configured.
     """
-    global _client, _initialized
+    global _client
 
     if not settings.clickhouse_enabled:
         return None
@@ -62,19 +207,192 @@ def get_clickhouse_client() -> Client | None:
     if _client is not None:
         return _client
 
-    params = _parse_clickhouse_url(settings.CLICKHOUSE_URL)
-    _client = clickhouse_connect.get_client(**params)  # type: ignore[arg-type]
+    with _client_lock:
+        if _client is None:
+            _client = clickhouse_connect.get_client(
+                **_parse_clickhouse_url(settings.CLICKHOUSE_URL),  # type: ignore[arg-type]
+                pool_mgr=_pool_manager(),
+                autogenerate_session_id=False,
+                compress=settings.CLICKHOUSE_COMPRESS,
+                connect_timeout=settings.CLICKHOUSE_CONNECT_TIMEOUT_SECONDS,
+                send_receive_timeout=settings.CLICKHOUSE_QUERY_TIMEOUT_SECONDS,
+                query_retries=settings.CLICKHOUSE_QUERY_RETRIES,
+            )
+    return _client
 
-    if not _initialized:
-        _client.command(CREATE_EVENTS_RAW_TABLE)
-        _initialized = True
-        logger.info("ClickHouse events_raw table ensured")
 
-    return _client
+class AsyncClickHouseClient:
+    """Awaitable wrapper around the pooled client for async routes and workers.
+
+    Calls run in the default executor, so concurrent awaits use separate
+    pooled connections without blocking the event loop.
+    """
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def query(self, sql: str, parameters: dict[str, Any] | None = None) -> QueryResult:
+        return await asyncio.to_thread(self.client.query, sql, parameters=parameters)
+
+    async def command(self, sql: str, parameters: dict[str, Any] | None = None) -> Any:
+        return await asyncio.to_thread(self.client.command, sql, parameters=parameters)
+
+    async def insert(
+        self, table: str, data: Sequence[Sequence[Any]], column_names: Sequence[str]
+    ) -> None:
+        await asyncio.to_thread(self.client.insert, table, data, column_names=column_names)
+
+    async def ping(self) -> bool:
+        return await asyncio.to_thread(self.client.ping)
+
+
+def get_async_clickhouse_client() -> AsyncClickHouseClient | None:
+    """Get the async wrapper over the shared pooled client.
+
+    Returns None when CLICKHOUSE_URL is not configured.
+    """
+    client = get_clickhouse_client()
+    if client is None:
+        return None
+    return AsyncClickHouseClient(client)
+
+
+def ensure_clickhouse_schema() -> None:
+    """Create or migrate the ClickHouse tables; run once at process startup."""
+    global _initialized
+
+    client = get_clickhouse_client()
+    if client is None or _initialized:
+        return
+
+    client.command(CREATE_EVENTS_RAW_TABLE)
+    for statement in MIGRATE_EVENTS_RAW_TABLE:
+        client.command(statement)
+    _ensure_daily_rollup(client)
+    _initialized = True
+    logger.info("ClickHouse schema ensured")
+
+
+def _ensure_daily_rollup(client: Client) -> None:
+    """Create the daily rollup table and view, backfilling existing events once.
+
+    One process per deployment runs the backfill, holding a Redis lock; the
+    others start without waiting and read raw rows until ``daily_rollup_ready``
+    sees the completion marker.
+    """
+    client.command(CREATE_EVENTS_DAILY_TABLE)
+    client.command(CREATE_SCHEMA_MIGRATIONS_TABLE)
+    migration = _daily_rollup_migration(client)
+    if migration is not None and migration[1]:
+        return
+
+    lock = redis.Redis.from_url(settings.REDIS_URL).lock(
+        _DAILY_ROLLUP_LOCK, timeout=_DAILY_ROLLUP_LOCK_SECONDS
+    )
+    if not lock.acquire(blocking=False):
+        logger.info("ClickHouse daily rollup backfill is running in another process")
+        return
+    try:
+        _backfill_daily_rollup(client)
+    finally:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            logger.warning("ClickHouse daily rollup lock expired before the backfill finished")
+
+
+def _daily_rollup_migration(client: Client) -> tuple[datetime, bool] | None:
+    """Return the recorded view cutoff and completion, or None if not started."""
+    rows = client.query(
+        f"SELECT cutoff, completed FROM {SCHEMA_MIGRATIONS_TABLE} FINAL"
+        " WHERE name = {name:String}",
+        parameters={"name": _DAILY_ROLLUP_MIGRATION},
+    ).result_rows
+    if not rows:
+        return None
+    return rows[0][0], bool(rows[0][1])
+
+
+def _record_daily_rollup(client: Client, cutoff: datetime, completed: bool) -> None:
+    client.insert(
+        SCHEMA_MIGRATIONS_TABLE,
+        [[_DAILY_ROLLUP_MIGRATION, cutoff, int(completed)]],
+        column_names=["name", "cutoff", "completed"],
+    )
+
+
+def _backfill_daily_rollup(client: Client) -> None:
+    """Point the view at a cutoff and backfill every row created before it.
+
+    The view only forwards rows created from a cutoff slightly in the future,
+    taken from the ClickHouse clock that sets ``created_at``.  The cutoff is
+    recorded before the view is created, so a run interrupted after that
+    resumes with the same cutoff.  Earlier rows are aggregated into a staging
+    table and attached to the rollup in one step, so an interrupted backfill
+    never leaves partial states behind.
+    """
+    migration = _daily_rollup_migration(client)
+    if migration is not None and migration[1]:
+        return
+
+    view_exists = client.command(f"EXISTS TABLE {EVENTS_DAILY_VIEW}") == 1
+    if view_exists and migration is None:
+        # Created and backfilled before completion was recorded
+        _record_daily_rollup(client, datetime.fromtimestamp(0, UTC), completed=True)
+        return
+
+    if view_exists and migration is not None:
+        cutoff = migration[0]
+    else:
+        cutoff = client.query(
+            "SELECT toStartOfSecond(now64(3, 'UTC')) + INTERVAL 2 SECOND"
+        ).result_rows[0][0]
+        _record_daily_rollup(client, cutoff, completed=False)
+
+    cutoff_sql = f"toDateTime64('{cutoff:%Y-%m-%d %H:%M:%S}', 3, 'UTC')"
+    where = f"created_at >= {cutoff_sql}"
+    client.command(
+        f"CREATE MATERIALIZED VIEW IF NOT EXISTS {EVENTS_DAILY_VIEW}"
+        f" TO {EVENTS_DAILY_TABLE} AS {_DAILY_ROLLUP_SELECT.format(where=where)}"
+    )
+
+    # Rows created just before the cutoff must be visible before backfilling
+    wait_ms = client.query(
+        f"SELECT greatest(dateDiff('millisecond', now64(3, 'UTC'), {cutoff_sql}), 0)"
+    ).result_rows[0][0]
+    time.sleep(int(wait_ms) / 1000)
+
+    where = f"created_at < {cutoff_sql}"
+    client.command(
+        f"CREATE TABLE IF NOT EXISTS {EVENTS_DAILY_BACKFILL_TABLE} AS {EVENTS_DAILY_TABLE}"
+    )
+    client.command(f"TRUNCATE TABLE {EVENTS_DAILY_BACKFILL_TABLE}")
+    client.command(
+        f"INSERT INTO {EVENTS_DAILY_BACKFILL_TABLE} {_DAILY_ROLLUP_SELECT.format(where=where)}"
+    )
+    client.command(
+        f"ALTER TABLE {EVENTS_DAILY_TABLE}"
+        f" ATTACH PARTITION tuple() FROM {EVENTS_DAILY_BACKFILL_TABLE}"
+    )
+    _record_daily_rollup(client, cutoff, completed=True)
+    client.command(f"DROP TABLE IF EXISTS {EVENTS_DAILY_BACKFILL_TABLE}")
+    logger.info("ClickHouse daily rollup view created and backfilled")
+
+
+def daily_rollup_ready() -> bool:
+    """Whether the daily rollup holds every event, so queries may read it."""
+    global _daily_rollup_ready
+
+    if not _daily_rollup_ready:
+        client = get_clickhouse_client()
+        migration = None if client is None else _daily_rollup_migration(client)
+        _daily_rollup_ready = migration is not None and migration[1]
+    return _daily_rollup_ready
 
 
 def reset_client() -> None:
     """Reset the cached client. Used for testing."""
-    global _client, _initialized
+    global _client, _initialized, _daily_rollup_ready
     _client = None
     _initialized = False
+    _daily_rollup_ready = False
@@ -1,12 +1,27 @@
 """Idempotency support for API endpoints.
 
-Provides a FastAPI dependency that checks for the ``Idempotency-Key`` header.
-If a cached response exists for the key, the dependency returns a JSONResponse
+Provides a helper that checks for the ``Idempotency-Key`` header.
+If a cached response exists for the key, the helper returns a JSONResponse
 directly; otherwise it returns ``None`` so the endpoint can proceed normally.
 After the endpoint completes, call ``record_idempotency_response`` to persist
 the response for future replays.
+
+Two stores are supported, selected by ``BXB_IDEMPOTENCY_BACKEND``:
+
+- ``database`` (default): records live in the ``idempotency_records`` table and
+  are purged by the daily cleanup task.
+- ``redis``: keys are reserved atomically with ``SET NX`` and expire natively.
+  A concurrent retry with the same key waits for the first request's response
+  instead of processing the request a second time.  A reservation whose request
+  ends without recording a response (an error, or a 4xx/5xx) is released by
+  ``release_idempotency_reservation``, so the client can retry at once.
 """
 
+import asyncio
+import json
+import secrets
+import time
+import zlib
 from dataclasses import dataclass
 from typing import Any
 from uuid import UUID
@@ -15,8 +30,25 @@ from fastapi import Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
 from app.repositories.idempotency_repository import IdempotencyRepository
 
+# Prefix of the value stored under a reserved key while the first request is
+# still in flight, followed by a token unique to the reservation.  Completed
+# responses are zlib streams, which never start with a NUL byte.
+_PENDING = b"\x00"
+_POLL_INTERVAL_SECONDS = 0.05
+
+# Deletes the key only if it still holds the given reservation, so neither a
+# recorded response nor another request's reservation is removed.
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
 
 @dataclass
 class IdempotencyResult:
@@ -27,7 +59,27 @@ class IdempotencyResult:
     path: str
 
 
-def check_idempotency(
+def _redis_key(organization_id: UUID, key: str) -> str:
+    return f"bxb:idempotency:{organization_id}:{key}"
+
+
+def _encode_response(status: int, body: dict[str, Any]) -> bytes:
+    """Serialize a response compactly for storage in Redis."""
+    return zlib.compress(json.dumps([status, body], separators=(",", ":")).encode())
+
+
+def _decode_response(raw: bytes) -> tuple[int, Any]:
+    status, body = json.loads(zlib.decompress(raw))
+    return int(status), body
+
+
+def _replay(status: int, body: Any) -> JSONResponse:
+    response = JSONResponse(content=body, status_code=status)
+    response.headers["Idempotency-Replayed"] = "true"
+    return response
+
+
+async def check_idempotency(
     request: Request,
     db: Session,
     organization_id: UUID,
@@ -37,7 +89,9 @@ def check_idempotency(
     Returns:
         - ``None`` if no ``Idempotency-Key`` header is present (no idempotency).
         - A ``JSONResponse`` with the cached response and ``Idempotency-Replayed: true``
-          header if a completed record already exists.
+          header if a completed record already exists.  With the Redis store this is
+          also a ``409`` if another request holding the key does not finish within
+          ``BXB_IDEMPOTENCY_WAIT_SECONDS``.
         - An ``IdempotencyResult`` with the key details if this is a new request that
           should be recorded after processing.
     """
@@ -45,16 +99,14 @@ def check_idempotency(
     if not key:
         return None
 
+    if settings.BXB_IDEMPOTENCY_BACKEND == "redis":
+        return await _check_redis(request, organization_id, key)
+
     repo = IdempotencyRepository(db)
     existing = repo.get_by_key(organization_id, key)
 
     if existing is not None and existing.response_status is not None:
-        response = JSONResponse(
-            content=existing.response_body,
-            status_code=int(existing.response_status),
-        )
-        response.headers["Idempotency-Replayed"] = "true"
-        return response
+        return _replay(int(existing.response_status), existing.response_body)
 
     if existing is None:
         repo.create(
@@ -71,7 +123,59 @@ def check_idempotency(
     )
 
 
-def record_idempotency_response(
+async def _check_redis(
+    request: Request,
+    organization_id: UUID,
+    key: str,
+) -> JSONResponse | IdempotencyResult:
+    """Reserve the key in Redis, or wait for the in-flight request that holds it.
+
+    The reservation is recorded on ``request.state`` and released when the
+    request ends without a recorded response.  It also expires after
+    ``BXB_IDEMPOTENCY_LOCK_SECONDS``, in case the process dies mid-request.
+    """
+    client = get_redis_client()
+    redis_key = _redis_key(organization_id, key)
+    pending = IdempotencyResult(key=key, method=request.method, path=request.url.path)
+    reservation = _PENDING + secrets.token_bytes(16)
+    deadline = time.monotonic() + settings.BXB_IDEMPOTENCY_WAIT_SECONDS
+
+    while True:
+        if await client.set(
+            redis_key, reservation, nx=True, ex=settings.BXB_IDEMPOTENCY_LOCK_SECONDS
+        ):
+            request.state.idempotency_reservation = (redis_key, reservation)
+            return pending
+
+        raw = await client.get(redis_key)
+        if raw is None:
+            # The holder's lock expired between SET and GET; try to take over.
+            continue
+        if not raw.startswith(_PENDING):
+            status, body = _decode_response(raw)
+            return _replay(status, body)
+
+        if time.monotonic() >= deadline:
+            return JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is in progress"},
+            )
+        await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+
+
+async def release_idempotency_reservation(request: Request) -> None:
+    """Release the request's Redis key reservation unless a response was recorded.
+
+    Called once the request has been handled, whatever its outcome.
+    """
+    reservation = getattr(request.state, "idempotency_reservation", None)
+    if reservation is None:
+        return
+    redis_key, token = reservation
+    await get_redis_client().eval(_RELEASE_SCRIPT, 1, redis_key, token)  # type: ignore[misc]
+
+
+async def record_idempotency_response(
     db: Session,
     organization_id: UUID,
     key: str,
@@ -79,7 +183,13 @@ def record_idempotency_response(
     body: dict[str, Any],
 ) -> None:
     """Persist the endpoint response so subsequent calls return the cached result."""
+    if settings.BXB_IDEMPOTENCY_BACKEND == "redis":
+        await get_redis_client().set(
+            _redis_key(organization_id, key),
+            _encode_response(status, body),
+            ex=settings.BXB_IDEMPOTENCY_TTL_SECONDS,
+        )
+        return
+
     repo = IdempotencyRepository(db)
-    record = repo.get_by_key(organization_id, key)
-    if record is not None:
-        repo.update_response(record, status, body)
+    repo.update_response_by_key(organization_id, key, status, body)
@@ -0,0 +1,26 @@
+"""Shared async Redis client for request-path caches and locks.
+
+The arq task queue manages its own pool (see ``app.tasks``); this client is for
+application features that talk to Redis directly, such as the idempotency store.
+"""
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_client: aioredis.Redis | None = None
+
+
+def get_redis_client() -> aioredis.Redis:
+    """Get or create the async Redis client singleton for ``REDIS_URL``."""
+    global _client
+
+    if _client is None:
+        _client = aioredis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def reset_client() -> None:
+    """Reset the cached client. Used for testing."""
+    global _client
+    _client = None
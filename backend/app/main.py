@@ -1,8 +1,14 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import Response
 
+from app.core.clickhouse import ensure_clickhouse_schema
 from app.core.config import settings
+from app.core.idempotency import release_idempotency_reservation
 from app.routers import (
     add_ons,
     audit_logs,
@@ -13,6 +19,7 @@ from app.routers import (
     coupons,
     credit_notes,
     customers,
+    daily_usage_backfills,
     dashboard,
     data_exports,
     dunning_campaigns,
@@ -65,6 +72,10 @@ OPENAPI_TAGS = [
     {"name": "Commitments", "description": "Manage minimum spend commitments on plans."},
     {"name": "Thresholds", "description": "Configure usage-based billing thresholds."},
     {"name": "Data Exports", "description": "Export billing data as CSV files."},
+    {
+        "name": "Daily Usage Backfills",
+        "description": "Recompute pre-aggregated daily usage for past date ranges.",
+    },
     {"name": "Integrations", "description": "Connect and manage external system integrations."},
     {"name": "Audit Logs", "description": "Query the audit trail for billing entities."},
     {
@@ -95,6 +106,13 @@ def init_sentry() -> None:
 
 init_sentry()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await asyncio.to_thread(ensure_clickhouse_schema)
+    yield
+
+
 app = FastAPI(
     title=settings.BXB_APP_NAME,
     version=settings.version,
@@ -104,6 +122,7 @@ app = FastAPI(
         "coupons, credit notes, taxes, webhooks, and more."
     ),
     openapi_tags=OPENAPI_TAGS,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -136,6 +155,16 @@ async def options_handler(request: Request, call_next):  # type: ignore[no-untyp
     return await call_next(request)
 
 
+@app.middleware("http")
+async def idempotency_reservation_handler(request: Request, call_next):  # type: ignore[no-untyped-def]
+    # Set here so the endpoint's reservation lands in this request's state
+    request.state.idempotency_reservation = None
+    try:
+        return await call_next(request)
+    finally:
+        await release_idempotency_reservation(request)
+
+
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 app.include_router(customers.router, prefix="/v1/customers", tags=["Customers"])
 app.include_router(
@@ -192,6 +221,11 @@ app.include_router(
     prefix="/v1/data_exports",
     tags=["Data Exports"],
 )
+app.include_router(
+    daily_usage_backfills.router,
+    prefix="/v1/daily_usage_backfills",
+    tags=["Daily Usage Backfills"],
+)
 app.include_router(
     integrations.router,
     prefix="/v1/integrations",
@@ -23,6 +23,11 @@ from app.models.credit_note_item import CreditNoteItem
 from app.models.currency import CurrencyCode
 from app.models.customer import Customer
 from app.models.daily_usage import DailyUsage
+from app.models.daily_usage_backfill import (
+    BackfillStatus,
+    DailyUsageBackfill,
+    DailyUsageBackfillShard,
+)
 from app.models.data_export import DataExport, ExportStatus, ExportType
 from app.models.dunning_campaign import DunningCampaign
 from app.models.dunning_campaign_threshold import DunningCampaignThreshold
@@ -38,14 +43,21 @@ from app.models.integration import (
 from app.models.integration_customer import IntegrationCustomer
 from app.models.integration_mapping import IntegrationMapping
 from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_number_sequence import InvoiceNumberSequence
 from app.models.invoice_settlement import InvoiceSettlement, SettlementType
 from app.models.notification import Notification
 from app.models.organization import Organization
 from app.models.organization_member import OrganizationMember
+from app.models.outbound_email import (
+    OutboundEmail,
+    OutboundEmailDocumentType,
+    OutboundEmailStatus,
+)
 from app.models.payment import Payment, PaymentProvider, PaymentStatus
 from app.models.payment_method import PaymentMethod
 from app.models.payment_request import PaymentRequest
 from app.models.payment_request_invoice import PaymentRequestInvoice
+from app.models.payment_webhook_event import PaymentWebhookEvent, PaymentWebhookEventStatus
 from app.models.plan import Plan, PlanInterval
 from app.models.shared import DEFAULT_ORGANIZATION_ID, UUIDType, generate_uuid, utc_now
 from app.models.subscription import BillingTime, Subscription, SubscriptionStatus, TerminationAction
@@ -55,6 +67,7 @@ from app.models.usage_alert_trigger import UsageAlertTrigger
 from app.models.usage_threshold import UsageThreshold
 from app.models.user import User
 from app.models.wallet import Wallet, WalletStatus
+from app.models.wallet_balance_snapshot import WalletBalanceSnapshot
 from app.models.wallet_transaction import (
     TransactionSource,
     TransactionStatus,
@@ -79,6 +92,7 @@ __all__ = [
     "AppliedCouponStatus",
     "AppliedTax",
     "AppliedUsageThreshold",
+    "BackfillStatus",
     "BillableMetric",
     "BillableMetricFilter",
     "Charge",
@@ -100,6 +114,8 @@ __all__ = [
     "CreditStatus",
     "Customer",
     "DailyUsage",
+    "DailyUsageBackfill",
+    "DailyUsageBackfillShard",
     "DataExport",
     "ExportStatus",
     "ExportType",
@@ -117,17 +133,23 @@ __all__ = [
     "IntegrationStatus",
     "IntegrationType",
     "Invoice",
+    "InvoiceNumberSequence",
     "InvoiceSettlement",
     "InvoiceStatus",
     "SettlementType",
     "Organization",
     "OrganizationMember",
+    "OutboundEmail",
+    "OutboundEmailDocumentType",
+    "OutboundEmailStatus",
     "Payment",
     "PaymentProvider",
     "PaymentMethod",
     "PaymentRequest",
     "PaymentRequestInvoice",
     "PaymentStatus",
+    "PaymentWebhookEvent",
+    "PaymentWebhookEventStatus",
     "RefundStatus",
     "Plan",
     "PlanInterval",
@@ -146,6 +168,7 @@ __all__ = [
     "TransactionType",
     "Notification",
     "Wallet",
+    "WalletBalanceSnapshot",
     "WalletStatus",
     "WalletTransaction",
     "Webhook",
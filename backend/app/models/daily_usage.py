@@ -1,6 +1,16 @@
 """DailyUsage model for pre-aggregated daily usage data."""
 
-from sqlalchemy import Column, Date, DateTime, Integer, Numeric, String, UniqueConstraint, func
+from sqlalchemy import (
+    JSON,
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    Numeric,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.schema import ForeignKey, Index
 
 from app.core.database import Base
@@ -29,6 +39,12 @@ class DailyUsage(Base):
     usage_date = Column(Date, nullable=False)
     usage_value = Column(Numeric(12, 4), nullable=False, default=0)
     events_count = Column(Integer, nullable=False, default=0)
+    # Unrounded, mergeable state for the metric's aggregation type (SUM, MAX or
+    # UNIQUE_COUNT), valid for events ingested up to rollup_watermark
+    sum_value = Column(Numeric(38, 12), nullable=True)
+    max_value = Column(Numeric(38, 12), nullable=True)
+    unique_values = Column(JSON, nullable=True)
+    rollup_watermark = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -45,4 +61,10 @@ class DailyUsage(Base):
             "billable_metric_id",
             "usage_date",
         ),
+        Index(
+            "ix_daily_usages_metric_customer_date",
+            "billable_metric_id",
+            "external_customer_id",
+            "usage_date",
+        ),
     )
@@ -0,0 +1,87 @@
+"""Models tracking daily usage backfills and their per-day shards."""
+
+from enum import Enum
+
+from sqlalchemy import Column, Date, DateTime, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.schema import ForeignKey
+
+from app.core.database import Base
+from app.models.shared import DEFAULT_ORGANIZATION_ID, UUIDType, generate_uuid
+
+
+class BackfillStatus(str, Enum):
+    """Status of a daily usage backfill or one of its shards."""
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class DailyUsageBackfill(Base):
+    """DailyUsageBackfill model - recomputes daily_usages over a date range."""
+
+    __tablename__ = "daily_usage_backfills"
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    organization_id = Column(
+        UUIDType,
+        ForeignKey("organizations.id", ondelete="RESTRICT"),
+        nullable=False,
+        index=True,
+        default=DEFAULT_ORGANIZATION_ID,
+    )
+    billable_metric_id = Column(
+        UUIDType,
+        ForeignKey("billable_metrics.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)  # inclusive
+    status = Column(String(20), nullable=False, default=BackfillStatus.PENDING.value)
+    total_days = Column(Integer, nullable=False)
+    completed_days = Column(Integer, nullable=False, default=0)
+    failed_days = Column(Integer, nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
+
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def progress(self) -> int:
+        """Percentage of days processed, successfully or not."""
+        total = int(self.total_days or 0)
+        if total == 0:
+            return 100
+        return (int(self.completed_days or 0) + int(self.failed_days or 0)) * 100 // total
+
+
+class DailyUsageBackfillShard(Base):
+    """DailyUsageBackfillShard model - one day of a backfill, run as one job."""
+
+    __tablename__ = "daily_usage_backfill_shards"
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    backfill_id = Column(
+        UUIDType,
+        ForeignKey("daily_usage_backfills.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    usage_date = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False, default=BackfillStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    record_count = Column(Integer, nullable=True)
+    error_message = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "backfill_id",
+            "usage_date",
+            name="uq_daily_usage_backfill_shards_backfill_date",
+        ),
+    )
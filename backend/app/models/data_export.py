@@ -20,6 +20,9 @@ class ExportType(str, Enum):
     FEES = "fees"
     CREDIT_NOTES = "credit_notes"
     AUDIT_LOGS = "audit_logs"
+    BILLING_SIMULATION = "billing_simulation"
+    INVOICE_PDFS = "invoice_pdfs"
+    CREDIT_NOTE_PDFS = "credit_note_pdfs"
 
 
 class ExportStatus(str, Enum):
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Index, String, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, UniqueConstraint, func
 from sqlalchemy.dialects.sqlite import JSON
 
 from app.core.database import Base
@@ -18,7 +18,7 @@ class Event(Base):
         index=True,
         default=DEFAULT_ORGANIZATION_ID,
     )
-    transaction_id = Column(String(255), unique=True, index=True, nullable=False)
+    transaction_id = Column(String(255), nullable=False)
     external_customer_id = Column(String(255), nullable=False)
     code = Column(String(255), nullable=False)  # billable metric code
     timestamp = Column(DateTime(timezone=True), nullable=False)
@@ -26,13 +26,31 @@ class Event(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     __table_args__ = (
-        Index("ix_events_external_customer_id", "external_customer_id"),
-        Index("ix_events_code", "code"),
-        Index("ix_events_timestamp", "timestamp"),
+        # Deduplication is per organization: two tenants may reuse a transaction_id.
+        UniqueConstraint(
+            "organization_id",
+            "transaction_id",
+            name="uq_events_organization_id_transaction_id",
+        ),
+        # Serves usage aggregation (org, customer, code, time range) and the
+        # filtered events list.  Properties are intentionally not INCLUDEd:
+        # payloads are unbounded and would overflow the btree tuple limit.
         Index(
-            "ix_events_customer_code_timestamp",
+            "ix_events_org_customer_code_timestamp",
+            "organization_id",
             "external_customer_id",
             "code",
             "timestamp",
         ),
+        # Serves the hourly volume chart and unfiltered time-range listings.
+        Index("ix_events_org_timestamp", "organization_id", "timestamp"),
+        # Serves the per-customer ingestion watermark (max(created_at)).
+        Index(
+            "ix_events_org_customer_created_at",
+            "organization_id",
+            "external_customer_id",
+            "created_at",
+        ),
+        # Finds events ingested after their day was rolled up (daily usage).
+        Index("ix_events_created_at", "created_at", postgresql_using="brin"),
     )
@@ -1,7 +1,7 @@
 import uuid
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import Column, DateTime, ForeignKey, Numeric, String, UniqueConstraint, func
 from sqlalchemy.dialects.sqlite import JSON
 
 from app.core.database import Base
@@ -25,6 +25,11 @@ class InvoiceType(str, Enum):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        UniqueConstraint(
+            "organization_id", "invoice_number", name="uq_invoices_organization_id_invoice_number"
+        ),
+    )
 
     id = Column(UUIDType, primary_key=True, default=lambda: uuid.uuid4())
     organization_id = Column(
@@ -34,7 +39,7 @@ class Invoice(Base):
         index=True,
         default=DEFAULT_ORGANIZATION_ID,
     )
-    invoice_number = Column(String(50), unique=True, index=True, nullable=False)
+    invoice_number = Column(String(50), index=True, nullable=False)
     customer_id = Column(
         UUIDType, ForeignKey("customers.id", ondelete="RESTRICT"), nullable=False, index=True
     )
@@ -0,0 +1,33 @@
+"""InvoiceNumberSequence model for allocating invoice numbers."""
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint, func
+from sqlalchemy.schema import ForeignKey
+
+from app.core.database import Base
+from app.models.shared import UUIDType, generate_uuid
+
+
+class InvoiceNumberSequence(Base):
+    """InvoiceNumberSequence model - next invoice number per organization and prefix."""
+
+    __tablename__ = "invoice_number_sequences"
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    organization_id = Column(
+        UUIDType,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # Invoice number prefix the counter numbers, e.g. "INV-20261018-"
+    sequence_key = Column(String(50), nullable=False)
+    next_value = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint(
+            "organization_id",
+            "sequence_key",
+            name="uq_invoice_number_sequences_org_key",
+        ),
+    )
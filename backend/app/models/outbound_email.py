@@ -0,0 +1,55 @@
+"""OutboundEmail model for queued invoice and credit note emails."""
+
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func
+from sqlalchemy.schema import ForeignKey
+
+from app.core.database import Base
+from app.models.shared import DEFAULT_ORGANIZATION_ID, UUIDType, generate_uuid
+
+
+class OutboundEmailStatus(str, Enum):
+    """Delivery status of a queued email."""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class OutboundEmailDocumentType(str, Enum):
+    """Documents an outbound email is sent for."""
+
+    INVOICE = "invoice"
+    CREDIT_NOTE = "credit_note"
+
+
+class OutboundEmail(Base):
+    """OutboundEmail model - an email queued for delivery by the worker."""
+
+    __tablename__ = "outbound_emails"
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_outbound_emails_document", "document_type", "document_id"),
+    )
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    organization_id = Column(
+        UUIDType,
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        default=DEFAULT_ORGANIZATION_ID,
+    )
+    document_type = Column(String(20), nullable=False)
+    document_id = Column(UUIDType, nullable=False)
+    status = Column(String(20), nullable=False, default=OutboundEmailStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    # When the email is next due; while sending, when a stalled send is retried
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
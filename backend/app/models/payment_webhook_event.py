@@ -0,0 +1,46 @@
+"""PaymentWebhookEvent model - inbox of payment provider webhook events."""
+
+from enum import Enum
+
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text, UniqueConstraint, func
+
+from app.core.database import Base
+from app.models.shared import UUIDType, generate_uuid
+
+
+class PaymentWebhookEventStatus(str, Enum):
+    """Processing status of a received payment webhook event."""
+
+    PENDING = "pending"
+    PROCESSED = "processed"
+    IGNORED = "ignored"  # No matching payment, or no status change
+    FAILED = "failed"
+
+
+class PaymentWebhookEvent(Base):
+    """PaymentWebhookEvent model - a provider webhook stored for processing."""
+
+    __tablename__ = "payment_webhook_events"
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_payment_webhook_events_provider_event"),
+        Index("ix_payment_webhook_events_status_ordering_key", "status", "ordering_key"),
+    )
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    provider = Column(String(50), nullable=False)
+    # Provider's event ID, or a hash of the payload if the provider sends none
+    event_id = Column(String(255), nullable=False)
+    event_type = Column(String(255), nullable=False)
+    # Events sharing a key (the provider's payment reference) are processed
+    # one at a time, in the order received
+    ordering_key = Column(String(255), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default=PaymentWebhookEventStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,38 @@
+"""WalletBalanceSnapshot model - periodic checkpoints of the wallet ledger."""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Numeric, UniqueConstraint, func
+
+from app.core.database import Base
+from app.models.shared import DEFAULT_ORGANIZATION_ID, UUIDType, generate_uuid
+
+
+class WalletBalanceSnapshot(Base):
+    """WalletBalanceSnapshot model - a wallet's ledger totals as of a point in time.
+
+    Covers the wallet's transactions created before ``as_of``.  Wallet
+    transactions are append-only, so a balance at any later time is the
+    snapshot plus the transactions created since.
+    """
+
+    __tablename__ = "wallet_balance_snapshots"
+    __table_args__ = (
+        UniqueConstraint("wallet_id", "as_of", name="uq_wallet_balance_snapshots_wallet_as_of"),
+    )
+
+    id = Column(UUIDType, primary_key=True, default=generate_uuid)
+    organization_id = Column(
+        UUIDType,
+        ForeignKey("organizations.id", ondelete="RESTRICT"),
+        nullable=False,
+        index=True,
+        default=DEFAULT_ORGANIZATION_ID,
+    )
+    wallet_id = Column(UUIDType, ForeignKey("wallets.id", ondelete="RESTRICT"), nullable=False)
+    as_of = Column(DateTime(timezone=True), nullable=False)
+    balance_cents = Column(Numeric(12, 4), nullable=False, default=0)
+    credits_balance = Column(Numeric(12, 4), nullable=False, default=0)
+    # Running totals of inbound and outbound transaction amounts
+    inbound_amount_cents = Column(Numeric(12, 4), nullable=False, default=0)
+    outbound_amount_cents = Column(Numeric(12, 4), nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,7 +2,7 @@
 
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String, func
 
 from app.core.database import Base
 from app.models.shared import DEFAULT_ORGANIZATION_ID, UUIDType, generate_uuid
@@ -36,6 +36,12 @@ class WalletTransaction(Base):
     """WalletTransaction model for tracking credit movements."""
 
     __tablename__ = "wallet_transactions"
+    # Ledger reads scan transactions by date: a wallet's since its latest
+    # balance snapshot, and all wallets' since the previous snapshot run
+    __table_args__ = (
+        Index("ix_wallet_transactions_wallet_id_created_at", "wallet_id", "created_at"),
+        Index("ix_wallet_transactions_created_at", "created_at"),
+    )
 
     id = Column(UUIDType, primary_key=True, default=generate_uuid)
     organization_id = Column(
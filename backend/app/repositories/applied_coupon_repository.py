@@ -99,12 +99,7 @@ class AppliedCouponRepository:
         if not applied_coupon:
             return None
 
-        if applied_coupon.frequency_duration_remaining is not None:
-            applied_coupon.frequency_duration_remaining -= 1  # type: ignore[assignment]
-            if applied_coupon.frequency_duration_remaining <= 0:
-                applied_coupon.status = AppliedCouponStatus.TERMINATED.value  # type: ignore[assignment]
-                applied_coupon.terminated_at = datetime.now()  # type: ignore[assignment]
-
+        self.mark_decremented(applied_coupon)
         self.db.commit()
         self.db.refresh(applied_coupon)
         return applied_coupon
@@ -115,12 +110,23 @@ class AppliedCouponRepository:
         if not applied_coupon:
             return None
 
-        applied_coupon.status = AppliedCouponStatus.TERMINATED.value  # type: ignore[assignment]
-        applied_coupon.terminated_at = datetime.now()  # type: ignore[assignment]
+        self.mark_terminated(applied_coupon)
         self.db.commit()
         self.db.refresh(applied_coupon)
         return applied_coupon
 
+    def mark_decremented(self, applied_coupon: AppliedCoupon) -> None:
+        """Decrement remaining uses in the session, terminating at 0. Caller commits."""
+        if applied_coupon.frequency_duration_remaining is not None:
+            applied_coupon.frequency_duration_remaining -= 1  # type: ignore[assignment]
+            if applied_coupon.frequency_duration_remaining <= 0:
+                self.mark_terminated(applied_coupon)
+
+    def mark_terminated(self, applied_coupon: AppliedCoupon) -> None:
+        """Terminate an applied coupon in the session. Caller commits."""
+        applied_coupon.status = AppliedCouponStatus.TERMINATED.value  # type: ignore[assignment]
+        applied_coupon.terminated_at = datetime.now()  # type: ignore[assignment]
+
     def get_all_by_coupon_id(self, coupon_id: UUID) -> list[AppliedCoupon]:
         """Get all applied coupons for a specific coupon."""
         return (
@@ -3,10 +3,11 @@
 from decimal import Decimal
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
 from app.models.applied_tax import AppliedTax
+from app.models.tax import Tax
 
 
 class AppliedTaxRepository:
@@ -24,18 +25,36 @@ class AppliedTaxRepository:
         tax_amount_cents: Decimal | int = 0,
     ) -> AppliedTax:
         """Create a new applied tax record."""
-        applied_tax = AppliedTax(
+        applied_tax = self.add(
             tax_id=tax_id,
             taxable_type=taxable_type,
             taxable_id=taxable_id,
             tax_rate=tax_rate,
             tax_amount_cents=tax_amount_cents,
         )
-        self.db.add(applied_tax)
         self.db.commit()
         self.db.refresh(applied_tax)
         return applied_tax
 
+    def add(
+        self,
+        tax_id: UUID,
+        taxable_type: str,
+        taxable_id: UUID,
+        tax_rate: Decimal | None = None,
+        tax_amount_cents: Decimal | int = 0,
+    ) -> AppliedTax:
+        """Add an applied tax record to the session without committing."""
+        applied_tax = AppliedTax(
+            tax_id=tax_id,
+            taxable_type=taxable_type,
+            taxable_id=taxable_id,
+            tax_rate=tax_rate,
+            tax_amount_cents=tax_amount_cents,
+        )
+        self.db.add(applied_tax)
+        return applied_tax
+
     def get_by_id(self, applied_tax_id: UUID) -> AppliedTax | None:
         """Get an applied tax by ID."""
         return self.db.query(AppliedTax).filter(AppliedTax.id == applied_tax_id).first()
@@ -51,6 +70,29 @@ class AppliedTaxRepository:
             .all()
         )
 
+    def get_taxes_by_taxables(
+        self, taxables: dict[str, list[UUID]]
+    ) -> list[tuple[AppliedTax, Tax]]:
+        """Get applied taxes with their Tax for several entities in one query.
+
+        Args:
+            taxables: Mapping of taxable_type to the taxable_ids to load.
+        """
+        conditions = [
+            and_(AppliedTax.taxable_type == taxable_type, AppliedTax.taxable_id.in_(ids))
+            for taxable_type, ids in taxables.items()
+            if ids
+        ]
+        if not conditions:
+            return []
+        rows = (
+            self.db.query(AppliedTax, Tax)
+            .join(Tax, Tax.id == AppliedTax.tax_id)
+            .filter(or_(*conditions))
+            .all()
+        )
+        return [(applied, tax) for applied, tax in rows]
+
     def delete_by_taxable(self, taxable_type: str, taxable_id: UUID) -> int:
         """Delete all applied taxes for a given entity. Returns count deleted."""
         count = (
@@ -29,6 +29,33 @@ class AuditLogRepository:
         actor_id: str | None = None,
         metadata: dict[str, Any] | None = None,
     ) -> AuditLog:
+        audit_log = self.add(
+            organization_id=organization_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            action=action,
+            changes=changes,
+            actor_type=actor_type,
+            actor_id=actor_id,
+            metadata=metadata,
+        )
+        self.db.commit()
+        self.db.refresh(audit_log)
+        return audit_log
+
+    def add(
+        self,
+        *,
+        organization_id: UUID,
+        resource_type: str,
+        resource_id: UUID,
+        action: str,
+        changes: dict[str, Any],
+        actor_type: str,
+        actor_id: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> AuditLog:
+        """Add an audit log entry to the session without committing."""
         audit_log = AuditLog(
             id=generate_uuid(),
             organization_id=organization_id,
@@ -41,8 +68,6 @@ class AuditLogRepository:
             metadata_=metadata,
         )
         self.db.add(audit_log)
-        self.db.commit()
-        self.db.refresh(audit_log)
         return audit_log
 
     def get_by_resource(
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.core.sorting import apply_order_by
 from app.models.billable_metric import BillableMetric
 from app.models.charge import Charge
+from app.models.daily_usage import DailyUsage
 from app.models.plan import Plan
 from app.schemas.billable_metric import BillableMetricCreate, BillableMetricUpdate
 
@@ -80,7 +81,20 @@ class BillableMetricRepository:
         metric = self.get_by_id(metric_id, organization_id)
         if not metric:
             return None
-        for key, value in data.model_dump(exclude_unset=True).items():
+        changes = data.model_dump(exclude_unset=True)
+        if "field_name" in changes and changes["field_name"] != metric.field_name:
+            # Rolled-up daily states aggregate the old field; drop them so
+            # usage is read from events until the days are rolled up again
+            self.db.query(DailyUsage).filter(DailyUsage.billable_metric_id == metric_id).update(
+                {
+                    DailyUsage.sum_value: None,
+                    DailyUsage.max_value: None,
+                    DailyUsage.unique_values: None,
+                    DailyUsage.rollup_watermark: None,
+                },
+                synchronize_session=False,
+            )
+        for key, value in changes.items():
             setattr(metric, key, value)
         self.db.commit()
         self.db.refresh(metric)
@@ -0,0 +1,226 @@
+"""Daily usage backfill repository for data access."""
+
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from app.core.sorting import apply_order_by
+from app.models.daily_usage_backfill import (
+    BackfillStatus,
+    DailyUsageBackfill,
+    DailyUsageBackfillShard,
+)
+from app.schemas.daily_usage_backfill import DailyUsageBackfillCreate
+
+_FINISHED = (BackfillStatus.COMPLETED.value, BackfillStatus.FAILED.value)
+
+
+class DailyUsageBackfillRepository:
+    """Repository for DailyUsageBackfill and DailyUsageBackfillShard models."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_all(
+        self,
+        organization_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: str | None = None,
+    ) -> list[DailyUsageBackfill]:
+        """List all daily usage backfills for an organization."""
+        query = self.db.query(DailyUsageBackfill).filter(
+            DailyUsageBackfill.organization_id == organization_id
+        )
+        query = apply_order_by(query, DailyUsageBackfill, order_by)
+        return query.offset(skip).limit(limit).all()
+
+    def count(self, organization_id: UUID) -> int:
+        """Count daily usage backfills for an organization."""
+        return (
+            self.db.query(func.count(DailyUsageBackfill.id))
+            .filter(DailyUsageBackfill.organization_id == organization_id)
+            .scalar()
+            or 0
+        )
+
+    def get_by_id(
+        self, backfill_id: UUID, organization_id: UUID | None = None
+    ) -> DailyUsageBackfill | None:
+        """Get a daily usage backfill by ID."""
+        query = self.db.query(DailyUsageBackfill).filter(DailyUsageBackfill.id == backfill_id)
+        if organization_id is not None:
+            query = query.filter(DailyUsageBackfill.organization_id == organization_id)
+        return query.first()
+
+    def create(self, data: DailyUsageBackfillCreate, organization_id: UUID) -> DailyUsageBackfill:
+        """Create a backfill with one pending shard per day of its range."""
+        total_days = (data.end_date - data.start_date).days + 1
+        backfill = DailyUsageBackfill(
+            organization_id=organization_id,
+            billable_metric_id=data.billable_metric_id,
+            start_date=data.start_date,
+            end_date=data.end_date,
+            total_days=total_days,
+        )
+        self.db.add(backfill)
+        self.db.flush()
+        self.db.add_all(
+            DailyUsageBackfillShard(
+                backfill_id=backfill.id,
+                usage_date=data.start_date + timedelta(days=i),
+            )
+            for i in range(total_days)
+        )
+        self.db.commit()
+        self.db.refresh(backfill)
+        return backfill
+
+    def get_shard(self, shard_id: UUID) -> DailyUsageBackfillShard | None:
+        """Get a backfill shard by ID."""
+        return (
+            self.db.query(DailyUsageBackfillShard)
+            .filter(DailyUsageBackfillShard.id == shard_id)
+            .first()
+        )
+
+    def get_shards(self, backfill_id: UUID) -> list[DailyUsageBackfillShard]:
+        """Get a backfill's shards, ordered by date."""
+        return (
+            self.db.query(DailyUsageBackfillShard)
+            .filter(DailyUsageBackfillShard.backfill_id == backfill_id)
+            .order_by(DailyUsageBackfillShard.usage_date)
+            .all()
+        )
+
+    def get_unfinished_shards(self, backfill_id: UUID) -> list[DailyUsageBackfillShard]:
+        """Get the shards that are pending or were interrupted, ordered by date."""
+        return (
+            self.db.query(DailyUsageBackfillShard)
+            .filter(
+                DailyUsageBackfillShard.backfill_id == backfill_id,
+                DailyUsageBackfillShard.status.notin_(_FINISHED),
+            )
+            .order_by(DailyUsageBackfillShard.usage_date)
+            .all()
+        )
+
+    def start_shard(self, shard: DailyUsageBackfillShard) -> None:
+        """Mark a shard, and its backfill, as processing."""
+        now = datetime.now(UTC)
+        self.db.execute(
+            update(DailyUsageBackfillShard)
+            .where(DailyUsageBackfillShard.id == shard.id)
+            .values(
+                status=BackfillStatus.PROCESSING.value,
+                attempts=DailyUsageBackfillShard.attempts + 1,
+                started_at=now,
+                error_message=None,
+            )
+        )
+        self.db.execute(
+            update(DailyUsageBackfill)
+            .where(
+                DailyUsageBackfill.id == shard.backfill_id,
+                DailyUsageBackfill.status == BackfillStatus.PENDING.value,
+            )
+            .values(status=BackfillStatus.PROCESSING.value, started_at=now)
+        )
+        self.db.commit()
+
+    def finish_shard(
+        self,
+        shard: DailyUsageBackfillShard,
+        record_count: int | None = None,
+        error_message: str | None = None,
+    ) -> bool:
+        """Record a shard's outcome and roll it into its backfill's counters.
+
+        The shard is completed, or failed when ``error_message`` is given.
+        Counters use conditional updates, so a shard finished twice (e.g. by a
+        duplicate job) is only counted once, whatever the number of workers.
+        The backfill is finalized when its last shard finishes.
+
+        Returns:
+            False if the shard had already finished.
+        """
+        failed = error_message is not None
+        now = datetime.now(UTC)
+        result = self.db.execute(
+            update(DailyUsageBackfillShard)
+            .where(
+                DailyUsageBackfillShard.id == shard.id,
+                DailyUsageBackfillShard.status.notin_(_FINISHED),
+            )
+            .values(
+                status=(BackfillStatus.FAILED if failed else BackfillStatus.COMPLETED).value,
+                record_count=record_count,
+                error_message=error_message,
+                completed_at=now,
+            )
+        )
+        if result.rowcount != 1:
+            self.db.rollback()
+            return False
+
+        counters = (
+            {"failed_days": DailyUsageBackfill.failed_days + 1}
+            if failed
+            else {
+                "completed_days": DailyUsageBackfill.completed_days + 1,
+                "record_count": DailyUsageBackfill.record_count + (record_count or 0),
+            }
+        )
+        self.db.execute(
+            update(DailyUsageBackfill)
+            .where(DailyUsageBackfill.id == shard.backfill_id)
+            .values(**counters)
+        )
+        self.db.execute(
+            update(DailyUsageBackfill)
+            .where(
+                DailyUsageBackfill.id == shard.backfill_id,
+                DailyUsageBackfill.completed_days + DailyUsageBackfill.failed_days
+                >= DailyUsageBackfill.total_days,
+            )
+            .values(
+                status=case(
+                    (DailyUsageBackfill.failed_days > 0, BackfillStatus.FAILED.value),
+                    else_=BackfillStatus.COMPLETED.value,
+                ),
+                completed_at=now,
+            )
+        )
+        self.db.commit()
+        return True
+
+    def reset_failed_shards(self, backfill: DailyUsageBackfill) -> int:
+        """Return a backfill's failed shards to pending so they can be retried.
+
+        Returns:
+            Number of shards reset.
+        """
+        result = self.db.execute(
+            update(DailyUsageBackfillShard)
+            .where(
+                DailyUsageBackfillShard.backfill_id == backfill.id,
+                DailyUsageBackfillShard.status == BackfillStatus.FAILED.value,
+            )
+            .values(status=BackfillStatus.PENDING.value, completed_at=None)
+        )
+        reset: int = result.rowcount
+        if reset:
+            self.db.execute(
+                update(DailyUsageBackfill)
+                .where(DailyUsageBackfill.id == backfill.id)
+                .values(
+                    failed_days=DailyUsageBackfill.failed_days - reset,
+                    status=BackfillStatus.PROCESSING.value,
+                    completed_at=None,
+                )
+            )
+        self.db.commit()
+        self.db.refresh(backfill)
+        return reset
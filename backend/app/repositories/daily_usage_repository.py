@@ -1,13 +1,19 @@
 """Daily usage repository for data access."""
 
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 from uuid import UUID
 
+from sqlalchemy import and_, or_
 from sqlalchemy import func as sa_func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.models.billable_metric import BillableMetric
 from app.models.daily_usage import DailyUsage
+from app.models.event import Event
+from app.models.shared import generate_uuid
 from app.schemas.daily_usage import DailyUsageCreate
 
 
@@ -69,6 +75,72 @@ class DailyUsageRepository:
         records = self.get_for_period(subscription_id, billable_metric_id, start_date, end_date)
         return sum((Decimal(str(r.usage_value)) for r in records), Decimal("0"))
 
+    def get_rollups(
+        self,
+        billable_metric_id: UUID,
+        external_customer_id: str,
+        start_date: date,
+        end_date: date,
+    ) -> list[DailyUsage]:
+        """Get rolled-up days for a metric and customer, across subscriptions.
+
+        Only rows carrying rollup state are returned, for dates in
+        [start_date, end_date), ordered by date then watermark.
+        """
+        return (
+            self.db.query(DailyUsage)
+            .filter(
+                DailyUsage.billable_metric_id == billable_metric_id,
+                DailyUsage.external_customer_id == external_customer_id,
+                DailyUsage.usage_date >= start_date,
+                DailyUsage.usage_date < end_date,
+                DailyUsage.rollup_watermark.isnot(None),
+            )
+            .order_by(DailyUsage.usage_date, DailyUsage.rollup_watermark)
+            .all()
+        )
+
+    def get_late_rollups(
+        self, since: datetime, before_date: date
+    ) -> list[tuple[DailyUsage, BillableMetric]]:
+        """Get rolled-up days that received events after their rollup.
+
+        Events ingested at or after ``since`` are matched to the records of
+        their metric, customer and UTC day in one grouped query; a record is
+        returned once if any of them was created after its rollup watermark.
+        Only days before ``before_date`` are considered.
+        """
+        dialect = self.db.bind.dialect.name if self.db.bind else "sqlite"
+        if dialect == "postgresql":
+            event_day = sa_func.date(sa_func.timezone("UTC", Event.timestamp))
+        else:
+            event_day = sa_func.date(Event.timestamp)
+
+        rows = (
+            self.db.query(DailyUsage, BillableMetric)
+            .join(BillableMetric, BillableMetric.id == DailyUsage.billable_metric_id)
+            .join(
+                Event,
+                and_(
+                    Event.organization_id == BillableMetric.organization_id,
+                    Event.code == BillableMetric.code,
+                    Event.external_customer_id == DailyUsage.external_customer_id,
+                    event_day == DailyUsage.usage_date,
+                ),
+            )
+            .filter(
+                Event.created_at >= since,
+                DailyUsage.usage_date < before_date,
+                or_(
+                    DailyUsage.rollup_watermark.is_(None),
+                    Event.created_at > DailyUsage.rollup_watermark,
+                ),
+            )
+            .group_by(DailyUsage.id, BillableMetric.id)
+            .all()
+        )
+        return [(daily_usage, metric) for daily_usage, metric in rows]
+
     def upsert(self, data: DailyUsageCreate) -> DailyUsage:
         """Create or update a daily usage record.
 
@@ -84,6 +156,10 @@ class DailyUsageRepository:
             existing.usage_value = data.usage_value  # type: ignore[assignment]
             existing.events_count = data.events_count  # type: ignore[assignment]
             existing.external_customer_id = data.external_customer_id  # type: ignore[assignment]
+            existing.sum_value = data.sum_value  # type: ignore[assignment]
+            existing.max_value = data.max_value  # type: ignore[assignment]
+            existing.unique_values = data.unique_values  # type: ignore[assignment]
+            existing.rollup_watermark = data.rollup_watermark  # type: ignore[assignment]
             self.db.commit()
             self.db.refresh(existing)
             return existing
@@ -95,12 +171,49 @@ class DailyUsageRepository:
             usage_date=data.usage_date,
             usage_value=data.usage_value,
             events_count=data.events_count,
+            sum_value=data.sum_value,
+            max_value=data.max_value,
+            unique_values=data.unique_values,
+            rollup_watermark=data.rollup_watermark,
         )
         self.db.add(record)
         self.db.commit()
         self.db.refresh(record)
         return record
 
+    def bulk_upsert(self, records: list[DailyUsageCreate]) -> int:
+        """Create or update many daily usage records in one statement.
+
+        Rows conflicting on subscription/metric/date are updated in place
+        with ``INSERT ... ON CONFLICT DO UPDATE``.  The caller commits.
+
+        Returns:
+            Number of records written.
+        """
+        if not records:
+            return 0
+
+        dialect = self.db.bind.dialect.name if self.db.bind else "sqlite"
+        insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(DailyUsage).values(
+            [{"id": generate_uuid(), **record.model_dump()} for record in records]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["subscription_id", "billable_metric_id", "usage_date"],
+            set_={
+                "external_customer_id": stmt.excluded.external_customer_id,
+                "usage_value": stmt.excluded.usage_value,
+                "events_count": stmt.excluded.events_count,
+                "sum_value": stmt.excluded.sum_value,
+                "max_value": stmt.excluded.max_value,
+                "unique_values": stmt.excluded.unique_values,
+                "rollup_watermark": stmt.excluded.rollup_watermark,
+                "updated_at": sa_func.now(),
+            },
+        )
+        self.db.execute(stmt)
+        return len(records)
+
     def get_trend_for_subscription(
         self,
         subscription_id: UUID,
@@ -4,7 +4,8 @@ import logging
 from datetime import datetime, timedelta
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.sorting import apply_order_by
@@ -65,6 +66,22 @@ class EventRepository:
             query = query.filter(Event.organization_id == organization_id)
         return query.first()
 
+    def get_existing_by_transaction_ids(
+        self, transaction_ids: list[str], organization_id: UUID
+    ) -> dict[str, Event]:
+        """Return existing events for the given transaction_ids keyed by transaction_id."""
+        if not transaction_ids:
+            return {}
+        rows = (
+            self.db.query(Event)
+            .filter(
+                Event.organization_id == organization_id,
+                Event.transaction_id.in_(set(transaction_ids)),
+            )
+            .all()
+        )
+        return {str(e.transaction_id): e for e in rows}
+
     def transaction_id_exists(self, transaction_id: str, organization_id: UUID) -> bool:
         """Check if an event with the given transaction_id already exists."""
         query = self.db.query(Event).filter(
@@ -113,12 +130,19 @@ class EventRepository:
         """
         events: list[Event] = []
         new_events: list[Event] = []
+        new_event_data: list[EventCreate] = []
         ingested = 0
         duplicates = 0
 
+        # Resolve existing events in one query against the
+        # (organization_id, transaction_id) unique key
+        existing_by_txn = self.get_existing_by_transaction_ids(
+            [d.transaction_id for d in events_data], organization_id
+        )
+
         # First pass: check for existing events and create new ones (without commit)
         for data in events_data:
-            existing = self.get_by_transaction_id(data.transaction_id, organization_id)
+            existing = existing_by_txn.get(data.transaction_id)
             if existing:
                 events.append(existing)
                 duplicates += 1
@@ -132,7 +156,9 @@ class EventRepository:
                     organization_id=organization_id,
                 )
                 self.db.add(event)
+                existing_by_txn[data.transaction_id] = event
                 new_events.append(event)
+                new_event_data.append(data)
                 events.append(event)
                 ingested += 1
 
@@ -143,16 +169,81 @@ class EventRepository:
                 self.db.refresh(event)
 
         # Dual-write new events to ClickHouse
-        new_event_data = [
-            d
-            for d in events_data
-            if d.transaction_id not in {e.transaction_id for e in events if e not in new_events}
-        ][:ingested]
         if new_event_data:
             self._clickhouse_insert_batch(new_event_data, organization_id)
 
         return events, ingested, duplicates
 
+    def ingest_batch(
+        self, events_data: list[EventCreate], organization_id: UUID
+    ) -> tuple[int, int]:
+        """Insert new events in one statement without loading them back.
+
+        Used by bulk ingestion paths that only report counts.  Events whose
+        transaction_id already exists for the organization (or repeats earlier
+        in the same batch) are skipped.  If a concurrent request inserts one of
+        the events first, the batch falls back to inserting events one by one,
+        counting those that conflict as duplicates.
+
+        Returns:
+            Tuple of (ingested_count, duplicate_count)
+        """
+        if not events_data:
+            return 0, 0
+
+        seen = {
+            str(tid)
+            for (tid,) in self.db.query(Event.transaction_id).filter(
+                Event.organization_id == organization_id,
+                Event.transaction_id.in_({d.transaction_id for d in events_data}),
+            )
+        }
+        new_event_data: list[EventCreate] = []
+        for data in events_data:
+            if data.transaction_id in seen:
+                continue
+            seen.add(data.transaction_id)
+            new_event_data.append(data)
+
+        if new_event_data:
+            try:
+                self._insert_rows(new_event_data, organization_id)
+            except IntegrityError:
+                self.db.rollback()
+                new_event_data = [
+                    d for d in new_event_data if self._insert_if_absent(d, organization_id)
+                ]
+            if new_event_data:
+                self._clickhouse_insert_batch(new_event_data, organization_id)
+
+        return len(new_event_data), len(events_data) - len(new_event_data)
+
+    def _insert_rows(self, events_data: list[EventCreate], organization_id: UUID) -> None:
+        self.db.execute(
+            insert(Event),
+            [
+                {
+                    "transaction_id": d.transaction_id,
+                    "external_customer_id": d.external_customer_id,
+                    "code": d.code,
+                    "timestamp": d.timestamp,
+                    "properties": d.properties,
+                    "organization_id": organization_id,
+                }
+                for d in events_data
+            ],
+        )
+        self.db.commit()
+
+    def _insert_if_absent(self, data: EventCreate, organization_id: UUID) -> bool:
+        """Insert one event, returning False if its transaction_id already exists."""
+        try:
+            self._insert_rows([data], organization_id)
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+
     def hourly_volume(
         self,
         organization_id: UUID,
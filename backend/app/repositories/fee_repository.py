@@ -127,6 +127,21 @@ class FeeRepository:
         organization_id: UUID | None = None,
     ) -> list[Fee]:
         """Create multiple fees at once."""
+        fees = self.add_bulk(fees_data, organization_id)
+        self.db.commit()
+        for fee in fees:
+            self.db.refresh(fee)
+        return fees
+
+    def add_bulk(
+        self,
+        fees_data: list[FeeCreate],
+        organization_id: UUID | None = None,
+    ) -> list[Fee]:
+        """Add multiple fees to the session without committing.
+
+        The fees are inserted on the next flush, batched into one statement.
+        """
         fees = []
         for data in fees_data:
             fee = Fee(
@@ -148,12 +163,9 @@ class FeeRepository:
                 properties=data.properties,
                 organization_id=organization_id,
             )
-            self.db.add(fee)
             fees.append(fee)
 
-        self.db.commit()
-        for fee in fees:
-            self.db.refresh(fee)
+        self.db.add_all(fees)
         return fees
 
     def update(self, fee_id: UUID, data: FeeUpdate) -> Fee | None:
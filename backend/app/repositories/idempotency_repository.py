@@ -60,6 +60,31 @@ class IdempotencyRepository:
         self.db.refresh(record)
         return record
 
+    def update_response_by_key(
+        self,
+        organization_id: UUID,
+        idempotency_key: str,
+        response_status: int,
+        response_body: dict[str, Any],
+    ) -> int:
+        """Store the response for a key with a single UPDATE statement."""
+        count = (
+            self.db.query(IdempotencyRecord)
+            .filter(
+                IdempotencyRecord.organization_id == organization_id,
+                IdempotencyRecord.idempotency_key == idempotency_key,
+            )
+            .update(
+                {
+                    IdempotencyRecord.response_status: response_status,
+                    IdempotencyRecord.response_body: response_body,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return int(count)
+
     def delete_expired(self, max_age_hours: int = 24) -> int:
         cutoff = datetime.now(UTC) - timedelta(hours=max_age_hours)
         count = (
@@ -9,8 +9,8 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.sorting import apply_order_by
-from app.models.billing_entity import BillingEntity
 from app.models.invoice import Invoice, InvoiceStatus, InvoiceType
+from app.models.shared import DEFAULT_ORGANIZATION_ID
 from app.schemas.invoice import InvoiceCreate, InvoiceUpdate
 
 
@@ -18,31 +18,6 @@ class InvoiceRepository:
     def __init__(self, db: Session):
         self.db = db
 
-    def _generate_invoice_number(self) -> str:
-        """Generate a unique invoice number."""
-        today = datetime.now().strftime("%Y%m%d")
-        prefix = f"INV-{today}-"
-
-        # Get the highest invoice number for today
-        result = (
-            self.db.query(Invoice.invoice_number)
-            .filter(Invoice.invoice_number.like(f"{prefix}%"))
-            .order_by(Invoice.invoice_number.desc())
-            .first()
-        )
-
-        if result:
-            # Extract number from INV-YYYYMMDD-XXXX format
-            try:
-                last_num = int(result[0].split("-")[-1])
-                new_num = last_num + 1
-            except (ValueError, IndexError):
-                new_num = 1
-        else:
-            new_num = 1
-
-        return f"{prefix}{new_num:04d}"
-
     def get_all(
         self,
         organization_id: UUID | None = None,
@@ -79,25 +54,29 @@ class InvoiceRepository:
             query = query.filter(Invoice.organization_id == organization_id)
         return query.first()
 
-    def get_by_invoice_number(self, invoice_number: str) -> Invoice | None:
-        return self.db.query(Invoice).filter(Invoice.invoice_number == invoice_number).first()
-
-    def _generate_entity_invoice_number(self, billing_entity_id: UUID) -> str:
-        """Generate an invoice number using the billing entity's prefix and counter."""
-        entity = self.db.query(BillingEntity).filter(BillingEntity.id == billing_entity_id).first()
-        if not entity:
-            return self._generate_invoice_number()
-
-        current_number = int(entity.next_invoice_number)
-        prefix = str(entity.invoice_prefix) if entity.invoice_prefix else "INV"
-        invoice_number = f"{prefix}-{current_number:04d}"
+    def get_by_invoice_number(self, invoice_number: str, organization_id: UUID) -> Invoice | None:
+        """Get an invoice by number; numbers are only unique within an organization."""
+        return (
+            self.db.query(Invoice)
+            .filter(
+                Invoice.organization_id == organization_id,
+                Invoice.invoice_number == invoice_number,
+            )
+            .first()
+        )
 
-        entity.next_invoice_number = current_number + 1  # type: ignore[assignment]
-        self.db.flush()
+    def create(self, data: InvoiceCreate, organization_id: UUID | None = None) -> Invoice:
+        invoice = self.add(data, organization_id)
+        self.db.commit()
+        self.db.refresh(invoice)
+        return invoice
 
-        return invoice_number
+    def add(self, data: InvoiceCreate, organization_id: UUID | None = None) -> Invoice:
+        """Add an invoice to the session without committing.
 
-    def create(self, data: InvoiceCreate, organization_id: UUID | None = None) -> Invoice:
+        Totals start from the line item subtotal; callers adjusting taxes,
+        discounts or credits set them before committing.
+        """
         # Calculate totals from line items
         subtotal = Decimal(0)
         for item in data.line_items:
@@ -107,10 +86,12 @@ class InvoiceRepository:
         line_items_json = [item.model_dump(mode="json") for item in data.line_items]
 
         # Use entity-scoped numbering if billing_entity_id is provided
-        if data.billing_entity_id:
-            invoice_number = self._generate_entity_invoice_number(data.billing_entity_id)
-        else:
-            invoice_number = self._generate_invoice_number()
+        from app.services.invoice_numbering import InvoiceNumberAllocator
+
+        invoice_number = InvoiceNumberAllocator(self.db).next_invoice_number(
+            organization_id if organization_id is not None else DEFAULT_ORGANIZATION_ID,
+            data.billing_entity_id,
+        )
 
         kwargs: dict[str, Any] = {
             "invoice_number": invoice_number,
@@ -134,8 +115,6 @@ class InvoiceRepository:
 
         invoice = Invoice(**kwargs)
         self.db.add(invoice)
-        self.db.commit()
-        self.db.refresh(invoice)
         return invoice
 
     def update(
@@ -177,14 +156,18 @@ class InvoiceRepository:
         invoice = self.get_by_id(invoice_id)
         if not invoice:
             return None
+        self.set_paid(invoice)
+        self.db.commit()
+        self.db.refresh(invoice)
+        return invoice
+
+    def set_paid(self, invoice: Invoice) -> None:
+        """Mark a finalized invoice as paid in the session. Caller commits."""
         if invoice.status not in [InvoiceStatus.FINALIZED.value]:
             raise ValueError("Only finalized invoices can be marked as paid")
 
         invoice.status = InvoiceStatus.PAID.value  # type: ignore[assignment]
         invoice.paid_at = datetime.now()  # type: ignore[assignment]
-        self.db.commit()
-        self.db.refresh(invoice)
-        return invoice
 
     def void(self, invoice_id: UUID) -> Invoice | None:
         """Void an invoice."""
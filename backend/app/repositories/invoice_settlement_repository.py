@@ -6,7 +6,7 @@ from uuid import UUID
 from sqlalchemy import func as sa_func
 from sqlalchemy.orm import Session
 
-from app.models.invoice_settlement import InvoiceSettlement
+from app.models.invoice_settlement import InvoiceSettlement, SettlementType
 from app.schemas.invoice_settlement import InvoiceSettlementCreate
 
 
@@ -18,17 +18,25 @@ class InvoiceSettlementRepository:
 
     def create(self, data: InvoiceSettlementCreate) -> InvoiceSettlement:
         """Create a new invoice settlement."""
-        settlement = InvoiceSettlement(
-            invoice_id=data.invoice_id,
-            settlement_type=data.settlement_type.value,
-            source_id=data.source_id,
-            amount_cents=data.amount_cents,
-        )
-        self.db.add(settlement)
+        settlement = self.add_bulk([data])[0]
         self.db.commit()
         self.db.refresh(settlement)
         return settlement
 
+    def add_bulk(self, settlements_data: list[InvoiceSettlementCreate]) -> list[InvoiceSettlement]:
+        """Add multiple invoice settlements to the session without committing."""
+        settlements = [
+            InvoiceSettlement(
+                invoice_id=data.invoice_id,
+                settlement_type=data.settlement_type.value,
+                source_id=data.source_id,
+                amount_cents=data.amount_cents,
+            )
+            for data in settlements_data
+        ]
+        self.db.add_all(settlements)
+        return settlements
+
     def get_by_invoice_id(self, invoice_id: UUID) -> list[InvoiceSettlement]:
         """Get all settlements for an invoice."""
         return (
@@ -38,6 +46,21 @@ class InvoiceSettlementRepository:
             .all()
         )
 
+    def exists_for_source(
+        self, invoice_id: UUID, settlement_type: SettlementType, source_id: UUID
+    ) -> bool:
+        """Whether the invoice has a settlement from this source."""
+        return (
+            self.db.query(InvoiceSettlement.id)
+            .filter(
+                InvoiceSettlement.invoice_id == invoice_id,
+                InvoiceSettlement.settlement_type == settlement_type.value,
+                InvoiceSettlement.source_id == source_id,
+            )
+            .first()
+            is not None
+        )
+
     def get_total_settled(self, invoice_id: UUID) -> Decimal:
         """Get the total amount settled for an invoice."""
         result = (
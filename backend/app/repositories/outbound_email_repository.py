@@ -0,0 +1,131 @@
+"""Outbound email repository for data access."""
+
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.outbound_email import OutboundEmail, OutboundEmailStatus
+
+_UNSENT = (OutboundEmailStatus.PENDING.value, OutboundEmailStatus.SENDING.value)
+
+
+class OutboundEmailRepository:
+    """Repository for OutboundEmail model."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_by_id(self, email_id: UUID) -> OutboundEmail | None:
+        """Get an outbound email by ID."""
+        return self.db.query(OutboundEmail).filter(OutboundEmail.id == email_id).first()
+
+    def create_many(
+        self, organization_id: UUID, document_type: str, document_ids: list[UUID]
+    ) -> list[OutboundEmail]:
+        """Queue one pending email per document."""
+        emails = [
+            OutboundEmail(
+                organization_id=organization_id,
+                document_type=document_type,
+                document_id=document_id,
+                next_attempt_at=datetime.now(UTC),
+            )
+            for document_id in document_ids
+        ]
+        self.db.add_all(emails)
+        self.db.commit()
+        return emails
+
+    def get_unsent_document_ids(self, document_type: str, document_ids: list[UUID]) -> set[UUID]:
+        """Documents among ``document_ids`` with an email still pending or sending."""
+        if not document_ids:
+            return set()
+        rows = (
+            self.db.query(OutboundEmail.document_id)
+            .filter(
+                OutboundEmail.document_type == document_type,
+                OutboundEmail.document_id.in_(document_ids),
+                OutboundEmail.status.in_(_UNSENT),
+            )
+            .all()
+        )
+        return {UUID(str(row.document_id)) for row in rows}
+
+    def claim_due(self, limit: int, lease: timedelta, max_attempts: int) -> list[OutboundEmail]:
+        """Claim up to ``limit`` due emails for sending.
+
+        Claimed emails are marked as sending, their attempt counted, and are
+        due again once ``lease`` expires, so emails of a worker that died
+        mid-send are picked up again.  Due emails that already used
+        ``max_attempts`` attempts were lost that many times, e.g. by a worker
+        crashing while building them, and are marked failed instead.  On
+        PostgreSQL, rows locked by a concurrent claim are skipped, so workers
+        claim disjoint batches.
+        """
+        now = datetime.now(UTC)
+        rows = self.db.execute(
+            select(OutboundEmail.id, OutboundEmail.attempts)
+            .where(
+                OutboundEmail.status.in_(_UNSENT),
+                OutboundEmail.next_attempt_at <= now,
+            )
+            .order_by(OutboundEmail.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            self.db.rollback()
+            return []
+        exhausted = [row.id for row in rows if row.attempts >= max_attempts]
+        ids = [row.id for row in rows if row.attempts < max_attempts]
+        if exhausted:
+            self.db.execute(
+                update(OutboundEmail)
+                .where(OutboundEmail.id.in_(exhausted))
+                .values(
+                    status=OutboundEmailStatus.FAILED.value,
+                    last_error=f"Not sent within the send lease after {max_attempts} attempts",
+                )
+            )
+        if ids:
+            self.db.execute(
+                update(OutboundEmail)
+                .where(OutboundEmail.id.in_(ids))
+                .values(
+                    status=OutboundEmailStatus.SENDING.value,
+                    attempts=OutboundEmail.attempts + 1,
+                    next_attempt_at=now + lease,
+                )
+            )
+        self.db.commit()
+        if not ids:
+            return []
+        return self.db.query(OutboundEmail).filter(OutboundEmail.id.in_(ids)).all()
+
+    def mark_sent(self, email_ids: list[UUID]) -> None:
+        """Mark emails as sent."""
+        if not email_ids:
+            return
+        self.db.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.id.in_(email_ids))
+            .values(
+                status=OutboundEmailStatus.SENT.value,
+                sent_at=datetime.now(UTC),
+                last_error=None,
+            )
+        )
+        self.db.commit()
+
+    def mark_failed(self, email_id: UUID, error: str, retry_at: datetime | None = None) -> None:
+        """Record a failed attempt, to be retried at ``retry_at`` or given up."""
+        values: dict[str, object] = {"last_error": error}
+        if retry_at is None:
+            values["status"] = OutboundEmailStatus.FAILED.value
+        else:
+            values["status"] = OutboundEmailStatus.PENDING.value
+            values["next_attempt_at"] = retry_at
+        self.db.execute(update(OutboundEmail).where(OutboundEmail.id == email_id).values(**values))
+        self.db.commit()
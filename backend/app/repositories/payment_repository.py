@@ -169,36 +169,34 @@ class PaymentRepository:
 
     def mark_succeeded(self, payment_id: UUID) -> Payment | None:
         """Mark a payment as succeeded."""
-        payment = self.get_by_id(payment_id)
-        if not payment:
-            return None
-
-        payment.status = PaymentStatus.SUCCEEDED.value  # type: ignore[assignment]
-        payment.completed_at = datetime.now(UTC)  # type: ignore[assignment]
-        self.db.commit()
-        self.db.refresh(payment)
-        return payment
+        return self._commit_status(payment_id, PaymentStatus.SUCCEEDED)
 
     def mark_failed(self, payment_id: UUID, reason: str | None = None) -> Payment | None:
         """Mark a payment as failed."""
-        payment = self.get_by_id(payment_id)
-        if not payment:
-            return None
-
-        payment.status = PaymentStatus.FAILED.value  # type: ignore[assignment]
-        if reason:
-            payment.failure_reason = reason  # type: ignore[assignment]
-        self.db.commit()
-        self.db.refresh(payment)
-        return payment
+        return self._commit_status(payment_id, PaymentStatus.FAILED, reason)
 
     def mark_canceled(self, payment_id: UUID) -> Payment | None:
         """Mark a payment as canceled."""
+        return self._commit_status(payment_id, PaymentStatus.CANCELED)
+
+    def set_status(
+        self, payment: Payment, status: PaymentStatus, failure_reason: str | None = None
+    ) -> None:
+        """Set a payment's status in the session. Caller commits."""
+        payment.status = status.value  # type: ignore[assignment]
+        if status == PaymentStatus.SUCCEEDED:
+            payment.completed_at = datetime.now(UTC)  # type: ignore[assignment]
+        if status == PaymentStatus.FAILED and failure_reason:
+            payment.failure_reason = failure_reason  # type: ignore[assignment]
+
+    def _commit_status(
+        self, payment_id: UUID, status: PaymentStatus, failure_reason: str | None = None
+    ) -> Payment | None:
         payment = self.get_by_id(payment_id)
         if not payment:
             return None
 
-        payment.status = PaymentStatus.CANCELED.value  # type: ignore[assignment]
+        self.set_status(payment, status, failure_reason)
         self.db.commit()
         self.db.refresh(payment)
         return payment
@@ -0,0 +1,147 @@
+"""Payment webhook event repository for data access."""
+
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.payment_webhook_event import PaymentWebhookEvent, PaymentWebhookEventStatus
+from app.models.shared import generate_uuid
+
+_PENDING = PaymentWebhookEventStatus.PENDING.value
+
+
+class PaymentWebhookEventRepository:
+    """Repository for PaymentWebhookEvent model."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_if_absent(
+        self,
+        provider: str,
+        event_id: str,
+        event_type: str,
+        ordering_key: str,
+        payload: dict[str, Any],
+    ) -> bool:
+        """Store a received event unless the provider already delivered it.
+
+        Returns:
+            True if the event is new.
+        """
+        now = datetime.now(UTC)
+        dialect = self.db.bind.dialect.name if self.db.bind else "sqlite"
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        row = self.db.execute(
+            insert(PaymentWebhookEvent)
+            .values(
+                id=generate_uuid(),
+                provider=provider,
+                event_id=event_id,
+                event_type=event_type,
+                ordering_key=ordering_key,
+                payload=payload,
+                status=_PENDING,
+                attempts=0,
+                received_at=now,
+                next_attempt_at=now,
+            )
+            .on_conflict_do_nothing(index_elements=["provider", "event_id"])
+            .returning(PaymentWebhookEvent.id)
+        ).first()
+        self.db.commit()
+        return row is not None
+
+    def get_pending_ordering_keys(self, limit: int) -> list[str]:
+        """Ordering keys whose earliest pending event is due, waiting longest first.
+
+        Events of a key are applied in the order received, so a key whose
+        earliest event waits for a retry has nothing to process yet, however
+        many of its later events are due.
+        """
+        heads = (
+            self.db.query(
+                PaymentWebhookEvent.ordering_key,
+                func.min(PaymentWebhookEvent.received_at).label("received_at"),
+            )
+            .filter(PaymentWebhookEvent.status == _PENDING)
+            .group_by(PaymentWebhookEvent.ordering_key)
+            .subquery()
+        )
+        rows = (
+            self.db.query(heads.c.ordering_key)
+            .join(
+                PaymentWebhookEvent,
+                and_(
+                    PaymentWebhookEvent.ordering_key == heads.c.ordering_key,
+                    PaymentWebhookEvent.received_at == heads.c.received_at,
+                ),
+            )
+            .filter(
+                PaymentWebhookEvent.status == _PENDING,
+                PaymentWebhookEvent.next_attempt_at <= datetime.now(UTC),
+            )
+            .group_by(heads.c.ordering_key, heads.c.received_at)
+            .order_by(heads.c.received_at)
+            .limit(limit)
+            .all()
+        )
+        return [str(row.ordering_key) for row in rows]
+
+    def get_pending_by_ordering_key(self, ordering_key: str) -> list[PaymentWebhookEvent]:
+        """Pending events of an ordering key, in the order received."""
+        return (
+            self.db.query(PaymentWebhookEvent)
+            .filter(
+                PaymentWebhookEvent.ordering_key == ordering_key,
+                PaymentWebhookEvent.status == _PENDING,
+            )
+            .order_by(PaymentWebhookEvent.received_at, PaymentWebhookEvent.id)
+            .all()
+        )
+
+    def mark_done(self, event_id: UUID, status: PaymentWebhookEventStatus) -> None:
+        """Record an event as processed, ignored or failed for good."""
+        self.db.execute(
+            update(PaymentWebhookEvent)
+            .where(PaymentWebhookEvent.id == event_id)
+            .values(
+                status=status.value,
+                attempts=PaymentWebhookEvent.attempts + 1,
+                processed_at=datetime.now(UTC),
+            )
+        )
+        self.db.commit()
+
+    def mark_attempt_failed(self, event_id: UUID, error: str, retry_at: datetime | None) -> None:
+        """Record a failed processing attempt, to be retried at ``retry_at`` or given up."""
+        values: dict[str, object] = {
+            "attempts": PaymentWebhookEvent.attempts + 1,
+            "last_error": error,
+        }
+        if retry_at is None:
+            values["status"] = PaymentWebhookEventStatus.FAILED.value
+            values["processed_at"] = datetime.now(UTC)
+        else:
+            values["next_attempt_at"] = retry_at
+        self.db.execute(
+            update(PaymentWebhookEvent).where(PaymentWebhookEvent.id == event_id).values(**values)
+        )
+        self.db.commit()
+
+    def delete_finished_before(self, cutoff: datetime) -> int:
+        """Delete events finished before ``cutoff``, ending their deduplication."""
+        count = (
+            self.db.query(PaymentWebhookEvent)
+            .filter(
+                PaymentWebhookEvent.status != _PENDING,
+                PaymentWebhookEvent.processed_at < cutoff,
+            )
+            .delete()
+        )
+        self.db.commit()
+        return int(count)
@@ -0,0 +1,106 @@
+"""Wallet balance snapshot repository for data access."""
+
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.shared import generate_uuid
+from app.models.wallet_balance_snapshot import WalletBalanceSnapshot
+
+# Rows per INSERT statement when writing snapshots
+_INSERT_BATCH_SIZE = 1000
+
+
+class WalletBalanceSnapshotRepository:
+    """Repository for WalletBalanceSnapshot model."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_latest(self, wallet_id: UUID, as_of: datetime) -> WalletBalanceSnapshot | None:
+        """Get a wallet's latest snapshot taken as of ``as_of`` or earlier."""
+        return (
+            self.db.query(WalletBalanceSnapshot)
+            .filter(
+                WalletBalanceSnapshot.wallet_id == wallet_id,
+                WalletBalanceSnapshot.as_of <= as_of,
+            )
+            .order_by(WalletBalanceSnapshot.as_of.desc())
+            .first()
+        )
+
+    def get_latest_by_wallet_ids(
+        self, wallet_ids: list[UUID], before: datetime
+    ) -> dict[UUID, WalletBalanceSnapshot]:
+        """Get the latest snapshot taken before ``before`` of each wallet that has one."""
+        if not wallet_ids:
+            return {}
+        latest = (
+            self.db.query(
+                WalletBalanceSnapshot.wallet_id,
+                func.max(WalletBalanceSnapshot.as_of).label("as_of"),
+            )
+            .filter(
+                WalletBalanceSnapshot.wallet_id.in_(wallet_ids),
+                WalletBalanceSnapshot.as_of < before,
+            )
+            .group_by(WalletBalanceSnapshot.wallet_id)
+            .subquery()
+        )
+        snapshots = (
+            self.db.query(WalletBalanceSnapshot)
+            .join(
+                latest,
+                (WalletBalanceSnapshot.wallet_id == latest.c.wallet_id)
+                & (WalletBalanceSnapshot.as_of == latest.c.as_of),
+            )
+            .all()
+        )
+        return {UUID(str(snapshot.wallet_id)): snapshot for snapshot in snapshots}
+
+    def get_in_range(
+        self, wallet_id: UUID, start: datetime, end: datetime
+    ) -> list[WalletBalanceSnapshot]:
+        """Get a wallet's snapshots taken after ``start`` and before ``end``, oldest first."""
+        return (
+            self.db.query(WalletBalanceSnapshot)
+            .filter(
+                WalletBalanceSnapshot.wallet_id == wallet_id,
+                WalletBalanceSnapshot.as_of > start,
+                WalletBalanceSnapshot.as_of < end,
+            )
+            .order_by(WalletBalanceSnapshot.as_of.asc())
+            .all()
+        )
+
+    def get_last_as_of(self, before: datetime) -> datetime | None:
+        """Time of the latest snapshot run before ``before``, if any."""
+        last_as_of: datetime | None = (
+            self.db.query(func.max(WalletBalanceSnapshot.as_of))
+            .filter(WalletBalanceSnapshot.as_of < before)
+            .scalar()
+        )
+        return last_as_of
+
+    def bulk_create(self, snapshots: list[dict[str, Any]]) -> int:
+        """Insert snapshots, skipping wallets already snapshotted at the same time.
+
+        The caller commits.
+
+        Returns:
+            Number of snapshots given.
+        """
+        dialect = self.db.bind.dialect.name if self.db.bind else "sqlite"
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        for i in range(0, len(snapshots), _INSERT_BATCH_SIZE):
+            batch = snapshots[i : i + _INSERT_BATCH_SIZE]
+            self.db.execute(
+                insert(WalletBalanceSnapshot)
+                .values([{"id": generate_uuid(), **snapshot} for snapshot in batch])
+                .on_conflict_do_nothing(index_elements=["wallet_id", "as_of"])
+            )
+        return len(snapshots)
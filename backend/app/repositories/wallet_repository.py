@@ -79,6 +79,38 @@ class WalletRepository:
             .all()
         )
 
+    def get_organization_ids(self, wallet_ids: list[UUID]) -> dict[UUID, UUID]:
+        """Map wallet IDs to their organization IDs."""
+        if not wallet_ids:
+            return {}
+        rows = (
+            self.db.query(Wallet.id, Wallet.organization_id).filter(Wallet.id.in_(wallet_ids)).all()
+        )
+        return {UUID(str(row.id)): UUID(str(row.organization_id)) for row in rows}
+
+    def lock_active_by_customer_id(self, customer_id: UUID) -> list[Wallet]:
+        """Get a customer's active, non-expired wallets, locked for update.
+
+        Same wallets and order as ``get_active_by_customer_id``.  On PostgreSQL
+        the rows stay locked (SELECT ... FOR UPDATE) until the caller commits or
+        rolls back, so concurrent consumption waits instead of overwriting the
+        balance.  Wallets already in the session are refreshed from the locked
+        rows.
+        """
+        now = datetime.now(UTC)
+        return (
+            self.db.query(Wallet)
+            .filter(
+                Wallet.customer_id == customer_id,
+                Wallet.status == WalletStatus.ACTIVE.value,
+            )
+            .filter((Wallet.expiration_at.is_(None)) | (Wallet.expiration_at > now))
+            .order_by(Wallet.priority.asc(), Wallet.created_at.asc())
+            .with_for_update()
+            .populate_existing()
+            .all()
+        )
+
     def create(self, data: WalletCreate, organization_id: UUID | None = None) -> Wallet:
         """Create a new wallet."""
         wallet = Wallet(
@@ -145,10 +177,14 @@ class WalletRepository:
         if not wallet:
             return None
 
+        self.mark_deducted(wallet, credits, amount_cents)
+        self.db.commit()
+        self.db.refresh(wallet)
+        return wallet
+
+    def mark_deducted(self, wallet: Wallet, credits: Decimal, amount_cents: Decimal) -> None:
+        """Deduct credits and balance from a wallet in the session. Caller commits."""
         wallet.credits_balance = Decimal(str(wallet.credits_balance)) - credits  # type: ignore[assignment]
         wallet.balance_cents = Decimal(str(wallet.balance_cents)) - amount_cents  # type: ignore[assignment]
         wallet.consumed_credits = Decimal(str(wallet.consumed_credits)) + credits  # type: ignore[assignment]
         wallet.consumed_amount_cents = Decimal(str(wallet.consumed_amount_cents)) + amount_cents  # type: ignore[assignment]
-        self.db.commit()
-        self.db.refresh(wallet)
-        return wallet
@@ -1,7 +1,9 @@
 """WalletTransaction repository for data access."""
 
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
+from typing import Any
 from uuid import UUID
 
 from sqlalchemy import case, func
@@ -11,6 +13,47 @@ from app.models.wallet_transaction import TransactionType, WalletTransaction
 from app.schemas.wallet_transaction import WalletTransactionCreate
 
 
+@dataclass
+class LedgerMovements:
+    """Inbound and outbound totals of a wallet's transactions over a time range."""
+
+    inbound_amount_cents: Decimal = Decimal("0")
+    outbound_amount_cents: Decimal = Decimal("0")
+    inbound_credits: Decimal = Decimal("0")
+    outbound_credits: Decimal = Decimal("0")
+
+
+def _sum_of(transaction_type: TransactionType, column: Any) -> Any:
+    return func.coalesce(
+        func.sum(
+            case(
+                (WalletTransaction.transaction_type == transaction_type.value, column),
+                else_=Decimal("0"),
+            )
+        ),
+        Decimal("0"),
+    )
+
+
+_LEDGER_SUMS = (
+    _sum_of(TransactionType.INBOUND, WalletTransaction.credit_amount).label("inbound_amount_cents"),
+    _sum_of(TransactionType.OUTBOUND, WalletTransaction.credit_amount).label(
+        "outbound_amount_cents"
+    ),
+    _sum_of(TransactionType.INBOUND, WalletTransaction.amount).label("inbound_credits"),
+    _sum_of(TransactionType.OUTBOUND, WalletTransaction.amount).label("outbound_credits"),
+)
+
+
+def _movements(row: Any) -> LedgerMovements:
+    return LedgerMovements(
+        inbound_amount_cents=Decimal(str(row.inbound_amount_cents)),
+        outbound_amount_cents=Decimal(str(row.outbound_amount_cents)),
+        inbound_credits=Decimal(str(row.inbound_credits)),
+        outbound_credits=Decimal(str(row.outbound_credits)),
+    )
+
+
 class WalletTransactionRepository:
     """Repository for WalletTransaction model."""
 
@@ -23,23 +66,38 @@ class WalletTransactionRepository:
         organization_id: UUID | None = None,
     ) -> WalletTransaction:
         """Create a new wallet transaction."""
-        txn = WalletTransaction(
-            wallet_id=data.wallet_id,
-            customer_id=data.customer_id,
-            transaction_type=data.transaction_type.value,
-            transaction_status=data.transaction_status.value,
-            source=data.source.value,
-            status=data.status.value,
-            amount=data.amount,
-            credit_amount=data.credit_amount,
-            invoice_id=data.invoice_id,
-            organization_id=organization_id,
-        )
-        self.db.add(txn)
+        txn = self.add_bulk([data], organization_id)[0]
         self.db.commit()
         self.db.refresh(txn)
         return txn
 
+    def add_bulk(
+        self,
+        transactions_data: list[WalletTransactionCreate],
+        organization_id: UUID | None = None,
+    ) -> list[WalletTransaction]:
+        """Add multiple wallet transactions to the session without committing.
+
+        The transactions are inserted on the next flush, batched into one statement.
+        """
+        transactions = [
+            WalletTransaction(
+                wallet_id=data.wallet_id,
+                customer_id=data.customer_id,
+                transaction_type=data.transaction_type.value,
+                transaction_status=data.transaction_status.value,
+                source=data.source.value,
+                status=data.status.value,
+                amount=data.amount,
+                credit_amount=data.credit_amount,
+                invoice_id=data.invoice_id,
+                organization_id=organization_id,
+            )
+            for data in transactions_data
+        ]
+        self.db.add_all(transactions)
+        return transactions
+
     def get_by_id(self, transaction_id: UUID) -> WalletTransaction | None:
         """Get a wallet transaction by ID."""
         return (
@@ -169,6 +227,36 @@ class WalletTransactionRepository:
             for row in rows
         ]
 
+    def ledger_movements(
+        self, wallet_id: UUID, start: datetime | None, end: datetime
+    ) -> LedgerMovements:
+        """Totals of a wallet's transactions created in ``[start, end)``.
+
+        With no ``start``, totals the wallet's transactions since it was created.
+        """
+        query = self.db.query(*_LEDGER_SUMS).filter(
+            WalletTransaction.wallet_id == wallet_id,
+            WalletTransaction.created_at < end,
+        )
+        if start is not None:
+            query = query.filter(WalletTransaction.created_at >= start)
+        return _movements(query.one())
+
+    def ledger_movements_by_wallet(
+        self, start: datetime | None, end: datetime
+    ) -> dict[UUID, LedgerMovements]:
+        """Totals per wallet of the transactions created in ``[start, end)``.
+
+        Wallets without transactions in the range are left out.
+        """
+        query = self.db.query(WalletTransaction.wallet_id, *_LEDGER_SUMS).filter(
+            WalletTransaction.created_at < end
+        )
+        if start is not None:
+            query = query.filter(WalletTransaction.created_at >= start)
+        rows = query.group_by(WalletTransaction.wallet_id).all()
+        return {UUID(str(row.wallet_id)): _movements(row) for row in rows}
+
     def avg_daily_consumption(self, wallet_id: UUID, days: int = 30) -> Decimal:
         """Calculate average daily outbound (consumption) over the last N days."""
         from datetime import UTC, timedelta
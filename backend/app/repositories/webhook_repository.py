@@ -29,6 +29,20 @@ class WebhookRepository:
         object_id: UUID | None = None,
     ) -> Webhook:
         """Create a new webhook record."""
+        webhook = self.add(webhook_endpoint_id, webhook_type, payload, object_type, object_id)
+        self.db.commit()
+        self.db.refresh(webhook)
+        return webhook
+
+    def add(
+        self,
+        webhook_endpoint_id: UUID,
+        webhook_type: str,
+        payload: dict[str, Any],
+        object_type: str | None = None,
+        object_id: UUID | None = None,
+    ) -> Webhook:
+        """Add a webhook record to the session without committing."""
         webhook = Webhook(
             webhook_endpoint_id=webhook_endpoint_id,
             webhook_type=webhook_type,
@@ -37,8 +51,6 @@ class WebhookRepository:
             payload=payload,
         )
         self.db.add(webhook)
-        self.db.commit()
-        self.db.refresh(webhook)
         return webhook
 
     def get_by_id(self, webhook_id: UUID) -> Webhook | None:
@@ -94,7 +94,7 @@ async def create_billing_entity(
     organization_id: UUID = Depends(get_current_organization),
 ) -> BillingEntity | JSONResponse:
     """Create a new billing entity."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -107,7 +107,7 @@ async def create_billing_entity(
 
     if isinstance(idempotency, IdempotencyResult):
         body = BillingEntityResponse.model_validate(entity).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return entity
 
@@ -1,5 +1,6 @@
 """CreditNote API endpoints."""
 
+import logging
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response
@@ -8,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.core.auth import get_current_organization
 from app.core.database import get_db
 from app.models.credit_note import CreditNote, CreditNoteStatus, CreditNoteType
+from app.models.outbound_email import OutboundEmailDocumentType
 from app.repositories.billing_entity_repository import BillingEntityRepository
 from app.repositories.credit_note_item_repository import CreditNoteItemRepository
 from app.repositories.credit_note_repository import CreditNoteRepository
@@ -15,14 +17,21 @@ from app.repositories.customer_repository import CustomerRepository
 from app.repositories.invoice_repository import InvoiceRepository
 from app.repositories.organization_repository import OrganizationRepository
 from app.schemas.credit_note import (
+    BulkSendCreditNoteEmailRequest,
+    BulkSendCreditNoteEmailResponse,
+    BulkSendCreditNoteEmailResult,
     CreditNoteCreate,
     CreditNoteResponse,
     CreditNoteUpdate,
 )
 from app.services.audit_service import AuditService
+from app.services.email_delivery import EmailDeliveryService
 from app.services.email_service import EmailService
 from app.services.pdf_service import PdfService
 from app.services.refund_service import RefundService
+from app.tasks import enqueue_send_queued_emails
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -242,6 +251,61 @@ async def void_credit_note(
     return voided  # type: ignore[return-value]
 
 
+@router.post(
+    "/bulk_send_email",
+    response_model=BulkSendCreditNoteEmailResponse,
+    summary="Queue credit note emails",
+    responses={
+        401: {"description": "Unauthorized"},
+    },
+)
+async def bulk_send_credit_note_emails(
+    data: BulkSendCreditNoteEmailRequest,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> BulkSendCreditNoteEmailResponse:
+    """Queue notification emails for multiple finalized credit notes.
+
+    The worker sends queued emails in batches over pooled SMTP connections,
+    retrying failed sends. A credit note whose email is still queued is not
+    queued again.
+    """
+    repo = CreditNoteRepository(db)
+    results: list[BulkSendCreditNoteEmailResult] = []
+    queued_ids: list[UUID] = []
+
+    for credit_note_id in data.credit_note_ids:
+        credit_note = repo.get_by_id(credit_note_id, organization_id)
+        if not credit_note:
+            error = "Credit note not found"
+        elif credit_note.status != CreditNoteStatus.FINALIZED.value:
+            error = "Credit note must be finalized to send email"
+        else:
+            queued_ids.append(credit_note_id)
+            results.append(
+                BulkSendCreditNoteEmailResult(credit_note_id=credit_note_id, success=True)
+            )
+            continue
+        results.append(
+            BulkSendCreditNoteEmailResult(credit_note_id=credit_note_id, success=False, error=error)
+        )
+
+    EmailDeliveryService(db).queue(
+        organization_id, OutboundEmailDocumentType.CREDIT_NOTE, queued_ids
+    )
+    if queued_ids:
+        try:
+            await enqueue_send_queued_emails()
+        except Exception:
+            logger.warning("Task queue unavailable, emails send on the next run", exc_info=True)
+
+    return BulkSendCreditNoteEmailResponse(
+        results=results,
+        queued_count=len(queued_ids),
+        failed_count=len(results) - len(queued_ids),
+    )
+
+
 @router.post(
     "/{credit_note_id}/send_email",
     summary="Send credit note email",
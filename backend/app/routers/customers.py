@@ -436,7 +436,7 @@ async def create_customer(
     organization_id: UUID = Depends(get_current_organization),
 ) -> Customer | JSONResponse:
     """Create a new customer."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -460,7 +460,7 @@ async def create_customer(
 
     if isinstance(idempotency, IdempotencyResult):
         body = CustomerResponse.model_validate(customer).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return customer
 
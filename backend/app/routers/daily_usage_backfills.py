@@ -0,0 +1,146 @@
+"""Daily usage backfills router for rebuilding historical daily usage."""
+
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_organization
+from app.core.database import get_db
+from app.models.daily_usage_backfill import DailyUsageBackfill, DailyUsageBackfillShard
+from app.repositories.daily_usage_backfill_repository import DailyUsageBackfillRepository
+from app.schemas.daily_usage_backfill import (
+    DailyUsageBackfillCreate,
+    DailyUsageBackfillResponse,
+    DailyUsageBackfillShardResponse,
+)
+from app.services.daily_usage_backfill_service import DailyUsageBackfillService
+from app.tasks import enqueue_daily_usage_backfill_shard
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+async def _enqueue_shards(shards: list[DailyUsageBackfillShard]) -> None:
+    try:
+        for shard in shards:
+            await enqueue_daily_usage_backfill_shard(str(shard.id), int(shard.attempts))
+    except Exception:
+        # Shards stay pending; resuming the backfill enqueues them again
+        logger.warning("Task queue unavailable, backfill shards left pending", exc_info=True)
+
+
+@router.post(
+    "/",
+    response_model=DailyUsageBackfillResponse,
+    status_code=201,
+    summary="Create daily usage backfill",
+    responses={
+        400: {"description": "Invalid date range or billable metric"},
+        401: {"description": "Unauthorized"},
+        422: {"description": "Validation error"},
+    },
+)
+async def create_daily_usage_backfill(
+    data: DailyUsageBackfillCreate,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> DailyUsageBackfill:
+    """Recompute daily usage for a date range, one worker job per day."""
+    service = DailyUsageBackfillService(db)
+    try:
+        backfill = service.create_backfill(organization_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    await _enqueue_shards(service.repo.get_unfinished_shards(UUID(str(backfill.id))))
+    return backfill
+
+
+@router.get(
+    "/",
+    response_model=list[DailyUsageBackfillResponse],
+    summary="List daily usage backfills",
+    responses={401: {"description": "Unauthorized"}},
+)
+async def list_daily_usage_backfills(
+    response: Response,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    order_by: str | None = Query(default=None),
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> list[DailyUsageBackfill]:
+    """List daily usage backfills for the organization."""
+    repo = DailyUsageBackfillRepository(db)
+    response.headers["X-Total-Count"] = str(repo.count(organization_id))
+    return repo.get_all(organization_id, skip=skip, limit=limit, order_by=order_by)
+
+
+@router.get(
+    "/{backfill_id}",
+    response_model=DailyUsageBackfillResponse,
+    summary="Get daily usage backfill",
+    responses={
+        401: {"description": "Unauthorized"},
+        404: {"description": "Daily usage backfill not found"},
+    },
+)
+async def get_daily_usage_backfill(
+    backfill_id: UUID,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> DailyUsageBackfill:
+    """Get a daily usage backfill and its progress."""
+    repo = DailyUsageBackfillRepository(db)
+    backfill = repo.get_by_id(backfill_id, organization_id)
+    if not backfill:
+        raise HTTPException(status_code=404, detail="Daily usage backfill not found")
+    return backfill
+
+
+@router.get(
+    "/{backfill_id}/shards",
+    response_model=list[DailyUsageBackfillShardResponse],
+    summary="List daily usage backfill shards",
+    responses={
+        401: {"description": "Unauthorized"},
+        404: {"description": "Daily usage backfill not found"},
+    },
+)
+async def list_daily_usage_backfill_shards(
+    backfill_id: UUID,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> list[DailyUsageBackfillShard]:
+    """List the per-day shards of a backfill with their status."""
+    repo = DailyUsageBackfillRepository(db)
+    if not repo.get_by_id(backfill_id, organization_id):
+        raise HTTPException(status_code=404, detail="Daily usage backfill not found")
+    return repo.get_shards(backfill_id)
+
+
+@router.post(
+    "/{backfill_id}/resume",
+    response_model=DailyUsageBackfillResponse,
+    summary="Resume daily usage backfill",
+    responses={
+        401: {"description": "Unauthorized"},
+        404: {"description": "Daily usage backfill not found"},
+    },
+)
+async def resume_daily_usage_backfill(
+    backfill_id: UUID,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> DailyUsageBackfill:
+    """Retry failed days and re-enqueue days that never finished."""
+    service = DailyUsageBackfillService(db)
+    backfill = service.repo.get_by_id(backfill_id, organization_id)
+    if not backfill:
+        raise HTTPException(status_code=404, detail="Daily usage backfill not found")
+
+    await _enqueue_shards(service.resume_backfill(backfill))
+    return backfill
@@ -1,5 +1,6 @@
 """Data exports router for CSV export endpoints."""
 
+import logging
 import os
 from uuid import UUID
 
@@ -9,10 +10,13 @@ from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_organization
 from app.core.database import get_db
-from app.models.data_export import DataExport, ExportStatus
+from app.models.data_export import DataExport, ExportStatus, ExportType
 from app.repositories.data_export_repository import DataExportRepository
 from app.schemas.data_export import DataExportCreate, DataExportEstimate, DataExportResponse
 from app.services.data_export_service import DataExportService
+from app.tasks import enqueue_process_data_export
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -40,6 +44,19 @@ async def create_data_export(
         filters=data.filters,
     )
 
+    if data.export_type in (
+        ExportType.BILLING_SIMULATION,
+        ExportType.INVOICE_PDFS,
+        ExportType.CREDIT_NOTE_PDFS,
+    ):
+        # Simulations price every active subscription and PDF exports render
+        # every document; run them on the worker
+        try:
+            await enqueue_process_data_export(str(export.id))
+            return export
+        except Exception:
+            logger.warning("Task queue unavailable, processing export inline", exc_info=True)
+
     # Process synchronously for now; in production this would be enqueued
     service.process_export(export.id)  # type: ignore[arg-type]
 
@@ -132,7 +149,7 @@ async def download_data_export(
     db: Session = Depends(get_db),
     organization_id: UUID = Depends(get_current_organization),
 ) -> FileResponse:
-    """Download the CSV file for a completed data export."""
+    """Download the CSV file (or ZIP archive of PDFs) for a completed data export."""
     repo = DataExportRepository(db)
     export = repo.get_by_id(export_id, organization_id)
     if not export:
@@ -142,6 +159,12 @@ async def download_data_export(
     if not export.file_path or not os.path.exists(str(export.file_path)):
         raise HTTPException(status_code=404, detail="Export file not found")
 
+    if str(export.file_path).endswith(".zip"):
+        return FileResponse(
+            path=str(export.file_path),
+            media_type="application/zip",
+            filename=f"{export.export_type}_{export_id}.zip",
+        )
     return FileResponse(
         path=str(export.file_path),
         media_type="text/csv",
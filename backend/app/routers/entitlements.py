@@ -66,7 +66,7 @@ async def create_entitlement(
     organization_id: UUID = Depends(get_current_organization),
 ) -> Entitlement | JSONResponse:
     """Create an entitlement linking a feature to a plan with a value."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -111,7 +111,7 @@ async def create_entitlement(
 
     if isinstance(idempotency, IdempotencyResult):
         body = EntitlementResponse.model_validate(entitlement).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return entitlement
 
@@ -5,7 +5,9 @@ from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_organization
@@ -13,6 +15,7 @@ from app.core.config import settings
 from app.core.database import get_db
 from app.core.idempotency import IdempotencyResult, check_idempotency, record_idempotency_response
 from app.core.rate_limiter import RateLimiter
+from app.core.redis_client import get_redis_client
 from app.models.charge import ChargeModel
 from app.models.event import Event
 from app.models.subscription import SubscriptionStatus
@@ -22,17 +25,29 @@ from app.repositories.customer_repository import CustomerRepository
 from app.repositories.event_repository import EventRepository
 from app.repositories.subscription_repository import SubscriptionRepository
 from app.schemas.event import (
+    EventAcceptedResponse,
     EventBatchCreate,
     EventBatchResponse,
     EventCreate,
     EventReprocessResponse,
     EventResponse,
+    EventStreamRejection,
+    EventStreamResponse,
     EventVolumePoint,
     EventVolumeResponse,
 )
 from app.schemas.invoice_preview import EstimateFeesRequest, EstimateFeesResponse
-from app.services.charge_models.factory import get_charge_calculator
+from app.services.charge_models.factory import charge_pricing_key, get_charge_calculator
+from app.services.event_ingestion import (
+    EventStreamIngestionService,
+    StreamFormatError,
+    get_active_subscription_ids,
+    get_active_subscription_ids_for_customers,
+    iter_ndjson_lines,
+)
+from app.services.event_queue import enqueue_events
 from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_snapshot import UsageSnapshotService
 from app.tasks import enqueue_check_usage_alerts, enqueue_check_usage_thresholds
 
 logger = logging.getLogger(__name__)
@@ -60,6 +75,39 @@ def _check_rate_limit(
     return organization_id
 
 
+async def _parse_body[M: BaseModel](request: Request, model: type[M]) -> M:
+    """Validate the raw request body in a single pass.
+
+    ``model_validate_json`` parses and validates the bytes in pydantic-core,
+    skipping the intermediate ``request.json()`` dict that FastAPI builds for
+    declared body parameters.  Errors keep FastAPI's 422 shape.
+    """
+    body = await request.body()
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        ) from e
+
+
+async def _event_body(request: Request) -> EventCreate:
+    return await _parse_body(request, EventCreate)
+
+
+async def _event_batch_body(request: Request) -> EventBatchCreate:
+    return await _parse_body(request, EventBatchCreate)
+
+
+def _json_body_schema(model: type[BaseModel]) -> dict[str, Any]:
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
 def validate_billable_metric_code(code: str, db: Session, organization_id: UUID) -> None:
     """Validate that the billable metric code exists."""
     metric_repo = BillableMetricRepository(db)
@@ -70,27 +118,6 @@ def validate_billable_metric_code(code: str, db: Session, organization_id: UUID)
         )
 
 
-def _get_active_subscription_ids(
-    external_customer_id: str, db: Session, organization_id: UUID
-) -> list[str]:
-    """Find active subscription IDs for the given external customer.
-
-    Looks up the customer by external_id and returns the IDs of all
-    active subscriptions as strings (for task serialization).
-    """
-    customer_repo = CustomerRepository(db)
-    customer = customer_repo.get_by_external_id(external_customer_id, organization_id)
-    if not customer:
-        return []
-
-    sub_repo = SubscriptionRepository(db)
-    subscriptions = sub_repo.get_by_customer_id(
-        customer_id=UUID(str(customer.id)),
-        organization_id=organization_id,
-    )
-    return [str(sub.id) for sub in subscriptions if sub.status == SubscriptionStatus.ACTIVE.value]
-
-
 async def _enqueue_threshold_checks(subscription_ids: list[str]) -> None:
     """Enqueue threshold check tasks for the given subscription IDs."""
     for sub_id in subscription_ids:
@@ -109,6 +136,27 @@ async def _enqueue_alert_checks(subscription_ids: list[str]) -> None:
             logger.exception("Failed to enqueue alert check for subscription %s", sub_id)
 
 
+async def _enqueue_for_async_ingestion(
+    events: list[EventCreate], organization_id: UUID
+) -> EventAcceptedResponse | None:
+    """Queue events when async ingestion is enabled.
+
+    Returns None when the synchronous path should handle the request, either
+    because the mode is ``sync`` or because the queue is unreachable.
+    """
+    if settings.BXB_EVENT_INGESTION_MODE != "async":
+        return None
+    try:
+        await enqueue_events(get_redis_client(), events, organization_id)
+    except Exception:
+        logger.warning("Event queue unavailable, ingesting synchronously", exc_info=True)
+        return None
+    return EventAcceptedResponse(
+        accepted=len(events),
+        transaction_ids=[event.transaction_id for event in events],
+    )
+
+
 @router.post(
     "/estimate_fees",
     response_model=EstimateFeesResponse,
@@ -164,24 +212,30 @@ async def estimate_fees(
             detail=f"No charge found for metric '{data.code}' on this subscription's plan",
         )
 
-    # Determine current billing period
+    # Current usage for the month so far, from the shared snapshot when the
+    # charge is unfiltered (filtered charges only have per-filter usage there)
     now = datetime.now()
     billing_period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    billing_period_end = now
-
-    # Aggregate current usage
-    usage_service = UsageAggregationService(db)
-    usage_result = usage_service.aggregate_usage_with_count(
-        external_customer_id=str(customer.external_id),
-        code=data.code,
-        from_timestamp=billing_period_start,
-        to_timestamp=billing_period_end,
+    snapshot = UsageSnapshotService(db).get_snapshot(
+        subscription, str(customer.external_id), billing_period_start
     )
+    charge_usage = snapshot.get_charge(UUID(str(charge.id)))
+    if charge_usage is not None:
+        current_usage, current_count = charge_usage.units, charge_usage.events_count
+    else:
+        usage_result = UsageAggregationService(db).aggregate_usage_with_count(
+            external_customer_id=str(customer.external_id),
+            code=data.code,
+            from_timestamp=billing_period_start,
+            to_timestamp=snapshot.period_end,
+            organization_id=organization_id,
+        )
+        current_usage, current_count = usage_result.value, usage_result.events_count
 
     # Add hypothetical event contribution
     usage_with_event = _add_hypothetical_event(
-        current_usage=usage_result.value,
-        current_count=usage_result.events_count,
+        current_usage=current_usage,
+        current_count=current_count,
         aggregation_type=str(metric.aggregation_type),
         field_name=str(metric.field_name) if metric.field_name else None,
         event_properties=data.properties,
@@ -191,7 +245,7 @@ async def estimate_fees(
     charge_model = ChargeModel(charge.charge_model)
     properties: dict[str, Any] = dict(charge.properties) if charge.properties else {}
     unit_price = Decimal(str(properties.get("unit_price", 0)))
-    calculator = get_charge_calculator(charge_model)
+    calculator = get_charge_calculator(charge_model, charge_pricing_key(charge))
     if not calculator:
         raise HTTPException(status_code=400, detail=f"Unsupported charge model: {charge_model}")
 
@@ -401,9 +455,7 @@ async def reprocess_event(
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    sub_ids = _get_active_subscription_ids(
-        str(event.external_customer_id), db, organization_id
-    )
+    sub_ids = get_active_subscription_ids(str(event.external_customer_id), db, organization_id)
     if sub_ids:
         background_tasks.add_task(_enqueue_threshold_checks, sub_ids)
         background_tasks.add_task(_enqueue_alert_checks, sub_ids)
@@ -420,45 +472,63 @@ async def reprocess_event(
     response_model=EventResponse,
     status_code=201,
     summary="Ingest event",
+    openapi_extra=_json_body_schema(EventCreate),
     responses={
+        202: {
+            "model": EventAcceptedResponse,
+            "description": "Event queued (asynchronous ingestion mode)",
+        },
         401: {"description": "Unauthorized – invalid or missing API key"},
         422: {"description": "Billable metric code does not exist"},
         429: {"description": "Rate limit exceeded"},
     },
 )
 async def create_event(
-    data: EventCreate,
     request: Request,
     background_tasks: BackgroundTasks,
+    data: EventCreate = Depends(_event_body),
     db: Session = Depends(get_db),
     organization_id: UUID = Depends(_check_rate_limit),
-) -> Event | JSONResponse:
+) -> Response:
     """Ingest a single event.
 
     If an event with the same transaction_id already exists, returns the existing event.
     This provides idempotent event ingestion.  The ``Idempotency-Key`` header adds an
     additional layer of deduplication on top of the existing ``transaction_id`` check.
+
+    In asynchronous ingestion mode the event is queued and a 202 acknowledgement
+    is returned instead; it becomes visible once an ingest worker writes it.
     """
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
     validate_billable_metric_code(data.code, db, organization_id)
 
+    accepted = await _enqueue_for_async_ingestion([data], organization_id)
+    if accepted is not None:
+        body = accepted.model_dump(mode="json")
+        if isinstance(idempotency, IdempotencyResult):
+            await record_idempotency_response(db, organization_id, idempotency.key, 202, body)
+        return JSONResponse(status_code=202, content=body)
+
     repo = EventRepository(db)
     event, is_new = repo.create_or_get_existing(data, organization_id)
 
     if is_new:
-        sub_ids = _get_active_subscription_ids(data.external_customer_id, db, organization_id)
+        sub_ids = get_active_subscription_ids(data.external_customer_id, db, organization_id)
         if sub_ids:
             background_tasks.add_task(_enqueue_threshold_checks, sub_ids)
             background_tasks.add_task(_enqueue_alert_checks, sub_ids)
 
+    response = EventResponse.model_validate(event)
     if isinstance(idempotency, IdempotencyResult):
-        body = EventResponse.model_validate(event).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        body = response.model_dump(mode="json")
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
-    return event
+    return Response(
+        content=response.model_dump_json(), status_code=201, media_type="application/json"
+    )
 
 
 @router.post(
@@ -466,18 +536,23 @@ async def create_event(
     response_model=EventBatchResponse,
     status_code=201,
     summary="Ingest event batch",
+    openapi_extra=_json_body_schema(EventBatchCreate),
     responses={
+        202: {
+            "model": EventAcceptedResponse,
+            "description": "Events queued (asynchronous ingestion mode)",
+        },
         401: {"description": "Unauthorized – invalid or missing API key"},
         422: {"description": "Billable metric code does not exist"},
         429: {"description": "Rate limit exceeded"},
     },
 )
 async def create_events_batch(
-    data: EventBatchCreate,
     background_tasks: BackgroundTasks,
+    data: EventBatchCreate = Depends(_event_batch_body),
     db: Session = Depends(get_db),
     organization_id: UUID = Depends(_check_rate_limit),
-) -> EventBatchResponse:
+) -> Response:
     """Ingest a batch of events (up to 100).
 
     Duplicate transaction_ids are handled gracefully - existing events are returned
@@ -488,23 +563,92 @@ async def create_events_batch(
     for code in unique_codes:
         validate_billable_metric_code(code, db, organization_id)
 
+    accepted = await _enqueue_for_async_ingestion(data.events, organization_id)
+    if accepted is not None:
+        return JSONResponse(status_code=202, content=accepted.model_dump(mode="json"))
+
     repo = EventRepository(db)
     events, ingested, duplicates = repo.create_batch(data.events, organization_id)
 
     if ingested > 0:
         # Collect unique external_customer_ids from the batch
         unique_customer_ids = {event.external_customer_id for event in data.events}
-        all_sub_ids: list[str] = []
-        for ext_cust_id in unique_customer_ids:
-            all_sub_ids.extend(_get_active_subscription_ids(ext_cust_id, db, organization_id))
-        # Deduplicate subscription IDs
-        unique_sub_ids = list(set(all_sub_ids))
+        unique_sub_ids = get_active_subscription_ids_for_customers(
+            unique_customer_ids, db, organization_id
+        )
         if unique_sub_ids:
             background_tasks.add_task(_enqueue_threshold_checks, unique_sub_ids)
             background_tasks.add_task(_enqueue_alert_checks, unique_sub_ids)
 
-    return EventBatchResponse(
+    response = EventBatchResponse(
         ingested=ingested,
         duplicates=duplicates,
         events=[EventResponse.model_validate(e) for e in events],
     )
+    return Response(
+        content=response.model_dump_json(), status_code=201, media_type="application/json"
+    )
+
+
+@router.post(
+    "/stream",
+    response_model=EventStreamResponse,
+    status_code=201,
+    summary="Ingest NDJSON event stream",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "description": (
+                "One event object per line (application/x-ndjson). "
+                "Send `Content-Encoding: gzip` for a gzip-compressed body."
+            ),
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+    responses={
+        400: {"description": "Body is not valid NDJSON or gzip"},
+        401: {"description": "Unauthorized – invalid or missing API key"},
+        429: {"description": "Rate limit exceeded"},
+    },
+)
+async def create_events_stream(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(_check_rate_limit),
+) -> EventStreamResponse:
+    """Ingest a newline-delimited JSON stream of events of any size.
+
+    Each line is parsed and validated independently and accepted events are
+    written in chunks as the body is read.  Invalid lines and unknown metric
+    codes are rejected individually without failing the stream.  The response
+    only summarizes the outcome; duplicate transaction_ids are counted, not
+    returned.
+    """
+    gzip_encoded = request.headers.get("content-encoding", "").lower() == "gzip"
+    service = EventStreamIngestionService(db)
+    try:
+        result = await service.ingest(
+            iter_ndjson_lines(request.stream(), gzip_encoded=gzip_encoded),
+            organization_id,
+        )
+    except StreamFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    if result.ingested > 0:
+        unique_sub_ids = get_active_subscription_ids_for_customers(
+            result.external_customer_ids, db, organization_id
+        )
+        if unique_sub_ids:
+            background_tasks.add_task(_enqueue_threshold_checks, unique_sub_ids)
+            background_tasks.add_task(_enqueue_alert_checks, unique_sub_ids)
+
+    return EventStreamResponse(
+        received=result.received,
+        ingested=result.ingested,
+        duplicates=result.duplicates,
+        rejected=result.rejected,
+        rejections=[
+            EventStreamRejection(line=line, reason=reason) for line, reason in result.rejections
+        ],
+    )
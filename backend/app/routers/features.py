@@ -91,7 +91,7 @@ async def create_feature(
     organization_id: UUID = Depends(get_current_organization),
 ) -> Feature | JSONResponse:
     """Create a new feature."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -117,7 +117,7 @@ async def create_feature(
 
     if isinstance(idempotency, IdempotencyResult):
         body = FeatureResponse.model_validate(feature).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return feature
 
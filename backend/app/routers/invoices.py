@@ -1,8 +1,10 @@
+import asyncio
+import logging
 from decimal import Decimal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_organization
@@ -10,10 +12,9 @@ from app.core.database import get_db
 from app.core.idempotency import IdempotencyResult, check_idempotency, record_idempotency_response
 from app.models.invoice import Invoice, InvoiceStatus, InvoiceType
 from app.models.invoice_settlement import InvoiceSettlement
+from app.models.outbound_email import OutboundEmailDocumentType
 from app.models.payment import PaymentProvider
-from app.repositories.billing_entity_repository import BillingEntityRepository
 from app.repositories.customer_repository import CustomerRepository
-from app.repositories.fee_repository import FeeRepository
 from app.repositories.invoice_repository import InvoiceRepository
 from app.repositories.invoice_settlement_repository import InvoiceSettlementRepository
 from app.repositories.organization_repository import OrganizationRepository
@@ -23,6 +24,9 @@ from app.schemas.invoice import (
     BulkFinalizeRequest,
     BulkFinalizeResponse,
     BulkFinalizeResult,
+    BulkSendInvoiceEmailRequest,
+    BulkSendInvoiceEmailResponse,
+    BulkSendInvoiceEmailResult,
     BulkVoidRequest,
     BulkVoidResponse,
     BulkVoidResult,
@@ -34,16 +38,60 @@ from app.schemas.invoice import (
 from app.schemas.invoice_preview import InvoicePreviewRequest, InvoicePreviewResponse
 from app.schemas.invoice_settlement import InvoiceSettlementResponse
 from app.services.audit_service import AuditService
+from app.services.email_delivery import EmailDeliveryService
 from app.services.email_service import EmailService
+from app.services.invoice_pdf_service import InvoicePdf, InvoicePdfService
 from app.services.invoice_preview_service import InvoicePreviewService
 from app.services.payment_provider import get_payment_provider
-from app.services.pdf_service import PdfService
 from app.services.wallet_service import WalletService
 from app.services.webhook_service import WebhookService
+from app.tasks import enqueue_render_invoice_pdf, enqueue_send_queued_emails
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def _enqueue_pdf_renders(invoice_ids: list[str]) -> None:
+    """Enqueue PDF rendering for newly finalized invoices.
+
+    Without a task queue the PDFs are rendered on first download instead.
+    """
+    for invoice_id in invoice_ids:
+        try:
+            await enqueue_render_invoice_pdf(invoice_id)
+        except Exception:
+            logger.warning("Task queue unavailable, invoice PDFs render on demand", exc_info=True)
+            return
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _pdf_response(
+    request: Request, invoice: Invoice, pdf: InvoicePdf, disposition: str
+) -> Response:
+    """Serve a stored invoice PDF with ETag revalidation and range support."""
+    if _etag_matches(request.headers.get("if-none-match"), pdf.etag):
+        return Response(status_code=304, headers={"ETag": pdf.etag})
+    return FileResponse(
+        pdf.path,
+        media_type="application/pdf",
+        headers={
+            "ETag": pdf.etag,
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": (
+                f'{disposition}; filename="invoice_{invoice.invoice_number}.pdf"'
+            ),
+        },
+    )
+
+
 @router.get(
     "/",
     response_model=list[InvoiceResponse],
@@ -147,6 +195,7 @@ async def bulk_finalize_invoices(
     results: list[BulkFinalizeResult] = []
     finalized_count = 0
     failed_count = 0
+    finalized_ids: list[str] = []
 
     for invoice_id in data.invoice_ids:
         invoice = repo.get_by_id(invoice_id, organization_id)
@@ -177,12 +226,15 @@ async def bulk_finalize_invoices(
 
             results.append(BulkFinalizeResult(invoice_id=invoice_id, success=True))
             finalized_count += 1
+            finalized_ids.append(str(invoice_id))
         except ValueError as e:
             results.append(BulkFinalizeResult(
                 invoice_id=invoice_id, success=False, error=str(e)
             ))
             failed_count += 1
 
+    await _enqueue_pdf_renders(finalized_ids)
+
     return BulkFinalizeResponse(
         results=results,
         finalized_count=finalized_count,
@@ -363,7 +415,7 @@ async def finalize_invoice(
     organization_id: UUID = Depends(get_current_organization),
 ) -> Invoice | JSONResponse:
     """Finalize a draft invoice and apply wallet credits if available."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -467,9 +519,11 @@ async def finalize_invoice(
             payload={"invoice_id": str(invoice.id)},
         )
 
+        await _enqueue_pdf_renders([str(invoice.id)])
+
         if isinstance(idempotency, IdempotencyResult):
             body = InvoiceResponse.model_validate(invoice).model_dump(mode="json")
-            record_idempotency_response(db, organization_id, idempotency.key, 200, body)
+            await record_idempotency_response(db, organization_id, idempotency.key, 200, body)
 
         return invoice
     except ValueError as e:
@@ -627,22 +681,8 @@ async def send_invoice_email(
     org_repo = OrganizationRepository(db)
     organization = org_repo.get_by_id(organization_id)
 
-    billing_entity = None
-    if invoice.billing_entity_id:
-        be_repo = BillingEntityRepository(db)
-        billing_entity = be_repo.get_by_id(invoice.billing_entity_id)  # type: ignore[arg-type]
-
-    pdf_bytes: bytes | None = None
-    fee_repo = FeeRepository(db)
-    fees = fee_repo.get_by_invoice_id(invoice_id)
-    pdf_service = PdfService()
-    pdf_bytes = pdf_service.generate_invoice_pdf(
-        invoice=invoice,
-        fees=fees,
-        customer=customer,  # type: ignore[arg-type]
-        organization=organization,  # type: ignore[arg-type]
-        billing_entity=billing_entity,
-    )
+    pdf = await asyncio.to_thread(InvoicePdfService(db).get_pdf, invoice)
+    pdf_bytes = pdf.path.read_bytes()
 
     email_service = EmailService()
     sent = await email_service.send_invoice_email(
@@ -654,6 +694,57 @@ async def send_invoice_email(
     return {"sent": sent}
 
 
+@router.post(
+    "/bulk_send_email",
+    response_model=BulkSendInvoiceEmailResponse,
+    summary="Queue invoice emails",
+    responses={
+        401: {"description": "Unauthorized – invalid or missing API key"},
+    },
+)
+async def bulk_send_invoice_emails(
+    data: BulkSendInvoiceEmailRequest,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> BulkSendInvoiceEmailResponse:
+    """Queue notification emails for multiple finalized or paid invoices.
+
+    The worker sends queued emails in batches over pooled SMTP connections,
+    retrying failed sends. An invoice whose email is still queued is not
+    queued again.
+    """
+    repo = InvoiceRepository(db)
+    results: list[BulkSendInvoiceEmailResult] = []
+    queued_ids: list[UUID] = []
+
+    for invoice_id in data.invoice_ids:
+        invoice = repo.get_by_id(invoice_id, organization_id)
+        if not invoice:
+            error = "Invoice not found"
+        elif invoice.status not in (InvoiceStatus.FINALIZED.value, InvoiceStatus.PAID.value):
+            error = "Invoice must be finalized or paid to send email"
+        else:
+            queued_ids.append(invoice_id)
+            results.append(BulkSendInvoiceEmailResult(invoice_id=invoice_id, success=True))
+            continue
+        results.append(
+            BulkSendInvoiceEmailResult(invoice_id=invoice_id, success=False, error=error)
+        )
+
+    EmailDeliveryService(db).queue(organization_id, OutboundEmailDocumentType.INVOICE, queued_ids)
+    if queued_ids:
+        try:
+            await enqueue_send_queued_emails()
+        except Exception:
+            logger.warning("Task queue unavailable, emails send on the next run", exc_info=True)
+
+    return BulkSendInvoiceEmailResponse(
+        results=results,
+        queued_count=len(queued_ids),
+        failed_count=len(results) - len(queued_ids),
+    )
+
+
 @router.post(
     "/{invoice_id}/send_reminder",
     response_model=SendReminderResponse,
@@ -748,6 +839,7 @@ async def delete_invoice(
     "/{invoice_id}/pdf_preview",
     summary="Get invoice PDF for inline preview",
     responses={
+        304: {"description": "PDF unchanged since the ETag given in If-None-Match"},
         400: {"description": "Invoice must be finalized or paid to generate PDF"},
         401: {"description": "Unauthorized – invalid or missing API key"},
         404: {"description": "Invoice not found"},
@@ -755,10 +847,14 @@ async def delete_invoice(
 )
 async def preview_invoice_pdf(
     invoice_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     organization_id: UUID = Depends(get_current_organization),
 ) -> Response:
-    """Generate and return a PDF for inline preview (Content-Disposition: inline)."""
+    """Return a PDF for inline preview (Content-Disposition: inline).
+
+    The PDF is rendered once per invoice version and then served from storage.
+    """
     invoice_repo = InvoiceRepository(db)
     invoice = invoice_repo.get_by_id(invoice_id, organization_id)
     if not invoice:
@@ -770,42 +866,15 @@ async def preview_invoice_pdf(
             detail="Invoice must be finalized or paid to generate PDF",
         )
 
-    customer_repo = CustomerRepository(db)
-    customer = customer_repo.get_by_id(invoice.customer_id)  # type: ignore[arg-type]
-
-    org_repo = OrganizationRepository(db)
-    organization = org_repo.get_by_id(organization_id)
-
-    billing_entity = None
-    if invoice.billing_entity_id:
-        be_repo = BillingEntityRepository(db)
-        billing_entity = be_repo.get_by_id(invoice.billing_entity_id)  # type: ignore[arg-type]
-
-    fee_repo = FeeRepository(db)
-    fees = fee_repo.get_by_invoice_id(invoice_id)
-
-    pdf_service = PdfService()
-    pdf_bytes = pdf_service.generate_invoice_pdf(
-        invoice=invoice,
-        fees=fees,
-        customer=customer,  # type: ignore[arg-type]
-        organization=organization,  # type: ignore[arg-type]
-        billing_entity=billing_entity,
-    )
-
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'inline; filename="invoice_{invoice.invoice_number}.pdf"'
-        },
-    )
+    pdf = await asyncio.to_thread(InvoicePdfService(db).get_pdf, invoice)
+    return _pdf_response(request, invoice, pdf, "inline")
 
 
 @router.post(
     "/{invoice_id}/download_pdf",
     summary="Download invoice PDF",
     responses={
+        304: {"description": "PDF unchanged since the ETag given in If-None-Match"},
         400: {"description": "Invoice must be finalized or paid to generate PDF"},
         401: {"description": "Unauthorized – invalid or missing API key"},
         404: {"description": "Invoice not found"},
@@ -813,10 +882,11 @@ async def preview_invoice_pdf(
 )
 async def download_invoice_pdf(
     invoice_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     organization_id: UUID = Depends(get_current_organization),
 ) -> Response:
-    """Generate and download a PDF for a finalized or paid invoice."""
+    """Download the PDF of a finalized or paid invoice, rendered once per version."""
     invoice_repo = InvoiceRepository(db)
     invoice = invoice_repo.get_by_id(invoice_id, organization_id)
     if not invoice:
@@ -828,33 +898,5 @@ async def download_invoice_pdf(
             detail="Invoice must be finalized or paid to generate PDF",
         )
 
-    customer_repo = CustomerRepository(db)
-    customer = customer_repo.get_by_id(invoice.customer_id)  # type: ignore[arg-type]
-
-    org_repo = OrganizationRepository(db)
-    organization = org_repo.get_by_id(organization_id)
-
-    billing_entity = None
-    if invoice.billing_entity_id:
-        be_repo = BillingEntityRepository(db)
-        billing_entity = be_repo.get_by_id(invoice.billing_entity_id)  # type: ignore[arg-type]
-
-    fee_repo = FeeRepository(db)
-    fees = fee_repo.get_by_invoice_id(invoice_id)
-
-    pdf_service = PdfService()
-    pdf_bytes = pdf_service.generate_invoice_pdf(
-        invoice=invoice,
-        fees=fees,
-        customer=customer,  # type: ignore[arg-type]
-        organization=organization,  # type: ignore[arg-type]
-        billing_entity=billing_entity,
-    )
-
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f'attachment; filename="invoice_{invoice.invoice_number}.pdf"'
-        },
-    )
+    pdf = await asyncio.to_thread(InvoicePdfService(db).get_pdf, invoice)
+    return _pdf_response(request, invoice, pdf, "attachment")
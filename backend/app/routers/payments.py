@@ -1,5 +1,6 @@
 """Payment API endpoints."""
 
+import logging
 from typing import Any
 from uuid import UUID
 
@@ -14,9 +15,7 @@ from app.models.invoice import InvoiceStatus
 from app.models.invoice_settlement import SettlementType
 from app.models.payment import Payment, PaymentProvider, PaymentStatus
 from app.repositories.invoice_repository import InvoiceRepository
-from app.repositories.invoice_settlement_repository import InvoiceSettlementRepository
 from app.repositories.payment_repository import PaymentRepository
-from app.schemas.invoice_settlement import InvoiceSettlementCreate
 from app.schemas.payment import (
     CheckoutSessionCreate,
     CheckoutSessionResponse,
@@ -26,36 +25,14 @@ from app.schemas.payment import (
 )
 from app.services.audit_service import AuditService
 from app.services.payment_provider import get_payment_provider
+from app.services.payment_webhook_inbox import (
+    PaymentWebhookInbox,
+    record_settlement_and_maybe_mark_paid,
+)
 from app.services.webhook_service import WebhookService
+from app.tasks import enqueue_process_payment_webhook_events
 
-
-def _record_settlement_and_maybe_mark_paid(
-    db: Session,
-    invoice_id: UUID,
-    settlement_type: SettlementType,
-    source_id: UUID,
-    amount_cents: float | int,
-) -> None:
-    """Record a settlement and auto-mark invoice as paid if fully settled."""
-    from decimal import Decimal
-
-    settlement_repo = InvoiceSettlementRepository(db)
-    settlement_repo.create(
-        InvoiceSettlementCreate(
-            invoice_id=invoice_id,
-            settlement_type=settlement_type,
-            source_id=source_id,
-            amount_cents=Decimal(str(amount_cents)),
-        )
-    )
-
-    invoice_repo = InvoiceRepository(db)
-    invoice = invoice_repo.get_by_id(invoice_id)
-    if invoice and invoice.status == InvoiceStatus.FINALIZED.value:
-        total_settled = settlement_repo.get_total_settled(invoice_id)
-        if total_settled >= Decimal(str(invoice.total_cents)):
-            invoice_repo.mark_paid(invoice_id)
-
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -167,7 +144,7 @@ async def record_manual_payment(
     payment_repo.mark_succeeded(payment.id)  # type: ignore[arg-type]
 
     # Record settlement and auto-mark invoice as paid if fully settled
-    _record_settlement_and_maybe_mark_paid(
+    record_settlement_and_maybe_mark_paid(
         db,
         invoice_id=invoice.id,  # type: ignore[arg-type]
         settlement_type=SettlementType.PAYMENT,
@@ -225,7 +202,7 @@ async def create_checkout_session(
     This creates a payment record and returns a URL where the customer
     can complete the payment.
     """
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -329,7 +306,7 @@ async def create_checkout_session(
 
     if isinstance(idempotency, IdempotencyResult):
         body = result.model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 200, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 200, body)
 
     return result
 
@@ -352,8 +329,10 @@ async def handle_webhook(
 ) -> dict[str, Any]:
     """Handle payment provider webhooks.
 
-    This endpoint receives webhook events from payment providers
-    and updates payment/invoice status accordingly.
+    This endpoint receives webhook events from payment providers, stores
+    them, deduplicated by the provider's event ID, and acknowledges them at
+    once. The worker then updates payment/invoice status accordingly, in the
+    order received for each payment.
     """
     payload = await request.body()
 
@@ -379,94 +358,19 @@ async def handle_webhook(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON payload") from None
 
-    result = payment_provider.parse_webhook(payload_json)
-
-    # Find the payment - try multiple lookup methods
-    payment_repo = PaymentRepository(db)
-    payment: Payment | None = None
-
-    if result.provider_checkout_id:
-        payment = payment_repo.get_by_provider_checkout_id(result.provider_checkout_id)
-    if not payment and result.provider_payment_id:
-        payment = payment_repo.get_by_provider_payment_id(result.provider_payment_id)
-    if not payment and result.metadata and result.metadata.get("payment_id"):
-        payment = payment_repo.get_by_id(UUID(result.metadata["payment_id"]))
-
-    if not payment:
-        # Payment not found - might be for a different system
-        return {"status": "ignored", "reason": "payment not found"}
-
-    # Update provider payment ID if we have it
-    if result.provider_payment_id and not payment.provider_payment_id:
-        payment_repo.set_provider_ids(
-            payment_id=payment.id,  # type: ignore[arg-type]
-            provider_payment_id=result.provider_payment_id,
-        )
-
-    # Update payment status
-    audit_service = AuditService(db)
-    webhook_service = WebhookService(db)
-    old_status = str(payment.status)
-    if result.status == "succeeded":
-        payment_repo.mark_succeeded(payment.id)  # type: ignore[arg-type]
-
-        audit_service.log_status_change(
-            resource_type="payment",
-            resource_id=payment.id,  # type: ignore[arg-type]
-            organization_id=payment.organization_id,  # type: ignore[arg-type]
-            old_status=old_status,
-            new_status="succeeded",
-            actor_type="webhook",
-        )
-
-        # Record settlement and auto-mark invoice as paid if fully settled
-        _record_settlement_and_maybe_mark_paid(
-            db,
-            invoice_id=payment.invoice_id,  # type: ignore[arg-type]
-            settlement_type=SettlementType.PAYMENT,
-            source_id=payment.id,  # type: ignore[arg-type]
-            amount_cents=float(payment.amount_cents),
-        )
-
-        webhook_service.send_webhook(
-            webhook_type="payment.succeeded",
-            object_type="payment",
-            object_id=payment.id,  # type: ignore[arg-type]
-            payload={"payment_id": str(payment.id)},
-        )
-
-    elif result.status == "failed":
-        payment_repo.mark_failed(payment.id, result.failure_reason)  # type: ignore[arg-type]
-
-        audit_service.log_status_change(
-            resource_type="payment",
-            resource_id=payment.id,  # type: ignore[arg-type]
-            organization_id=payment.organization_id,  # type: ignore[arg-type]
-            old_status=old_status,
-            new_status="failed",
-            actor_type="webhook",
-        )
-
-        webhook_service.send_webhook(
-            webhook_type="payment.failed",
-            object_type="payment",
-            object_id=payment.id,  # type: ignore[arg-type]
-            payload={"payment_id": str(payment.id)},
-        )
-
-    elif result.status == "canceled":
-        payment_repo.mark_canceled(payment.id)  # type: ignore[arg-type]
+    # Store the event and acknowledge it; the worker applies it
+    inbox = PaymentWebhookInbox(db)
+    event = inbox.receive(provider, payload, payload_json)
+    if not event.created:
+        return {"status": "duplicate", "event_type": event.event_type}
 
-        audit_service.log_status_change(
-            resource_type="payment",
-            resource_id=payment.id,  # type: ignore[arg-type]
-            organization_id=payment.organization_id,  # type: ignore[arg-type]
-            old_status=old_status,
-            new_status="canceled",
-            actor_type="webhook",
-        )
+    try:
+        await enqueue_process_payment_webhook_events()
+    except Exception:
+        logger.warning("Task queue unavailable, processing payment webhook inline", exc_info=True)
+        inbox.process_ordering_key(event.ordering_key)
 
-    return {"status": "processed", "event_type": result.event_type}
+    return {"status": "accepted", "event_type": event.event_type}
 
 
 @router.post(
@@ -503,7 +407,7 @@ async def mark_payment_paid(
         raise HTTPException(status_code=404, detail="Payment not found")
 
     # Record settlement and auto-mark invoice as paid if fully settled
-    _record_settlement_and_maybe_mark_paid(
+    record_settlement_and_maybe_mark_paid(
         db,
         invoice_id=payment.invoice_id,  # type: ignore[arg-type]
         settlement_type=SettlementType.PAYMENT,
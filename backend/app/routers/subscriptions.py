@@ -271,7 +271,7 @@ async def create_subscription(
     organization_id: UUID = Depends(get_current_organization),
 ) -> Subscription | JSONResponse:
     """Create a new subscription."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -318,7 +318,7 @@ async def create_subscription(
 
     if isinstance(idempotency, IdempotencyResult):
         body = SubscriptionResponse.model_validate(subscription).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return subscription
 
@@ -93,7 +93,7 @@ async def create_usage_alert(
     organization_id: UUID = Depends(get_current_organization),
 ) -> UsageAlert | JSONResponse:
     """Create a new usage alert for a subscription and metric."""
-    idempotency = check_idempotency(request, db, organization_id)
+    idempotency = await check_idempotency(request, db, organization_id)
     if isinstance(idempotency, JSONResponse):
         return idempotency
 
@@ -110,7 +110,7 @@ async def create_usage_alert(
 
     if isinstance(idempotency, IdempotencyResult):
         body = UsageAlertResponse.model_validate(alert).model_dump(mode="json")
-        record_idempotency_response(db, organization_id, idempotency.key, 201, body)
+        await record_idempotency_response(db, organization_id, idempotency.key, 201, body)
 
     return alert
 
@@ -1,6 +1,6 @@
 """Wallet API endpoints."""
 
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from decimal import Decimal
 from math import ceil
 from uuid import UUID
@@ -18,6 +18,8 @@ from app.schemas.wallet import (
     BalanceTimelinePoint,
     BalanceTimelineResponse,
     DepletionForecastResponse,
+    WalletBalanceHistoryResponse,
+    WalletBalancePoint,
     WalletCreate,
     WalletResponse,
     WalletTopUp,
@@ -27,6 +29,7 @@ from app.schemas.wallet import (
 )
 from app.schemas.wallet_transaction import WalletTransactionResponse
 from app.services.audit_service import AuditService
+from app.services.wallet_ledger_service import WalletLedgerService
 from app.services.wallet_service import WalletService
 
 router = APIRouter()
@@ -337,6 +340,62 @@ async def get_balance_timeline(
     return BalanceTimelineResponse(wallet_id=wallet_id, points=points)
 
 
+@router.get(
+    "/{wallet_id}/balance_history",
+    response_model=WalletBalanceHistoryResponse,
+    summary="Get wallet balance history",
+    responses={
+        400: {"description": "Invalid date range"},
+        401: {"description": "Unauthorized – invalid or missing API key"},
+        404: {"description": "Wallet not found"},
+    },
+)
+async def get_balance_history(
+    wallet_id: UUID,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    db: Session = Depends(get_db),
+    organization_id: UUID = Depends(get_current_organization),
+) -> WalletBalanceHistoryResponse:
+    """Get a wallet's opening and closing balances and its balance history over a range.
+
+    Defaults to the last 30 days. Points are the daily balance snapshots in
+    the range, then the closing balance; the balance only changes at points.
+    """
+    wallet_repo = WalletRepository(db)
+    wallet = wallet_repo.get_by_id(wallet_id, organization_id)
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    end = end_date or datetime.now(UTC)
+    start = start_date or end - timedelta(days=30)
+    try:
+        history = WalletLedgerService(db).balance_history(wallet_id, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    opening, closing = history.opening, history.closing
+    return WalletBalanceHistoryResponse(
+        wallet_id=wallet_id,
+        start_date=start,
+        end_date=end,
+        opening_balance_cents=opening.balance_cents,
+        opening_credits_balance=opening.credits_balance,
+        closing_balance_cents=closing.balance_cents,
+        closing_credits_balance=closing.credits_balance,
+        inbound_amount_cents=closing.inbound_amount_cents - opening.inbound_amount_cents,
+        outbound_amount_cents=closing.outbound_amount_cents - opening.outbound_amount_cents,
+        points=[
+            WalletBalancePoint(
+                as_of=point.as_of,
+                balance_cents=point.balance_cents,
+                credits_balance=point.credits_balance,
+            )
+            for point in history.points
+        ],
+    )
+
+
 @router.get(
     "/{wallet_id}/depletion_forecast",
     response_model=DepletionForecastResponse,
@@ -80,3 +80,19 @@ class CreditNoteResponse(BaseModel):
     voided_at: datetime | None = None
     created_at: datetime
     updated_at: datetime
+
+
+class BulkSendCreditNoteEmailRequest(BaseModel):
+    credit_note_ids: list[UUID] = Field(min_length=1)
+
+
+class BulkSendCreditNoteEmailResult(BaseModel):
+    credit_note_id: UUID
+    success: bool
+    error: str | None = None
+
+
+class BulkSendCreditNoteEmailResponse(BaseModel):
+    results: list[BulkSendCreditNoteEmailResult]
+    queued_count: int
+    failed_count: int
@@ -2,6 +2,7 @@
 
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Any
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -16,6 +17,10 @@ class DailyUsageCreate(BaseModel):
     usage_date: date
     usage_value: Decimal = Decimal("0")
     events_count: int = 0
+    sum_value: Decimal | None = None
+    max_value: Decimal | None = None
+    unique_values: list[Any] | None = None
+    rollup_watermark: datetime | None = None
 
 
 class DailyUsageResponse(BaseModel):
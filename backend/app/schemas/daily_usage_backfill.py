@@ -0,0 +1,62 @@
+"""Daily usage backfill schemas."""
+
+from datetime import date, datetime
+from typing import Self
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+
+class DailyUsageBackfillCreate(BaseModel):
+    """Schema for requesting a daily usage backfill.
+
+    Both dates are inclusive; omitting ``billable_metric_id`` recomputes every
+    metric of the organization.
+    """
+
+    start_date: date
+    end_date: date
+    billable_metric_id: UUID | None = None
+
+    @model_validator(mode="after")
+    def validate_date_range(self) -> Self:
+        """Validate end_date is not before start_date."""
+        if self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+
+class DailyUsageBackfillResponse(BaseModel):
+    """Schema for daily usage backfill response, with its progress."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    organization_id: UUID
+    billable_metric_id: UUID | None = None
+    start_date: date
+    end_date: date
+    status: str
+    total_days: int
+    completed_days: int
+    failed_days: int
+    record_count: int
+    progress: int
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+    created_at: datetime
+
+
+class DailyUsageBackfillShardResponse(BaseModel):
+    """Schema for one day of a daily usage backfill."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: UUID
+    usage_date: date
+    status: str
+    attempts: int
+    record_count: int | None = None
+    error_message: str | None = None
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
@@ -2,7 +2,8 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from pydantic_core import to_json
 
 
 class EventCreate(BaseModel):
@@ -12,6 +13,8 @@ class EventCreate(BaseModel):
     timestamp: datetime
     properties: dict[str, Any] = Field(default_factory=dict)
 
+    _properties_json: str | None = PrivateAttr(default=None)
+
     @field_validator("timestamp", mode="before")
     @classmethod
     def parse_timestamp(cls, v: Any) -> datetime:
@@ -25,6 +28,12 @@ class EventCreate(BaseModel):
                 pass
         raise ValueError("Invalid timestamp format. Use ISO 8601 format.")
 
+    def properties_json(self) -> str:
+        """Return ``properties`` as a JSON string, encoding it at most once."""
+        if self._properties_json is None:
+            self._properties_json = to_json(self.properties).decode()
+        return self._properties_json
+
 
 class EventBatchCreate(BaseModel):
     events: list[EventCreate] = Field(..., min_length=1, max_length=100)
@@ -48,6 +57,26 @@ class EventBatchResponse(BaseModel):
     events: list[EventResponse]
 
 
+class EventAcceptedResponse(BaseModel):
+    """Acknowledgement for events queued in asynchronous ingestion mode."""
+
+    accepted: int
+    transaction_ids: list[str]
+
+
+class EventStreamRejection(BaseModel):
+    line: int
+    reason: str
+
+
+class EventStreamResponse(BaseModel):
+    received: int
+    ingested: int
+    duplicates: int
+    rejected: int
+    rejections: list[EventStreamRejection]
+
+
 class EventVolumePoint(BaseModel):
     timestamp: str
     count: int
@@ -77,6 +77,22 @@ class BulkVoidResponse(BaseModel):
     failed_count: int
 
 
+class BulkSendInvoiceEmailRequest(BaseModel):
+    invoice_ids: list[UUID] = Field(min_length=1)
+
+
+class BulkSendInvoiceEmailResult(BaseModel):
+    invoice_id: UUID
+    success: bool
+    error: str | None = None
+
+
+class BulkSendInvoiceEmailResponse(BaseModel):
+    results: list[BulkSendInvoiceEmailResult]
+    queued_count: int
+    failed_count: int
+
+
 class SendReminderResponse(BaseModel):
     sent: bool
     invoice_id: UUID
@@ -67,6 +67,25 @@ class BalanceTimelineResponse(BaseModel):
     points: list[BalanceTimelinePoint]
 
 
+class WalletBalancePoint(BaseModel):
+    as_of: datetime
+    balance_cents: Decimal
+    credits_balance: Decimal
+
+
+class WalletBalanceHistoryResponse(BaseModel):
+    wallet_id: UUID
+    start_date: datetime
+    end_date: datetime
+    opening_balance_cents: Decimal
+    opening_credits_balance: Decimal
+    closing_balance_cents: Decimal
+    closing_credits_balance: Decimal
+    inbound_amount_cents: Decimal
+    outbound_amount_cents: Decimal
+    points: list[WalletBalancePoint]
+
+
 class DepletionForecastResponse(BaseModel):
     wallet_id: UUID
     current_balance_cents: Decimal
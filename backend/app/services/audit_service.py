@@ -12,6 +12,7 @@ class AuditService:
     """Service for recording audit trail entries."""
 
     def __init__(self, db: Session):
+        self.db = db
         self.repo = AuditLogRepository(db)
 
     def log_create(
@@ -97,7 +98,29 @@ class AuditService:
         actor_id: str | None = None,
     ) -> None:
         """Log a status change event."""
-        self.repo.create(
+        self.stage_status_change(
+            resource_type,
+            resource_id,
+            organization_id,
+            old_status,
+            new_status,
+            actor_type,
+            actor_id,
+        )
+        self.db.commit()
+
+    def stage_status_change(
+        self,
+        resource_type: str,
+        resource_id: UUID,
+        organization_id: UUID,
+        old_status: str,
+        new_status: str,
+        actor_type: str = "system",
+        actor_id: str | None = None,
+    ) -> None:
+        """Add a status change event to the session without committing."""
+        self.repo.add(
             organization_id=organization_id,
             resource_type=resource_type,
             resource_id=resource_id,
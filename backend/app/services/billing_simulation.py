@@ -0,0 +1,397 @@
+"""Dry-run billing simulation across an organization's active subscriptions.
+
+Prices the current billing period of every active subscription without
+persisting anything, optionally with hypothetical charge properties, to gauge
+the revenue impact of a pricing change.  The charge catalog is loaded once per
+run, usage is aggregated for a batch of customers per metric, and batches are
+spread over ``BXB_BILLING_SIMULATION_WORKERS`` threads with their own sessions.
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.billable_metric_filter import BillableMetricFilter
+from app.models.charge import ChargeModel
+from app.models.customer import Customer
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.repositories.billable_metric_repository import BillableMetricRepository
+from app.repositories.charge_filter_repository import ChargeFilterRepository
+from app.repositories.charge_repository import ChargeRepository
+from app.services.charge_models.factory import charge_pricing_key
+from app.services.subscription_dates import SubscriptionDatesService
+from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_snapshot import calculate_charge_amount
+
+# Customers aggregated together per metric query
+SIMULATION_BATCH_SIZE = 500
+
+SIMULATION_COLUMNS = [
+    "subscription_external_id",
+    "customer_external_id",
+    "plan_code",
+    "currency",
+    "billing_period_start",
+    "billing_period_end",
+    "charge_id",
+    "charge_filter_id",
+    "metric_code",
+    "charge_model",
+    "units",
+    "events_count",
+    "amount_cents",
+    "simulated_amount_cents",
+]
+
+
+@dataclass(frozen=True)
+class _PricedCharge:
+    """A charge (or charge filter) with its current and simulated pricing."""
+
+    charge_id: UUID
+    charge_filter_id: UUID | None
+    charge_model: ChargeModel
+    metric_code: str
+    filters: dict[str, str] | None
+    properties: dict[str, Any]
+    pricing_key: Hashable
+    simulated_properties: dict[str, Any] | None
+    simulated_pricing_key: Hashable | None
+
+
+def _simulated_pricing_key(
+    pricing_key: tuple[Any, ...], simulated_properties: dict[str, Any] | None
+) -> Hashable | None:
+    """Key compiled pricing by the simulated properties themselves.
+
+    Runs with the same overrides share compiled pricing; runs with different
+    overrides never do.
+    """
+    if simulated_properties is None:
+        return None
+    digest = hashlib.sha256(
+        json.dumps(simulated_properties, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return (*pricing_key, "simulation", digest)
+
+
+@dataclass(frozen=True)
+class _SimulatedSubscription:
+    external_id: str
+    external_customer_id: str
+    plan_id: UUID
+    plan_code: str
+    currency: str
+    period_start: datetime
+    period_end: datetime
+
+
+class BillingSimulationService:
+    """Preview invoice charges for every active subscription of an organization."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.charge_repo = ChargeRepository(db)
+        self.charge_filter_repo = ChargeFilterRepository(db)
+        self.metric_repo = BillableMetricRepository(db)
+        self.dates_service = SubscriptionDatesService()
+
+    def count_subscriptions(self, organization_id: UUID) -> int:
+        """Count the subscriptions a simulation would price."""
+        return (
+            self.db.query(Subscription)
+            .filter(
+                Subscription.organization_id == organization_id,
+                Subscription.status == SubscriptionStatus.ACTIVE.value,
+            )
+            .count()
+        )
+
+    def simulate(
+        self,
+        organization_id: UUID,
+        charge_overrides: dict[str, dict[str, Any]] | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ) -> Iterator[list[Any]]:
+        """Simulate the current billing period of all active subscriptions.
+
+        Args:
+            organization_id: Organization whose subscriptions are simulated.
+            charge_overrides: Hypothetical properties keyed by charge ID or
+                charge filter ID, merged over the stored properties.
+            on_progress: Called with (subscriptions_done, subscriptions_total)
+                after each batch.
+
+        Yields:
+            One row per charge (or charge filter) with usage, in
+            ``SIMULATION_COLUMNS`` order.
+
+        Raises:
+            ValueError: If an override is not a properties object.
+        """
+        overrides = charge_overrides or {}
+        for key, value in overrides.items():
+            if not isinstance(value, dict):
+                raise ValueError(f"Override for {key} must be an object of charge properties")
+
+        subscriptions = self._load_subscriptions(organization_id)
+        catalog = self._load_catalog({sub.plan_id for sub in subscriptions}, overrides)
+
+        # Subscriptions sharing a plan and period are aggregated together
+        groups: defaultdict[Hashable, list[_SimulatedSubscription]] = defaultdict(list)
+        for sub in subscriptions:
+            groups[(sub.plan_id, sub.period_start, sub.period_end)].append(sub)
+        batches = [
+            group[i : i + SIMULATION_BATCH_SIZE]
+            for group in groups.values()
+            for i in range(0, len(group), SIMULATION_BATCH_SIZE)
+        ]
+
+        total = len(subscriptions)
+        done = 0
+        workers = settings.BXB_BILLING_SIMULATION_WORKERS
+        if workers <= 1:
+            for batch in batches:
+                yield from self._simulate_batch(
+                    self.db, organization_id, batch, catalog[batch[0].plan_id]
+                )
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, total)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda batch: self._simulate_batch_in_session(
+                    organization_id, batch, catalog[batch[0].plan_id]
+                ),
+                batches,
+            )
+            for batch, rows in zip(batches, results, strict=True):
+                yield from rows
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, total)
+
+    def _load_subscriptions(self, organization_id: UUID) -> list[_SimulatedSubscription]:
+        """Load active subscriptions with their customer, plan and current period."""
+        rows = (
+            self.db.query(Subscription, Customer.external_id, Plan)
+            .join(Customer, Customer.id == Subscription.customer_id)
+            .join(Plan, Plan.id == Subscription.plan_id)
+            .filter(
+                Subscription.organization_id == organization_id,
+                Subscription.status == SubscriptionStatus.ACTIVE.value,
+            )
+            .order_by(Subscription.created_at)
+            .all()
+        )
+
+        subscriptions: list[_SimulatedSubscription] = []
+        for subscription, external_customer_id, plan in rows:
+            period_start, period_end = self.dates_service.calculate_billing_period(
+                subscription, str(plan.interval)
+            )
+            subscriptions.append(
+                _SimulatedSubscription(
+                    external_id=str(subscription.external_id),
+                    external_customer_id=str(external_customer_id),
+                    plan_id=UUID(str(plan.id)),
+                    plan_code=str(plan.code),
+                    currency=str(plan.currency),
+                    period_start=period_start,
+                    period_end=period_end,
+                )
+            )
+        return subscriptions
+
+    def _load_catalog(
+        self,
+        plan_ids: set[UUID],
+        overrides: dict[str, dict[str, Any]],
+    ) -> dict[UUID, list[_PricedCharge]]:
+        """Resolve each plan's charges, filters and metrics once for the run."""
+        catalog: dict[UUID, list[_PricedCharge]] = {}
+        for plan_id in plan_ids:
+            priced: list[_PricedCharge] = []
+            for charge in self.charge_repo.get_by_plan_id(plan_id):
+                metric = self.metric_repo.get_by_id(UUID(str(charge.billable_metric_id)))
+                if not metric:
+                    continue
+
+                charge_id = UUID(str(charge.id))
+                charge_model = ChargeModel(charge.charge_model)
+                base_properties: dict[str, Any] = (
+                    dict(charge.properties) if charge.properties else {}
+                )
+                charge_override = overrides.get(str(charge_id))
+
+                charge_filters = self.charge_filter_repo.get_by_charge_id(charge_id)
+                if not charge_filters:
+                    simulated_properties: dict[str, Any] | None = (
+                        {**base_properties, **charge_override}
+                        if charge_override is not None
+                        else None
+                    )
+                    priced.append(
+                        _PricedCharge(
+                            charge_id=charge_id,
+                            charge_filter_id=None,
+                            charge_model=charge_model,
+                            metric_code=str(metric.code),
+                            filters=None,
+                            properties=base_properties,
+                            pricing_key=charge_pricing_key(charge),
+                            simulated_properties=simulated_properties,
+                            simulated_pricing_key=_simulated_pricing_key(
+                                charge_pricing_key(charge), simulated_properties
+                            ),
+                        )
+                    )
+                    continue
+
+                for cf in charge_filters:
+                    filters = self._resolve_filters(UUID(str(cf.id)))
+                    if not filters:
+                        continue
+                    filter_properties: dict[str, Any] = dict(cf.properties) if cf.properties else {}
+                    filter_override = overrides.get(str(cf.id))
+                    simulated_properties = None
+                    if charge_override is not None or filter_override is not None:
+                        simulated_properties = {
+                            **base_properties,
+                            **(charge_override or {}),
+                            **filter_properties,
+                            **(filter_override or {}),
+                        }
+                    priced.append(
+                        _PricedCharge(
+                            charge_id=charge_id,
+                            charge_filter_id=UUID(str(cf.id)),
+                            charge_model=charge_model,
+                            metric_code=str(metric.code),
+                            filters=filters,
+                            properties={**base_properties, **filter_properties},
+                            pricing_key=charge_pricing_key(charge, cf),
+                            simulated_properties=simulated_properties,
+                            simulated_pricing_key=_simulated_pricing_key(
+                                charge_pricing_key(charge, cf), simulated_properties
+                            ),
+                        )
+                    )
+            catalog[plan_id] = priced
+        return catalog
+
+    def _resolve_filters(self, charge_filter_id: UUID) -> dict[str, str]:
+        """Map a charge filter's values to event property filters."""
+        filters: dict[str, str] = {}
+        for fv in self.charge_filter_repo.get_filter_values(charge_filter_id):
+            bmf = (
+                self.db.query(BillableMetricFilter)
+                .filter(BillableMetricFilter.id == fv.billable_metric_filter_id)
+                .first()
+            )
+            if bmf is None:
+                continue
+            filters[str(bmf.key)] = str(fv.value)
+        return filters
+
+    def _simulate_batch_in_session(
+        self,
+        organization_id: UUID,
+        batch: list[_SimulatedSubscription],
+        charges: list[_PricedCharge],
+    ) -> list[list[Any]]:
+        db = SessionLocal()
+        try:
+            return list(self._simulate_batch(db, organization_id, batch, charges))
+        finally:
+            db.close()
+
+    def _simulate_batch(
+        self,
+        db: Session,
+        organization_id: UUID,
+        batch: list[_SimulatedSubscription],
+        charges: list[_PricedCharge],
+    ) -> Iterator[list[Any]]:
+        """Price one batch of subscriptions sharing a plan and billing period."""
+        usage_service = UsageAggregationService(db)
+        period_start = batch[0].period_start
+        period_end = batch[0].period_end
+        customer_ids = list({sub.external_customer_id for sub in batch})
+
+        usage_by_charge = [
+            usage_service.aggregate_usage_for_customers(
+                external_customer_ids=customer_ids,
+                code=priced.metric_code,
+                from_timestamp=period_start,
+                to_timestamp=period_end,
+                organization_id=organization_id,
+                filters=priced.filters,
+            )
+            for priced in charges
+        ]
+
+        for sub in batch:
+            for priced, usage_results in zip(charges, usage_by_charge, strict=True):
+                usage = usage_results[sub.external_customer_id]
+                amount = calculate_charge_amount(
+                    db,
+                    charge_model=priced.charge_model,
+                    properties=priced.properties,
+                    usage=usage.value,
+                    external_customer_id=sub.external_customer_id,
+                    organization_id=organization_id,
+                    metric_code=priced.metric_code,
+                    period_start=period_start,
+                    period_end=period_end,
+                    filters=priced.filters,
+                    pricing_key=priced.pricing_key,
+                )
+                simulated_amount = amount
+                if priced.simulated_properties is not None:
+                    simulated_amount = calculate_charge_amount(
+                        db,
+                        charge_model=priced.charge_model,
+                        properties=priced.simulated_properties,
+                        usage=usage.value,
+                        external_customer_id=sub.external_customer_id,
+                        organization_id=organization_id,
+                        metric_code=priced.metric_code,
+                        period_start=period_start,
+                        period_end=period_end,
+                        filters=priced.filters,
+                        pricing_key=priced.simulated_pricing_key,
+                    )
+
+                if usage.events_count == 0 and amount == 0 and simulated_amount == 0:
+                    continue
+
+                yield [
+                    sub.external_id,
+                    sub.external_customer_id,
+                    sub.plan_code,
+                    sub.currency,
+                    period_start.isoformat(),
+                    period_end.isoformat(),
+                    str(priced.charge_id),
+                    str(priced.charge_filter_id) if priced.charge_filter_id else "",
+                    priced.metric_code,
+                    priced.charge_model.value,
+                    str(usage.value),
+                    usage.events_count,
+                    str(amount),
+                    str(simulated_amount),
+                ]
@@ -0,0 +1,258 @@
+"""Bulk rendering of invoice and credit note PDFs on a process pool.
+
+WeasyPrint is CPU-bound and holds the GIL, so rendering in threads keeps a
+single core busy.  ``BulkPdfRenderer`` builds documents in the calling
+process, which owns the database session, and renders them on a pool of
+``BXB_PDF_RENDER_PROCESSES`` processes (one per CPU core by default), each
+reusing its parsed stylesheets and fonts across documents.  Invoice PDFs go
+through the content-addressed invoice PDF storage: PDFs already stored are
+not rendered again, and new ones are stored for later downloads.  Output is
+written as a ZIP archive or as one file per document.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.credit_note import CreditNote
+from app.models.invoice import Invoice
+from app.repositories.billing_entity_repository import BillingEntityRepository
+from app.repositories.credit_note_item_repository import CreditNoteItemRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.invoice_repository import InvoiceRepository
+from app.repositories.organization_repository import OrganizationRepository
+from app.services.invoice_pdf_service import InvoicePdfService, invoice_pdf_path, store_invoice_pdf
+from app.services.pdf_service import PdfDocument, PdfService, render_pdf
+
+logger = logging.getLogger(__name__)
+
+# Documents in flight per pool process, bounding the rendered PDFs held in memory
+RENDER_QUEUE_PER_PROCESS = 4
+
+
+@dataclass(frozen=True)
+class BulkRenderStats:
+    """Outcome and throughput of a bulk render."""
+
+    rendered: int
+    reused: int
+    failed: int
+    elapsed_seconds: float
+
+    @property
+    def written(self) -> int:
+        """Documents written to the output."""
+        return self.rendered + self.reused
+
+    @property
+    def documents_per_second(self) -> float:
+        """Documents written per second of wall-clock time."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.written / self.elapsed_seconds
+
+
+@dataclass(frozen=True)
+class _RenderJob:
+    filename: str
+    document: PdfDocument
+    # Whether the PDF lives in the invoice PDF storage
+    stored: bool
+
+
+class _OutputWriter:
+    """Write PDFs into a ZIP archive, or as files in a directory."""
+
+    def __init__(self, output: Path, as_zip: bool):
+        self.output = output
+        self.archive: zipfile.ZipFile | None = None
+        if as_zip:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            # PDFs are already compressed
+            self.archive = zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED)
+        else:
+            output.mkdir(parents=True, exist_ok=True)
+
+    def write(self, filename: str, data: bytes) -> None:
+        if self.archive is not None:
+            self.archive.writestr(filename, data)
+        else:
+            (self.output / filename).write_bytes(data)
+
+    def __enter__(self) -> "_OutputWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if self.archive is not None:
+            self.archive.close()
+
+
+class BulkPdfRenderer:
+    """Render batches of invoice and credit note PDFs across CPU cores."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.pdf_service = PdfService()
+
+    def render_invoices(
+        self,
+        invoices: Iterable[Invoice],
+        output: Path,
+        as_zip: bool = True,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> BulkRenderStats:
+        """Render invoice PDFs into a ZIP archive or a directory.
+
+        Args:
+            invoices: Finalized or paid invoices to render.
+            output: Path of the ZIP archive, or of the directory to write to.
+            as_zip: Write a ZIP archive rather than one file per invoice.
+            on_progress: Called with the number of documents processed so far.
+
+        Returns:
+            Counts of rendered, reused (already stored) and failed PDFs.
+        """
+        invoice_pdf_service = InvoicePdfService(self.db)
+        jobs = (
+            _RenderJob(
+                filename=f"invoice_{invoice.invoice_number}.pdf",
+                document=invoice_pdf_service.document(invoice),
+                stored=True,
+            )
+            for invoice in invoices
+        )
+        return self._render(jobs, output, as_zip, on_progress)
+
+    def render_credit_notes(
+        self,
+        credit_notes: Iterable[CreditNote],
+        output: Path,
+        as_zip: bool = True,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> BulkRenderStats:
+        """Render credit note PDFs into a ZIP archive or a directory.
+
+        Args:
+            credit_notes: Finalized credit notes to render.
+            output: Path of the ZIP archive, or of the directory to write to.
+            as_zip: Write a ZIP archive rather than one file per credit note.
+            on_progress: Called with the number of documents processed so far.
+
+        Returns:
+            Counts of rendered and failed PDFs.
+        """
+        jobs = (
+            _RenderJob(
+                filename=f"credit_note_{credit_note.number}.pdf",
+                document=self._credit_note_document(credit_note),
+                stored=False,
+            )
+            for credit_note in credit_notes
+        )
+        return self._render(jobs, output, as_zip, on_progress)
+
+    def _credit_note_document(self, credit_note: CreditNote) -> PdfDocument:
+        customer = CustomerRepository(self.db).get_by_id(credit_note.customer_id)  # type: ignore[arg-type]
+        organization = OrganizationRepository(self.db).get_by_id(
+            credit_note.organization_id  # type: ignore[arg-type]
+        )
+        billing_entity = None
+        invoice = InvoiceRepository(self.db).get_by_id(credit_note.invoice_id)  # type: ignore[arg-type]
+        if invoice and invoice.billing_entity_id:
+            billing_entity = BillingEntityRepository(self.db).get_by_id(
+                invoice.billing_entity_id  # type: ignore[arg-type]
+            )
+        items = CreditNoteItemRepository(self.db).get_by_credit_note_id(UUID(str(credit_note.id)))
+        return self.pdf_service.credit_note_document(
+            credit_note=credit_note,
+            items=items,
+            customer=customer,  # type: ignore[arg-type]
+            organization=organization,  # type: ignore[arg-type]
+            billing_entity=billing_entity,
+        )
+
+    def _render(
+        self,
+        jobs: Iterator[_RenderJob],
+        output: Path,
+        as_zip: bool,
+        on_progress: Callable[[int], None] | None,
+    ) -> BulkRenderStats:
+        """Render jobs on the process pool, writing results in job order.
+
+        Documents are built lazily while earlier ones render, and at most
+        ``RENDER_QUEUE_PER_PROCESS`` per process are in flight at a time.
+        """
+        started = time.monotonic()
+        processes = settings.BXB_PDF_RENDER_PROCESSES or os.cpu_count() or 1
+        counts = {"rendered": 0, "reused": 0, "failed": 0}
+        pending: deque[tuple[_RenderJob, Future[bytes] | bytes]] = deque()
+
+        def write_next(writer: _OutputWriter) -> None:
+            job, result = pending.popleft()
+            if isinstance(result, bytes):
+                writer.write(job.filename, result)
+                counts["reused"] += 1
+            else:
+                try:
+                    data = result.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception:
+                    logger.exception("Failed to render %s", job.filename)
+                    counts["failed"] += 1
+                else:
+                    if job.stored:
+                        store_invoice_pdf(job.document.content_key, data)
+                    writer.write(job.filename, data)
+                    counts["rendered"] += 1
+            if on_progress:
+                on_progress(sum(counts.values()))
+
+        # Spawned workers start clean, without the parent's connections and threads
+        with (
+            _OutputWriter(output, as_zip) as writer,
+            ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+            ) as executor,
+        ):
+            for job in jobs:
+                stored_path = invoice_pdf_path(job.document.content_key) if job.stored else None
+                if stored_path is not None and stored_path.exists():
+                    pending.append((job, stored_path.read_bytes()))
+                else:
+                    pending.append((job, executor.submit(render_pdf, job.document)))
+                while len(pending) > processes * RENDER_QUEUE_PER_PROCESS:
+                    write_next(writer)
+            while pending:
+                write_next(writer)
+
+        stats = BulkRenderStats(elapsed_seconds=time.monotonic() - started, **counts)
+        logger.info(
+            "Bulk rendered %d PDFs (%d reused, %d failed) in %.1fs on %d processes: %.1f/s",
+            stats.written,
+            stats.reused,
+            stats.failed,
+            stats.elapsed_seconds,
+            processes,
+            stats.documents_per_second,
+        )
+        return stats
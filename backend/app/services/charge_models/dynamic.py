@@ -1,9 +1,18 @@
+from collections.abc import Iterable
 from decimal import Decimal
 from typing import Any
 
 
+def price_fields(properties: dict[str, Any]) -> tuple[str, str]:
+    """Return the (price_field, quantity_field) event property names."""
+    return (
+        str(properties.get("price_field", "unit_price")),
+        str(properties.get("quantity_field", "quantity")),
+    )
+
+
 def calculate(
-    events: list[dict[str, Any]],
+    events: Iterable[dict[str, Any]],
     properties: dict[str, Any],
 ) -> Decimal:
     """Dynamic charge: pricing derived from event properties.
@@ -16,8 +25,7 @@ def calculate(
     Returns:
         Sum of (price * quantity) across all events.
     """
-    price_field = str(properties.get("price_field", "unit_price"))
-    quantity_field = str(properties.get("quantity_field", "quantity"))
+    price_field, quantity_field = price_fields(properties)
 
     total = Decimal(0)
     for event in events:
@@ -1,7 +1,11 @@
-from collections.abc import Callable
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from decimal import Decimal
+from typing import Any
 
-from app.models.charge import ChargeModel
+from app.models.charge import Charge, ChargeModel
+from app.models.charge_filter import ChargeFilter
 from app.services.charge_models import (
     custom,
     dynamic,
@@ -31,6 +35,75 @@ _CALCULATORS: dict[ChargeModel, CalculatorFn] = {
     ChargeModel.DYNAMIC: dynamic.calculate,
 }
 
+# Models whose properties compile into an immutable pricing object exposing
+# ``calculate`` with the calculator's signature minus ``properties``
+_COMPILERS: dict[ChargeModel, Callable[[dict[str, Any]], Any]] = {
+    ChargeModel.GRADUATED: graduated.compile_pricing,
+    ChargeModel.VOLUME: volume.compile_pricing,
+    ChargeModel.PACKAGE: package.compile_pricing,
+    ChargeModel.PERCENTAGE: percentage.compile_pricing,
+    ChargeModel.GRADUATED_PERCENTAGE: graduated_percentage.compile_pricing,
+}
+
+_COMPILED_CACHE_SIZE = 4096
+_compiled_cache: OrderedDict[tuple[ChargeModel, Hashable], Any] = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def charge_pricing_key(
+    charge: Charge, charge_filter: ChargeFilter | None = None
+) -> tuple[Any, ...]:
+    """Identify the pricing properties of a charge, optionally overridden by a filter.
+
+    Includes ``updated_at`` so editing a charge or filter invalidates its
+    compiled pricing.
+    """
+    key: tuple[Any, ...] = (str(charge.id), charge.updated_at)
+    if charge_filter is not None:
+        key += (str(charge_filter.id), charge_filter.updated_at)
+    return key
+
+
+def _get_compiled_pricing(
+    model: ChargeModel, pricing_key: Hashable, properties: dict[str, Any]
+) -> Any:
+    cache_key = (model, pricing_key)
+    with _compiled_cache_lock:
+        pricing = _compiled_cache.get(cache_key)
+        if pricing is not None:
+            _compiled_cache.move_to_end(cache_key)
+            return pricing
+
+    pricing = _COMPILERS[model](properties)
+    with _compiled_cache_lock:
+        _compiled_cache[cache_key] = pricing
+        if len(_compiled_cache) > _COMPILED_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return pricing
+
+
+def clear_compiled_pricing_cache() -> None:
+    with _compiled_cache_lock:
+        _compiled_cache.clear()
+
+
+def get_charge_calculator(
+    model: ChargeModel, pricing_key: Hashable | None = None
+) -> CalculatorFn | None:
+    """Return the calculator for a charge model.
+
+    With a ``pricing_key`` (see ``charge_pricing_key``), tiered and
+    percentage models compile ``properties`` on first use and reuse the
+    compiled pricing for later calls with the same key.  Callers must pass
+    the same properties for a given key.
+    """
+    calculator = _CALCULATORS.get(model)
+    if calculator is None or pricing_key is None or model not in _COMPILERS:
+        return calculator
+
+    def compiled_calculator(*args: Any, properties: dict[str, Any], **kwargs: Any) -> Decimal:
+        pricing = _get_compiled_pricing(model, pricing_key, properties)
+        result: Decimal = pricing.calculate(*args, **kwargs)
+        return result
 
-def get_charge_calculator(model: ChargeModel) -> CalculatorFn | None:
-    return _CALCULATORS.get(model)
+    return compiled_calculator
@@ -1,62 +1,108 @@
+from bisect import bisect_left
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any
 
 
-def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
+@dataclass(frozen=True)
+class GraduatedPricing:
+    """Graduated tiers compiled for O(log n) evaluation.
+
+    ``boundaries[i]`` is the cumulative number of units covered by tiers
+    ``0..i`` and ``prefix_totals[i]`` the cost of filling tiers ``0..i-1``
+    completely, so a usage only prices the tier it ends in.
+    """
+
+    boundaries: tuple[Decimal, ...] = ()
+    unit_prices: tuple[Decimal, ...] = ()
+    flat_amounts: tuple[Decimal, ...] = ()
+    prefix_totals: tuple[Decimal, ...] = ()
+
+    @classmethod
+    def from_tiers(cls, tiers: list[tuple[Decimal, Decimal, Decimal]]) -> "GraduatedPricing":
+        """Build from ordered (capacity, unit_price, flat_amount) tiers.
+
+        An infinite capacity makes the tier open-ended; later tiers are
+        unreachable and dropped.
+        """
+        boundaries: list[Decimal] = []
+        prefix_totals: list[Decimal] = []
+        covered = Decimal(0)
+        total = Decimal(0)
+        for capacity, unit_price, flat in tiers:
+            prefix_totals.append(total)
+            covered += capacity
+            boundaries.append(covered)
+            if capacity.is_infinite():
+                break
+            total += capacity * unit_price + flat
+        kept = len(boundaries)
+        return cls(
+            boundaries=tuple(boundaries),
+            unit_prices=tuple(t[1] for t in tiers[:kept]),
+            flat_amounts=tuple(t[2] for t in tiers[:kept]),
+            prefix_totals=(*prefix_totals, total),
+        )
+
+    def calculate(self, units: Decimal) -> Decimal:
+        if units <= 0 or not self.boundaries:
+            return Decimal(0)
+        i = bisect_left(self.boundaries, units)
+        if i == len(self.boundaries):
+            # Usage beyond the last bounded tier is not billed
+            return self.prefix_totals[-1]
+        previous = self.boundaries[i - 1] if i else Decimal(0)
+        return (
+            self.prefix_totals[i] + (units - previous) * self.unit_prices[i] + self.flat_amounts[i]
+        )
+
+
+def compile_pricing(properties: dict[str, Any]) -> GraduatedPricing:
     ranges = properties.get("graduated_ranges", [])
     if ranges:
-        return _calculate_lago_format(units, ranges)
+        return _compile_lago_format(ranges)
 
     tiers = properties.get("tiers", [])
     if tiers:
-        return _calculate_bxb_format(units, tiers)
+        return _compile_bxb_format(tiers)
 
-    return Decimal(0)
+    return GraduatedPricing()
 
 
-def _calculate_lago_format(units: Decimal, ranges: list[dict[str, Any]]) -> Decimal:
-    total = Decimal(0)
-    remaining = units
+def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    return compile_pricing(properties).calculate(units)
 
-    for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
-        if remaining <= 0:
-            break
 
+def _compile_lago_format(ranges: list[dict[str, Any]]) -> GraduatedPricing:
+    tiers: list[tuple[Decimal, Decimal, Decimal]] = []
+    for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
         from_value = Decimal(str(r.get("from_value", 0)))
         to_value = r.get("to_value")
+        capacity = (
+            Decimal("Infinity") if to_value is None else Decimal(str(to_value)) - from_value + 1
+        )
+        # Empty or inverted ranges never bill anything
+        if capacity <= 0:
+            continue
         per_unit = Decimal(str(r.get("per_unit_amount", 0)))
         flat = Decimal(str(r.get("flat_amount", 0)))
-
-        tier_capacity = remaining if to_value is None else Decimal(str(to_value)) - from_value + 1
-
-        units_in_tier = min(remaining, tier_capacity)
-        if units_in_tier <= 0:
-            continue
-
-        total += units_in_tier * per_unit + flat
-        remaining -= units_in_tier
-
-    return total
+        tiers.append((capacity, per_unit, flat))
+        if to_value is None:
+            break
+    return GraduatedPricing.from_tiers(tiers)
 
 
-def _calculate_bxb_format(units: Decimal, tiers: list[dict[str, Any]]) -> Decimal:
-    total = Decimal(0)
-    remaining = units
+def _compile_bxb_format(tiers: list[dict[str, Any]]) -> GraduatedPricing:
+    compiled: list[tuple[Decimal, Decimal, Decimal]] = []
     prev_limit = Decimal(0)
-
     for tier in sorted(tiers, key=lambda t: t.get("up_to", float("inf"))):
-        if remaining <= 0:
-            break
-
         up_to = Decimal(str(tier.get("up_to", float("inf"))))
-        tier_price = Decimal(str(tier.get("unit_price", 0)))
-
-        tier_usage = min(remaining, up_to - prev_limit)
-        if tier_usage <= 0:
+        capacity = up_to - prev_limit
+        # A tier that does not extend past the previous one ends the schedule
+        if capacity <= 0:
+            break
+        compiled.append((capacity, Decimal(str(tier.get("unit_price", 0))), Decimal(0)))
+        if up_to.is_infinite():
             break
-
-        total += tier_usage * tier_price
-        remaining -= tier_usage
         prev_limit = up_to
-
-    return total
+    return GraduatedPricing.from_tiers(compiled)
@@ -1,34 +1,38 @@
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any
 
+from app.services.charge_models.graduated import GraduatedPricing
 
-def calculate(total_amount: Decimal, properties: dict[str, Any]) -> Decimal:
-    ranges = properties.get("graduated_percentage_ranges", [])
-    if not ranges:
-        return Decimal(0)
 
-    total = Decimal(0)
-    remaining = total_amount
+@dataclass(frozen=True)
+class GraduatedPercentagePricing:
+    """Percentage ranges compiled as graduated tiers priced per unit of amount."""
 
-    for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
-        if remaining <= 0:
-            break
+    tiers: GraduatedPricing
+
+    def calculate(self, total_amount: Decimal) -> Decimal:
+        return self.tiers.calculate(total_amount)
+
+
+def compile_pricing(properties: dict[str, Any]) -> GraduatedPercentagePricing:
+    ranges = properties.get("graduated_percentage_ranges", [])
 
+    tiers: list[tuple[Decimal, Decimal, Decimal]] = []
+    for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
         from_value = Decimal(str(r.get("from_value", 0)))
         to_value = r.get("to_value")
+        capacity = Decimal("Infinity") if to_value is None else Decimal(str(to_value)) - from_value
+        if capacity <= 0:
+            continue
         rate = Decimal(str(r.get("rate", 0)))
         flat = Decimal(str(r.get("flat_amount", 0)))
-
+        tiers.append((capacity, rate / Decimal(100), flat))
         if to_value is None:
-            portion = remaining
-        else:
-            tier_capacity = Decimal(str(to_value)) - from_value
-            portion = min(remaining, tier_capacity)
+            break
 
-        if portion <= 0:
-            continue
+    return GraduatedPercentagePricing(GraduatedPricing.from_tiers(tiers))
 
-        total += portion * (rate / Decimal(100)) + flat
-        remaining -= portion
 
-    return total
+def calculate(total_amount: Decimal, properties: dict[str, Any]) -> Decimal:
+    return compile_pricing(properties).calculate(total_amount)
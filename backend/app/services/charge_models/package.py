@@ -1,16 +1,31 @@
 import math
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any
 
 
-def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
-    amount = Decimal(str(properties.get("amount", properties.get("unit_price", 0))))
-    package_size = Decimal(str(properties.get("package_size", 1)))
-    free_units = Decimal(str(properties.get("free_units", 0)))
+@dataclass(frozen=True)
+class PackagePricing:
+    amount: Decimal
+    package_size: Decimal
+    free_units: Decimal
+
+    def calculate(self, units: Decimal) -> Decimal:
+        billable = max(Decimal(0), units - self.free_units)
+        if billable == 0:
+            return Decimal(0)
+
+        packages = Decimal(math.ceil(billable / self.package_size))
+        return packages * self.amount
 
-    billable = max(Decimal(0), units - free_units)
-    if billable == 0:
-        return Decimal(0)
 
-    packages = Decimal(math.ceil(billable / package_size))
-    return packages * amount
+def compile_pricing(properties: dict[str, Any]) -> PackagePricing:
+    return PackagePricing(
+        amount=Decimal(str(properties.get("amount", properties.get("unit_price", 0)))),
+        package_size=Decimal(str(properties.get("package_size", 1))),
+        free_units=Decimal(str(properties.get("free_units", 0))),
+    )
+
+
+def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    return compile_pricing(properties).calculate(units)
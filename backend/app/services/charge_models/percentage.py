@@ -1,37 +1,59 @@
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any
 
 
-def calculate(
-    units: Decimal,
-    properties: dict[str, Any],
-    total_amount: Decimal = Decimal("0"),
-    event_count: int = 0,
-) -> Decimal:
-    rate = Decimal(str(properties.get("rate", properties.get("percentage", 0))))
-    fixed_amount = Decimal(str(properties.get("fixed_amount", 0)))
-    free_events = int(properties.get("free_units_per_events", 0))
-    per_tx_min = properties.get("per_transaction_min_amount")
-    per_tx_max = properties.get("per_transaction_max_amount")
+@dataclass(frozen=True)
+class PercentagePricing:
+    rate: Decimal
+    fixed_amount: Decimal
+    free_events: int
+    per_transaction_min: Decimal | None
+    per_transaction_max: Decimal | None
+
+    def calculate(
+        self,
+        units: Decimal,
+        total_amount: Decimal = Decimal("0"),
+        event_count: int = 0,
+    ) -> Decimal:
+        # Calculate percentage fee on total amount
+        percentage_fee = total_amount * (self.rate / Decimal(100))
+
+        # Calculate fixed fees for billable events
+        billable_events = max(0, event_count - self.free_events)
+        fixed_fees = Decimal(str(billable_events)) * self.fixed_amount
 
-    # Calculate percentage fee on total amount
-    percentage_fee = total_amount * (rate / Decimal(100))
+        total = percentage_fee + fixed_fees
 
-    # Calculate fixed fees for billable events
-    billable_events = max(0, event_count - free_events)
-    fixed_fees = Decimal(str(billable_events)) * fixed_amount
+        # Apply per-transaction min/max bounds
+        if self.per_transaction_min is not None and total < self.per_transaction_min:
+            total = self.per_transaction_min
 
-    total = percentage_fee + fixed_fees
+        if self.per_transaction_max is not None and total > self.per_transaction_max:
+            total = self.per_transaction_max
 
-    # Apply per-transaction min/max bounds
-    if per_tx_min is not None:
-        min_amount = Decimal(str(per_tx_min))
-        if total < min_amount:
-            total = min_amount
+        return total
 
-    if per_tx_max is not None:
-        max_amount = Decimal(str(per_tx_max))
-        if total > max_amount:
-            total = max_amount
 
-    return total
+def compile_pricing(properties: dict[str, Any]) -> PercentagePricing:
+    per_tx_min = properties.get("per_transaction_min_amount")
+    per_tx_max = properties.get("per_transaction_max_amount")
+    return PercentagePricing(
+        rate=Decimal(str(properties.get("rate", properties.get("percentage", 0)))),
+        fixed_amount=Decimal(str(properties.get("fixed_amount", 0))),
+        free_events=int(properties.get("free_units_per_events", 0)),
+        per_transaction_min=Decimal(str(per_tx_min)) if per_tx_min is not None else None,
+        per_transaction_max=Decimal(str(per_tx_max)) if per_tx_max is not None else None,
+    )
+
+
+def calculate(
+    units: Decimal,
+    properties: dict[str, Any],
+    total_amount: Decimal = Decimal("0"),
+    event_count: int = 0,
+) -> Decimal:
+    return compile_pricing(properties).calculate(
+        units, total_amount=total_amount, event_count=event_count
+    )
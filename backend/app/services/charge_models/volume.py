@@ -1,44 +1,79 @@
+from bisect import bisect_left
+from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any
 
 
-def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
+@dataclass(frozen=True)
+class VolumePricing:
+    """Volume tiers compiled for O(log n) evaluation.
+
+    All units are priced at the first tier whose upper bound covers the
+    usage; ``bounds`` holds the running maximum of the upper bounds so the
+    tier can be found by bisection.  Usage above every bound uses the last
+    tier.
+    """
+
+    bounds: tuple[Decimal, ...] = ()
+    unit_prices: tuple[Decimal, ...] = ()
+    flat_amounts: tuple[Decimal, ...] = ()
+
+    @classmethod
+    def from_tiers(cls, tiers: list[tuple[Decimal, Decimal, Decimal]]) -> "VolumePricing":
+        """Build from ordered (upper_bound, unit_price, flat_amount) tiers."""
+        bounds: list[Decimal] = []
+        for upper_bound, _, _ in tiers:
+            bounds.append(max(bounds[-1], upper_bound) if bounds else upper_bound)
+        return cls(
+            bounds=tuple(bounds),
+            unit_prices=tuple(t[1] for t in tiers),
+            flat_amounts=tuple(t[2] for t in tiers),
+        )
+
+    def calculate(self, units: Decimal) -> Decimal:
+        if not self.bounds:
+            return Decimal(0)
+        i = min(bisect_left(self.bounds, units), len(self.bounds) - 1)
+        return units * self.unit_prices[i] + self.flat_amounts[i]
+
+
+def compile_pricing(properties: dict[str, Any]) -> VolumePricing:
     ranges = properties.get("volume_ranges", [])
     if ranges:
-        return _calculate_lago_format(units, ranges)
+        return _compile_lago_format(ranges)
 
     tiers = properties.get("tiers", [])
     if tiers:
-        return _calculate_bxb_format(units, tiers)
+        return _compile_bxb_format(tiers)
+
+    return VolumePricing()
+
 
-    return Decimal(0)
+def calculate(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    return compile_pricing(properties).calculate(units)
 
 
-def _calculate_lago_format(units: Decimal, ranges: list[dict[str, Any]]) -> Decimal:
+def _compile_lago_format(ranges: list[dict[str, Any]]) -> VolumePricing:
+    tiers: list[tuple[Decimal, Decimal, Decimal]] = []
     for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
         to_value = r.get("to_value")
-        if to_value is None or units <= Decimal(str(to_value)):
-            per_unit = Decimal(str(r.get("per_unit_amount", 0)))
-            flat = Decimal(str(r.get("flat_amount", 0)))
-            return units * per_unit + flat
-
-    # If exceeds all tiers, use the last tier
-    last = sorted(ranges, key=lambda x: x.get("from_value", 0))[-1]
-    per_unit = Decimal(str(last.get("per_unit_amount", 0)))
-    flat = Decimal(str(last.get("flat_amount", 0)))
-    return units * per_unit + flat
-
-
-def _calculate_bxb_format(units: Decimal, tiers: list[dict[str, Any]]) -> Decimal:
-    for tier in sorted(tiers, key=lambda t: t.get("up_to", float("inf"))):
-        up_to = Decimal(str(tier.get("up_to", float("inf"))))
-        if units <= up_to:
-            tier_price = Decimal(str(tier.get("unit_price", 0)))
-            flat = Decimal(str(tier.get("flat_amount", 0)))
-            return units * tier_price + flat
-
-    # If exceeds all tiers, use the last tier
-    last = sorted(tiers, key=lambda t: t.get("up_to", float("inf")))[-1]
-    tier_price = Decimal(str(last.get("unit_price", 0)))
-    flat = Decimal(str(last.get("flat_amount", 0)))
-    return units * tier_price + flat
+        upper_bound = Decimal("Infinity") if to_value is None else Decimal(str(to_value))
+        per_unit = Decimal(str(r.get("per_unit_amount", 0)))
+        flat = Decimal(str(r.get("flat_amount", 0)))
+        tiers.append((upper_bound, per_unit, flat))
+        # An open-ended range matches any usage; later ranges are unreachable
+        if to_value is None:
+            break
+    return VolumePricing.from_tiers(tiers)
+
+
+def _compile_bxb_format(tiers: list[dict[str, Any]]) -> VolumePricing:
+    compiled = [
+        (
+            Decimal(str(tier.get("up_to", float("inf")))),
+            Decimal(str(tier.get("unit_price", 0))),
+            Decimal(str(tier.get("flat_amount", 0))),
+        )
+        for tier in sorted(tiers, key=lambda t: t.get("up_to", float("inf")))
+    ]
+    return VolumePricing.from_tiers(compiled)
@@ -6,34 +6,84 @@ queries against ClickHouse for high-volume event workloads.
 
 import json
 import logging
-from datetime import datetime
+from collections.abc import Sequence
+from datetime import UTC, date, datetime, time, timedelta
 from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
-from app.core.clickhouse import EVENTS_RAW_TABLE, get_clickhouse_client
+from app.core.clickhouse import (
+    DAILY_STATE_COLUMNS,
+    EVENTS_DAILY_TABLE,
+    EVENTS_RAW_TABLE,
+    daily_rollup_ready,
+    get_clickhouse_client,
+)
 from app.models.billable_metric import AggregationType
-from app.services.usage_aggregation import UsageResult, _evaluate_expression, _is_numeric
+from app.services.expression import CompiledExpression, compile_expression
+from app.services.usage_aggregation import UsageResult
 
 logger = logging.getLogger(__name__)
 
-# Base WHERE clause shared by all aggregation queries
-_BASE_WHERE = (
+# WHERE clause for one customer's events of a metric, without a time range
+_CUSTOMER_WHERE = (
     "organization_id = {org_id:String}"
     " AND code = {code:String}"
     " AND external_customer_id = {cust_id:String}"
-    " AND timestamp >= {from_ts:DateTime64(3)}"
-    " AND timestamp < {to_ts:DateTime64(3)}"
 )
 
+# WHERE clause for several customers' events of a metric, without a time range
+_CUSTOMERS_WHERE = (
+    "organization_id = {org_id:String}"
+    " AND code = {code:String}"
+    " AND external_customer_id IN {cust_ids:Array(String)}"
+)
+
+_PERIOD_WHERE = " AND timestamp >= {from_ts:DateTime64(3)} AND timestamp < {to_ts:DateTime64(3)}"
+
+# Base WHERE clause shared by all aggregation queries
+_BASE_WHERE = f"{_CUSTOMER_WHERE}{_PERIOD_WHERE}"
+
+# (raw_select, rollup_select) pairs for the aggregations that reduce to a
+# single row of (value, events_count); see _aggregate_row.
+_ROW_AGGREGATES: dict[AggregationType, tuple[str, str]] = {
+    AggregationType.COUNT: (
+        "count(), count()",
+        "countMerge(events_count), countMerge(events_count)",
+    ),
+    AggregationType.SUM: (
+        "coalesce(sum(decimal_value), 0), count()",
+        "coalesce(sumMerge(sum_value), 0), countMerge(events_count)",
+    ),
+    AggregationType.MAX: (
+        "coalesce(max(decimal_value), 0), count()",
+        "coalesce(maxMerge(max_value), 0), countMerge(events_count)",
+    ),
+    AggregationType.UNIQUE_COUNT: (
+        "uniq(value), count(value)",
+        "uniqMerge(unique_values), countMerge(values_count)",
+    ),
+    AggregationType.LATEST: (
+        "argMax(ifNull(decimal_value, toDecimal128(0, 26)), timestamp), count()",
+        "argMaxMerge(latest_value), countMerge(events_count)",
+    ),
+}
+
 
 def _build_filter_clause(filters: dict[str, str] | None) -> str:
-    """Build additional WHERE clause for property-based filters."""
+    """Build additional WHERE clause for property-based filters.
+
+    Filters read the ``properties_map`` column, whose bloom filter indexes
+    let ClickHouse skip granules without a matching key and value.
+    """
     if not filters:
         return ""
     clauses = []
     for i, (_key, _value) in enumerate(filters.items()):
-        clauses.append(f" AND JSONExtractString(properties, {{fk{i}:String}}) = {{fv{i}:String}}")
+        clauses.append(
+            f" AND mapContains(properties_map, {{fk{i}:String}})"
+            f" AND properties_map[{{fk{i}:String}}] = {{fv{i}:String}}"
+        )
     return "".join(clauses)
 
 
@@ -85,21 +135,154 @@ def _query_params(
     }
 
 
-def aggregate_count(
+def _full_days(from_timestamp: datetime, to_timestamp: datetime) -> tuple[date, date] | None:
+    """Return the whole UTC days inside [from, to) as a [first, end) range.
+
+    Naive timestamps are taken as UTC.  Returns None when the period does
+    not cover at least one whole day.
+    """
+    if from_timestamp.tzinfo is not None:
+        from_timestamp = from_timestamp.astimezone(UTC).replace(tzinfo=None)
+    if to_timestamp.tzinfo is not None:
+        to_timestamp = to_timestamp.astimezone(UTC).replace(tzinfo=None)
+
+    first_day = from_timestamp.date()
+    if from_timestamp != datetime.combine(first_day, time.min):
+        first_day += timedelta(days=1)
+    end_day = to_timestamp.date()
+    if first_day >= end_day:
+        return None
+    return first_day, end_day
+
+
+def _rollup_days(
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    filters: dict[str, str] | None,
+) -> tuple[date, date] | None:
+    """Return the whole days to read from the daily rollup, if any.
+
+    Filtered queries need event properties, and the rollup is only complete
+    once its backfill has finished.
+    """
+    if filters or not daily_rollup_ready():
+        return None
+    return _full_days(from_timestamp, to_timestamp)
+
+
+def _aggregate_sql(
+    raw_select: str,
+    rollup_select: str,
+    customer_where: str,
+    filters: dict[str, str] | None,
+    days: tuple[date, date] | None,
+    grouped: bool,
+) -> str:
+    """Build the aggregate query behind ``_aggregate_row``.
+
+    With ``grouped``, each selected row is prefixed with the customer's
+    ``external_customer_id`` and aggregated per customer.
+    """
+    key = "external_customer_id, " if grouped else ""
+    group_by = " GROUP BY external_customer_id" if grouped else ""
+    if days is None:
+        return (
+            f"SELECT {key}{raw_select} FROM {EVENTS_RAW_TABLE}"
+            f" WHERE {customer_where}{_PERIOD_WHERE}{_build_filter_clause(filters)}{group_by}"
+        )
+
+    return f"""
+    SELECT {key}{rollup_select} FROM (
+        SELECT {key}events_count, sum_value, max_value, latest_value, unique_values, values_count
+        FROM {EVENTS_DAILY_TABLE}
+        WHERE {customer_where}
+            AND day >= {{first_day:Date}} AND day < {{end_day:Date}}
+        UNION ALL
+        SELECT {key}{DAILY_STATE_COLUMNS}
+        FROM {EVENTS_RAW_TABLE}
+        WHERE {customer_where}
+            AND ((timestamp >= {{from_ts:DateTime64(3)}}
+                  AND timestamp < {{days_start:DateTime64(3)}})
+              OR (timestamp >= {{days_end:DateTime64(3)}}
+                  AND timestamp < {{to_ts:DateTime64(3)}})){group_by}
+    ){group_by}
+    """
+
+
+def _days_params(days: tuple[date, date] | None) -> dict[str, object]:
+    if days is None:
+        return {}
+    first_day, end_day = days
+    return {
+        "first_day": first_day,
+        "end_day": end_day,
+        "days_start": datetime.combine(first_day, time.min),
+        "days_end": datetime.combine(end_day, time.min),
+    }
+
+
+def _aggregate_row(
+    raw_select: str,
+    rollup_select: str,
     organization_id: UUID,
     code: str,
     external_customer_id: str,
     from_timestamp: datetime,
     to_timestamp: datetime,
-    filters: dict[str, str] | None = None,
-) -> UsageResult:
-    """COUNT aggregation via ClickHouse."""
+    filters: dict[str, str] | None,
+) -> Sequence[Any]:
+    """Run a single-row aggregate, using the daily rollup where possible.
+
+    Unfiltered periods spanning whole UTC days merge the daily states from
+    ``EVENTS_DAILY_TABLE`` with states computed from raw rows for the
+    partial days at either end.  ``rollup_select`` merges the columns of
+    ``EVENTS_DAILY_TABLE``; ``raw_select`` computes the same values from
+    ``EVENTS_RAW_TABLE`` rows.
+    """
     client = get_clickhouse_client()
     assert client is not None
 
-    filter_clause = _build_filter_clause(filters)
-    sql = f"SELECT count() FROM {EVENTS_RAW_TABLE} WHERE {_BASE_WHERE}{filter_clause}"
-    params = _query_params(
+    days = _rollup_days(from_timestamp, to_timestamp, filters)
+    sql = _aggregate_sql(raw_select, rollup_select, _CUSTOMER_WHERE, filters, days, grouped=False)
+    params = {
+        **_query_params(
+            organization_id,
+            code,
+            external_customer_id,
+            from_timestamp,
+            to_timestamp,
+            filters,
+        ),
+        **_days_params(days),
+    }
+    return client.query(sql, parameters=params).result_rows[0]
+
+
+def _row_result(aggregation_type: AggregationType, row: Sequence[Any]) -> UsageResult:
+    """Convert a (value, events_count) row of ``_ROW_AGGREGATES`` to a UsageResult."""
+    count = int(row[1])
+    if aggregation_type == AggregationType.COUNT:
+        return UsageResult(value=Decimal(count), events_count=count)
+    if aggregation_type == AggregationType.UNIQUE_COUNT:
+        return UsageResult(value=Decimal(int(row[0])), events_count=count)
+    if count == 0 or row[0] is None:
+        return UsageResult(value=Decimal(0), events_count=count)
+    return UsageResult(value=Decimal(str(row[0])), events_count=count)
+
+
+def _aggregate(
+    aggregation_type: AggregationType,
+    organization_id: UUID,
+    code: str,
+    external_customer_id: str,
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    filters: dict[str, str] | None,
+) -> UsageResult:
+    raw_select, rollup_select = _ROW_AGGREGATES[aggregation_type]
+    row = _aggregate_row(
+        raw_select,
+        rollup_select,
         organization_id,
         code,
         external_customer_id,
@@ -107,10 +290,27 @@ def aggregate_count(
         to_timestamp,
         filters,
     )
+    return _row_result(aggregation_type, row)
 
-    result = client.query(sql, parameters=params)
-    count = int(result.first_row[0])
-    return UsageResult(value=Decimal(count), events_count=count)
+
+def aggregate_count(
+    organization_id: UUID,
+    code: str,
+    external_customer_id: str,
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    filters: dict[str, str] | None = None,
+) -> UsageResult:
+    """COUNT aggregation via ClickHouse."""
+    return _aggregate(
+        AggregationType.COUNT,
+        organization_id,
+        code,
+        external_customer_id,
+        from_timestamp,
+        to_timestamp,
+        filters,
+    )
 
 
 def aggregate_sum(
@@ -122,15 +322,8 @@ def aggregate_sum(
     filters: dict[str, str] | None = None,
 ) -> UsageResult:
     """SUM aggregation via ClickHouse."""
-    client = get_clickhouse_client()
-    assert client is not None
-
-    filter_clause = _build_filter_clause(filters)
-    sql = (
-        f"SELECT coalesce(sum(decimal_value), 0), count()"
-        f" FROM {EVENTS_RAW_TABLE} WHERE {_BASE_WHERE}{filter_clause}"
-    )
-    params = _query_params(
+    return _aggregate(
+        AggregationType.SUM,
         organization_id,
         code,
         external_customer_id,
@@ -139,10 +332,6 @@ def aggregate_sum(
         filters,
     )
 
-    result = client.query(sql, parameters=params)
-    row = result.first_row
-    return UsageResult(value=Decimal(str(row[0])), events_count=int(row[1]))
-
 
 def aggregate_max(
     organization_id: UUID,
@@ -153,15 +342,8 @@ def aggregate_max(
     filters: dict[str, str] | None = None,
 ) -> UsageResult:
     """MAX aggregation via ClickHouse."""
-    client = get_clickhouse_client()
-    assert client is not None
-
-    filter_clause = _build_filter_clause(filters)
-    sql = (
-        f"SELECT coalesce(max(decimal_value), 0), count()"
-        f" FROM {EVENTS_RAW_TABLE} WHERE {_BASE_WHERE}{filter_clause}"
-    )
-    params = _query_params(
+    return _aggregate(
+        AggregationType.MAX,
         organization_id,
         code,
         external_customer_id,
@@ -170,10 +352,6 @@ def aggregate_max(
         filters,
     )
 
-    result = client.query(sql, parameters=params)
-    row = result.first_row
-    return UsageResult(value=Decimal(str(row[0])), events_count=int(row[1]))
-
 
 def aggregate_unique_count(
     organization_id: UUID,
@@ -181,34 +359,22 @@ def aggregate_unique_count(
     external_customer_id: str,
     from_timestamp: datetime,
     to_timestamp: datetime,
-    field_name: str,
     filters: dict[str, str] | None = None,
 ) -> UsageResult:
-    """UNIQUE_COUNT aggregation via ClickHouse using uniq()."""
-    client = get_clickhouse_client()
-    assert client is not None
+    """UNIQUE_COUNT aggregation via ClickHouse using uniq().
 
-    filter_clause = _build_filter_clause(filters)
-    sql = (
-        "SELECT uniq(JSONExtractString(properties, {field:String})), count()"
-        f" FROM {EVENTS_RAW_TABLE} WHERE {_BASE_WHERE}{filter_clause}"
-        " AND JSONHas(properties, {field:String})"
+    Counts distinct values of the metric's field, extracted into the
+    ``value`` column at ingestion; only events with the field are counted.
+    """
+    return _aggregate(
+        AggregationType.UNIQUE_COUNT,
+        organization_id,
+        code,
+        external_customer_id,
+        from_timestamp,
+        to_timestamp,
+        filters,
     )
-    params = {
-        **_query_params(
-            organization_id,
-            code,
-            external_customer_id,
-            from_timestamp,
-            to_timestamp,
-            filters,
-        ),
-        "field": field_name,
-    }
-
-    result = client.query(sql, parameters=params)
-    row = result.first_row
-    return UsageResult(value=Decimal(int(row[0])), events_count=int(row[1]))
 
 
 def aggregate_latest(
@@ -220,20 +386,8 @@ def aggregate_latest(
     filters: dict[str, str] | None = None,
 ) -> UsageResult:
     """LATEST aggregation — returns the most recent event's decimal_value."""
-    client = get_clickhouse_client()
-    assert client is not None
-
-    filter_clause = _build_filter_clause(filters)
-    # Get latest value and total count in one round-trip
-    sql = (
-        "SELECT"
-        f" (SELECT coalesce(decimal_value, 0) FROM {EVENTS_RAW_TABLE}"
-        f"  WHERE {_BASE_WHERE}{filter_clause}"
-        "  ORDER BY timestamp DESC LIMIT 1) AS latest_val,"
-        f" (SELECT count() FROM {EVENTS_RAW_TABLE}"
-        f"  WHERE {_BASE_WHERE}{filter_clause}) AS cnt"
-    )
-    params = _query_params(
+    return _aggregate(
+        AggregationType.LATEST,
         organization_id,
         code,
         external_customer_id,
@@ -242,13 +396,35 @@ def aggregate_latest(
         filters,
     )
 
-    result = client.query(sql, parameters=params)
-    row = result.first_row
-    value = Decimal(str(row[0])) if row[0] is not None else Decimal(0)
-    count = int(row[1])
-    if count == 0:
+
+def _weighted_sum_sql(customer_where: str, filters: dict[str, str] | None, grouped: bool) -> str:
+    """Build the event count and weighted sum query, computed in one pass."""
+    key = "external_customer_id, " if grouped else ""
+    partition = "PARTITION BY external_customer_id " if grouped else ""
+    group_by = " GROUP BY external_customer_id" if grouped else ""
+    return f"""
+    SELECT {key}count(), sum(period_ratio) AS aggregation FROM (
+        SELECT
+            {key}coalesce(decimal_value, 0)
+            * dateDiff('second', timestamp,
+                leadInFrame(timestamp, 1, {{to_ts:DateTime64(3)}})
+                OVER ({partition}ORDER BY timestamp ASC
+                      ROWS BETWEEN CURRENT ROW AND 1 FOLLOWING))
+            / {{total_seconds:Float64}}
+            AS period_ratio
+        FROM {EVENTS_RAW_TABLE}
+        WHERE {customer_where}{_PERIOD_WHERE}{_build_filter_clause(filters)}
+        ORDER BY timestamp ASC
+    ){group_by}
+    """
+
+
+def _weighted_sum_result(row: Sequence[Any]) -> UsageResult:
+    events_count = int(row[0])
+    if events_count == 0:
         return UsageResult(value=Decimal(0), events_count=0)
-    return UsageResult(value=value, events_count=count)
+    value = Decimal(str(row[1])) if row[1] is not None else Decimal(0)
+    return UsageResult(value=value, events_count=events_count)
 
 
 def aggregate_weighted_sum(
@@ -263,7 +439,8 @@ def aggregate_weighted_sum(
 
     Adapted from Lago's WeightedSumQuery: computes a time-weighted sum
     where each event's value is weighted by the fraction of the period
-    it applies to (until the next event or period end).
+    it applies to (until the next event or period end).  The weight depends
+    on the neighbouring event, so this always scans raw rows.
     """
     client = get_clickhouse_client()
     assert client is not None
@@ -272,10 +449,7 @@ def aggregate_weighted_sum(
     if total_seconds == 0:
         return UsageResult(value=Decimal(0), events_count=0)
 
-    filter_clause = _build_filter_clause(filters)
-
-    # Count events first
-    count_sql = f"SELECT count() FROM {EVENTS_RAW_TABLE} WHERE {_BASE_WHERE}{filter_clause}"
+    sql = _weighted_sum_sql(_CUSTOMER_WHERE, filters, grouped=False)
     params: dict[str, object] = _query_params(
         organization_id,
         code,
@@ -284,33 +458,10 @@ def aggregate_weighted_sum(
         to_timestamp,
         filters,
     )
-    count_result = client.query(count_sql, parameters=params)
-    events_count = int(count_result.first_row[0])
-
-    if events_count == 0:
-        return UsageResult(value=Decimal(0), events_count=0)
-
-    # Weighted sum using window functions
-    sql = f"""
-    SELECT sum(period_ratio) AS aggregation FROM (
-        SELECT
-            coalesce(decimal_value, 0)
-            * dateDiff('second', timestamp,
-                leadInFrame(timestamp, 1, {{to_ts:DateTime64(3)}})
-                OVER (ORDER BY timestamp ASC
-                      ROWS BETWEEN CURRENT ROW AND 1 FOLLOWING))
-            / {{total_seconds:Float64}}
-            AS period_ratio
-        FROM {EVENTS_RAW_TABLE}
-        WHERE {_BASE_WHERE}{filter_clause}
-        ORDER BY timestamp ASC
-    )
-    """
     params["total_seconds"] = total_seconds
 
-    result = client.query(sql, parameters=params)
-    value = Decimal(str(result.first_row[0])) if result.first_row[0] is not None else Decimal(0)
-    return UsageResult(value=value, events_count=events_count)
+    row = client.query(sql, parameters=params).result_rows[0]
+    return _weighted_sum_result(row)
 
 
 def fetch_events_for_custom(
@@ -344,6 +495,62 @@ def fetch_events_for_custom(
     return [json.loads(str(row[0])) for row in result.result_rows]
 
 
+def _sum_expression_sql(
+    compiled: CompiledExpression,
+    organization_id: UUID,
+    code: str,
+    external_customer_id: str,
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    filters: dict[str, str] | None,
+    missing_as_zero: bool = False,
+) -> UsageResult | None:
+    """Sum a compiled expression in ClickHouse.
+
+    Returns None when the result cannot be trusted to match Python evaluation
+    (a division or untranslatable literal, a row without a usable numeric
+    value, or a server-side arithmetic error such as a decimal overflow), so
+    the caller can fall back to fetching the rows.
+    """
+    translated = compiled.to_clickhouse_sql(missing_as_zero=missing_as_zero)
+    if translated is None:
+        return None
+    expr_sql, expr_params = translated
+
+    client = get_clickhouse_client()
+    assert client is not None
+
+    filter_clause = _build_filter_clause(filters)
+    sql = (
+        "SELECT sum(v), count(), countIf(isNull(v)) FROM ("
+        f" SELECT {expr_sql} AS v FROM {EVENTS_RAW_TABLE}"
+        f" WHERE {_BASE_WHERE}{filter_clause})"
+    )
+    params = {
+        **_query_params(
+            organization_id,
+            code,
+            external_customer_id,
+            from_timestamp,
+            to_timestamp,
+            filters,
+        ),
+        **expr_params,
+    }
+
+    try:
+        row = client.query(sql, parameters=params).result_rows[0]
+    except Exception:
+        logger.warning("ClickHouse could not evaluate expression %r", compiled.source)
+        return None
+    if int(row[2]) > 0:
+        return None
+    events_count = int(row[1])
+    if events_count == 0:
+        return UsageResult(value=Decimal(0), events_count=0)
+    return UsageResult(value=Decimal(str(row[0])), events_count=events_count)
+
+
 def aggregate_custom(
     organization_id: UUID,
     code: str,
@@ -353,8 +560,14 @@ def aggregate_custom(
     expression: str,
     filters: dict[str, str] | None = None,
 ) -> UsageResult:
-    """CUSTOM aggregation — fetch events from ClickHouse, evaluate in Python."""
-    events_props = fetch_events_for_custom(
+    """CUSTOM aggregation — evaluate the expression server-side.
+
+    Falls back to fetching event properties and evaluating in Python when
+    ClickHouse cannot compute an exact result.
+    """
+    compiled = compile_expression(expression)
+    result = _sum_expression_sql(
+        compiled,
         organization_id,
         code,
         external_customer_id,
@@ -362,21 +575,52 @@ def aggregate_custom(
         to_timestamp,
         filters,
     )
-    events_count = len(events_props)
-    if events_count == 0:
-        return UsageResult(value=Decimal(0), events_count=0)
+    if result is not None:
+        return result
 
-    total = Decimal(0)
-    for props in events_props:
-        variables = {
-            k: Decimal(str(v))
-            for k, v in props.items()
-            if isinstance(v, (int, float, str)) and _is_numeric(v)
-        }
-        total += _evaluate_expression(expression, variables)
+    events_props = fetch_events_for_custom(
+        organization_id,
+        code,
+        external_customer_id,
+        from_timestamp,
+        to_timestamp,
+        filters,
+    )
+    total, events_count = compiled.sum_over(events_props)
     return UsageResult(value=total, events_count=events_count)
 
 
+def aggregate_dynamic_amount(
+    organization_id: UUID,
+    code: str,
+    external_customer_id: str,
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    price_field: str,
+    quantity_field: str,
+    filters: dict[str, str] | None = None,
+) -> Decimal | None:
+    """Sum price * quantity for a DYNAMIC charge in ClickHouse.
+
+    Absent fields count as 0, as in ``charge_models.dynamic``.  Returns None
+    when the caller should compute the amount from raw event properties.
+    """
+    if not price_field.isidentifier() or not quantity_field.isidentifier():
+        return None
+    compiled = compile_expression(f"{price_field} * {quantity_field}")
+    result = _sum_expression_sql(
+        compiled,
+        organization_id,
+        code,
+        external_customer_id,
+        from_timestamp,
+        to_timestamp,
+        filters,
+        missing_as_zero=True,
+    )
+    return result.value if result is not None else None
+
+
 def fetch_raw_event_properties(
     organization_id: UUID,
     code: str,
@@ -440,14 +684,12 @@ def clickhouse_aggregate(
             filters,
         )
     elif aggregation_type == AggregationType.UNIQUE_COUNT:
-        assert field_name is not None
         return aggregate_unique_count(
             organization_id,
             code,
             external_customer_id,
             from_timestamp,
             to_timestamp,
-            field_name,
             filters,
         )
     elif aggregation_type == AggregationType.LATEST:
@@ -481,3 +723,80 @@ def clickhouse_aggregate(
         )
     else:
         raise ValueError(f"Unknown aggregation type: {aggregation_type}")
+
+
+def clickhouse_aggregate_for_customers(
+    organization_id: UUID,
+    code: str,
+    external_customer_ids: Sequence[str],
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    aggregation_type: AggregationType,
+    field_name: str | None = None,
+    expression: str | None = None,
+    filters: dict[str, str] | None = None,
+) -> dict[str, UsageResult]:
+    """Aggregate a metric for many customers over the same period at once.
+
+    Runs one query grouped by ``external_customer_id``; results match
+    ``clickhouse_aggregate`` for each customer.  CUSTOM expressions may need
+    a per-customer fallback to Python evaluation, so they are aggregated
+    one customer at a time.
+    """
+    if aggregation_type == AggregationType.CUSTOM:
+        return {
+            customer_id: clickhouse_aggregate(
+                organization_id,
+                code,
+                customer_id,
+                from_timestamp,
+                to_timestamp,
+                aggregation_type,
+                field_name,
+                expression,
+                filters,
+            )
+            for customer_id in external_customer_ids
+        }
+
+    if not external_customer_ids:
+        return {}
+
+    client = get_clickhouse_client()
+    assert client is not None
+
+    params: dict[str, object] = {
+        "org_id": str(organization_id),
+        "code": code,
+        "cust_ids": list(external_customer_ids),
+        "from_ts": from_timestamp,
+        "to_ts": to_timestamp,
+        **_build_filter_params(filters),
+    }
+    if aggregation_type == AggregationType.WEIGHTED_SUM:
+        total_seconds = (to_timestamp - from_timestamp).total_seconds()
+        if total_seconds == 0:
+            return {
+                customer_id: UsageResult(value=Decimal(0), events_count=0)
+                for customer_id in external_customer_ids
+            }
+        sql = _weighted_sum_sql(_CUSTOMERS_WHERE, filters, grouped=True)
+        params["total_seconds"] = total_seconds
+        rows = client.query(sql, parameters=params).result_rows
+        found = {str(row[0]): _weighted_sum_result(row[1:]) for row in rows}
+    elif aggregation_type in _ROW_AGGREGATES:
+        raw_select, rollup_select = _ROW_AGGREGATES[aggregation_type]
+        days = _rollup_days(from_timestamp, to_timestamp, filters)
+        sql = _aggregate_sql(
+            raw_select, rollup_select, _CUSTOMERS_WHERE, filters, days, grouped=True
+        )
+        params.update(_days_params(days))
+        rows = client.query(sql, parameters=params).result_rows
+        found = {str(row[0]): _row_result(aggregation_type, row[1:]) for row in rows}
+    else:
+        raise ValueError(f"Unknown aggregation type: {aggregation_type}")
+
+    return {
+        customer_id: found.get(customer_id) or UsageResult(value=Decimal(0), events_count=0)
+        for customer_id in external_customer_ids
+    }
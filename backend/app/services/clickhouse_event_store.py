@@ -1,10 +1,13 @@
 """ClickHouse event store for writing events to ClickHouse."""
 
-import json
+import hashlib
 import logging
 from decimal import Decimal, InvalidOperation
+from typing import Any
 from uuid import UUID
 
+from clickhouse_connect.driver import Client
+
 from app.core.clickhouse import EVENTS_RAW_TABLE, get_clickhouse_client
 from app.schemas.event import EventCreate
 
@@ -58,12 +61,60 @@ def _build_row(
         event.external_customer_id,
         event.code,
         event.timestamp,
-        json.dumps(event.properties),
+        event.properties_json(),
         value_str,
         decimal_val,
     ]
 
 
+def _row_key(row: list[Any]) -> tuple[Any, ...]:
+    """The (code, external_customer_id, transaction_id) identifying a row's event."""
+    return (row[3], row[2], row[1])
+
+
+def _insert_new_rows(client: Client, organization_id: UUID, rows: list[list[Any]]) -> int:
+    """Insert the rows events_raw does not already hold; return how many.
+
+    The daily rollup view aggregates every inserted row, so a re-sent
+    transaction is dropped here rather than left for ReplacingMergeTree to
+    collapse.  The insert carries a token derived from its transaction ids,
+    so a retry of a block that did land is deduplicated by the server too.
+    """
+    unique: dict[tuple[Any, ...], list[Any]] = {}
+    for row in rows:
+        unique.setdefault(_row_key(row), row)
+
+    existing = client.query(
+        f"SELECT code, external_customer_id, transaction_id FROM {EVENTS_RAW_TABLE}"
+        " WHERE organization_id = {organization_id:String}"
+        " AND code IN {codes:Array(String)}"
+        " AND external_customer_id IN {customers:Array(String)}"
+        " AND transaction_id IN {transaction_ids:Array(String)}",
+        parameters={
+            "organization_id": str(organization_id),
+            "codes": sorted({key[0] for key in unique}),
+            "customers": sorted({key[1] for key in unique}),
+            "transaction_ids": sorted({key[2] for key in unique}),
+        },
+    ).result_rows
+    for key in existing:
+        unique.pop(tuple(key), None)
+    if not unique:
+        return 0
+
+    new_rows = list(unique.values())
+    token = hashlib.sha256(
+        "\n".join([str(organization_id), *sorted(row[1] for row in new_rows)]).encode()
+    ).hexdigest()
+    client.insert(
+        EVENTS_RAW_TABLE,
+        new_rows,
+        column_names=COLUMNS,
+        settings={"insert_deduplication_token": token},
+    )
+    return len(new_rows)
+
+
 def insert_event(
     event: EventCreate,
     organization_id: UUID,
@@ -82,7 +133,7 @@ def insert_event(
 
     row = _build_row(event, organization_id, field_name)
     try:
-        client.insert(EVENTS_RAW_TABLE, [row], column_names=COLUMNS)
+        _insert_new_rows(client, organization_id, [row])
     except Exception:
         logger.exception("Failed to insert event %s into ClickHouse", event.transaction_id)
 
@@ -107,6 +158,6 @@ def insert_events_batch(
     rows = [_build_row(event, organization_id, field_names.get(event.code)) for event in events]
 
     try:
-        client.insert(EVENTS_RAW_TABLE, rows, column_names=COLUMNS)
+        _insert_new_rows(client, organization_id, rows)
     except Exception:
         logger.exception("Failed to insert %d events into ClickHouse", len(events))
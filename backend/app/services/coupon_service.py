@@ -169,6 +169,26 @@ class CouponApplicationService:
         # For "forever" frequency, no consumption needed — return as-is
         return applied_coupon
 
+    def stage_applied_coupon_consumption(self, applied_coupon_ids: list[UUID]) -> None:
+        """Consume applied coupons without committing.
+
+        Applies the same frequency rules as ``consume_applied_coupon`` so that
+        invoice generation can commit coupon usage together with the invoice.
+
+        Args:
+            applied_coupon_ids: The applied coupons used on the invoice.
+        """
+        for applied_coupon_id in applied_coupon_ids:
+            applied_coupon = self.db.get(AppliedCoupon, applied_coupon_id)
+            if not applied_coupon:
+                continue
+
+            frequency = str(applied_coupon.frequency)
+            if frequency == CouponFrequency.ONCE.value:
+                self.applied_coupon_repo.mark_terminated(applied_coupon)
+            elif frequency == CouponFrequency.RECURRING.value:
+                self.applied_coupon_repo.mark_decremented(applied_coupon)
+
     def _calculate_single_discount(
         self,
         applied_coupon: AppliedCoupon,
@@ -0,0 +1,121 @@
+"""Recompute daily_usages over historical date ranges.
+
+A backfill rebuilds the daily usage records of an organization (optionally a
+single metric) for a range of days, e.g. after late events, a metric change
+or a fix to the aggregation.  The range is split into one shard per day;
+each shard is an independent worker job, so days are recomputed in parallel
+across arq workers.  Shards upsert their records, so re-running one is
+harmless, and unfinished shards can be re-enqueued to resume a backfill.
+"""
+
+import logging
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.billable_metric import BillableMetric
+from app.models.daily_usage_backfill import (
+    BackfillStatus,
+    DailyUsageBackfill,
+    DailyUsageBackfillShard,
+)
+from app.repositories.daily_usage_backfill_repository import DailyUsageBackfillRepository
+from app.schemas.daily_usage_backfill import DailyUsageBackfillCreate
+from app.services.daily_usage_service import DailyUsageService
+
+logger = logging.getLogger(__name__)
+
+# Longest range accepted for one backfill, in days
+MAX_BACKFILL_DAYS = 400
+
+
+class DailyUsageBackfillService:
+    """Service for creating, running and resuming daily usage backfills."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = DailyUsageBackfillRepository(db)
+
+    def create_backfill(
+        self, organization_id: UUID, data: DailyUsageBackfillCreate
+    ) -> DailyUsageBackfill:
+        """Create a backfill and its per-day shards.
+
+        Raises:
+            ValueError: If the range includes today or later, exceeds
+                ``MAX_BACKFILL_DAYS``, or the metric is not the organization's.
+        """
+        if data.end_date >= datetime.now(UTC).date():
+            raise ValueError("end_date must be before today")
+        if (data.end_date - data.start_date).days + 1 > MAX_BACKFILL_DAYS:
+            raise ValueError(f"A backfill covers at most {MAX_BACKFILL_DAYS} days")
+        if data.billable_metric_id is not None:
+            metric = (
+                self.db.query(BillableMetric)
+                .filter(
+                    BillableMetric.id == data.billable_metric_id,
+                    BillableMetric.organization_id == organization_id,
+                )
+                .first()
+            )
+            if metric is None:
+                raise ValueError(f"Billable metric {data.billable_metric_id} not found")
+        return self.repo.create(data, organization_id)
+
+    def resume_backfill(self, backfill: DailyUsageBackfill) -> list[DailyUsageBackfillShard]:
+        """Reset failed shards and list every shard left to run.
+
+        Shards interrupted while processing (e.g. by a worker restart) are
+        included; running one that is in fact still in flight only upserts
+        the same records again.
+
+        Returns:
+            The shards to enqueue.
+        """
+        reset = self.repo.reset_failed_shards(backfill)
+        if reset:
+            logger.info("Reset %d failed shards of backfill %s", reset, backfill.id)
+        return self.repo.get_unfinished_shards(UUID(str(backfill.id)))
+
+    def run_shard(self, shard_id: UUID) -> int:
+        """Recompute one day of a backfill.
+
+        Returns:
+            Number of daily usage records written, or 0 if the shard had
+            already completed.
+
+        Raises:
+            ValueError: If the shard does not exist.
+        """
+        shard = self.repo.get_shard(shard_id)
+        if shard is None:
+            raise ValueError(f"Backfill shard {shard_id} not found")
+        if shard.status == BackfillStatus.COMPLETED.value:
+            return 0
+        backfill = self.repo.get_by_id(UUID(str(shard.backfill_id)))
+        if backfill is None:
+            raise ValueError(f"Backfill {shard.backfill_id} not found")
+
+        self.repo.start_shard(shard)
+        daily_usage_service = DailyUsageService(self.db)
+        try:
+            count = daily_usage_service.aggregate_organization(
+                organization_id=UUID(str(backfill.organization_id)),
+                target_date=shard.usage_date,  # type: ignore[arg-type]
+                rollup_watermark=daily_usage_service.rollup_watermark(),
+                billable_metric_id=(
+                    UUID(str(backfill.billable_metric_id))
+                    if backfill.billable_metric_id is not None
+                    else None
+                ),
+                include_existing=True,
+            )
+        except Exception as e:
+            logger.exception("Failed to backfill daily usage for %s", shard.usage_date)
+            self.db.rollback()
+            self.repo.finish_shard(shard, error_message=str(e))
+            return 0
+
+        self.repo.finish_shard(shard, record_count=count)
+        return count
@@ -1,21 +1,36 @@
 """Daily usage service for pre-aggregating daily usage data."""
 
 import logging
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, date, datetime, timedelta
 from decimal import Decimal
 from uuid import UUID
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.billable_metric import AggregationType, BillableMetric
 from app.models.charge import Charge
 from app.models.customer import Customer
+from app.models.daily_usage import DailyUsage
 from app.models.subscription import Subscription, SubscriptionStatus
 from app.repositories.daily_usage_repository import DailyUsageRepository
 from app.schemas.daily_usage import DailyUsageCreate
-from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_aggregation import (
+    UsageAggregationService,
+    UsageResult,
+    UsageRollup,
+    _utc_naive,
+)
 
 logger = logging.getLogger(__name__)
 
+# Daily usage records written per INSERT ... ON CONFLICT statement
+DAILY_USAGE_UPSERT_BATCH_SIZE = 1000
+
 
 class DailyUsageService:
     """Service for aggregating and querying daily usage data."""
@@ -25,11 +40,22 @@ class DailyUsageService:
         self.repo = DailyUsageRepository(db)
         self.usage_service = UsageAggregationService(db)
 
-    def aggregate_daily_usage(self, target_date: date | None = None) -> int:
+    def aggregate_daily_usage(
+        self,
+        target_date: date | None = None,
+        organization_ids: Sequence[UUID] | None = None,
+    ) -> int:
         """Aggregate usage for all active subscriptions for a given date.
 
+        Each organization is aggregated set-based (see
+        ``aggregate_organization``); organizations are spread over
+        ``BXB_DAILY_USAGE_WORKERS`` threads with their own sessions.
+
         Args:
             target_date: The date to aggregate for. Defaults to yesterday.
+            organization_ids: Restrict the run to these organizations, e.g. to
+                split it across worker processes. Defaults to all
+                organizations with an active subscription.
 
         Returns:
             Number of daily usage records upserted.
@@ -37,86 +63,227 @@ class DailyUsageService:
         if target_date is None:
             target_date = (datetime.now(UTC) - timedelta(days=1)).date()
 
-        # Convert date to datetime range for aggregation
-        from_ts = datetime(target_date.year, target_date.month, target_date.day)
-        to_ts = from_ts + timedelta(days=1)
+        # Events ingested after this point are late for the rollups written now
+        rollup_watermark = self.rollup_watermark()
 
-        # Find all active subscriptions
-        subscriptions = (
-            self.db.query(Subscription)
-            .filter(Subscription.status == SubscriptionStatus.ACTIVE.value)
-            .all()
-        )
+        if organization_ids is None:
+            organization_ids = [
+                UUID(str(organization_id))
+                for (organization_id,) in self.db.query(Subscription.organization_id)
+                .filter(Subscription.status == SubscriptionStatus.ACTIVE.value)
+                .distinct()
+            ]
 
-        count = 0
-        for subscription in subscriptions:
-            count += self._aggregate_for_subscription(subscription, target_date, from_ts, to_ts)
+        workers = settings.BXB_DAILY_USAGE_WORKERS
+        if workers <= 1 or len(organization_ids) <= 1:
+            count = sum(
+                self.aggregate_organization(organization_id, target_date, rollup_watermark)
+                for organization_id in organization_ids
+            )
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                count = sum(
+                    executor.map(
+                        lambda organization_id: _aggregate_organization_in_session(
+                            organization_id, target_date, rollup_watermark
+                        ),
+                        organization_ids,
+                    )
+                )
 
         if count > 0:
             logger.info("Aggregated %d daily usage records for %s", count, target_date)
         return count
 
-    def _aggregate_for_subscription(
+    def aggregate_organization(
         self,
-        subscription: Subscription,
+        organization_id: UUID,
         target_date: date,
-        from_ts: datetime,
-        to_ts: datetime,
+        rollup_watermark: datetime,
+        billable_metric_id: UUID | None = None,
+        include_existing: bool = False,
     ) -> int:
-        """Aggregate usage for a single subscription's charges.
+        """Aggregate one day for every active subscription of an organization.
+
+        The (subscription, customer, metric) targets are resolved with one
+        query, usage is aggregated for all of them at once, and the records
+        are written with bulk upserts, committed together.
+
+        Args:
+            organization_id: The organization to aggregate.
+            target_date: The date to aggregate for.
+            rollup_watermark: Database time taken before reading events.
+            billable_metric_id: Only aggregate this metric.
+            include_existing: Also recompute records already stored for the
+                day, e.g. for subscriptions that are no longer active.
 
         Returns:
             Number of records upserted.
         """
-        # Get the customer's external_id
-        customer = self.db.query(Customer).filter(Customer.id == subscription.customer_id).first()
-        if not customer:
-            return 0
+        active = (
+            self.db.query(Subscription.id, Customer.external_id, Charge.billable_metric_id)
+            .join(Customer, Customer.id == Subscription.customer_id)
+            .join(Charge, Charge.plan_id == Subscription.plan_id)
+            .filter(
+                Subscription.organization_id == organization_id,
+                Subscription.status == SubscriptionStatus.ACTIVE.value,
+            )
+        )
+        if billable_metric_id is not None:
+            active = active.filter(Charge.billable_metric_id == billable_metric_id)
+        rows = active.distinct().all()
 
-        external_customer_id = str(customer.external_id)
+        if include_existing:
+            existing = (
+                self.db.query(
+                    DailyUsage.subscription_id,
+                    DailyUsage.external_customer_id,
+                    DailyUsage.billable_metric_id,
+                )
+                .join(Subscription, Subscription.id == DailyUsage.subscription_id)
+                .filter(
+                    Subscription.organization_id == organization_id,
+                    DailyUsage.usage_date == target_date,
+                )
+            )
+            if billable_metric_id is not None:
+                existing = existing.filter(DailyUsage.billable_metric_id == billable_metric_id)
+            rows.extend(existing.all())
 
-        # Get charges for the subscription's plan
-        charges = self.db.query(Charge).filter(Charge.plan_id == subscription.plan_id).all()
+        targets = {
+            (UUID(str(subscription_id)), str(external_customer_id), UUID(str(metric_id)))
+            for subscription_id, external_customer_id, metric_id in rows
+        }
+        if not targets:
+            return 0
 
-        count = 0
-        for charge in charges:
-            metric_id = UUID(str(charge.billable_metric_id))
-            # Look up the billable metric to get its code
-            from app.models.billable_metric import BillableMetric
+        metrics = {
+            UUID(str(metric.id)): metric
+            for metric in self.db.query(BillableMetric).filter(
+                BillableMetric.id.in_({metric_id for _, _, metric_id in targets})
+            )
+        }
+        usage = self.usage_service.aggregate_day_for_customers(
+            metrics=list(metrics.values()),
+            targets={
+                (str(metrics[metric_id].code), external_customer_id)
+                for _, external_customer_id, metric_id in targets
+                if metric_id in metrics
+            },
+            usage_date=target_date,
+            organization_id=organization_id,
+        )
 
-            metric = self.db.query(BillableMetric).filter(BillableMetric.id == metric_id).first()
-            if not metric:
+        records: list[DailyUsageCreate] = []
+        for subscription_id, external_customer_id, metric_id in targets:
+            metric = metrics.get(metric_id)
+            if metric is None:
                 continue
-
-            try:
-                result = self.usage_service.aggregate_usage_with_count(
-                    external_customer_id=external_customer_id,
-                    code=str(metric.code),
-                    from_timestamp=from_ts,
-                    to_timestamp=to_ts,
-                )
-            except ValueError:
-                logger.warning(
-                    "Failed to aggregate usage for subscription %s, metric %s",
-                    subscription.id,
-                    metric.code,
-                )
+            aggregated = usage.get((str(metric.code), external_customer_id))
+            if aggregated is None:
                 continue
-
-            self.repo.upsert(
-                DailyUsageCreate(
-                    subscription_id=UUID(str(subscription.id)),
-                    billable_metric_id=metric_id,
-                    external_customer_id=external_customer_id,
-                    usage_date=target_date,
-                    usage_value=result.value,
-                    events_count=result.events_count,
+            result, rollup = aggregated
+            records.append(
+                _daily_usage_record(
+                    subscription_id,
+                    metric,
+                    external_customer_id,
+                    target_date,
+                    result,
+                    rollup,
+                    rollup_watermark,
                 )
             )
-            count += 1
 
+        for i in range(0, len(records), DAILY_USAGE_UPSERT_BATCH_SIZE):
+            self.repo.bulk_upsert(records[i : i + DAILY_USAGE_UPSERT_BATCH_SIZE])
+        self.db.commit()
+        return len(records)
+
+    def refresh_late_daily_usage(self, since: datetime, before_date: date) -> int:
+        """Recompute rolled-up days that received events after their rollup.
+
+        Args:
+            since: Only events ingested at or after this time are considered.
+            before_date: Only days before this date are considered.
+
+        Returns:
+            Number of daily usage records recomputed.
+        """
+        rollup_watermark = self.rollup_watermark()
+        count = 0
+        for daily_usage, metric in self.repo.get_late_rollups(_utc_naive(since), before_date):
+            if self._upsert_day(
+                UUID(str(daily_usage.subscription_id)),
+                metric,
+                str(daily_usage.external_customer_id),
+                UUID(str(metric.organization_id)),
+                daily_usage.usage_date,  # type: ignore[arg-type]
+                rollup_watermark,
+            ):
+                count += 1
+
+        if count > 0:
+            logger.info("Recomputed %d daily usage records with late events", count)
         return count
 
+    def _upsert_day(
+        self,
+        subscription_id: UUID,
+        metric: BillableMetric,
+        external_customer_id: str,
+        organization_id: UUID,
+        usage_date: date,
+        rollup_watermark: datetime,
+    ) -> bool:
+        """Aggregate one day of a metric and store it; False if it failed."""
+        try:
+            result, rollup = self.usage_service.aggregate_day(
+                external_customer_id=external_customer_id,
+                metric=metric,
+                usage_date=usage_date,
+                organization_id=organization_id,
+            )
+        except ValueError:
+            logger.warning(
+                "Failed to aggregate usage for subscription %s, metric %s",
+                subscription_id,
+                metric.code,
+            )
+            return False
+
+        self.repo.upsert(
+            _daily_usage_record(
+                subscription_id,
+                metric,
+                external_customer_id,
+                usage_date,
+                result,
+                rollup,
+                rollup_watermark,
+            )
+        )
+        return True
+
+    def database_now(self) -> datetime:
+        """Current time on the database clock, which stamps events.created_at."""
+        now: datetime = self.db.query(func.now()).scalar()
+        return now
+
+    def rollup_watermark(self) -> datetime:
+        """Watermark for rollups about to read events.
+
+        ``events.created_at`` is the start time of the inserting transaction,
+        so an event committed after the rollup read can carry an earlier
+        timestamp.  The watermark trails the database clock by
+        ``BXB_DAILY_USAGE_WATERMARK_LAG_SECONDS`` so such events count as late;
+        events inside the window make their day read from raw events until
+        ``refresh_late_daily_usage`` recomputes it.
+        """
+        return self.database_now() - timedelta(
+            seconds=settings.BXB_DAILY_USAGE_WATERMARK_LAG_SECONDS
+        )
+
     def get_usage_for_period(
         self,
         subscription_id: UUID,
@@ -139,3 +306,52 @@ class DailyUsageService:
             Summed usage value for the period.
         """
         return self.repo.sum_for_period(subscription_id, billable_metric_id, start_date, end_date)
+
+
+def _daily_usage_record(
+    subscription_id: UUID,
+    metric: BillableMetric,
+    external_customer_id: str,
+    usage_date: date,
+    result: UsageResult,
+    rollup: UsageRollup | None,
+    rollup_watermark: datetime,
+) -> DailyUsageCreate:
+    """Build a daily usage record, with the rollup state the metric merges on."""
+    aggregation_type = AggregationType(metric.aggregation_type)
+    return DailyUsageCreate(
+        subscription_id=subscription_id,
+        billable_metric_id=UUID(str(metric.id)),
+        external_customer_id=external_customer_id,
+        usage_date=usage_date,
+        usage_value=result.value,
+        events_count=result.events_count,
+        sum_value=(
+            rollup.sum_value
+            if rollup is not None and aggregation_type == AggregationType.SUM
+            else None
+        ),
+        max_value=(
+            rollup.max_value
+            if rollup is not None and aggregation_type == AggregationType.MAX
+            else None
+        ),
+        unique_values=(
+            rollup.unique_values
+            if rollup is not None and aggregation_type == AggregationType.UNIQUE_COUNT
+            else None
+        ),
+        rollup_watermark=rollup_watermark if rollup is not None else None,
+    )
+
+
+def _aggregate_organization_in_session(
+    organization_id: UUID, target_date: date, rollup_watermark: datetime
+) -> int:
+    db = SessionLocal()
+    try:
+        return DailyUsageService(db).aggregate_organization(
+            organization_id, target_date, rollup_watermark
+        )
+    finally:
+        db.close()
@@ -1,4 +1,4 @@
-"""Data export service for generating CSV exports."""
+"""Data export service for generating CSV exports and PDF archives."""
 
 import csv
 import io
@@ -6,14 +6,15 @@ import json
 import logging
 import os
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
 
 from app.core.config import settings
 from app.models.audit_log import AuditLog
-from app.models.credit_note import CreditNote
+from app.models.credit_note import CreditNote, CreditNoteStatus
 from app.models.customer import Customer
 from app.models.data_export import DataExport, ExportStatus, ExportType
 from app.models.event import Event
@@ -22,9 +23,13 @@ from app.models.invoice import Invoice
 from app.models.subscription import Subscription
 from app.repositories.data_export_repository import DataExportRepository
 from app.schemas.data_export import DataExportCreate
+from app.services.invoice_pdf_service import RENDERABLE_STATUSES
 
 logger = logging.getLogger(__name__)
 
+# Export types producing a ZIP archive of PDFs rather than a CSV
+PDF_EXPORT_TYPES = (ExportType.INVOICE_PDFS.value, ExportType.CREDIT_NOTE_PDFS.value)
+
 
 class DataExportService:
     """Service for creating and processing CSV data exports."""
@@ -48,6 +53,9 @@ class DataExportService:
             ExportType.FEES.value: self._count_fees,
             ExportType.CREDIT_NOTES.value: self._count_credit_notes,
             ExportType.AUDIT_LOGS.value: self._count_audit_logs,
+            ExportType.BILLING_SIMULATION.value: self._count_billing_simulation,
+            ExportType.INVOICE_PDFS.value: self._count_invoice_pdfs,
+            ExportType.CREDIT_NOTE_PDFS.value: self._count_credit_note_pdfs,
         }
         counter = counters.get(export_type.value)
         if not counter:
@@ -65,7 +73,7 @@ class DataExportService:
         return self.repo.create(data, organization_id)
 
     def process_export(self, export_id: UUID) -> DataExport:
-        """Process a data export: query data, generate CSV, update record."""
+        """Process a data export: query data, generate the file, update record."""
         export = self.repo.get_by_id(export_id)
         if not export:
             raise ValueError(f"DataExport {export_id} not found")
@@ -82,20 +90,30 @@ class DataExportService:
             export_type = export.export_type
             filters: dict[str, Any] = export.filters or {}  # type: ignore[assignment]
 
-            csv_content, record_count = self._generate_csv(
-                str(export_type),
-                org_id,  # type: ignore[arg-type]
-                filters,
-                export_id=export_id,
-            )
-
-            # Write CSV to file
             export_dir = os.path.join(settings.BXB_DATA_PATH, "exports")
             os.makedirs(export_dir, exist_ok=True)
-            file_path = os.path.join(export_dir, f"{export_id}.csv")
 
-            with open(file_path, "w", newline="") as f:
-                f.write(csv_content)
+            if export_type in PDF_EXPORT_TYPES:
+                file_path = os.path.join(export_dir, f"{export_id}.zip")
+                record_count = self._generate_pdf_archive(
+                    str(export_type),
+                    org_id,  # type: ignore[arg-type]
+                    filters,
+                    file_path,
+                    export_id=export_id,
+                )
+            else:
+                csv_content, record_count = self._generate_csv(
+                    str(export_type),
+                    org_id,  # type: ignore[arg-type]
+                    filters,
+                    export_id=export_id,
+                )
+
+                # Write CSV to file
+                file_path = os.path.join(export_dir, f"{export_id}.csv")
+                with open(file_path, "w", newline="") as f:
+                    f.write(csv_content)
 
             result = self.repo.update_status(
                 export_id,
@@ -138,12 +156,88 @@ class DataExportService:
             ExportType.FEES.value: self._generate_csv_fees,
             ExportType.CREDIT_NOTES.value: self._generate_csv_credit_notes,
             ExportType.AUDIT_LOGS.value: self._generate_csv_audit_logs,
+            ExportType.BILLING_SIMULATION.value: self._generate_csv_billing_simulation,
         }
         generator = generators.get(export_type)
         if not generator:
             raise ValueError(f"Unknown export type: {export_type}")
         return generator(organization_id, filters, export_id=export_id)
 
+    def _generate_pdf_archive(
+        self,
+        export_type: str,
+        organization_id: UUID,
+        filters: dict[str, Any],
+        file_path: str,
+        export_id: UUID | None = None,
+    ) -> int:
+        """Render invoice or credit note PDFs into a ZIP archive.
+
+        Returns:
+            Number of PDFs in the archive.
+
+        Raises:
+            ValueError: If any document failed to render.
+        """
+        from app.services.bulk_pdf_rendering import BulkPdfRenderer
+
+        progress = 0
+
+        def on_progress(done: int) -> None:
+            nonlocal progress
+            # Only commit progress when the percentage moves
+            if done * 100 // total > progress:
+                progress = done * 100 // total
+                self._update_progress(export_id, progress)
+
+        renderer = BulkPdfRenderer(self.db)
+        if export_type == ExportType.INVOICE_PDFS.value:
+            invoices = (
+                self._invoice_pdfs_query(organization_id, filters)
+                .order_by(Invoice.created_at.desc())
+                .all()
+            )
+            total = len(invoices)
+            stats = renderer.render_invoices(invoices, Path(file_path), on_progress=on_progress)
+        else:
+            credit_notes = (
+                self._credit_note_pdfs_query(organization_id, filters)
+                .order_by(CreditNote.created_at.desc())
+                .all()
+            )
+            total = len(credit_notes)
+            stats = renderer.render_credit_notes(
+                credit_notes, Path(file_path), on_progress=on_progress
+            )
+
+        if stats.failed:
+            raise ValueError(f"{stats.failed} of {total} PDFs failed to render")
+        return stats.written
+
+    def _invoice_pdfs_query(self, organization_id: UUID, filters: dict[str, Any]) -> Query[Invoice]:
+        """Invoices with a PDF (finalized or paid) matching filters."""
+        query = self.db.query(Invoice).filter(
+            Invoice.organization_id == organization_id,
+            Invoice.status.in_(RENDERABLE_STATUSES),
+        )
+        if filters.get("status"):
+            query = query.filter(Invoice.status == filters["status"])
+        if filters.get("customer_id"):
+            query = query.filter(Invoice.customer_id == filters["customer_id"])
+        return query
+
+    def _credit_note_pdfs_query(
+        self, organization_id: UUID, filters: dict[str, Any]
+    ) -> Query[CreditNote]:
+        """Credit notes with a PDF (finalized) matching filters."""
+        query = self.db.query(CreditNote).filter(
+            CreditNote.organization_id == organization_id,
+            CreditNote.status == CreditNoteStatus.FINALIZED.value,
+        )
+        if filters.get("customer_id"):
+            query = query.filter(CreditNote.customer_id == filters["customer_id"])
+        return query
+
     def _generate_csv_invoices(
         self,
         organization_id: UUID,
@@ -458,6 +552,38 @@ class DataExportService:
             self._update_progress(export_id, (i + 1) * 100 // total)
         return output.getvalue(), total
 
+    def _generate_csv_billing_simulation(
+        self,
+        organization_id: UUID,
+        filters: dict[str, Any],
+        export_id: UUID | None = None,
+    ) -> tuple[str, int]:
+        """Generate CSV of simulated charges for all active subscriptions.
+
+        ``filters["charge_overrides"]`` maps charge (or charge filter) IDs to
+        hypothetical properties; rows report both current and simulated amounts.
+        """
+        from app.services.billing_simulation import (
+            SIMULATION_COLUMNS,
+            BillingSimulationService,
+        )
+
+        def on_progress(done: int, total: int) -> None:
+            self._update_progress(export_id, done * 100 // total)
+
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(SIMULATION_COLUMNS)
+        count = 0
+        for row in BillingSimulationService(self.db).simulate(
+            organization_id,
+            charge_overrides=filters.get("charge_overrides"),
+            on_progress=on_progress,
+        ):
+            writer.writerow(row)
+            count += 1
+        return output.getvalue(), count
+
     # --- Count methods for size estimation ---
 
     def _count_invoices(self, organization_id: UUID, filters: dict[str, Any]) -> int:
@@ -469,6 +595,14 @@ class DataExportService:
             query = query.filter(Invoice.customer_id == filters["customer_id"])
         return query.count()
 
+    def _count_invoice_pdfs(self, organization_id: UUID, filters: dict[str, Any]) -> int:
+        """Count invoices whose PDFs would be exported."""
+        return self._invoice_pdfs_query(organization_id, filters).count()
+
+    def _count_credit_note_pdfs(self, organization_id: UUID, filters: dict[str, Any]) -> int:
+        """Count credit notes whose PDFs would be exported."""
+        return self._credit_note_pdfs_query(organization_id, filters).count()
+
     def _count_customers(self, organization_id: UUID, filters: dict[str, Any]) -> int:
         """Count customers matching filters."""
         query = self.db.query(Customer).filter(Customer.organization_id == organization_id)
@@ -519,6 +653,12 @@ class DataExportService:
             query = query.filter(AuditLog.actor_type == filters["actor_type"])
         return query.count()
 
+    def _count_billing_simulation(self, organization_id: UUID, filters: dict[str, Any]) -> int:
+        """Count subscriptions a billing simulation would price."""
+        from app.services.billing_simulation import BillingSimulationService
+
+        return BillingSimulationService(self.db).count_subscriptions(organization_id)
+
 
 def _fmt_dt(dt: datetime | None) -> str:
     """Format a datetime for CSV output."""
@@ -0,0 +1,228 @@
+"""Queued delivery of invoice and credit note emails.
+
+Sending a month's invoices one request at a time opens an SMTP connection per
+email and ties up API requests on rendering and delivery.  Instead, the bulk
+send endpoints queue one ``OutboundEmail`` per document and the worker sends
+them in batches of ``BXB_EMAIL_BATCH_SIZE``: messages are built in a thread
+(invoice PDFs come from the rendered-PDF storage, so each invoice version is
+rendered at most once), then sent concurrently over the pooled SMTP
+connections, whose size bounds the concurrency.  Failed sends are retried with
+exponential backoff up to ``BXB_EMAIL_MAX_ATTEMPTS`` attempts; permanent SMTP
+errors (5xx replies) fail at once.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from email.message import EmailMessage
+from uuid import UUID
+
+import aiosmtplib
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.credit_note import CreditNote
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.organization import Organization
+from app.models.outbound_email import OutboundEmail, OutboundEmailDocumentType
+from app.repositories.billing_entity_repository import BillingEntityRepository
+from app.repositories.credit_note_item_repository import CreditNoteItemRepository
+from app.repositories.credit_note_repository import CreditNoteRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.invoice_repository import InvoiceRepository
+from app.repositories.organization_repository import OrganizationRepository
+from app.repositories.outbound_email_repository import OutboundEmailRepository
+from app.services.email_service import EmailService
+from app.services.invoice_pdf_service import InvoicePdfService
+from app.services.pdf_service import PdfService
+
+logger = logging.getLogger(__name__)
+
+# A claimed email not sent within this time is assumed lost and sent again
+SEND_LEASE = timedelta(minutes=10)
+
+
+@dataclass(frozen=True)
+class PreparedEmail:
+    """A claimed email, with its message or the reason it cannot be built."""
+
+    email_id: UUID
+    attempts: int
+    message: EmailMessage | None = None
+    error: Exception | None = None
+
+
+class EmailDeliveryService:
+    """Queue document emails and prepare and record their delivery."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = OutboundEmailRepository(db)
+        self.email_service = EmailService()
+
+    def queue(
+        self,
+        organization_id: UUID,
+        document_type: OutboundEmailDocumentType,
+        document_ids: list[UUID],
+    ) -> list[OutboundEmail]:
+        """Queue an email for each document not already waiting to be sent."""
+        unsent = self.repo.get_unsent_document_ids(document_type.value, document_ids)
+        new_ids = list(dict.fromkeys(d for d in document_ids if d not in unsent))
+        return self.repo.create_many(organization_id, document_type.value, new_ids)
+
+    def prepare_batch(self, limit: int) -> list[PreparedEmail]:
+        """Claim due emails and build their messages."""
+        prepared = []
+        for email in self.repo.claim_due(limit, SEND_LEASE, settings.BXB_EMAIL_MAX_ATTEMPTS):
+            email_id = UUID(str(email.id))
+            attempts = int(email.attempts)
+            try:
+                message = self._compose(email)
+            except Exception as e:
+                if not isinstance(e, ValueError):
+                    logger.exception("Failed to build email %s", email_id)
+                prepared.append(PreparedEmail(email_id, attempts, error=e))
+            else:
+                prepared.append(PreparedEmail(email_id, attempts, message=message))
+        return prepared
+
+    def record_results(self, results: list[tuple[PreparedEmail, Exception | None]]) -> int:
+        """Record the outcome of each email: None when sent, else the error.
+
+        Returns:
+            Number of emails sent.
+        """
+        sent_ids = [email.email_id for email, error in results if error is None]
+        self.repo.mark_sent(sent_ids)
+        for email, error in results:
+            if error is None:
+                continue
+            retry_at = None
+            if _is_retryable(error) and email.attempts < settings.BXB_EMAIL_MAX_ATTEMPTS:
+                retry_at = datetime.now(UTC) + timedelta(minutes=2**email.attempts)
+            self.repo.mark_failed(email.email_id, str(error)[:1000], retry_at)
+            if retry_at is None:
+                logger.warning("Giving up on email %s: %s", email.email_id, error)
+        return len(sent_ids)
+
+    def _compose(self, email: OutboundEmail) -> EmailMessage:
+        """Build an email's message.
+
+        Raises:
+            ValueError: If the document or the customer's email address is gone.
+        """
+        organization_id = UUID(str(email.organization_id))
+        document_id = UUID(str(email.document_id))
+        organization = OrganizationRepository(self.db).get_by_id(organization_id)
+        if organization is None:
+            raise ValueError("Organization not found")
+
+        message: EmailMessage | None
+        if email.document_type == OutboundEmailDocumentType.INVOICE.value:
+            invoice = InvoiceRepository(self.db).get_by_id(document_id, organization_id)
+            if invoice is None:
+                raise ValueError("Invoice not found")
+            customer = CustomerRepository(self.db).get_by_id(invoice.customer_id)  # type: ignore[arg-type]
+            if customer is None:
+                raise ValueError("Customer not found")
+            message = self.email_service.compose_invoice_email(
+                invoice, customer, organization, self._invoice_pdf(invoice)
+            )
+        else:
+            credit_note = CreditNoteRepository(self.db).get_by_id(document_id, organization_id)
+            if credit_note is None:
+                raise ValueError("Credit note not found")
+            customer = CustomerRepository(self.db).get_by_id(credit_note.customer_id)  # type: ignore[arg-type]
+            if customer is None:
+                raise ValueError("Customer not found")
+            message = self.email_service.compose_credit_note_email(
+                credit_note,
+                customer,
+                organization,
+                self._credit_note_pdf(credit_note, customer, organization),
+            )
+        if message is None:
+            raise ValueError("Customer has no email address")
+        return message
+
+    def _invoice_pdf(self, invoice: Invoice) -> bytes:
+        return InvoicePdfService(self.db).get_pdf(invoice).path.read_bytes()
+
+    def _credit_note_pdf(
+        self, credit_note: CreditNote, customer: Customer, organization: Organization
+    ) -> bytes:
+        billing_entity = None
+        invoice = InvoiceRepository(self.db).get_by_id(credit_note.invoice_id)  # type: ignore[arg-type]
+        if invoice and invoice.billing_entity_id:
+            billing_entity = BillingEntityRepository(self.db).get_by_id(
+                invoice.billing_entity_id  # type: ignore[arg-type]
+            )
+        items = CreditNoteItemRepository(self.db).get_by_credit_note_id(UUID(str(credit_note.id)))
+        return PdfService().generate_credit_note_pdf(
+            credit_note=credit_note,
+            items=items,
+            customer=customer,
+            organization=organization,
+            billing_entity=billing_entity,
+        )
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a failed email may succeed on a later attempt."""
+    # Raised when the document, or its customer's email address, is gone
+    if isinstance(error, ValueError):
+        return False
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code < 500
+    return True
+
+
+def _prepare_batch() -> list[PreparedEmail]:
+    db = SessionLocal()
+    try:
+        return EmailDeliveryService(db).prepare_batch(settings.BXB_EMAIL_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def _record_results(results: list[tuple[PreparedEmail, Exception | None]]) -> int:
+    db = SessionLocal()
+    try:
+        return EmailDeliveryService(db).record_results(results)
+    finally:
+        db.close()
+
+
+async def _send(
+    email_service: EmailService, email: PreparedEmail
+) -> tuple[PreparedEmail, Exception | None]:
+    if email.message is None:
+        return email, email.error
+    try:
+        await email_service.send_message(email.message)
+    except (aiosmtplib.SMTPException, OSError) as e:
+        logger.warning("Failed to send email %s: %s", email.email_id, e)
+        return email, e
+    return email, None
+
+
+async def send_queued_emails() -> int:
+    """Send due queued emails, batch after batch, until none is left.
+
+    Database work runs in threads, so the event loop keeps sending.
+
+    Returns:
+        Number of emails sent.
+    """
+    email_service = EmailService()
+    sent = 0
+    while batch := await asyncio.to_thread(_prepare_batch):
+        results = await asyncio.gather(*(_send(email_service, email) for email in batch))
+        sent += await asyncio.to_thread(_record_results, list(results))
+    return sent
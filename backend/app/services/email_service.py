@@ -35,14 +35,14 @@ def _format_date(dt: object) -> str:
 class EmailService:
     """Service for sending transactional emails via SMTP."""
 
-    async def send_email(
+    def compose(
         self,
         to: str,
         subject: str,
         html_body: str,
         attachments: list[tuple[str, bytes, str]] | None = None,
-    ) -> bool:
-        """Send an email via SMTP.
+    ) -> EmailMessage:
+        """Build an email message.
 
         Args:
             to: Recipient email address.
@@ -51,14 +51,8 @@ class EmailService:
             attachments: Optional list of (filename, content_bytes, mime_type) tuples.
 
         Returns:
-            True if sent successfully (or no-op when SMTP unconfigured).
+            The message, from the configured sender.
         """
-        if not settings.SMTP_HOST:
-            logger.info("SMTP not configured, skipping email to %s: %s", to, subject)
-            return True
-
-        import aiosmtplib
-
         msg = EmailMessage()
         msg["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
         msg["To"] = to
@@ -75,18 +69,47 @@ class EmailService:
                     subtype=subtype or "octet-stream",
                     filename=filename,
                 )
+        return msg
 
-        await aiosmtplib.send(
-            msg,
-            hostname=settings.SMTP_HOST,
-            port=settings.SMTP_PORT,
-            username=settings.SMTP_USERNAME or None,
-            password=settings.SMTP_PASSWORD or None,
-            start_tls=settings.SMTP_USE_TLS,
-        )
-        logger.info("Email sent to %s: %s", to, subject)
+    async def send_message(self, msg: EmailMessage) -> bool:
+        """Send a message over the pooled SMTP connections.
+
+        Returns:
+            True if sent successfully (or no-op when SMTP unconfigured).
+
+        Raises:
+            aiosmtplib.SMTPException: If the message could not be sent.
+        """
+        if not settings.SMTP_HOST:
+            logger.info("SMTP not configured, skipping email to %s: %s", msg["To"], msg["Subject"])
+            return True
+
+        from app.services.smtp_pool import get_smtp_pool
+
+        await get_smtp_pool().send(msg)
+        logger.info("Email sent to %s: %s", msg["To"], msg["Subject"])
         return True
 
+    async def send_email(
+        self,
+        to: str,
+        subject: str,
+        html_body: str,
+        attachments: list[tuple[str, bytes, str]] | None = None,
+    ) -> bool:
+        """Send an email via SMTP.
+
+        Args:
+            to: Recipient email address.
+            subject: Email subject line.
+            html_body: HTML content of the email.
+            attachments: Optional list of (filename, content_bytes, mime_type) tuples.
+
+        Returns:
+            True if sent successfully (or no-op when SMTP unconfigured).
+        """
+        return await self.send_message(self.compose(to, subject, html_body, attachments))
+
     async def send_invoice_email(
         self,
         invoice: Invoice,
@@ -105,9 +128,32 @@ class EmailService:
         Returns:
             True if sent successfully.
         """
-        if not customer.email:
+        msg = self.compose_invoice_email(invoice, customer, organization, pdf_bytes)
+        if msg is None:
             logger.warning("Customer %s has no email, skipping invoice email", customer.id)
             return False
+        return await self.send_message(msg)
+
+    def compose_invoice_email(
+        self,
+        invoice: Invoice,
+        customer: Customer,
+        organization: Organization,
+        pdf_bytes: bytes | None = None,
+    ) -> EmailMessage | None:
+        """Build an invoice notification email.
+
+        Args:
+            invoice: The invoice to notify about.
+            customer: The customer to email.
+            organization: The issuing organization.
+            pdf_bytes: Optional PDF attachment bytes.
+
+        Returns:
+            The message, or None if the customer has no email address.
+        """
+        if not customer.email:
+            return None
 
         org_name = str(organization.name or "")
         subject = f"Invoice {invoice.invoice_number} from {org_name}"
@@ -131,7 +177,7 @@ class EmailService:
         if pdf_bytes is not None:
             attachments = [(f"invoice-{invoice.invoice_number}.pdf", pdf_bytes, "application/pdf")]
 
-        return await self.send_email(
+        return self.compose(
             to=str(customer.email),
             subject=subject,
             html_body=html_body,
@@ -156,9 +202,32 @@ class EmailService:
         Returns:
             True if sent successfully.
         """
-        if not customer.email:
+        msg = self.compose_credit_note_email(credit_note, customer, organization, pdf_bytes)
+        if msg is None:
             logger.warning("Customer %s has no email, skipping credit note email", customer.id)
             return False
+        return await self.send_message(msg)
+
+    def compose_credit_note_email(
+        self,
+        credit_note: object,
+        customer: Customer,
+        organization: Organization,
+        pdf_bytes: bytes | None = None,
+    ) -> EmailMessage | None:
+        """Build a credit note notification email.
+
+        Args:
+            credit_note: The credit note to notify about.
+            customer: The customer to email.
+            organization: The issuing organization.
+            pdf_bytes: Optional PDF attachment bytes.
+
+        Returns:
+            The message, or None if the customer has no email address.
+        """
+        if not customer.email:
+            return None
 
         org_name = str(organization.name or "")
         number = getattr(credit_note, "number", "")
@@ -185,7 +254,7 @@ class EmailService:
         if pdf_bytes is not None:
             attachments = [(f"credit-note-{number}.pdf", pdf_bytes, "application/pdf")]
 
-        return await self.send_email(
+        return self.compose(
             to=str(customer.email),
             subject=subject,
             html_body=html_body,
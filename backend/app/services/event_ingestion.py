@@ -0,0 +1,221 @@
+"""Streaming NDJSON event ingestion.
+
+Reads newline-delimited JSON events (optionally gzip-compressed) incrementally
+from a request body, validates each line on its own and writes accepted events
+in chunks.  Only a compact summary is produced; events are never echoed back.
+"""
+
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass, field
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.models.subscription import SubscriptionStatus
+from app.repositories.billable_metric_repository import BillableMetricRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.event_repository import EventRepository
+from app.repositories.subscription_repository import SubscriptionRepository
+from app.schemas.event import EventCreate
+
+# Events are written to the database in chunks of this size
+STREAM_CHUNK_SIZE = 500
+
+# Upper bound on per-line rejection details returned to the caller
+MAX_REPORTED_REJECTIONS = 100
+
+# Guards against unbounded memory use from a missing newline or a gzip bomb
+MAX_LINE_BYTES = 1024 * 1024
+_INFLATE_CHUNK_BYTES = 256 * 1024
+
+
+class StreamFormatError(ValueError):
+    """Raised when the request body cannot be decoded as (gzip) NDJSON."""
+
+
+@dataclass
+class StreamIngestionResult:
+    """Counts and rejected line details for a streamed ingestion."""
+
+    received: int = 0
+    ingested: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    rejections: list[tuple[int, str]] = field(default_factory=list)
+    external_customer_ids: set[str] = field(default_factory=set)
+
+
+class _GzipDecoder:
+    """Incremental decoder for gzip bodies, including multi-member ones.
+
+    Concatenated gzip members (as produced by appending to a ``.gz`` file)
+    decode to the concatenation of their contents, as with ``gzip -d``.
+    """
+
+    def __init__(self) -> None:
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        """Decompress ``data`` in bounded pieces."""
+        while data:
+            if self._decompressor.eof:
+                # The previous member ended; the data starts the next one
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                out = self._decompressor.decompress(data, _INFLATE_CHUNK_BYTES)
+            except zlib.error as e:
+                raise StreamFormatError(f"Invalid gzip body: {e}") from None
+            yield out
+            if self._decompressor.eof:
+                data = self._decompressor.unused_data
+            else:
+                data = self._decompressor.unconsumed_tail
+
+    def finish(self) -> bytes:
+        """Return any remaining output, checking the last member is complete."""
+        if not self._decompressor.eof:
+            raise StreamFormatError("Invalid gzip body: truncated stream")
+        return self._decompressor.flush()
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    gzip_encoded: bool = False,
+) -> AsyncIterator[tuple[int, bytes]]:
+    """Yield ``(line_number, line)`` pairs from a byte stream of NDJSON.
+
+    Line numbers are 1-based and count blank lines, which are skipped.
+    """
+    decoder = _GzipDecoder() if gzip_encoded else None
+    buffer = b""
+    line_number = 0
+
+    async for chunk in chunks:
+        pieces = decoder.feed(chunk) if decoder else iter((chunk,))
+        for piece in pieces:
+            buffer += piece
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield line_number, line
+            if len(buffer) > MAX_LINE_BYTES:
+                raise StreamFormatError(f"Line {line_number + 1} exceeds {MAX_LINE_BYTES} bytes")
+
+    if decoder is not None:
+        buffer += decoder.finish()
+    for line in buffer.split(b"\n"):
+        line_number += 1
+        if line.strip():
+            yield line_number, line
+
+
+def get_active_subscription_ids(
+    external_customer_id: str, db: Session, organization_id: UUID
+) -> list[str]:
+    """Find active subscription IDs for the given external customer.
+
+    Looks up the customer by external_id and returns the IDs of all
+    active subscriptions as strings (for task serialization).
+    """
+    customer_repo = CustomerRepository(db)
+    customer = customer_repo.get_by_external_id(external_customer_id, organization_id)
+    if not customer:
+        return []
+
+    sub_repo = SubscriptionRepository(db)
+    subscriptions = sub_repo.get_by_customer_id(
+        customer_id=UUID(str(customer.id)),
+        organization_id=organization_id,
+    )
+    return [str(sub.id) for sub in subscriptions if sub.status == SubscriptionStatus.ACTIVE.value]
+
+
+def get_active_subscription_ids_for_customers(
+    external_customer_ids: set[str], db: Session, organization_id: UUID
+) -> list[str]:
+    """Find unique active subscription IDs across several external customers."""
+    all_sub_ids: set[str] = set()
+    for ext_cust_id in external_customer_ids:
+        all_sub_ids.update(get_active_subscription_ids(ext_cust_id, db, organization_id))
+    return list(all_sub_ids)
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    parts = []
+    for err in error.errors():
+        loc = ".".join(str(p) for p in err["loc"])
+        parts.append(f"{loc}: {err['msg']}" if loc else str(err["msg"]))
+    return "; ".join(parts)
+
+
+class EventStreamIngestionService:
+    """Validate and store events from an NDJSON line stream."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.event_repo = EventRepository(db)
+        self.metric_repo = BillableMetricRepository(db)
+
+    async def ingest(
+        self,
+        lines: AsyncIterator[tuple[int, bytes]],
+        organization_id: UUID,
+    ) -> StreamIngestionResult:
+        """Ingest every valid line, recording rejected lines with their reason.
+
+        Accepted events are written every ``STREAM_CHUNK_SIZE`` lines, so a
+        stream interrupted by a format error keeps the chunks already written;
+        replaying it is safe because duplicates are skipped by transaction_id.
+        """
+        result = StreamIngestionResult()
+        known_codes: dict[str, bool] = {}
+        pending: list[EventCreate] = []
+
+        async for line_number, line in lines:
+            result.received += 1
+            try:
+                event = EventCreate.model_validate_json(line)
+            except ValidationError as e:
+                self._reject(result, line_number, _format_validation_error(e))
+                continue
+
+            if event.code not in known_codes:
+                known_codes[event.code] = self.metric_repo.code_exists(event.code, organization_id)
+            if not known_codes[event.code]:
+                self._reject(
+                    result,
+                    line_number,
+                    f"Billable metric with code '{event.code}' does not exist",
+                )
+                continue
+
+            pending.append(event)
+            if len(pending) >= STREAM_CHUNK_SIZE:
+                self._flush(pending, organization_id, result)
+                pending = []
+
+        self._flush(pending, organization_id, result)
+        return result
+
+    def _flush(
+        self,
+        events: list[EventCreate],
+        organization_id: UUID,
+        result: StreamIngestionResult,
+    ) -> None:
+        if not events:
+            return
+        ingested, duplicates = self.event_repo.ingest_batch(events, organization_id)
+        result.ingested += ingested
+        result.duplicates += duplicates
+        if ingested:
+            result.external_customer_ids.update(e.external_customer_id for e in events)
+
+    @staticmethod
+    def _reject(result: StreamIngestionResult, line_number: int, reason: str) -> None:
+        result.rejected += 1
+        if len(result.rejections) < MAX_REPORTED_REJECTIONS:
+            result.rejections.append((line_number, reason))
@@ -0,0 +1,239 @@
+"""Queue-backed asynchronous event ingestion.
+
+When ``BXB_EVENT_INGESTION_MODE`` is ``async``, the ingestion endpoints validate
+events and append them to a Redis Stream instead of writing them inline.  Ingest
+workers join a consumer group on that stream, bulk-write events to Postgres (and
+ClickHouse via the repository dual-write), then enqueue the usage threshold and
+alert checks that the synchronous path would have triggered.
+
+Entries are acknowledged and deleted only after a successful write, so events
+from a crashed or failing worker stay pending and are reclaimed by another
+consumer once they have been idle for ``CLAIM_MIN_IDLE_MS``.  When a batch
+fails to write, its entries are written one at a time, so one bad entry does
+not hold back the rest.  An entry reclaimed after
+``BXB_EVENT_QUEUE_MAX_DELIVERIES`` deliveries is moved to ``DEAD_LETTER_KEY``
+for inspection instead of being retried forever.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any
+from uuid import UUID
+
+from arq.connections import ArqRedis
+from pydantic import ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.event_repository import EventRepository
+from app.schemas.event import EventCreate
+from app.services.event_ingestion import get_active_subscription_ids_for_customers
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = "bxb:events:ingest"
+DEAD_LETTER_KEY = "bxb:events:ingest:dead"
+CONSUMER_GROUP = "bxb-ingest"
+
+# Pending entries idle for longer than this are assumed orphaned and reclaimed
+CLAIM_MIN_IDLE_MS = 60_000
+_READ_BLOCK_MS = 1_000
+_ERROR_BACKOFF_SECONDS = 1.0
+
+
+async def enqueue_events(
+    client: Redis,
+    events: list[EventCreate],
+    organization_id: UUID,
+) -> None:
+    """Append validated events to the ingest stream in one round trip."""
+    async with client.pipeline(transaction=False) as pipe:
+        for event in events:
+            pipe.xadd(
+                STREAM_KEY,
+                {"organization_id": str(organization_id), "event": event.model_dump_json()},
+            )
+        await pipe.execute()
+
+
+class EventQueueConsumer:
+    """Consumer-group member that drains the ingest stream in batches."""
+
+    def __init__(
+        self,
+        client: ArqRedis,
+        consumer_name: str,
+        batch_size: int | None = None,
+    ):
+        self.client = client
+        self.consumer_name = consumer_name
+        self.batch_size = batch_size or settings.BXB_EVENT_QUEUE_BATCH_SIZE
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def ensure_group(self) -> None:
+        """Create the consumer group (and stream) if it does not exist yet."""
+        try:
+            await self.client.xgroup_create(STREAM_KEY, CONSUMER_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def run(self) -> None:
+        """Consume until ``stop()`` is called."""
+        await self.ensure_group()
+        logger.info("Event queue consumer %s started", self.consumer_name)
+        while not self._stopping.is_set():
+            try:
+                await self.process_once()
+            except Exception:
+                logger.exception("Event queue consumer %s failed a batch", self.consumer_name)
+                await asyncio.sleep(_ERROR_BACKOFF_SECONDS)
+        logger.info("Event queue consumer %s stopped", self.consumer_name)
+
+    async def process_once(self) -> int:
+        """Process one batch: reclaimed orphans first, then new entries.
+
+        Returns:
+            Number of stream entries acknowledged.
+        """
+        _, entries, *_ = await self.client.xautoclaim(
+            STREAM_KEY,
+            CONSUMER_GROUP,
+            self.consumer_name,
+            min_idle_time=CLAIM_MIN_IDLE_MS,
+            start_id="0-0",
+            count=self.batch_size,
+        )
+        if entries:
+            entries = await self._dead_letter_exhausted(entries)
+        if not entries:
+            response = await self.client.xreadgroup(
+                CONSUMER_GROUP,
+                self.consumer_name,
+                {STREAM_KEY: ">"},
+                count=self.batch_size,
+                block=_READ_BLOCK_MS,
+            )
+            entries = response[0][1] if response else []
+        if not entries:
+            return 0
+
+        try:
+            sub_ids = await asyncio.to_thread(self._write, entries)
+        except Exception:
+            logger.exception("Failed to write an event queue batch, writing entries one by one")
+            entries, sub_ids = await asyncio.to_thread(self._write_each, entries)
+            if not entries:
+                return 0
+
+        entry_ids = [entry_id for entry_id, _ in entries]
+        await self.client.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+        await self.client.xdel(STREAM_KEY, *entry_ids)
+
+        for sub_id in sub_ids:
+            await self._enqueue_checks(sub_id)
+        return len(entry_ids)
+
+    async def _dead_letter_exhausted(
+        self, entries: list[tuple[Any, dict[Any, Any]]]
+    ) -> list[tuple[Any, dict[Any, Any]]]:
+        """Move reclaimed entries delivered too many times to the dead-letter stream.
+
+        Returns:
+            The entries still to be processed.
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            for entry_id, _ in entries:
+                pipe.xpending_range(STREAM_KEY, CONSUMER_GROUP, entry_id, entry_id, 1)
+            pending = await pipe.execute()
+
+        remaining = []
+        exhausted = []
+        for entry, info in zip(entries, pending, strict=True):
+            deliveries = int(info[0]["times_delivered"]) if info else 1
+            if deliveries > settings.BXB_EVENT_QUEUE_MAX_DELIVERIES:
+                exhausted.append(entry)
+            else:
+                remaining.append(entry)
+        if not exhausted:
+            return remaining
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            for entry_id, fields in exhausted:
+                pipe.xadd(DEAD_LETTER_KEY, {**fields, "entry_id": entry_id})
+            entry_ids = [entry_id for entry_id, _ in exhausted]
+            pipe.xack(STREAM_KEY, CONSUMER_GROUP, *entry_ids)
+            pipe.xdel(STREAM_KEY, *entry_ids)
+            await pipe.execute()
+        logger.error(
+            "Moved %d event queue entries to %s after %d deliveries",
+            len(exhausted),
+            DEAD_LETTER_KEY,
+            settings.BXB_EVENT_QUEUE_MAX_DELIVERIES,
+        )
+        return remaining
+
+    def _write_each(
+        self, entries: list[tuple[Any, dict[Any, Any]]]
+    ) -> tuple[list[tuple[Any, dict[Any, Any]]], list[str]]:
+        """Write entries one at a time, leaving those that fail pending.
+
+        Returns:
+            The written entries and the subscriptions to re-check.
+        """
+        written = []
+        sub_ids: set[str] = set()
+        for entry in entries:
+            try:
+                sub_ids.update(self._write([entry]))
+            except Exception:
+                logger.exception("Failed to write event queue entry %s", _decode(entry[0]))
+                continue
+            written.append(entry)
+        return written, sorted(sub_ids)
+
+    def _write(self, entries: list[tuple[Any, dict[Any, Any]]]) -> list[str]:
+        """Bulk-write entries per organization; return subscriptions to re-check."""
+        by_org: dict[UUID, list[EventCreate]] = defaultdict(list)
+        for entry_id, fields in entries:
+            try:
+                organization_id = UUID(_decode(fields[b"organization_id"]))
+                event = EventCreate.model_validate_json(fields[b"event"])
+            except (KeyError, TypeError, ValueError, ValidationError):
+                # Entries are validated before enqueueing; drop corrupt or trimmed ones
+                logger.error("Dropping malformed event queue entry %s", _decode(entry_id))
+                continue
+            by_org[organization_id].append(event)
+
+        sub_ids: set[str] = set()
+        db = SessionLocal()
+        try:
+            repo = EventRepository(db)
+            for organization_id, events in by_org.items():
+                ingested, _ = repo.ingest_batch(events, organization_id)
+                if ingested:
+                    sub_ids.update(
+                        get_active_subscription_ids_for_customers(
+                            {e.external_customer_id for e in events}, db, organization_id
+                        )
+                    )
+        finally:
+            db.close()
+        return sorted(sub_ids)
+
+    async def _enqueue_checks(self, subscription_id: str) -> None:
+        try:
+            await self.client.enqueue_job("check_usage_thresholds_task", subscription_id)
+            await self.client.enqueue_job("check_usage_alerts_task", subscription_id)
+        except Exception:
+            logger.exception("Failed to enqueue usage checks for subscription %s", subscription_id)
+
+
+def _decode(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
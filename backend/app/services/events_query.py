@@ -1,16 +1,18 @@
-"""Shared helper for fetching raw event properties.
+"""Shared helpers for DYNAMIC charge calculations over raw event properties.
 
 Routes through ClickHouse when enabled, otherwise queries the SQL Event model.
-Used by invoice generation and usage threshold services for DYNAMIC charges.
+Used by invoice generation, preview, usage query and threshold services.
 """
 
 from datetime import datetime
+from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.services.charge_models import dynamic
 
 
 def fetch_event_properties(
@@ -19,7 +21,7 @@ def fetch_event_properties(
     code: str,
     from_timestamp: datetime,
     to_timestamp: datetime,
-    organization_id: UUID | None = None,
+    organization_id: UUID,
     filters: dict[str, str] | None = None,
 ) -> list[dict[str, Any]]:
     """Fetch raw event properties for DYNAMIC charge calculations.
@@ -32,13 +34,13 @@ def fetch_event_properties(
         code: Billable metric code.
         from_timestamp: Start of period.
         to_timestamp: End of period (exclusive).
-        organization_id: Organization ID (required for ClickHouse path).
+        organization_id: Organization owning the events.
         filters: Optional property-based filters.
 
     Returns:
         List of event property dicts.
     """
-    if settings.clickhouse_enabled and organization_id is not None:
+    if settings.clickhouse_enabled:
         from app.services.clickhouse_aggregation import fetch_raw_event_properties
 
         all_props = fetch_raw_event_properties(
@@ -53,6 +55,7 @@ def fetch_event_properties(
     raw_events = (
         db.query(Event)
         .filter(
+            Event.organization_id == organization_id,
             Event.external_customer_id == external_customer_id,
             Event.code == code,
             Event.timestamp >= from_timestamp,
@@ -66,3 +69,48 @@ def fetch_event_properties(
     if filters:
         return [p for p in props_list if all(p.get(k) == v for k, v in filters.items())]
     return props_list
+
+
+def compute_dynamic_amount(
+    db: Session,
+    external_customer_id: str,
+    code: str,
+    from_timestamp: datetime,
+    to_timestamp: datetime,
+    organization_id: UUID,
+    properties: dict[str, Any],
+    filters: dict[str, str] | None = None,
+) -> Decimal:
+    """Compute a DYNAMIC charge amount: sum of price * quantity over events.
+
+    When ClickHouse is enabled the sum runs server-side; otherwise, or if
+    ClickHouse cannot compute it exactly, event properties are fetched and
+    summed with ``charge_models.dynamic.calculate``.
+    """
+    if settings.clickhouse_enabled:
+        from app.services.clickhouse_aggregation import aggregate_dynamic_amount
+
+        price_field, quantity_field = dynamic.price_fields(properties)
+        amount = aggregate_dynamic_amount(
+            organization_id,
+            code,
+            external_customer_id,
+            from_timestamp,
+            to_timestamp,
+            price_field,
+            quantity_field,
+            filters,
+        )
+        if amount is not None:
+            return amount
+
+    events = fetch_event_properties(
+        db,
+        external_customer_id,
+        code,
+        from_timestamp,
+        to_timestamp,
+        organization_id,
+        filters=filters,
+    )
+    return dynamic.calculate(events, properties)
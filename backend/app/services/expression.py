@@ -0,0 +1,255 @@
+"""Compiled arithmetic expressions over event properties.
+
+Used by CUSTOM aggregation (``BillableMetric.expression``) and DYNAMIC
+charges.  An expression is tokenized and parsed once into a small tree that
+can be evaluated for a single event, summed over columns of event values,
+or translated into a ClickHouse SQL expression so the sum runs server-side.
+"""
+
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+# Pattern to tokenize simple math expressions like "field1 + field2 * 2"
+_TOKEN_RE = re.compile(r"(\d+(?:\.\d+)?|[a-zA-Z_]\w*|[+\-*/()])")
+
+# Scale of property values in ClickHouse SQL, as for events_raw.decimal_value
+CLICKHOUSE_DECIMAL_SCALE = 26
+
+# Tree nodes: ("num", Decimal) | ("var", name) | (operator, left, right)
+Node = tuple[Any, ...]
+# A column is either a per-event list or a scalar shared by every event
+Column = list[Decimal] | Decimal
+
+
+def is_numeric(value: object) -> bool:
+    """Check if a value can be converted to Decimal."""
+    try:
+        Decimal(str(value))
+        return True
+    except Exception:
+        return False
+
+
+def numeric_variables(properties: Mapping[str, Any]) -> dict[str, Decimal]:
+    """Return the event properties usable as expression variables."""
+    return {
+        k: Decimal(str(v))
+        for k, v in properties.items()
+        if isinstance(v, (int, float, str)) and is_numeric(v)
+    }
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A parsed expression, reusable across events and calls."""
+
+    source: str
+    tree: Node
+    variables: tuple[str, ...]
+
+    def evaluate(self, variables: Mapping[str, Decimal]) -> Decimal:
+        """Evaluate the expression for a single set of variables."""
+        return _evaluate(self.tree, variables)
+
+    def sum_over(self, events: Iterable[Mapping[str, Any]]) -> tuple[Decimal, int]:
+        """Sum the expression over event property dicts, column by column.
+
+        Only the referenced properties are converted, once per event, and
+        each operator is applied to whole columns.  Arithmetic stays exact
+        in Decimal and matches summing ``evaluate`` per event.
+
+        Returns:
+            Tuple of (total, events_count).
+
+        Raises:
+            ValueError: If an event lacks a numeric value for a variable, or
+                a division by zero occurs.
+        """
+        rows = list(events)
+        if not rows:
+            return Decimal(0), 0
+
+        columns: dict[str, list[Decimal]] = {}
+        for name in self.variables:
+            column: list[Decimal] = []
+            for props in rows:
+                value = props.get(name)
+                if not isinstance(value, (int, float, str)) or not is_numeric(value):
+                    raise ValueError(f"Unknown variable: {name}")
+                column.append(Decimal(str(value)))
+            columns[name] = column
+
+        result = _evaluate_columns(self.tree, columns)
+        if isinstance(result, Decimal):
+            return result * len(rows), len(rows)
+        return sum(result, Decimal(0)), len(rows)
+
+    def to_clickhouse_sql(
+        self,
+        param_prefix: str = "expr",
+        missing_as_zero: bool = False,
+    ) -> tuple[str, dict[str, str]] | None:
+        """Translate the expression into ClickHouse SQL over ``properties``.
+
+        Variables are read from the JSON ``properties`` column as
+        ``Decimal256`` with ``decimal_value``'s scale; a value that is absent
+        or not numeric yields NULL (or 0 for an absent value when
+        ``missing_as_zero``), so callers can detect rows the SQL path cannot
+        price exactly.  Sums, differences and products are exact in
+        ClickHouse (a product too large for ``Decimal256`` raises instead of
+        rounding), but a quotient is truncated to the dividend's scale, so
+        expressions that divide are left to Python.
+
+        Returns:
+            Tuple of (sql, query_parameters), or None if the expression
+            divides or uses literals that cannot be expressed in SQL.
+        """
+        params: dict[str, str] = {}
+        for i, name in enumerate(self.variables):
+            params[f"{param_prefix}{i}"] = name
+        placeholders = {name: f"{param_prefix}{i}" for i, name in enumerate(self.variables)}
+        sql = _to_sql(self.tree, placeholders, missing_as_zero)
+        if sql is None:
+            return None
+        return sql, params
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse an expression once; results are cached by expression text.
+
+    Supports: +, -, *, / operators and parentheses.
+    No eval() or exec() — uses a simple recursive descent parser.
+    """
+    tokens = _TOKEN_RE.findall(expression)
+    pos = 0
+    names: list[str] = []
+
+    def _peek() -> str | None:
+        return str(tokens[pos]) if pos < len(tokens) else None
+
+    def _consume() -> str:
+        nonlocal pos
+        token = str(tokens[pos])
+        pos += 1
+        return token
+
+    def _parse_primary() -> Node:
+        token = _peek()
+        if token is None:
+            raise ValueError("Unexpected end of expression")
+        if token == "(":
+            _consume()  # consume '('
+            node = _parse_additive()
+            if _peek() != ")":
+                raise ValueError("Expected ')'")
+            _consume()  # consume ')'
+            return node
+        _consume()
+        # Number literal
+        try:
+            return ("num", Decimal(token))
+        except Exception:
+            pass
+        if token in "+-*/)":
+            raise ValueError(f"Unexpected token: {token}")
+        # Variable reference
+        if token not in names:
+            names.append(token)
+        return ("var", token)
+
+    def _parse_multiplicative() -> Node:
+        left = _parse_primary()
+        while _peek() in ("*", "/"):
+            op = _consume()
+            left = (op, left, _parse_primary())
+        return left
+
+    def _parse_additive() -> Node:
+        left = _parse_multiplicative()
+        while _peek() in ("+", "-"):
+            op = _consume()
+            left = (op, left, _parse_multiplicative())
+        return left
+
+    if not tokens:
+        raise ValueError("Empty expression")
+
+    tree = _parse_additive()
+    if pos != len(tokens):
+        raise ValueError("Unexpected tokens in expression")
+    return CompiledExpression(source=expression, tree=tree, variables=tuple(names))
+
+
+def _apply(op: str, left: Decimal, right: Decimal) -> Decimal:
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if right == 0:
+        raise ValueError("Division by zero")
+    return left / right
+
+
+def _evaluate(node: Node, variables: Mapping[str, Decimal]) -> Decimal:
+    kind = node[0]
+    if kind == "num":
+        value: Decimal = node[1]
+        return value
+    if kind == "var":
+        if node[1] not in variables:
+            raise ValueError(f"Unknown variable: {node[1]}")
+        return variables[node[1]]
+    return _apply(kind, _evaluate(node[1], variables), _evaluate(node[2], variables))
+
+
+def _evaluate_columns(node: Node, columns: Mapping[str, list[Decimal]]) -> Column:
+    kind = node[0]
+    if kind == "num":
+        value: Decimal = node[1]
+        return value
+    if kind == "var":
+        return columns[node[1]]
+
+    left = _evaluate_columns(node[1], columns)
+    right = _evaluate_columns(node[2], columns)
+    if isinstance(left, Decimal) and isinstance(right, Decimal):
+        return _apply(kind, left, right)
+    if isinstance(left, Decimal):
+        return [_apply(kind, left, r) for r in right]  # type: ignore[union-attr]
+    if isinstance(right, Decimal):
+        return [_apply(kind, lv, right) for lv in left]
+    return [_apply(kind, lv, r) for lv, r in zip(left, right, strict=True)]
+
+
+def _to_sql(node: Node, placeholders: Mapping[str, str], missing_as_zero: bool) -> str | None:
+    scale = CLICKHOUSE_DECIMAL_SCALE
+    kind = node[0]
+    if kind == "num":
+        literal: Decimal = node[1]
+        if not literal.is_finite():
+            return None
+        return f"toDecimal256('{literal}', {scale})"
+    if kind == "var":
+        param = f"{{{placeholders[node[1]]}:String}}"
+        value = (
+            f"toDecimal256OrNull(trim(BOTH '\"' FROM JSONExtractRaw(properties, {param})), {scale})"
+        )
+        if missing_as_zero:
+            return f"if(JSONHas(properties, {param}), {value}, toDecimal256(0, {scale}))"
+        return value
+
+    if kind == "/":
+        return None
+    left = _to_sql(node[1], placeholders, missing_as_zero)
+    right = _to_sql(node[2], placeholders, missing_as_zero)
+    if left is None or right is None:
+        return None
+    # A product's scale is the sum of its operands' scales, so it stays exact
+    return f"({left} {kind} {right})"
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from typing import Any
@@ -5,10 +6,16 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.models.billable_metric import BillableMetric
+from app.models.billable_metric_filter import BillableMetricFilter
 from app.models.charge import Charge, ChargeModel
+from app.models.charge_filter import ChargeFilter
 from app.models.fee import FeeType
 from app.models.invoice import Invoice
 from app.models.subscription import SubscriptionStatus
+from app.models.tax import Tax
+from app.repositories.applied_tax_repository import AppliedTaxRepository
+from app.repositories.billable_metric_repository import BillableMetricRepository
 from app.repositories.charge_filter_repository import ChargeFilterRepository
 from app.repositories.charge_repository import ChargeRepository
 from app.repositories.commitment_repository import CommitmentRepository
@@ -17,11 +24,20 @@ from app.repositories.invoice_repository import InvoiceRepository
 from app.repositories.subscription_repository import SubscriptionRepository
 from app.schemas.fee import FeeCreate
 from app.schemas.invoice import InvoiceCreate, InvoiceLineItem
-from app.services.charge_models.factory import get_charge_calculator
+from app.services.charge_models.factory import charge_pricing_key, get_charge_calculator
 from app.services.coupon_service import CouponApplicationService
-from app.services.events_query import fetch_event_properties
+from app.services.events_query import compute_dynamic_amount
 from app.services.tax_service import TaxCalculationService
-from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_aggregation import UsageAggregationService, UsageResult
+
+
+@dataclass(frozen=True)
+class _ChargeUsage:
+    """Aggregated usage for a charge, or one filter of a charge."""
+
+    metric: BillableMetric
+    filters: dict[str, str] | None
+    usage: UsageResult
 
 
 class InvoiceGenerationService:
@@ -32,12 +48,14 @@ class InvoiceGenerationService:
         self.subscription_repo = SubscriptionRepository(db)
         self.charge_repo = ChargeRepository(db)
         self.charge_filter_repo = ChargeFilterRepository(db)
+        self.metric_repo = BillableMetricRepository(db)
         self.commitment_repo = CommitmentRepository(db)
         self.invoice_repo = InvoiceRepository(db)
         self.fee_repo = FeeRepository(db)
         self.usage_service = UsageAggregationService(db)
         self.coupon_service = CouponApplicationService(db)
         self.tax_service = TaxCalculationService(db)
+        self.applied_tax_repo = AppliedTaxRepository(db)
 
     def generate_invoice(
         self,
@@ -49,7 +67,10 @@ class InvoiceGenerationService:
         """Generate an invoice for a subscription and billing period.
 
         Creates Fee records as the source of truth for line items, then populates
-        the Invoice's line_items JSON for backward compatibility.
+        the Invoice's line_items JSON for backward compatibility.  Fees, taxes,
+        coupon discounts and progressive billing credits are computed first;
+        the invoice, fees, applied taxes and coupon consumption are then written
+        in a single transaction, so a failure leaves nothing behind.
 
         Args:
             subscription_id: The subscription to bill
@@ -74,20 +95,36 @@ class InvoiceGenerationService:
 
         # Calculate fees for each charge
         customer_id = UUID(str(subscription.customer_id))
+        organization_id = UUID(str(subscription.organization_id))
         fee_creates: list[FeeCreate] = []
 
+        filters_by_charge = {
+            UUID(str(charge.id)): self.charge_filter_repo.get_by_charge_id(UUID(str(charge.id)))
+            for charge in charges
+        }
+        charge_usage = self._aggregate_charge_usage(
+            charges=charges,
+            filters_by_charge=filters_by_charge,
+            external_customer_id=external_customer_id,
+            organization_id=organization_id,
+            billing_period_start=billing_period_start,
+            billing_period_end=billing_period_end,
+        )
+
         for charge in charges:
             charge_id = UUID(str(charge.id))
-            charge_filters = self.charge_filter_repo.get_by_charge_id(charge_id)
+            charge_filters = filters_by_charge[charge_id]
 
             if charge_filters:
                 # Filtered charge: create separate fees per filter
                 filtered_fees = self._calculate_filtered_charge_fees(
                     charge=charge,
                     charge_filters=charge_filters,
+                    charge_usage=charge_usage,
                     customer_id=customer_id,
                     subscription_id=subscription_id,
                     external_customer_id=external_customer_id,
+                    organization_id=organization_id,
                     billing_period_start=billing_period_start,
                     billing_period_end=billing_period_end,
                 )
@@ -96,9 +133,11 @@ class InvoiceGenerationService:
                 # Unfiltered charge: single aggregation, single fee
                 fee_data = self._calculate_charge_fee(
                     charge=charge,
+                    charge_usage=charge_usage.get((charge_id, None)),
                     customer_id=customer_id,
                     subscription_id=subscription_id,
                     external_customer_id=external_customer_id,
+                    organization_id=organization_id,
                     billing_period_start=billing_period_start,
                     billing_period_end=billing_period_end,
                 )
@@ -134,7 +173,6 @@ class InvoiceGenerationService:
             else None
         )
 
-        # Create invoice
         invoice_data = InvoiceCreate(
             customer_id=customer_id,
             subscription_id=subscription_id,
@@ -144,49 +182,35 @@ class InvoiceGenerationService:
             line_items=line_items,
         )
 
-        invoice = self.invoice_repo.create(invoice_data)
-
-        # Create Fee records linked to the invoice
-        created_fees = []
-        if fee_creates:
-            invoice_uuid = UUID(str(invoice.id))
-            for fc in fee_creates:
-                fc.invoice_id = invoice_uuid
-            created_fees = self.fee_repo.create_bulk(fee_creates)
-
-        # Apply taxes to each fee
-        for fee in created_fees:
-            fee_id = UUID(str(fee.id))
-            fee_charge_id = UUID(str(fee.charge_id)) if fee.charge_id else None
-            taxes = self.tax_service.get_applicable_taxes(
-                customer_id=customer_id,
-                plan_id=plan_id,
-                charge_id=fee_charge_id,
-            )
-            if taxes:
-                self.tax_service.apply_taxes_to_fee(fee_id, taxes)
-
-        # Apply coupon discounts
-        subtotal = Decimal(str(invoice.subtotal_cents))
+        # Compute taxes, discounts and credits in memory; everything below is
+        # read-only until the single write transaction at the end
+        tax_resolver = self.tax_service.build_tax_resolver(
+            customer_id=customer_id,
+            plan_id=plan_id,
+            charge_ids=[UUID(str(charge.id)) for charge in charges],
+            organization_id=organization_id,
+        )
+        fee_taxes: list[list[Tax]] = []
+        total_tax = Decimal("0")
+        for fc in fee_creates:
+            taxes = tax_resolver.get_applicable_taxes(fc.charge_id)
+            tax_result = self.tax_service.calculate_tax(fc.amount_cents, taxes)
+            fc.taxes_amount_cents = tax_result.taxes_amount_cents
+            fc.total_amount_cents = fc.amount_cents + tax_result.taxes_amount_cents
+            total_tax += tax_result.taxes_amount_cents
+            fee_taxes.append(taxes)
+
+        subtotal = sum((fc.amount_cents for fc in fee_creates), Decimal("0"))
+        coupon_discount = Decimal("0")
+        applied_coupon_ids: list[UUID] = []
         if subtotal > 0:
-            coupon_discount = self.coupon_service.calculate_coupon_discount(
+            discount = self.coupon_service.calculate_coupon_discount(
                 customer_id=customer_id,
                 subtotal_cents=subtotal,
             )
-            if coupon_discount.total_discount_cents > 0:
-                invoice.coupons_amount_cents = coupon_discount.total_discount_cents  # type: ignore[assignment]
-                invoice.total_cents = subtotal - coupon_discount.total_discount_cents  # type: ignore[assignment]
-                self.db.commit()
-                self.db.refresh(invoice)
-
-                # Consume applied coupons
-                for applied_coupon_id in coupon_discount.applied_coupon_ids:
-                    self.coupon_service.consume_applied_coupon(applied_coupon_id)
-
-        # Aggregate fee-level taxes into invoice totals
-        if created_fees:
-            self.tax_service.apply_taxes_to_invoice(invoice_uuid)
-            self.db.refresh(invoice)
+            if discount.total_discount_cents > 0:
+                coupon_discount = discount.total_discount_cents
+                applied_coupon_ids = discount.applied_coupon_ids
 
         # Subtract progressive billing credits for end-of-period invoices
         from app.services.progressive_billing_service import ProgressiveBillingService
@@ -197,14 +221,48 @@ class InvoiceGenerationService:
             billing_period_start=billing_period_start,
             billing_period_end=billing_period_end,
         )
+
+        total = subtotal - coupon_discount + total_tax
         if progressive_credit > 0:
-            current_total = Decimal(str(invoice.total_cents))
-            invoice.progressive_billing_credit_amount_cents = progressive_credit  # type: ignore[assignment]
-            adjusted = current_total - progressive_credit
-            invoice.total_cents = adjusted if adjusted > 0 else Decimal("0")  # type: ignore[assignment]
+            total = max(total - progressive_credit, Decimal("0"))
+
+        # Write the invoice, its fees, applied taxes and coupon usage atomically
+        try:
+            invoice = self.invoice_repo.add(invoice_data, organization_id)
+            invoice.tax_amount_cents = total_tax  # type: ignore[assignment]
+            invoice.total_cents = total  # type: ignore[assignment]
+            if coupon_discount > 0:
+                invoice.coupons_amount_cents = coupon_discount  # type: ignore[assignment]
+            if progressive_credit > 0:
+                invoice.progressive_billing_credit_amount_cents = progressive_credit  # type: ignore[assignment]
+            self.db.flush()
+
+            if fee_creates:
+                invoice_uuid = UUID(str(invoice.id))
+                for fc in fee_creates:
+                    fc.invoice_id = invoice_uuid
+                created_fees = self.fee_repo.add_bulk(fee_creates)
+                self.db.flush()
+
+                for fee, taxes in zip(created_fees, fee_taxes, strict=True):
+                    fee_subtotal = Decimal(str(fee.amount_cents))
+                    for tax in taxes:
+                        rate = Decimal(str(tax.rate))
+                        self.applied_tax_repo.add(
+                            tax_id=tax.id,  # type: ignore[arg-type]
+                            taxable_type="fee",
+                            taxable_id=fee.id,  # type: ignore[arg-type]
+                            tax_rate=rate,
+                            tax_amount_cents=fee_subtotal * rate,
+                        )
+
+            self.coupon_service.stage_applied_coupon_consumption(applied_coupon_ids)
             self.db.commit()
-            self.db.refresh(invoice)
+        except Exception:
+            self.db.rollback()
+            raise
 
+        self.db.refresh(invoice)
         return invoice
 
     def _generate_commitment_true_up_fees(
@@ -269,17 +327,89 @@ class InvoiceGenerationService:
 
         return true_up_fees
 
+    def _aggregate_charge_usage(
+        self,
+        charges: list[Charge],
+        filters_by_charge: dict[UUID, list[ChargeFilter]],
+        external_customer_id: str,
+        organization_id: UUID,
+        billing_period_start: datetime,
+        billing_period_end: datetime,
+    ) -> dict[tuple[UUID, UUID | None], _ChargeUsage]:
+        """Aggregate usage for every metered charge and charge filter at once.
+
+        Aggregations are dispatched together so they can run concurrently
+        (see ``UsageAggregationService.aggregate_usage_many``).
+
+        Returns:
+            Usage keyed by (charge_id, charge_filter_id); filters without
+            any resolvable values and charges without a metric are absent.
+        """
+        keys: list[tuple[UUID, UUID | None]] = []
+        entries: list[tuple[BillableMetric, dict[str, str] | None]] = []
+        for charge in charges:
+            if not charge.billable_metric_id:
+                continue
+            metric = self.metric_repo.get_by_id(UUID(str(charge.billable_metric_id)))
+            if not metric:
+                continue
+
+            charge_id = UUID(str(charge.id))
+            charge_filters = filters_by_charge[charge_id]
+            if not charge_filters:
+                keys.append((charge_id, None))
+                entries.append((metric, None))
+                continue
+
+            for cf in charge_filters:
+                filters = self._resolve_filters(UUID(str(cf.id)))
+                if filters:
+                    keys.append((charge_id, UUID(str(cf.id))))
+                    entries.append((metric, filters))
+
+        usage_results = self.usage_service.aggregate_usage_many(
+            external_customer_id=external_customer_id,
+            requests=[(str(metric.code), filters) for metric, filters in entries],
+            from_timestamp=billing_period_start,
+            to_timestamp=billing_period_end,
+            organization_id=organization_id,
+        )
+        return {
+            key: _ChargeUsage(metric=metric, filters=filters, usage=usage)
+            for key, (metric, filters), usage in zip(keys, entries, usage_results, strict=True)
+        }
+
+    def _resolve_filters(self, charge_filter_id: UUID) -> dict[str, str]:
+        """Map a charge filter's values to event property filters."""
+        filters: dict[str, str] = {}
+        for fv in self.charge_filter_repo.get_filter_values(charge_filter_id):
+            bmf = (
+                self.db.query(BillableMetricFilter)
+                .filter(BillableMetricFilter.id == fv.billable_metric_filter_id)
+                .first()
+            )
+            if bmf is None:
+                continue
+            filters[str(bmf.key)] = str(fv.value)
+        return filters
+
     def _calculate_charge_fee(
         self,
         charge: Charge,
+        charge_usage: _ChargeUsage | None,
         customer_id: UUID,
         subscription_id: UUID,
         external_customer_id: str,
+        organization_id: UUID,
         billing_period_start: datetime,
         billing_period_end: datetime,
     ) -> FeeCreate | None:
         """Calculate a Fee for a charge.
 
+        Args:
+            charge_usage: The charge's aggregated usage; None for a metered
+                charge whose metric no longer exists.
+
         Returns:
             FeeCreate or None if no charges apply
         """
@@ -291,36 +421,27 @@ class InvoiceGenerationService:
 
         # Get usage for the metric
         events_count = 0
-        event_properties_list: list[dict[str, Any]] = []
+        dynamic_amount = Decimal(0)
         if charge.billable_metric_id:
-            from app.repositories.billable_metric_repository import (
-                BillableMetricRepository,
-            )
-
-            metric_repo = BillableMetricRepository(self.db)
-            metric_id = UUID(str(charge.billable_metric_id))
-            metric = metric_repo.get_by_id(metric_id)
-            if not metric:
+            if charge_usage is None:
                 return None
 
+            metric = charge_usage.metric
             metric_code = str(metric.code)
-            usage_result = self.usage_service.aggregate_usage_with_count(
-                external_customer_id=external_customer_id,
-                code=metric_code,
-                from_timestamp=billing_period_start,
-                to_timestamp=billing_period_end,
-            )
+            usage_result = charge_usage.usage
             usage = usage_result.value
             events_count = usage_result.events_count
 
-            # For dynamic charges, fetch raw event properties
+            # For dynamic charges, sum price * quantity over the events
             if charge_model == ChargeModel.DYNAMIC:
-                event_properties_list = fetch_event_properties(
+                dynamic_amount = compute_dynamic_amount(
                     self.db,
                     external_customer_id,
                     metric_code,
                     billing_period_start,
                     billing_period_end,
+                    organization_id,
+                    properties,
                 )
 
             description = str(metric.name)
@@ -330,7 +451,7 @@ class InvoiceGenerationService:
             metric_code = None
 
         # Get the calculator for this charge model
-        calculator = get_charge_calculator(charge_model)
+        calculator = get_charge_calculator(charge_model, charge_pricing_key(charge))
         if not calculator:
             return None
 
@@ -373,7 +494,7 @@ class InvoiceGenerationService:
 
         elif charge_model == ChargeModel.DYNAMIC:
             quantity = Decimal(events_count)
-            amount = calculator(events=event_properties_list, properties=properties)
+            amount = dynamic_amount
 
         else:
             return None
@@ -399,69 +520,38 @@ class InvoiceGenerationService:
     def _calculate_filtered_charge_fees(
         self,
         charge: Charge,
-        charge_filters: list[Any],
+        charge_filters: list[ChargeFilter],
+        charge_usage: dict[tuple[UUID, UUID | None], _ChargeUsage],
         customer_id: UUID,
         subscription_id: UUID,
         external_customer_id: str,
+        organization_id: UUID,
         billing_period_start: datetime,
         billing_period_end: datetime,
     ) -> list[FeeCreate]:
         """Calculate fees for a charge that has filters.
 
-        For each ChargeFilter, aggregate usage matching the filter's key-value
-        pairs and calculate a separate fee using the filter's properties.
+        For each ChargeFilter, take the usage aggregated for the filter's
+        key-value pairs and calculate a separate fee using the filter's
+        properties.
 
         Returns:
             List of FeeCreate objects, one per applicable filter.
         """
-        from app.models.billable_metric_filter import BillableMetricFilter
-        from app.repositories.billable_metric_repository import (
-            BillableMetricRepository,
-        )
-
         fees: list[FeeCreate] = []
-
-        # Resolve metric info (needed for all filters)
-        if not charge.billable_metric_id:
-            return fees
-
-        metric_repo = BillableMetricRepository(self.db)
-        metric_id = UUID(str(charge.billable_metric_id))
-        metric = metric_repo.get_by_id(metric_id)
-        if not metric:
-            return fees
-
-        metric_code = str(metric.code)
+        charge_id = UUID(str(charge.id))
         charge_model = ChargeModel(charge.charge_model)
 
         for cf in charge_filters:
-            # Build filter dict from ChargeFilterValues
-            filter_values = self.charge_filter_repo.get_filter_values(UUID(str(cf.id)))
-            if not filter_values:
-                continue
-
-            filters: dict[str, str] = {}
-            for fv in filter_values:
-                bmf = (
-                    self.db.query(BillableMetricFilter)
-                    .filter(BillableMetricFilter.id == fv.billable_metric_filter_id)
-                    .first()
-                )
-                if bmf is None:
-                    continue
-                filters[str(bmf.key)] = str(fv.value)
-
-            if not filters:
+            # Filters without resolvable values were not aggregated
+            filter_usage = charge_usage.get((charge_id, UUID(str(cf.id))))
+            if filter_usage is None:
                 continue
 
-            # Aggregate usage with these filters applied
-            usage_result = self.usage_service.aggregate_usage_with_count(
-                external_customer_id=external_customer_id,
-                code=metric_code,
-                from_timestamp=billing_period_start,
-                to_timestamp=billing_period_end,
-                filters=filters,
-            )
+            metric = filter_usage.metric
+            metric_code = str(metric.code)
+            filters = filter_usage.filters
+            usage_result = filter_usage.usage
             usage = usage_result.value
             events_count = usage_result.events_count
 
@@ -473,20 +563,22 @@ class InvoiceGenerationService:
 
             unit_price = Decimal(str(properties.get("unit_price", 0)))
 
-            # For dynamic charges, fetch filtered raw event properties
-            event_properties_list: list[dict[str, Any]] = []
+            # For dynamic charges, sum price * quantity over the filtered events
+            dynamic_amount = Decimal(0)
             if charge_model == ChargeModel.DYNAMIC:
-                event_properties_list = fetch_event_properties(
+                dynamic_amount = compute_dynamic_amount(
                     self.db,
                     external_customer_id,
                     metric_code,
                     billing_period_start,
                     billing_period_end,
+                    organization_id,
+                    properties,
                     filters=filters,
                 )
 
             # Get calculator and compute amount
-            calculator = get_charge_calculator(charge_model)
+            calculator = get_charge_calculator(charge_model, charge_pricing_key(charge, cf))
             if not calculator:
                 continue
 
@@ -530,7 +622,7 @@ class InvoiceGenerationService:
 
             elif charge_model == ChargeModel.DYNAMIC:
                 quantity = Decimal(events_count)
-                amount = calculator(events=event_properties_list, properties=properties)
+                amount = dynamic_amount
 
             else:
                 continue
@@ -566,6 +658,7 @@ class InvoiceGenerationService:
         self,
         charge: Charge,
         external_customer_id: str,
+        organization_id: UUID,
         billing_period_start: datetime,
         billing_period_end: datetime,
     ) -> InvoiceLineItem | None:
@@ -583,7 +676,7 @@ class InvoiceGenerationService:
         max_price = Decimal(str(properties.get("max_price", 0)))
 
         # Get usage for the metric
-        event_properties_list: list[dict[str, Any]] = []
+        dynamic_amount = Decimal(0)
         if charge.billable_metric_id:
             from app.repositories.billable_metric_repository import (
                 BillableMetricRepository,
@@ -601,16 +694,19 @@ class InvoiceGenerationService:
                 code=metric_code,
                 from_timestamp=billing_period_start,
                 to_timestamp=billing_period_end,
+                organization_id=organization_id,
             )
 
-            # For dynamic charges, fetch raw event properties
+            # For dynamic charges, sum price * quantity over the events
             if charge_model == ChargeModel.DYNAMIC:
-                event_properties_list = fetch_event_properties(
+                dynamic_amount = compute_dynamic_amount(
                     self.db,
                     external_customer_id,
                     metric_code,
                     billing_period_start,
                     billing_period_end,
+                    organization_id,
+                    properties,
                 )
 
             description = str(metric.name)
@@ -620,7 +716,7 @@ class InvoiceGenerationService:
             metric_code = None
 
         # Get the calculator for this charge model
-        calculator = get_charge_calculator(charge_model)
+        calculator = get_charge_calculator(charge_model, charge_pricing_key(charge))
         if not calculator:
             return None
 
@@ -663,7 +759,7 @@ class InvoiceGenerationService:
 
         elif charge_model == ChargeModel.DYNAMIC:
             quantity = usage
-            amount = calculator(events=event_properties_list, properties=properties)
+            amount = dynamic_amount
 
         else:
             return None
@@ -0,0 +1,206 @@
+"""Invoice number allocation.
+
+Invoice numbers come from counters advanced by a single ``UPDATE ...
+RETURNING``: the organization's daily ``INV-YYYYMMDD-`` counter in
+``invoice_number_sequences``, or a billing entity's ``next_invoice_number``.
+On PostgreSQL the counter is advanced in its own short transaction, so its
+row lock is held for one statement instead of the whole invoice transaction
+and parallel billing workers neither queue behind each other nor race to the
+same number.  In exchange, an invoice that is rolled back leaves a gap.
+
+With ``BXB_INVOICE_NUMBER_BLOCK_SIZE`` above 1, each process reserves a block
+of numbers per counter and hands them out from memory, so bulk invoice runs
+touch the counter once per block.  Numbers still unused in a block when the
+process exits are never issued, and a change to a billing entity's prefix or
+counter takes effect from its next block.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Engine, Executable, Row, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.billing_entity import BillingEntity
+from app.models.invoice import Invoice
+from app.models.invoice_number_sequence import InvoiceNumberSequence
+from app.models.shared import generate_uuid
+
+DEFAULT_ENTITY_PREFIX = "INV"
+
+
+class _Block:
+    """A reserved range of numbers [next_value, end) and their prefix."""
+
+    __slots__ = ("prefix", "next_value", "end")
+
+    def __init__(self, prefix: str, next_value: int, end: int):
+        self.prefix = prefix
+        self.next_value = next_value
+        self.end = end
+
+
+_BLOCK_CACHE_SIZE = 1024
+_blocks: OrderedDict[Hashable, _Block] = OrderedDict()
+_blocks_lock = threading.Lock()
+
+
+def clear_invoice_number_blocks() -> None:
+    """Drop all reserved blocks. Used for testing."""
+    with _blocks_lock:
+        _blocks.clear()
+
+
+class InvoiceNumberAllocator:
+    """Allocate invoice numbers from per-organization and per-entity counters."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def next_invoice_number(
+        self, organization_id: UUID, billing_entity_id: UUID | None = None
+    ) -> str:
+        """Allocate the next invoice number.
+
+        Invoices of a billing entity are numbered ``<prefix>-NNNN`` from the
+        entity's counter; other invoices ``INV-YYYYMMDD-NNNN`` from the
+        organization's counter for the day.  An unknown billing entity falls
+        back to the organization's counter.
+        """
+        if billing_entity_id is not None:
+            number = self._take(
+                ("billing_entity", billing_entity_id),
+                lambda count: self._reserve_billing_entity(billing_entity_id, count),
+            )
+            if number is not None:
+                return number
+
+        prefix = f"INV-{datetime.now().strftime('%Y%m%d')}-"
+        number = self._take(
+            ("organization", organization_id, prefix),
+            lambda count: self._reserve_organization(organization_id, prefix, count),
+        )
+        assert number is not None
+        return number
+
+    def _take(self, key: Hashable, reserve: Callable[[int], tuple[str, int] | None]) -> str | None:
+        """Hand out the next number of the key's block, reserving one if needed.
+
+        ``reserve(count)`` returns (prefix, first value) for a new block of
+        ``count`` numbers, or None if the counter does not exist.
+        """
+        block_size = max(settings.BXB_INVOICE_NUMBER_BLOCK_SIZE, 1)
+        if block_size > 1:
+            with _blocks_lock:
+                block = _blocks.get(key)
+                if block is not None and block.next_value < block.end:
+                    value = block.next_value
+                    block.next_value += 1
+                    _blocks.move_to_end(key)
+                    return f"{block.prefix}{value:04d}"
+
+        reserved = reserve(block_size)
+        if reserved is None:
+            return None
+        prefix, first = reserved
+        if block_size > 1:
+            with _blocks_lock:
+                # A concurrent thread may have reserved a block meanwhile; the
+                # remainder of whichever block is replaced goes unused
+                _blocks[key] = _Block(prefix, first + 1, first + block_size)
+                _blocks.move_to_end(key)
+                if len(_blocks) > _BLOCK_CACHE_SIZE:
+                    _blocks.popitem(last=False)
+        return f"{prefix}{first:04d}"
+
+    def _reserve_billing_entity(
+        self, billing_entity_id: UUID, count: int
+    ) -> tuple[str, int] | None:
+        row = self._execute_counter(
+            update(BillingEntity)
+            .where(BillingEntity.id == billing_entity_id)
+            .values(next_invoice_number=BillingEntity.next_invoice_number + count)
+            .returning(BillingEntity.next_invoice_number, BillingEntity.invoice_prefix)
+        )
+        if row is None:
+            return None
+        next_value, invoice_prefix = row
+        return f"{invoice_prefix or DEFAULT_ENTITY_PREFIX}-", int(next_value) - count
+
+    def _reserve_organization(
+        self, organization_id: UUID, prefix: str, count: int
+    ) -> tuple[str, int]:
+        advance = (
+            update(InvoiceNumberSequence)
+            .where(
+                InvoiceNumberSequence.organization_id == organization_id,
+                InvoiceNumberSequence.sequence_key == prefix,
+            )
+            .values(next_value=InvoiceNumberSequence.next_value + count)
+            .returning(InvoiceNumberSequence.next_value)
+        )
+        row = self._execute_counter(advance)
+        if row is None:
+            self._create_sequence(organization_id, prefix)
+            row = self._execute_counter(advance)
+            assert row is not None
+        return prefix, int(row[0]) - count
+
+    def _create_sequence(self, organization_id: UUID, prefix: str) -> None:
+        """Create the counter for a prefix, continuing after existing invoices.
+
+        Concurrent creators are resolved by the unique constraint: the first
+        insert wins and the others leave its row untouched.
+        """
+        dialect = self.db.bind.dialect.name if self.db.bind else "sqlite"
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        self._execute_counter(
+            insert(InvoiceNumberSequence)
+            .values(
+                id=generate_uuid(),
+                organization_id=organization_id,
+                sequence_key=prefix,
+                next_value=self._next_after_existing(organization_id, prefix),
+            )
+            .on_conflict_do_nothing(index_elements=["organization_id", "sequence_key"])
+            .returning(InvoiceNumberSequence.id)
+        )
+
+    def _next_after_existing(self, organization_id: UUID, prefix: str) -> int:
+        """Next number after the organization's invoices already using a prefix.
+
+        Numbers are compared by length first, as the suffix grows past four
+        digits and "...-9999" sorts after "...-10000" as a string.
+        """
+        numbers = (
+            self.db.query(Invoice.invoice_number)
+            .filter(
+                Invoice.organization_id == organization_id,
+                Invoice.invoice_number.like(f"{prefix}%"),
+            )
+            .order_by(func.length(Invoice.invoice_number).desc(), Invoice.invoice_number.desc())
+        )
+        for (number,) in numbers:
+            try:
+                return int(str(number)[len(prefix) :]) + 1
+            except ValueError:
+                continue
+        return 1
+
+    def _execute_counter(self, statement: Executable) -> Row[Any] | None:
+        """Run a counter statement returning rows, committing it at once on PostgreSQL.
+
+        Elsewhere (SQLite, or a session bound to a connection) the statement
+        joins the session's transaction, which serializes writers anyway.
+        """
+        bind = self.db.get_bind()
+        if isinstance(bind, Engine) and bind.dialect.name == "postgresql":
+            with bind.begin() as connection:
+                return connection.execute(statement).first()
+        return self.db.execute(statement).first()
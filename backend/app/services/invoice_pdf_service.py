@@ -0,0 +1,118 @@
+"""Invoice PDFs rendered once per version and stored on disk.
+
+Rendering a PDF with WeasyPrint takes hundreds of milliseconds, while the
+HTML it is rendered from is cheap to build.  ``InvoicePdfService`` names each
+PDF after its document's content key and keeps it under
+``BXB_DATA_PATH/invoice_pdfs``, so a version of an invoice is rendered once
+and served from disk afterwards.  Any change to the invoice, its fees,
+customer, organization, billing entity or the template yields a different
+document and therefore a new PDF.  Finalization enqueues the render on the
+worker; reads render on a miss.
+"""
+
+import os
+import tempfile
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.invoice import Invoice, InvoiceStatus
+from app.repositories.billing_entity_repository import BillingEntityRepository
+from app.repositories.customer_repository import CustomerRepository
+from app.repositories.fee_repository import FeeRepository
+from app.repositories.invoice_repository import InvoiceRepository
+from app.repositories.organization_repository import OrganizationRepository
+from app.services.pdf_service import PdfDocument, PdfService
+
+# Invoice statuses whose PDF can be rendered
+RENDERABLE_STATUSES = (InvoiceStatus.FINALIZED.value, InvoiceStatus.PAID.value)
+
+
+@dataclass(frozen=True)
+class InvoicePdf:
+    """A stored invoice PDF."""
+
+    content_key: str
+    path: Path
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag identifying the PDF's content."""
+        return f'"{self.content_key}"'
+
+
+def invoice_pdf_path(content_key: str) -> Path:
+    """Location of the PDF with a given content key."""
+    return Path(settings.BXB_DATA_PATH) / "invoice_pdfs" / content_key[:2] / f"{content_key}.pdf"
+
+
+class InvoicePdfService:
+    """Render invoice PDFs on first use and serve them from storage."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.pdf_service = PdfService()
+
+    def get_pdf(self, invoice: Invoice) -> InvoicePdf:
+        """Get the PDF of an invoice's current version, rendering it if needed."""
+        document = self.document(invoice)
+        content_key = document.content_key
+        path = invoice_pdf_path(content_key)
+        if not path.exists():
+            store_invoice_pdf(content_key, self.pdf_service.render(document))
+        return InvoicePdf(content_key=content_key, path=path)
+
+    def render(self, invoice_id: UUID) -> InvoicePdf | None:
+        """Render and store a finalized or paid invoice's PDF ahead of reads.
+
+        Returns:
+            The stored PDF, or None if the invoice does not exist or is not
+            finalized or paid.
+        """
+        invoice = InvoiceRepository(self.db).get_by_id(invoice_id)
+        if invoice is None or invoice.status not in RENDERABLE_STATUSES:
+            return None
+        return self.get_pdf(invoice)
+
+    def document(self, invoice: Invoice) -> PdfDocument:
+        """Build the document of an invoice's current version."""
+        customer = CustomerRepository(self.db).get_by_id(invoice.customer_id)  # type: ignore[arg-type]
+        organization = OrganizationRepository(self.db).get_by_id(
+            invoice.organization_id  # type: ignore[arg-type]
+        )
+        billing_entity = None
+        if invoice.billing_entity_id:
+            billing_entity = BillingEntityRepository(self.db).get_by_id(
+                invoice.billing_entity_id  # type: ignore[arg-type]
+            )
+        fees = FeeRepository(self.db).get_by_invoice_id(invoice.id)  # type: ignore[arg-type]
+        return self.pdf_service.invoice_document(
+            invoice=invoice,
+            fees=fees,
+            customer=customer,  # type: ignore[arg-type]
+            organization=organization,  # type: ignore[arg-type]
+            billing_entity=billing_entity,
+        )
+
+
+def store_invoice_pdf(content_key: str, data: bytes) -> Path:
+    """Store a rendered PDF under its content key.
+
+    The file is written atomically, so readers never see it partially written.
+    """
+    path = invoice_pdf_path(content_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    return path
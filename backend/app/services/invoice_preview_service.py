@@ -2,7 +2,6 @@
 
 from datetime import datetime
 from decimal import Decimal
-from typing import Any
 from uuid import UUID
 
 from sqlalchemy.orm import Session
@@ -10,17 +9,14 @@ from sqlalchemy.orm import Session
 from app.models.charge import Charge, ChargeModel
 from app.models.fee import FeeType
 from app.models.subscription import SubscriptionStatus
-from app.repositories.charge_filter_repository import ChargeFilterRepository
 from app.repositories.charge_repository import ChargeRepository
 from app.repositories.commitment_repository import CommitmentRepository
 from app.repositories.subscription_repository import SubscriptionRepository
 from app.schemas.fee import FeeCreate
 from app.schemas.invoice_preview import FeePreview, InvoicePreviewResponse
-from app.services.charge_models.factory import get_charge_calculator
 from app.services.coupon_service import CouponApplicationService
-from app.services.events_query import fetch_event_properties
 from app.services.tax_service import TaxCalculationService
-from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_snapshot import ChargeUsageSnapshot, UsageSnapshotService
 
 
 class InvoicePreviewService:
@@ -30,9 +26,8 @@ class InvoicePreviewService:
         self.db = db
         self.subscription_repo = SubscriptionRepository(db)
         self.charge_repo = ChargeRepository(db)
-        self.charge_filter_repo = ChargeFilterRepository(db)
         self.commitment_repo = CommitmentRepository(db)
-        self.usage_service = UsageAggregationService(db)
+        self.snapshot_service = UsageSnapshotService(db)
         self.coupon_service = CouponApplicationService(db)
         self.tax_service = TaxCalculationService(db)
 
@@ -67,46 +62,31 @@ class InvoicePreviewService:
         if subscription.status != SubscriptionStatus.ACTIVE.value:
             raise ValueError("Can only preview invoices for active subscriptions")
 
-        # Default billing period to current month if not specified
-        if billing_period_start is None or billing_period_end is None:
-            now = datetime.now()
-            billing_period_start = billing_period_start or now.replace(
+        # Default billing period to the current month; an open period ends now
+        if billing_period_start is None:
+            billing_period_start = datetime.now().replace(
                 day=1, hour=0, minute=0, second=0, microsecond=0
             )
-            billing_period_end = billing_period_end or now
 
         plan_id = UUID(str(subscription.plan_id))
         customer_id = UUID(str(subscription.customer_id))
+        organization_id = UUID(str(subscription.organization_id))
         charges = self.charge_repo.get_by_plan_id(plan_id)
 
         # Calculate fees for each charge (same logic as InvoiceGenerationService)
+        snapshot = self.snapshot_service.get_snapshot(
+            subscription, external_customer_id, billing_period_start, billing_period_end
+        )
+        billing_period_end = snapshot.period_end
         fee_creates: list[FeeCreate] = []
-        for charge in charges:
-            charge_id = UUID(str(charge.id))
-            charge_filters = self.charge_filter_repo.get_by_charge_id(charge_id)
-
-            if charge_filters:
-                filtered_fees = self._calculate_filtered_charge_fees(
-                    charge=charge,
-                    charge_filters=charge_filters,
-                    customer_id=customer_id,
-                    subscription_id=subscription_id,
-                    external_customer_id=external_customer_id,
-                    billing_period_start=billing_period_start,
-                    billing_period_end=billing_period_end,
-                )
-                fee_creates.extend(filtered_fees)
-            else:
-                fee_data = self._calculate_charge_fee(
-                    charge=charge,
-                    customer_id=customer_id,
-                    subscription_id=subscription_id,
-                    external_customer_id=external_customer_id,
-                    billing_period_start=billing_period_start,
-                    billing_period_end=billing_period_end,
-                )
-                if fee_data:
-                    fee_creates.append(fee_data)
+        for charge_usage in snapshot.charges:
+            fee_data = self._build_charge_fee(
+                charge_usage=charge_usage,
+                customer_id=customer_id,
+                subscription_id=subscription_id,
+            )
+            if fee_data:
+                fee_creates.append(fee_data)
 
         # Generate commitment true-up fees
         commitment_fees = self._generate_commitment_true_up_fees(
@@ -121,13 +101,15 @@ class InvoicePreviewService:
         subtotal = sum((fc.amount_cents for fc in fee_creates), Decimal("0"))
 
         # Calculate taxes (read-only — no AppliedTax records created)
+        tax_resolver = self.tax_service.build_tax_resolver(
+            customer_id=customer_id,
+            plan_id=plan_id,
+            charge_ids=[UUID(str(charge.id)) for charge in charges],
+            organization_id=organization_id,
+        )
         tax_amount = Decimal("0")
         for fc in fee_creates:
-            taxes = self.tax_service.get_applicable_taxes(
-                customer_id=customer_id,
-                plan_id=plan_id,
-                charge_id=fc.charge_id,
-            )
+            taxes = tax_resolver.get_applicable_taxes(fc.charge_id)
             if taxes:
                 result = self.tax_service.calculate_tax(fc.amount_cents, taxes)
                 tax_amount += result.taxes_amount_cents
@@ -240,274 +222,39 @@ class InvoicePreviewService:
 
         return true_up_fees
 
-    def _calculate_charge_fee(
+    def _build_charge_fee(
         self,
-        charge: Charge,
+        charge_usage: ChargeUsageSnapshot,
         customer_id: UUID,
         subscription_id: UUID,
-        external_customer_id: str,
-        billing_period_start: datetime,
-        billing_period_end: datetime,
     ) -> FeeCreate | None:
-        """Calculate a Fee for a charge (same logic as InvoiceGenerationService)."""
-        charge_model = ChargeModel(charge.charge_model)
-        properties: dict[str, Any] = dict(charge.properties) if charge.properties else {}
+        """Build a Fee for a charge's usage (same logic as InvoiceGenerationService)."""
+        charge_model = charge_usage.charge_model
+        properties = dict(charge_usage.properties)
         unit_price = Decimal(str(properties.get("unit_price", 0)))
-        min_price = Decimal(str(properties.get("min_price", 0)))
-        max_price = Decimal(str(properties.get("max_price", 0)))
-
-        events_count = 0
-        event_properties_list: list[dict[str, Any]] = []
-        if charge.billable_metric_id:
-            from app.repositories.billable_metric_repository import (
-                BillableMetricRepository,
-            )
-
-            metric_repo = BillableMetricRepository(self.db)
-            metric_id = UUID(str(charge.billable_metric_id))
-            metric = metric_repo.get_by_id(metric_id)
-            if not metric:
-                return None
-
-            metric_code = str(metric.code)
-            usage_result = self.usage_service.aggregate_usage_with_count(
-                external_customer_id=external_customer_id,
-                code=metric_code,
-                from_timestamp=billing_period_start,
-                to_timestamp=billing_period_end,
-            )
-            usage = usage_result.value
-            events_count = usage_result.events_count
-
-            if charge_model == ChargeModel.DYNAMIC:
-                event_properties_list = fetch_event_properties(
-                    self.db,
-                    external_customer_id,
-                    metric_code,
-                    billing_period_start,
-                    billing_period_end,
-                )
-
-            description = str(metric.name)
-        else:
-            usage = Decimal(1)
-            description = "Subscription Fee"
-            metric_code = None
-
-        calculator = get_charge_calculator(charge_model)
-        if not calculator:
-            return None
 
-        amount = Decimal("0")
-        quantity = Decimal("0")
-
-        if charge_model == ChargeModel.STANDARD:
-            quantity = usage
-            amount = calculator(units=usage, properties=properties)
-            if min_price and amount < min_price:
-                amount = min_price
-            if max_price and amount > max_price:
-                amount = max_price
-
-        elif charge_model in (
-            ChargeModel.GRADUATED,
-            ChargeModel.VOLUME,
-            ChargeModel.PACKAGE,
-        ):
-            quantity = usage
-            amount = calculator(units=usage, properties=properties)
-
-        elif charge_model == ChargeModel.PERCENTAGE:
-            total_amount = Decimal(str(properties.get("base_amount", 0)))
-            event_count = int(properties.get("event_count", 0))
+        if charge_model in (ChargeModel.PERCENTAGE, ChargeModel.GRADUATED_PERCENTAGE):
             quantity = Decimal(1)
-            amount = calculator(
-                units=usage,
-                properties=properties,
-                total_amount=total_amount,
-                event_count=event_count,
-            )
-
-        elif charge_model == ChargeModel.GRADUATED_PERCENTAGE:
-            usage_amount = Decimal(str(properties.get("base_amount", usage)))
-            quantity = Decimal(1)
-            amount = calculator(total_amount=usage_amount, properties=properties)
-
-        elif charge_model == ChargeModel.CUSTOM:
-            quantity = usage
-            amount = calculator(units=usage, properties=properties)
-
-        else:  # ChargeModel.DYNAMIC
-            quantity = Decimal(events_count)
-            amount = calculator(events=event_properties_list, properties=properties)
+        elif charge_model == ChargeModel.DYNAMIC:
+            quantity = Decimal(charge_usage.events_count)
+        else:
+            quantity = charge_usage.units
 
+        amount = charge_usage.amount
         if amount == 0 and quantity == 0:
             return None
 
         return FeeCreate(
             customer_id=customer_id,
             subscription_id=subscription_id,
-            charge_id=UUID(str(charge.id)),
+            charge_id=charge_usage.charge_id,
             fee_type=FeeType.CHARGE,
             amount_cents=amount,
             total_amount_cents=amount,
             units=quantity,
-            events_count=events_count,
+            events_count=charge_usage.events_count,
             unit_amount_cents=unit_price if quantity else amount,
-            description=description,
-            metric_code=metric_code,
+            description=charge_usage.invoice_display_name or charge_usage.metric_name,
+            metric_code=charge_usage.metric_code,
             properties=properties,
         )
-
-    def _calculate_filtered_charge_fees(
-        self,
-        charge: Charge,
-        charge_filters: list[Any],
-        customer_id: UUID,
-        subscription_id: UUID,
-        external_customer_id: str,
-        billing_period_start: datetime,
-        billing_period_end: datetime,
-    ) -> list[FeeCreate]:
-        """Calculate fees for a charge that has filters (preview only)."""
-        from app.models.billable_metric_filter import BillableMetricFilter
-        from app.repositories.billable_metric_repository import (
-            BillableMetricRepository,
-        )
-
-        fees: list[FeeCreate] = []
-
-        if not charge.billable_metric_id:
-            return fees
-
-        metric_repo = BillableMetricRepository(self.db)
-        metric_id = UUID(str(charge.billable_metric_id))
-        metric = metric_repo.get_by_id(metric_id)
-        if not metric:
-            return fees
-
-        metric_code = str(metric.code)
-        charge_model = ChargeModel(charge.charge_model)
-
-        for cf in charge_filters:
-            filter_values = self.charge_filter_repo.get_filter_values(UUID(str(cf.id)))
-            if not filter_values:
-                continue
-
-            filters: dict[str, str] = {}
-            for fv in filter_values:
-                bmf = (
-                    self.db.query(BillableMetricFilter)
-                    .filter(BillableMetricFilter.id == fv.billable_metric_filter_id)
-                    .first()
-                )
-                if bmf is None:
-                    continue
-                filters[str(bmf.key)] = str(fv.value)
-
-            if not filters:
-                continue
-
-            usage_result = self.usage_service.aggregate_usage_with_count(
-                external_customer_id=external_customer_id,
-                code=metric_code,
-                from_timestamp=billing_period_start,
-                to_timestamp=billing_period_end,
-                filters=filters,
-            )
-            usage = usage_result.value
-            events_count = usage_result.events_count
-
-            base_properties: dict[str, Any] = (
-                dict(charge.properties) if charge.properties else {}
-            )
-            filter_properties: dict[str, Any] = dict(cf.properties) if cf.properties else {}
-            properties = {**base_properties, **filter_properties}
-
-            unit_price = Decimal(str(properties.get("unit_price", 0)))
-
-            event_properties_list: list[dict[str, Any]] = []
-            if charge_model == ChargeModel.DYNAMIC:
-                event_properties_list = fetch_event_properties(
-                    self.db,
-                    external_customer_id,
-                    metric_code,
-                    billing_period_start,
-                    billing_period_end,
-                    filters=filters,
-                )
-
-            calculator = get_charge_calculator(charge_model)
-            if not calculator:
-                continue
-
-            amount = Decimal("0")
-            quantity = Decimal("0")
-
-            if charge_model == ChargeModel.STANDARD:
-                min_price = Decimal(str(properties.get("min_price", 0)))
-                max_price = Decimal(str(properties.get("max_price", 0)))
-                quantity = usage
-                amount = calculator(units=usage, properties=properties)
-                if min_price and amount < min_price:
-                    amount = min_price
-                if max_price and amount > max_price:
-                    amount = max_price
-
-            elif charge_model in (
-                ChargeModel.GRADUATED,
-                ChargeModel.VOLUME,
-                ChargeModel.PACKAGE,
-            ):
-                quantity = usage
-                amount = calculator(units=usage, properties=properties)
-
-            elif charge_model == ChargeModel.PERCENTAGE:
-                total_amount = Decimal(str(properties.get("base_amount", 0)))
-                event_count = int(properties.get("event_count", 0))
-                quantity = Decimal(1)
-                amount = calculator(
-                    units=usage,
-                    properties=properties,
-                    total_amount=total_amount,
-                    event_count=event_count,
-                )
-
-            elif charge_model == ChargeModel.GRADUATED_PERCENTAGE:
-                usage_amount = Decimal(str(properties.get("base_amount", usage)))
-                quantity = Decimal(1)
-                amount = calculator(total_amount=usage_amount, properties=properties)
-
-            elif charge_model == ChargeModel.CUSTOM:
-                quantity = usage
-                amount = calculator(units=usage, properties=properties)
-
-            else:  # ChargeModel.DYNAMIC
-                quantity = Decimal(events_count)
-                amount = calculator(events=event_properties_list, properties=properties)
-
-            if amount == 0 and quantity == 0:
-                continue
-
-            description = (
-                str(cf.invoice_display_name) if cf.invoice_display_name else str(metric.name)
-            )
-
-            fees.append(
-                FeeCreate(
-                    customer_id=customer_id,
-                    subscription_id=subscription_id,
-                    charge_id=UUID(str(charge.id)),
-                    fee_type=FeeType.CHARGE,
-                    amount_cents=amount,
-                    total_amount_cents=amount,
-                    units=quantity,
-                    events_count=events_count,
-                    unit_amount_cents=unit_price if quantity else amount,
-                    description=description,
-                    metric_code=metric_code,
-                    properties=properties,
-                )
-            )
-
-        return fees
@@ -60,6 +60,8 @@ class WebhookResult:
     """Result of processing a webhook."""
 
     event_type: str
+    # Provider's unique ID for the event, used to deduplicate deliveries
+    event_id: str | None = None
     provider_payment_id: str | None = None
     provider_checkout_id: str | None = None
     status: str | None = None
@@ -348,6 +350,7 @@ class StripeProvider(PaymentProviderBase):
 
         result = WebhookResult(
             event_type=event_type,
+            event_id=payload.get("id"),
             metadata=data_object.get("metadata"),
         )
 
@@ -429,6 +432,7 @@ class ManualProvider(PaymentProviderBase):
         """Parse manual webhook payload."""
         return WebhookResult(
             event_type=payload.get("event_type", "payment.manual"),
+            event_id=payload.get("event_id"),
             provider_payment_id=payload.get("payment_id"),
             status=payload.get("status", "succeeded"),
             metadata=payload.get("metadata"),
@@ -641,6 +645,7 @@ class UCPProvider(PaymentProviderBase):
 
         result = WebhookResult(
             event_type=event_type,
+            event_id=payload.get("event_id") or (payload.get("id") if "data" in payload else None),
             provider_checkout_id=checkout_id,
             provider_payment_id=order_id if order_id != checkout_id else None,
             status=status,
@@ -214,6 +214,9 @@ class AdyenProvider(PaymentProviderBase):
 
         result = WebhookResult(
             event_type=f"adyen.{event_code}",
+            # Adyen identifies a notification by its event code, PSP reference
+            # and outcome
+            event_id=f"{event_code}:{psp_reference}:{success}" if psp_reference else None,
             provider_payment_id=psp_reference,
             provider_checkout_id=merchant_reference,
             metadata=meta,
@@ -202,6 +202,7 @@ class GoCardlessProvider(PaymentProviderBase):
 
         result = WebhookResult(
             event_type=event_type,
+            event_id=event.get("id"),
             metadata=metadata,
         )
 
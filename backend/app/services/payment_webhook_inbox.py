@@ -0,0 +1,386 @@
+"""Inbox for payment provider webhooks.
+
+Providers expect webhooks acknowledged within seconds and redeliver them
+otherwise, and they deliver some events more than once anyway.  The webhook
+endpoint therefore only verifies, parses and stores each event in
+``payment_webhook_events``, deduplicated by the provider's event ID, and
+responds.  The worker then applies stored events: updating the payment,
+recording the settlement, writing the audit log and sending our own webhooks,
+all committed in one transaction together with the event's outcome.
+
+Events are ordered by the payment they belong to: the local payment the
+event resolves to when received, or the provider payment reference when no
+payment matches yet.  Events sharing an ordering key are applied one at a
+time, in the order received, and an event that fails blocks the later ones
+until it succeeds or exhausts its ``BXB_PAYMENT_WEBHOOK_MAX_ATTEMPTS``
+attempts (retried with exponential backoff).  Events of different payments
+are applied concurrently, on ``BXB_PAYMENT_WEBHOOK_WORKERS`` threads per
+worker.  On PostgreSQL, an ordering key is held under an advisory lock while
+its events are applied, so concurrent workers never apply events of one
+payment out of order.
+"""
+
+import hashlib
+import logging
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Engine, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.invoice import InvoiceStatus
+from app.models.invoice_settlement import SettlementType
+from app.models.payment import Payment, PaymentProvider, PaymentStatus
+from app.models.payment_webhook_event import PaymentWebhookEventStatus
+from app.repositories.invoice_repository import InvoiceRepository
+from app.repositories.invoice_settlement_repository import InvoiceSettlementRepository
+from app.repositories.payment_repository import PaymentRepository
+from app.repositories.payment_webhook_event_repository import PaymentWebhookEventRepository
+from app.schemas.invoice_settlement import InvoiceSettlementCreate
+from app.services.audit_service import AuditService
+from app.services.payment_provider import WebhookResult, get_payment_provider
+from app.services.webhook_service import WebhookService
+
+logger = logging.getLogger(__name__)
+
+# Namespace of the advisory locks held on ordering keys
+_ORDERING_LOCK_CLASS = 0x5057
+
+# Ordering keys whose events are loaded per pass
+_ORDERING_KEY_BATCH_SIZE = 100
+
+
+def record_settlement_and_maybe_mark_paid(
+    db: Session,
+    invoice_id: UUID,
+    settlement_type: SettlementType,
+    source_id: UUID,
+    amount_cents: float | int,
+) -> None:
+    """Record a settlement and auto-mark invoice as paid if fully settled."""
+    stage_settlement_and_maybe_mark_paid(db, invoice_id, settlement_type, source_id, amount_cents)
+    db.commit()
+
+
+def stage_settlement_and_maybe_mark_paid(
+    db: Session,
+    invoice_id: UUID,
+    settlement_type: SettlementType,
+    source_id: UUID,
+    amount_cents: float | int,
+) -> None:
+    """Add a settlement and mark the invoice paid if fully settled. Caller commits."""
+    settlement_repo = InvoiceSettlementRepository(db)
+    settlement_repo.add_bulk(
+        [
+            InvoiceSettlementCreate(
+                invoice_id=invoice_id,
+                settlement_type=settlement_type,
+                source_id=source_id,
+                amount_cents=Decimal(str(amount_cents)),
+            )
+        ]
+    )
+    db.flush()
+
+    invoice_repo = InvoiceRepository(db)
+    invoice = invoice_repo.get_by_id(invoice_id)
+    if invoice and invoice.status == InvoiceStatus.FINALIZED.value:
+        total_settled = settlement_repo.get_total_settled(invoice_id)
+        if total_settled >= Decimal(str(invoice.total_cents)):
+            invoice_repo.set_paid(invoice)
+
+
+@dataclass(frozen=True)
+class ReceivedWebhookEvent:
+    """A webhook event stored in the inbox."""
+
+    event_type: str
+    ordering_key: str
+    # False if the provider had already delivered the event
+    created: bool
+
+
+def _ordering_key(
+    provider: PaymentProvider, result: WebhookResult, event_id: str, payment: Payment | None
+) -> str:
+    """The key an event is ordered by: its local payment, else the provider reference.
+
+    Keying on the local payment keeps a checkout's events and its payment's
+    events, which carry different provider references, in one sequence.
+    """
+    if payment is not None:
+        return f"payment:{payment.id}"
+    reference = (
+        result.provider_payment_id
+        or result.provider_checkout_id
+        or (result.metadata or {}).get("payment_id")
+        or f"event:{event_id}"
+    )
+    return f"{provider.value}:{reference}"[:255]
+
+
+class PaymentWebhookInbox:
+    """Store payment provider webhook events and apply them in order."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = PaymentWebhookEventRepository(db)
+
+    def receive(
+        self, provider: PaymentProvider, body: bytes, payload: dict[str, Any]
+    ) -> ReceivedWebhookEvent:
+        """Store a verified webhook event for processing.
+
+        Events without a provider event ID are deduplicated by a hash of
+        their body.
+        """
+        result = get_payment_provider(provider).parse_webhook(payload)
+        event_id = result.event_id or hashlib.sha256(body).hexdigest()
+        ordering_key = _ordering_key(provider, result, event_id, self._find_payment(result))
+        created = self.repo.create_if_absent(
+            provider=provider.value,
+            event_id=event_id[:255],
+            event_type=result.event_type[:255],
+            ordering_key=ordering_key,
+            payload=payload,
+        )
+        if not created:
+            logger.info("Duplicate %s webhook event %s ignored", provider.value, event_id)
+        return ReceivedWebhookEvent(result.event_type, ordering_key, created)
+
+    def process_ordering_key(self, ordering_key: str) -> int:
+        """Apply the pending events of an ordering key, in the order received.
+
+        Each event's changes are committed together with its outcome.  Stops
+        at an event that is waiting for a retry, so later events wait for it.
+        Does nothing if another worker holds the ordering key.
+
+        Returns:
+            Number of events processed, ignored or given up on.
+        """
+        count = 0
+        with self._ordering_lock(ordering_key) as locked:
+            if not locked:
+                return 0
+            now = datetime.now(UTC)
+            for event in self.repo.get_pending_by_ordering_key(ordering_key):
+                next_attempt_at = event.next_attempt_at
+                if next_attempt_at.tzinfo is None:
+                    next_attempt_at = next_attempt_at.replace(tzinfo=UTC)
+                if next_attempt_at > now:
+                    break
+                event_id = UUID(str(event.id))
+                try:
+                    status = self.apply(PaymentProvider(event.provider), event.payload)  # type: ignore[arg-type]
+                    self.repo.mark_done(event_id, status)
+                except Exception as e:
+                    logger.exception("Failed to process payment webhook event %s", event_id)
+                    self.db.rollback()
+                    attempts = int(event.attempts) + 1
+                    retry_at = None
+                    if attempts < settings.BXB_PAYMENT_WEBHOOK_MAX_ATTEMPTS:
+                        retry_at = now + timedelta(minutes=2**attempts)
+                    self.repo.mark_attempt_failed(event_id, str(e)[:1000], retry_at)
+                    if retry_at is not None:
+                        break
+                    count += 1
+                    continue
+                count += 1
+        return count
+
+    def apply(
+        self, provider: PaymentProvider, payload: dict[str, Any]
+    ) -> PaymentWebhookEventStatus:
+        """Update the payment and invoice for a webhook event. Caller commits.
+
+        The payment's status, its settlement, the audit log entry and our
+        webhooks are only added to the session, so they are committed
+        together or not at all.  A payment already in the event's status is
+        left untouched, so events reporting the same outcome (e.g. a
+        completed checkout and its succeeded payment) settle the invoice
+        once; a succeeded payment without its settlement still gets it.
+
+        Returns:
+            IGNORED if no payment matches or its status is unchanged,
+            PROCESSED otherwise.
+        """
+        result = get_payment_provider(provider).parse_webhook(payload)
+        payment = self._find_payment(result)
+        if not payment:
+            # Payment not found - might be for a different system
+            return PaymentWebhookEventStatus.IGNORED
+
+        # Update provider payment ID if we have it
+        if result.provider_payment_id and not payment.provider_payment_id:
+            payment.provider_payment_id = result.provider_payment_id  # type: ignore[assignment]
+
+        old_status = str(payment.status)
+        if result.status == old_status:
+            if old_status == PaymentStatus.SUCCEEDED.value and not self._is_settled(payment):
+                # An earlier event marked it succeeded but its settlement was lost
+                self._stage_settlement(payment)
+                return PaymentWebhookEventStatus.PROCESSED
+            return PaymentWebhookEventStatus.IGNORED
+
+        # Update payment status
+        payment_repo = PaymentRepository(self.db)
+        audit_service = AuditService(self.db)
+        webhook_service = WebhookService(self.db)
+        if result.status == "succeeded":
+            payment_repo.set_status(payment, PaymentStatus.SUCCEEDED)
+
+            audit_service.stage_status_change(
+                resource_type="payment",
+                resource_id=payment.id,  # type: ignore[arg-type]
+                organization_id=payment.organization_id,  # type: ignore[arg-type]
+                old_status=old_status,
+                new_status="succeeded",
+                actor_type="webhook",
+            )
+
+            # Record settlement and auto-mark invoice as paid if fully settled
+            self._stage_settlement(payment)
+
+            webhook_service.stage_webhook(
+                webhook_type="payment.succeeded",
+                object_type="payment",
+                object_id=payment.id,  # type: ignore[arg-type]
+                payload={"payment_id": str(payment.id)},
+            )
+
+        elif result.status == "failed":
+            payment_repo.set_status(payment, PaymentStatus.FAILED, result.failure_reason)
+
+            audit_service.stage_status_change(
+                resource_type="payment",
+                resource_id=payment.id,  # type: ignore[arg-type]
+                organization_id=payment.organization_id,  # type: ignore[arg-type]
+                old_status=old_status,
+                new_status="failed",
+                actor_type="webhook",
+            )
+
+            webhook_service.stage_webhook(
+                webhook_type="payment.failed",
+                object_type="payment",
+                object_id=payment.id,  # type: ignore[arg-type]
+                payload={"payment_id": str(payment.id)},
+            )
+
+        elif result.status == "canceled":
+            payment_repo.set_status(payment, PaymentStatus.CANCELED)
+
+            audit_service.stage_status_change(
+                resource_type="payment",
+                resource_id=payment.id,  # type: ignore[arg-type]
+                organization_id=payment.organization_id,  # type: ignore[arg-type]
+                old_status=old_status,
+                new_status="canceled",
+                actor_type="webhook",
+            )
+
+        return PaymentWebhookEventStatus.PROCESSED
+
+    def _find_payment(self, result: WebhookResult) -> Payment | None:
+        """Find the payment an event refers to - try multiple lookup methods."""
+        payment_repo = PaymentRepository(self.db)
+        payment: Payment | None = None
+
+        if result.provider_checkout_id:
+            payment = payment_repo.get_by_provider_checkout_id(result.provider_checkout_id)
+        if not payment and result.provider_payment_id:
+            payment = payment_repo.get_by_provider_payment_id(result.provider_payment_id)
+        if not payment and result.metadata and result.metadata.get("payment_id"):
+            try:
+                payment_id = UUID(result.metadata["payment_id"])
+            except ValueError:
+                return None
+            payment = payment_repo.get_by_id(payment_id)
+        return payment
+
+    def _is_settled(self, payment: Payment) -> bool:
+        return InvoiceSettlementRepository(self.db).exists_for_source(
+            payment.invoice_id,  # type: ignore[arg-type]
+            SettlementType.PAYMENT,
+            payment.id,  # type: ignore[arg-type]
+        )
+
+    def _stage_settlement(self, payment: Payment) -> None:
+        stage_settlement_and_maybe_mark_paid(
+            self.db,
+            invoice_id=payment.invoice_id,  # type: ignore[arg-type]
+            settlement_type=SettlementType.PAYMENT,
+            source_id=payment.id,  # type: ignore[arg-type]
+            amount_cents=float(payment.amount_cents),
+        )
+
+    @contextmanager
+    def _ordering_lock(self, ordering_key: str) -> Iterator[bool]:
+        """Hold a payment reference while its events are applied.
+
+        Yields whether the lock was acquired.  On PostgreSQL this is a
+        session advisory lock on a dedicated connection; elsewhere (SQLite)
+        there is a single writer, and the lock always succeeds.
+        """
+        bind = self.db.get_bind()
+        if not (isinstance(bind, Engine) and bind.dialect.name == "postgresql"):
+            yield True
+            return
+        lock_key = func.hashtext(ordering_key)
+        with bind.connect() as connection:
+            locked = bool(
+                connection.execute(
+                    select(func.pg_try_advisory_lock(_ORDERING_LOCK_CLASS, lock_key))
+                ).scalar()
+            )
+            try:
+                yield locked
+            finally:
+                if locked:
+                    connection.execute(
+                        select(func.pg_advisory_unlock(_ORDERING_LOCK_CLASS, lock_key))
+                    )
+
+
+def _process_ordering_key_in_session(ordering_key: str) -> int:
+    db = SessionLocal()
+    try:
+        return PaymentWebhookInbox(db).process_ordering_key(ordering_key)
+    finally:
+        db.close()
+
+
+def process_pending_payment_webhook_events() -> int:
+    """Apply the due events in the inbox, payment references in parallel.
+
+    Returns:
+        Number of events processed, ignored or given up on.
+    """
+    workers = max(settings.BXB_PAYMENT_WEBHOOK_WORKERS, 1)
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            db = SessionLocal()
+            try:
+                ordering_keys = PaymentWebhookEventRepository(db).get_pending_ordering_keys(
+                    _ORDERING_KEY_BATCH_SIZE
+                )
+            finally:
+                db.close()
+            if not ordering_keys:
+                break
+            count = sum(executor.map(_process_ordering_key_in_session, ordering_keys))
+            # The remaining events wait for a retry or another worker
+            if count == 0:
+                break
+            total += count
+    return total
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
+import threading
+from dataclasses import dataclass
 from decimal import Decimal
 from string import Template
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from app.models.billing_entity import BillingEntity
@@ -15,11 +18,9 @@ if TYPE_CHECKING:
     from app.models.invoice import Invoice
     from app.models.organization import Organization
 
-_INVOICE_TEMPLATE = Template("""\
-<!DOCTYPE html>
-<html>
-<head>
-<style>
+# Stylesheets are kept apart from the HTML so WeasyPrint parses each one once
+# per rendering thread or process rather than once per document
+_INVOICE_STYLESHEET = """\
   body { font-family: Helvetica, Arial, sans-serif; font-size: 12px; color: #333; margin: 40px; }
   h1 { font-size: 24px; margin-bottom: 4px; }
   .header { display: flex; justify-content: space-between; margin-bottom: 30px; }
@@ -40,8 +41,11 @@ _INVOICE_TEMPLATE = Template("""\
   .status-paid { background: #e6f4ea; color: #137333; }
   .status-draft { background: #fce8e6; color: #c5221f; }
   .status-voided { background: #f1f3f4; color: #5f6368; }
-</style>
-</head>
+"""
+
+_INVOICE_TEMPLATE = Template("""\
+<!DOCTYPE html>
+<html>
 <body>
 <div class="header">
   <div class="header-left">
@@ -95,11 +99,7 @@ _FEE_ROW_TEMPLATE = Template(
     '<td class="right">${unit_price}</td><td class="right">${amount}</td></tr>'
 )
 
-_CREDIT_NOTE_TEMPLATE = Template("""\
-<!DOCTYPE html>
-<html>
-<head>
-<style>
+_CREDIT_NOTE_STYLESHEET = """\
   body { font-family: Helvetica, Arial, sans-serif; font-size: 12px; color: #333; margin: 40px; }
   h1 { font-size: 24px; margin-bottom: 4px; }
   .header { display: flex; justify-content: space-between; margin-bottom: 30px; }
@@ -118,8 +118,11 @@ _CREDIT_NOTE_TEMPLATE = Template("""\
              text-transform: uppercase; font-size: 11px; }
   .status-finalized { background: #e8f0fe; color: #1a73e8; }
   .status-draft { background: #fce8e6; color: #c5221f; }
-</style>
-</head>
+"""
+
+_CREDIT_NOTE_TEMPLATE = Template("""\
+<!DOCTYPE html>
+<html>
 <body>
 <div class="header">
   <div class="header-left">
@@ -205,6 +208,62 @@ def _build_billing_entity_address(billing_entity: BillingEntity) -> str:
     return "<br>".join(parts)
 
 
+@dataclass(frozen=True)
+class PdfDocument:
+    """HTML and stylesheet a PDF is rendered from.
+
+    A document captures everything its PDF shows, so its content key
+    identifies the PDF.
+    """
+
+    html: str
+    stylesheet: str
+
+    @property
+    def content_key(self) -> str:
+        """SHA-256 of the document's stylesheet and HTML."""
+        digest = hashlib.sha256(self.stylesheet.encode())
+        digest.update(b"\0")
+        digest.update(self.html.encode())
+        return digest.hexdigest()
+
+
+# Parsed stylesheets and font configuration, per thread: WeasyPrint objects
+# are reused across documents but not shared between threads
+_renderer_state = threading.local()
+
+
+def _parsed_stylesheet(stylesheet: str) -> tuple[Any, Any]:
+    """Get this thread's parsed stylesheet and its font configuration."""
+    import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
+
+    cache: dict[str, tuple[Any, Any]] | None = getattr(_renderer_state, "stylesheets", None)
+    if cache is None:
+        cache = _renderer_state.stylesheets = {}
+    if stylesheet not in cache:
+        font_config = FontConfiguration()
+        cache[stylesheet] = (
+            weasyprint.CSS(string=stylesheet, font_config=font_config),
+            font_config,
+        )
+    return cache[stylesheet]
+
+
+def render_pdf(document: PdfDocument) -> bytes:
+    """Render a document to PDF bytes with WeasyPrint.
+
+    A module-level function, so documents can be rendered in pool processes.
+    """
+    import weasyprint
+
+    css, font_config = _parsed_stylesheet(document.stylesheet)
+    pdf_bytes: bytes = weasyprint.HTML(string=document.html).write_pdf(
+        stylesheets=[css], font_config=font_config
+    )
+    return pdf_bytes
+
+
 class PdfService:
     """Service for generating PDF documents."""
 
@@ -228,6 +287,19 @@ class PdfService:
         Returns:
             Raw PDF bytes.
         """
+        return self.render(
+            self.invoice_document(invoice, fees, customer, organization, billing_entity)
+        )
+
+    def invoice_document(
+        self,
+        invoice: Invoice,
+        fees: list[Fee],
+        customer: Customer,
+        organization: Organization,
+        billing_entity: BillingEntity | None = None,
+    ) -> PdfDocument:
+        """Build the document an invoice PDF is rendered from."""
         fee_rows = "\n    ".join(
             _FEE_ROW_TEMPLATE.substitute(
                 description=fee.description or "",
@@ -269,11 +341,11 @@ class PdfService:
             ),
             total=_format_amount(invoice.total_cents),
         )
+        return PdfDocument(html=html, stylesheet=_INVOICE_STYLESHEET)
 
-        import weasyprint
-
-        pdf_bytes: bytes = weasyprint.HTML(string=html).write_pdf()
-        return pdf_bytes
+    def render(self, document: PdfDocument) -> bytes:
+        """Render a document to PDF bytes."""
+        return render_pdf(document)
 
     def generate_credit_note_pdf(
         self,
@@ -295,6 +367,19 @@ class PdfService:
         Returns:
             Raw PDF bytes.
         """
+        return self.render(
+            self.credit_note_document(credit_note, items, customer, organization, billing_entity)
+        )
+
+    def credit_note_document(
+        self,
+        credit_note: CreditNote,
+        items: list[CreditNoteItem],
+        customer: Customer,
+        organization: Organization,
+        billing_entity: BillingEntity | None = None,
+    ) -> PdfDocument:
+        """Build the document a credit note PDF is rendered from."""
         item_rows = "\n    ".join(
             _CREDIT_NOTE_ITEM_ROW_TEMPLATE.substitute(
                 description=f"Fee item ({item.fee_id})",
@@ -325,8 +410,4 @@ class PdfService:
             taxes_amount=_format_amount(credit_note.taxes_amount_cents),
             total=_format_amount(credit_note.total_amount_cents),
         )
-
-        import weasyprint
-
-        pdf_bytes: bytes = weasyprint.HTML(string=html).write_pdf()
-        return pdf_bytes
+        return PdfDocument(html=html, stylesheet=_CREDIT_NOTE_STYLESHEET)
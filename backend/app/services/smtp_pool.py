@@ -0,0 +1,136 @@
+"""Pooled SMTP connections.
+
+Opening an SMTP connection costs a TCP connect, a STARTTLS handshake and a
+login, which dominate the time to send a transactional email, and providers
+limit how many connections a client may open.  ``SmtpConnectionPool`` keeps
+up to ``SMTP_POOL_SIZE`` authenticated connections open per event loop and
+sends each message on an idle one.  Connections idle for longer than
+``SMTP_IDLE_TIMEOUT_SECONDS`` (which servers usually drop) are replaced, and
+a connection is recycled after ``SMTP_MAX_MESSAGES_PER_CONNECTION`` messages.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    __slots__ = ("client", "sent", "last_used")
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def is_reusable(self) -> bool:
+        return (
+            self.client.is_connected
+            and self.sent < settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+            and time.monotonic() - self.last_used < settings.SMTP_IDLE_TIMEOUT_SECONDS
+        )
+
+
+class SmtpConnectionPool:
+    """Send messages over a bounded set of reused SMTP connections."""
+
+    def __init__(self, size: int | None = None):
+        self.size = max(size or settings.SMTP_POOL_SIZE, 1)
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle: list[_Connection] = []
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send a message, waiting for a free connection if all are busy.
+
+        A message that fails because the server dropped a reused connection
+        is sent once more on a new connection.
+
+        Raises:
+            aiosmtplib.SMTPException: If the message could not be sent.
+        """
+        async with self._slots:
+            connection = await self._acquire()
+            reused = connection.sent > 0
+            try:
+                await connection.client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                self._discard(connection)
+                if not reused:
+                    raise
+                connection = await self._connect()
+                await self._send_or_discard(connection, message)
+            except BaseException:
+                self._discard(connection)
+                raise
+            connection.sent += 1
+            connection.last_used = time.monotonic()
+            self._idle.append(connection)
+
+    async def close(self) -> None:
+        """Close the idle connections."""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            try:
+                await connection.client.quit()
+            except aiosmtplib.SMTPException:
+                connection.client.close()
+
+    async def _acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.is_reusable():
+                return connection
+            self._discard(connection)
+        return await self._connect()
+
+    async def _connect(self) -> _Connection:
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USERNAME or None,
+            password=settings.SMTP_PASSWORD or None,
+            start_tls=settings.SMTP_USE_TLS,
+        )
+        await client.connect()
+        return _Connection(client)
+
+    async def _send_or_discard(self, connection: _Connection, message: EmailMessage) -> None:
+        try:
+            await connection.client.send_message(message)
+        except BaseException:
+            self._discard(connection)
+            raise
+
+    @staticmethod
+    def _discard(connection: _Connection) -> None:
+        if connection.client.is_connected:
+            connection.client.close()
+
+
+# asyncio primitives belong to one event loop, so each loop gets its own pool
+_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SmtpConnectionPool] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_smtp_pool() -> SmtpConnectionPool:
+    """The SMTP connection pool of the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = SmtpConnectionPool()
+    return pool
+
+
+async def close_smtp_pool() -> None:
+    """Close the running event loop's idle SMTP connections."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
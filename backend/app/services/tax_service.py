@@ -23,6 +23,26 @@ class TaxCalculationResult:
     applied_taxes: list[AppliedTax] = field(default_factory=list)
 
 
+@dataclass
+class TaxResolver:
+    """In-memory tax lookup for every fee of one customer's plan.
+
+    Built once per invoice run by ``TaxCalculationService.build_tax_resolver``
+    and applies the same hierarchy as ``get_applicable_taxes``.
+    """
+
+    charge_taxes: dict[UUID, list[Tax]] = field(default_factory=dict)
+    plan_taxes: list[Tax] = field(default_factory=list)
+    customer_taxes: list[Tax] = field(default_factory=list)
+    organization_taxes: list[Tax] = field(default_factory=list)
+
+    def get_applicable_taxes(self, charge_id: UUID | None = None) -> list[Tax]:
+        """Return the first non-empty level: charge -> plan -> customer -> org."""
+        if charge_id and charge_id in self.charge_taxes:
+            return self.charge_taxes[charge_id]
+        return self.plan_taxes or self.customer_taxes or self.organization_taxes
+
+
 class TaxCalculationService:
     """Service for tax calculation and application."""
 
@@ -65,6 +85,37 @@ class TaxCalculationService:
         # Fall back to organization defaults
         return self.tax_repo.get_organization_defaults(organization_id)
 
+    def build_tax_resolver(
+        self,
+        customer_id: UUID,
+        plan_id: UUID | None = None,
+        charge_ids: list[UUID] | None = None,
+        organization_id: UUID = DEFAULT_ORGANIZATION_ID,
+    ) -> TaxResolver:
+        """Load every tax that can apply to a customer's plan in two queries.
+
+        One query fetches the applied taxes (with their Tax) for the charges,
+        the plan and the customer; a second fetches the organization defaults.
+        """
+        taxables: dict[str, list[UUID]] = {
+            "charge": list(charge_ids or []),
+            "plan": [plan_id] if plan_id else [],
+            "customer": [customer_id],
+        }
+        resolver = TaxResolver()
+        for applied, tax in self.applied_tax_repo.get_taxes_by_taxables(taxables):
+            taxable_type = str(applied.taxable_type)
+            if taxable_type == "charge":
+                charge_id = UUID(str(applied.taxable_id))
+                resolver.charge_taxes.setdefault(charge_id, []).append(tax)
+            elif taxable_type == "plan":
+                resolver.plan_taxes.append(tax)
+            else:
+                resolver.customer_taxes.append(tax)
+
+        resolver.organization_taxes = self.tax_repo.get_organization_defaults(organization_id)
+        return resolver
+
     def calculate_tax(
         self,
         subtotal_cents: Decimal,
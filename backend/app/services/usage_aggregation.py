@@ -1,90 +1,25 @@
-import re
-from dataclasses import dataclass
-from datetime import datetime
+import logging
+from collections import defaultdict
+from collections.abc import Collection, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, time, timedelta
 from decimal import ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP, Decimal
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, not_
+from sqlalchemy.orm import Query, Session
 
+from app.core.config import settings
 from app.models.billable_metric import AggregationType, BillableMetric
-from app.models.customer import DEFAULT_ORGANIZATION_ID
+from app.models.daily_usage import DailyUsage
 from app.models.event import Event
 from app.repositories.billable_metric_repository import BillableMetricRepository
+from app.repositories.daily_usage_repository import DailyUsageRepository
+from app.services.expression import compile_expression
 
-# Pattern to tokenize simple math expressions like "field1 + field2 * 2"
-_TOKEN_RE = re.compile(r"(\d+(?:\.\d+)?|[a-zA-Z_]\w*|[+\-*/()])")
-
-
-def _evaluate_expression(expression: str, variables: dict[str, Decimal]) -> Decimal:
-    """Safely evaluate a simple arithmetic expression with variables.
-
-    Supports: +, -, *, / operators and parentheses.
-    Variables are resolved from the provided dict.
-    No eval() or exec() — uses a simple recursive descent parser.
-    """
-    tokens = _TOKEN_RE.findall(expression)
-    pos = [0]
-
-    def _peek() -> str | None:
-        if pos[0] < len(tokens):
-            return str(tokens[pos[0]])
-        return None
-
-    def _consume() -> str:
-        token = str(tokens[pos[0]])
-        pos[0] += 1
-        return token
-
-    def _parse_primary() -> Decimal:
-        token = _peek()
-        if token is None:
-            raise ValueError("Unexpected end of expression")
-        if token == "(":
-            _consume()  # consume '('
-            result = _parse_additive()
-            if _peek() != ")":
-                raise ValueError("Expected ')'")
-            _consume()  # consume ')'
-            return result
-        _consume()
-        # Number literal
-        try:
-            return Decimal(token)
-        except Exception:
-            pass
-        # Variable reference
-        if token in variables:
-            return variables[token]
-        raise ValueError(f"Unknown variable: {token}")
-
-    def _parse_multiplicative() -> Decimal:
-        left = _parse_primary()
-        while _peek() in ("*", "/"):
-            op = _consume()
-            right = _parse_primary()
-            if op == "*":
-                left = left * right
-            else:
-                if right == 0:
-                    raise ValueError("Division by zero")
-                left = left / right
-        return left
-
-    def _parse_additive() -> Decimal:
-        left = _parse_multiplicative()
-        while _peek() in ("+", "-"):
-            op = _consume()
-            right = _parse_multiplicative()
-            left = left + right if op == "+" else left - right
-        return left
-
-    if not tokens:
-        raise ValueError("Empty expression")
-
-    result = _parse_additive()
-    if pos[0] != len(tokens):
-        raise ValueError("Unexpected tokens in expression")
-    return result
+logger = logging.getLogger(__name__)
 
 
 def _apply_rounding(
@@ -117,6 +52,61 @@ class UsageResult:
     events_count: int
 
 
+# Aggregations whose per-day states merge into a period result
+ROLLUP_AGGREGATION_TYPES = frozenset(
+    {
+        AggregationType.COUNT,
+        AggregationType.SUM,
+        AggregationType.MAX,
+        AggregationType.UNIQUE_COUNT,
+    }
+)
+
+# Events fetched per round trip when scanning a day for the nightly rollup
+ROLLUP_SCAN_BATCH_SIZE = 5000
+
+
+@dataclass
+class UsageRollup:
+    """Mergeable, unrounded aggregation state over a set of events.
+
+    Only the component used by the metric's aggregation type is meaningful:
+    SUM reads ``sum_value``, MAX ``max_value``, UNIQUE_COUNT the distinct
+    ``unique_values``; every type counts events.
+    """
+
+    events_count: int = 0
+    sum_value: Decimal = Decimal(0)
+    max_value: Decimal = Decimal(0)
+    unique_values: list[Any] = field(default_factory=list)
+
+    def merge(self, other: "UsageRollup") -> None:
+        self.events_count += other.events_count
+        self.sum_value += other.sum_value
+        self.max_value = max(self.max_value, other.max_value)
+        self.unique_values.extend(other.unique_values)
+
+    def to_result(self, aggregation_type: AggregationType) -> UsageResult:
+        if aggregation_type == AggregationType.SUM:
+            value = self.sum_value
+        elif aggregation_type == AggregationType.MAX:
+            value = self.max_value
+        elif aggregation_type == AggregationType.UNIQUE_COUNT:
+            value = Decimal(len(set(self.unique_values)))
+        else:
+            value = Decimal(self.events_count)
+        return UsageResult(value=value, events_count=self.events_count)
+
+    @classmethod
+    def from_daily_usage(cls, row: DailyUsage) -> "UsageRollup":
+        return cls(
+            events_count=int(row.events_count),
+            sum_value=_from_numeric(row.sum_value),
+            max_value=_from_numeric(row.max_value),
+            unique_values=list(row.unique_values or []),
+        )
+
+
 class UsageAggregationService:
     """Service for aggregating events into usage data by billing period."""
 
@@ -130,8 +120,8 @@ class UsageAggregationService:
         code: str,
         from_timestamp: datetime,
         to_timestamp: datetime,
+        organization_id: UUID,
         filters: dict[str, str] | None = None,
-        organization_id: UUID = DEFAULT_ORGANIZATION_ID,
     ) -> Decimal:
         """Aggregate usage for a customer and metric code within a time period.
 
@@ -140,8 +130,8 @@ class UsageAggregationService:
             code: Billable metric code
             from_timestamp: Start of period
             to_timestamp: End of period
+            organization_id: Organization owning the metric and events.
             filters: Optional dict of property key-value pairs to filter events
-            organization_id: Organization to scope the metric lookup to.
 
         Returns:
             Aggregated usage value based on the metric's aggregation type.
@@ -162,8 +152,8 @@ class UsageAggregationService:
         code: str,
         from_timestamp: datetime,
         to_timestamp: datetime,
+        organization_id: UUID,
         filters: dict[str, str] | None = None,
-        organization_id: UUID = DEFAULT_ORGANIZATION_ID,
     ) -> UsageResult:
         """Aggregate usage for a customer and metric code within a time period.
 
@@ -172,8 +162,8 @@ class UsageAggregationService:
             code: Billable metric code
             from_timestamp: Start of period
             to_timestamp: End of period
+            organization_id: Organization owning the metric and events.
             filters: Optional dict of property key-value pairs to filter events
-            organization_id: Organization to scope the metric lookup to.
 
         Returns:
             UsageResult with aggregated value and events count.
@@ -185,73 +175,507 @@ class UsageAggregationService:
         aggregation_type = AggregationType(metric.aggregation_type)
 
         # Delegate to ClickHouse when enabled
-        from app.core.config import settings as _settings
-
-        if _settings.clickhouse_enabled:
-            from app.services.clickhouse_aggregation import clickhouse_aggregate
-
-            ch_result = clickhouse_aggregate(
-                organization_id=organization_id,
-                code=code,
+        if settings.clickhouse_enabled:
+            return self._clickhouse_usage(
+                metric=metric,
                 external_customer_id=external_customer_id,
                 from_timestamp=from_timestamp,
                 to_timestamp=to_timestamp,
-                aggregation_type=aggregation_type,
-                field_name=str(metric.field_name) if metric.field_name else None,
-                expression=str(metric.expression) if metric.expression else None,
+                organization_id=organization_id,
                 filters=filters,
             )
-            ch_rounding_fn: str | None = (
-                str(metric.rounding_function) if metric.rounding_function else None
+
+        query = self._events_query(
+            organization_id, external_customer_id, code, from_timestamp, to_timestamp
+        )
+
+        rolled_up = None
+        if not filters and aggregation_type in ROLLUP_AGGREGATION_TYPES:
+            rolled_up = self._aggregate_with_rollups(
+                metric, aggregation_type, query, external_customer_id, from_timestamp, to_timestamp
             )
-            ch_rounding_prec: int | None = (
-                int(metric.rounding_precision) if metric.rounding_precision is not None else None
+
+        if rolled_up is not None:
+            result = rolled_up
+        elif aggregation_type == AggregationType.COUNT and not filters:
+            # Unfiltered counts are answered from the
+            # (organization_id, external_customer_id, code, timestamp) index
+            # without loading event rows.
+            count = int(query.with_entities(func.count()).scalar() or 0)
+            result = UsageResult(value=Decimal(count), events_count=count)
+        else:
+            events = query.all()
+
+            # Apply property-based filters
+            if filters:
+                events = [
+                    e for e in events if all(e.properties.get(k) == v for k, v in filters.items())
+                ]
+
+            events_count = len(events)
+
+            result = self._compute_aggregation(
+                aggregation_type=aggregation_type,
+                metric=metric,
+                events=events,
+                events_count=events_count,
+                code=code,
+                from_timestamp=from_timestamp,
+                to_timestamp=to_timestamp,
             )
-            return UsageResult(
-                value=_apply_rounding(ch_result.value, ch_rounding_fn, ch_rounding_prec),
-                events_count=ch_result.events_count,
+
+        # Apply rounding
+        rounding_fn: str | None = (
+            str(metric.rounding_function) if metric.rounding_function else None
+        )
+        rounding_prec: int | None = (
+            int(metric.rounding_precision) if metric.rounding_precision is not None else None
+        )
+        result = UsageResult(
+            value=_apply_rounding(result.value, rounding_fn, rounding_prec),
+            events_count=result.events_count,
+        )
+
+        return result
+
+    def aggregate_day(
+        self,
+        external_customer_id: str,
+        metric: BillableMetric,
+        usage_date: date,
+        organization_id: UUID,
+    ) -> tuple[UsageResult, UsageRollup | None]:
+        """Aggregate one UTC day from raw events, for the daily usage rollup.
+
+        Returns:
+            Tuple of (rounded UsageResult, UsageRollup).  The rollup is None
+            for aggregation types that cannot be merged across days, and
+            when ClickHouse (which keeps its own daily states) is enabled.
+        """
+        from_ts = datetime.combine(usage_date, time.min)
+        to_ts = from_ts + timedelta(days=1)
+        code = str(metric.code)
+        aggregation_type = AggregationType(metric.aggregation_type)
+
+        if settings.clickhouse_enabled or aggregation_type not in ROLLUP_AGGREGATION_TYPES:
+            result = self.aggregate_usage_with_count(
+                external_customer_id=external_customer_id,
+                code=code,
+                from_timestamp=from_ts,
+                to_timestamp=to_ts,
+                organization_id=organization_id,
             )
+            return result, None
 
-        query = self.db.query(Event).filter(
+        query = self._events_query(organization_id, external_customer_id, code, from_ts, to_ts)
+        rollup = _rollup_from_events(aggregation_type, metric, query)
+        return _round_usage(metric, rollup.to_result(aggregation_type)), rollup
+
+    def aggregate_day_for_customers(
+        self,
+        metrics: Sequence[BillableMetric],
+        targets: Collection[tuple[str, str]],
+        usage_date: date,
+        organization_id: UUID,
+    ) -> dict[tuple[str, str], tuple[UsageResult, UsageRollup | None]]:
+        """Aggregate one UTC day for many (metric code, customer) pairs at once.
+
+        Set-based counterpart of ``aggregate_day`` for the nightly rollup:
+        COUNT metrics are read with one grouped ``count(*)`` and SUM, MAX and
+        UNIQUE_COUNT metrics with one scan of the day's events, however many
+        customers are involved.  Other aggregation types, and the ClickHouse
+        backend, go through ``aggregate_usage_for_customers`` per metric.
+
+        Args:
+            metrics: Metrics of the organization referenced by ``targets``.
+            targets: (metric code, external customer ID) pairs to aggregate.
+            usage_date: The UTC day to aggregate.
+            organization_id: Organization owning the metrics and events.
+
+        Returns:
+            Dictionary mapping each pair to (rounded UsageResult, UsageRollup),
+            as ``aggregate_day`` returns them.  Metrics that cannot be
+            aggregated (e.g. a missing field_name) are logged and left out.
+        """
+        from_ts = datetime.combine(usage_date, time.min)
+        to_ts = from_ts + timedelta(days=1)
+        customers_by_code: defaultdict[str, set[str]] = defaultdict(set)
+        for code, external_customer_id in targets:
+            customers_by_code[code].add(external_customer_id)
+
+        results: dict[tuple[str, str], tuple[UsageResult, UsageRollup | None]] = {}
+        rollup_metrics: dict[str, BillableMetric] = {}
+        for metric in metrics:
+            code = str(metric.code)
+            if code not in customers_by_code:
+                continue
+            aggregation_type = AggregationType(metric.aggregation_type)
+            try:
+                if settings.clickhouse_enabled or aggregation_type not in ROLLUP_AGGREGATION_TYPES:
+                    usage = self.aggregate_usage_for_customers(
+                        external_customer_ids=sorted(customers_by_code[code]),
+                        code=code,
+                        from_timestamp=from_ts,
+                        to_timestamp=to_ts,
+                        organization_id=organization_id,
+                    )
+                    for external_customer_id, result in usage.items():
+                        results[(code, external_customer_id)] = (result, None)
+                    continue
+                if aggregation_type != AggregationType.COUNT:
+                    _require_field_name(aggregation_type, metric)
+            except ValueError as exc:
+                logger.warning("Skipping daily usage for metric %s: %s", code, exc)
+                continue
+            rollup_metrics[code] = metric
+
+        rollups = self._rollup_day_for_customers(
+            rollup_metrics, customers_by_code, from_ts, to_ts, organization_id
+        )
+        for (code, external_customer_id), rollup in rollups.items():
+            metric = rollup_metrics[code]
+            result = rollup.to_result(AggregationType(metric.aggregation_type))
+            results[(code, external_customer_id)] = (_round_usage(metric, result), rollup)
+        return results
+
+    def _rollup_day_for_customers(
+        self,
+        metrics: dict[str, BillableMetric],
+        customers_by_code: dict[str, set[str]],
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        organization_id: UUID,
+    ) -> dict[tuple[str, str], UsageRollup]:
+        rollups: dict[tuple[str, str], UsageRollup] = {
+            (code, external_customer_id): UsageRollup()
+            for code in metrics
+            for external_customer_id in customers_by_code[code]
+        }
+        day_events = self.db.query(Event).filter(
+            Event.organization_id == organization_id,
+            Event.timestamp >= from_timestamp,
+            Event.timestamp < to_timestamp,
+        )
+
+        count_codes = [
+            code
+            for code, metric in metrics.items()
+            if metric.aggregation_type == AggregationType.COUNT.value
+        ]
+        if count_codes:
+            counts = (
+                day_events.filter(Event.code.in_(count_codes))
+                .with_entities(Event.code, Event.external_customer_id, func.count())
+                .group_by(Event.code, Event.external_customer_id)
+            )
+            for code, external_customer_id, count in counts:
+                rollup = rollups.get((str(code), str(external_customer_id)))
+                if rollup is not None:
+                    rollup.events_count = int(count)
+
+        field_metrics = {
+            code: (AggregationType(metric.aggregation_type), str(metric.field_name))
+            for code, metric in metrics.items()
+            if metric.aggregation_type != AggregationType.COUNT.value
+        }
+        if field_metrics:
+            unique_values: defaultdict[tuple[str, str], set[Any]] = defaultdict(set)
+            rows = (
+                day_events.filter(Event.code.in_(list(field_metrics)))
+                .with_entities(Event.code, Event.external_customer_id, Event.properties)
+                .yield_per(ROLLUP_SCAN_BATCH_SIZE)
+            )
+            for code, external_customer_id, props in rows:
+                key = (str(code), str(external_customer_id))
+                rollup = rollups.get(key)
+                if rollup is None:
+                    continue
+                aggregation_type, field_name = field_metrics[key[0]]
+                _add_to_rollup(rollup, unique_values[key], aggregation_type, field_name, props)
+            for key, values in unique_values.items():
+                rollups[key].unique_values = list(values)
+
+        return rollups
+
+    def _events_query(
+        self,
+        organization_id: UUID,
+        external_customer_id: str,
+        code: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+    ) -> Query[Event]:
+        return self.db.query(Event).filter(
+            Event.organization_id == organization_id,
             Event.external_customer_id == external_customer_id,
             Event.code == code,
             Event.timestamp >= from_timestamp,
             Event.timestamp < to_timestamp,
         )
 
-        events = query.all()
+    def _aggregate_with_rollups(
+        self,
+        metric: BillableMetric,
+        aggregation_type: AggregationType,
+        query: Query[Event],
+        external_customer_id: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+    ) -> UsageResult | None:
+        """Combine closed-day rollups with a raw scan of the remaining days.
+
+        A day's rollup is used only if no event for it was ingested after the
+        rollup's watermark; late days, the open current day and partial
+        boundary days are read from raw events.  Returns an unrounded result,
+        or None when no rolled-up day applies.
+        """
+        period_start = _utc_naive(from_timestamp)
+        first_day = period_start.date()
+        if period_start != datetime.combine(first_day, time.min):
+            first_day += timedelta(days=1)
+        end_day = min(_utc_naive(to_timestamp).date(), datetime.now(UTC).date())
+        if first_day >= end_day:
+            return None
+
+        rollups: dict[date, DailyUsage] = {}
+        for row in DailyUsageRepository(self.db).get_rollups(
+            UUID(str(metric.id)), external_customer_id, first_day, end_day
+        ):
+            # Subscriptions sharing the metric roll up the same events; keep
+            # the most recent rollup of each day
+            rollups[row.usage_date] = row  # type: ignore[index]
+        if not rollups:
+            return None
+
+        oldest_watermark = min(
+            _utc_naive(row.rollup_watermark)  # type: ignore[arg-type]
+            for row in rollups.values()
+        )
+        late_events = query.filter(
+            Event.timestamp < datetime.combine(end_day, time.min),
+            Event.created_at > oldest_watermark,
+        ).with_entities(Event.timestamp, Event.created_at)
+        for timestamp, created_at in late_events:
+            day = _utc_naive(timestamp).date()
+            late_row = rollups.get(day)
+            if late_row is not None and _utc_naive(created_at) > _utc_naive(
+                late_row.rollup_watermark  # type: ignore[arg-type]
+            ):
+                del rollups[day]
+        if not rollups:
+            return None
+
+        # Exclude runs of consecutive rolled-up days from the raw scan
+        runs: list[tuple[date, date]] = []
+        for day in sorted(rollups):
+            if runs and runs[-1][1] == day:
+                runs[-1] = (runs[-1][0], day + timedelta(days=1))
+            else:
+                runs.append((day, day + timedelta(days=1)))
+        remaining = query
+        for run_start, run_end in runs:
+            remaining = remaining.filter(
+                not_(
+                    and_(
+                        Event.timestamp >= datetime.combine(run_start, time.min),
+                        Event.timestamp < datetime.combine(run_end, time.min),
+                    )
+                )
+            )
+
+        total = UsageRollup()
+        for row in rollups.values():
+            total.merge(UsageRollup.from_daily_usage(row))
+        total.merge(_rollup_from_events(aggregation_type, metric, remaining))
+        return total.to_result(aggregation_type)
+
+    def aggregate_usage_many(
+        self,
+        external_customer_id: str,
+        requests: Sequence[tuple[str, dict[str, str] | None]],
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        organization_id: UUID,
+    ) -> list[UsageResult]:
+        """Aggregate several metrics for one customer over the same period.
 
-        # Apply property-based filters
-        if filters:
-            events = [
-                e for e in events if all(e.properties.get(k) == v for k, v in filters.items())
+        With ClickHouse enabled, the queries are dispatched concurrently on
+        the pooled client, at most ``BXB_USAGE_AGGREGATION_CONCURRENCY`` at a
+        time.  Otherwise they run one after another on this session.
+
+        Args:
+            external_customer_id: Customer to aggregate for
+            requests: (metric code, filters) pairs, e.g. one per charge
+            from_timestamp: Start of period
+            to_timestamp: End of period
+            organization_id: Organization owning the metrics and events.
+
+        Returns:
+            One UsageResult per request, in request order.
+        """
+        concurrency = min(settings.BXB_USAGE_AGGREGATION_CONCURRENCY, len(requests))
+        if not settings.clickhouse_enabled or concurrency <= 1:
+            return [
+                self.aggregate_usage_with_count(
+                    external_customer_id=external_customer_id,
+                    code=code,
+                    from_timestamp=from_timestamp,
+                    to_timestamp=to_timestamp,
+                    organization_id=organization_id,
+                    filters=filters,
+                )
+                for code, filters in requests
             ]
 
-        events_count = len(events)
+        # Metrics are resolved on this thread; only ClickHouse queries fan out
+        metrics: dict[str, BillableMetric] = {}
+        for code, _filters in requests:
+            if code not in metrics:
+                metric = self.metric_repo.get_by_code(code, organization_id)
+                if not metric:
+                    raise ValueError(f"Billable metric with code '{code}' not found")
+                metrics[code] = metric
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(
+                    self._clickhouse_usage,
+                    metric=metrics[code],
+                    external_customer_id=external_customer_id,
+                    from_timestamp=from_timestamp,
+                    to_timestamp=to_timestamp,
+                    organization_id=organization_id,
+                    filters=filters,
+                )
+                for code, filters in requests
+            ]
+            return [future.result() for future in futures]
 
-        result = self._compute_aggregation(
-            aggregation_type=aggregation_type,
-            metric=metric,
-            events=events,
-            events_count=events_count,
-            code=code,
+    def _clickhouse_usage(
+        self,
+        metric: BillableMetric,
+        external_customer_id: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        organization_id: UUID,
+        filters: dict[str, str] | None,
+    ) -> UsageResult:
+        """Aggregate a metric in ClickHouse and apply its rounding."""
+        from app.services.clickhouse_aggregation import clickhouse_aggregate
+
+        ch_result = clickhouse_aggregate(
+            organization_id=organization_id,
+            code=str(metric.code),
+            external_customer_id=external_customer_id,
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
+            aggregation_type=AggregationType(metric.aggregation_type),
+            field_name=str(metric.field_name) if metric.field_name else None,
+            expression=str(metric.expression) if metric.expression else None,
+            filters=filters,
         )
-
-        # Apply rounding
-        rounding_fn: str | None = (
+        ch_rounding_fn: str | None = (
             str(metric.rounding_function) if metric.rounding_function else None
         )
-        rounding_prec: int | None = (
+        ch_rounding_prec: int | None = (
             int(metric.rounding_precision) if metric.rounding_precision is not None else None
         )
-        result = UsageResult(
-            value=_apply_rounding(result.value, rounding_fn, rounding_prec),
-            events_count=result.events_count,
+        return UsageResult(
+            value=_apply_rounding(ch_result.value, ch_rounding_fn, ch_rounding_prec),
+            events_count=ch_result.events_count,
         )
 
-        return result
+    def aggregate_usage_for_customers(
+        self,
+        external_customer_ids: Sequence[str],
+        code: str,
+        from_timestamp: datetime,
+        to_timestamp: datetime,
+        organization_id: UUID,
+        filters: dict[str, str] | None = None,
+    ) -> dict[str, UsageResult]:
+        """Aggregate usage for many customers over the same period at once.
+
+        Events for all customers are read with a single query (a grouped
+        ``count(*)`` for unfiltered COUNT metrics, or a query grouped by
+        customer in ClickHouse) instead of one query per customer; results
+        match ``aggregate_usage_with_count`` for each.
+
+        Args:
+            external_customer_ids: Customers to aggregate for.
+            code: Billable metric code
+            from_timestamp: Start of period
+            to_timestamp: End of period
+            organization_id: Organization owning the metric and events.
+            filters: Optional dict of property key-value pairs to filter events
+
+        Returns:
+            Dictionary mapping each external customer ID to its UsageResult.
+        """
+        metric = self.metric_repo.get_by_code(code, organization_id)
+        if not metric:
+            raise ValueError(f"Billable metric with code '{code}' not found")
+
+        aggregation_type = AggregationType(metric.aggregation_type)
+        results: dict[str, UsageResult] = {}
+        if settings.clickhouse_enabled:
+            from app.services.clickhouse_aggregation import clickhouse_aggregate_for_customers
+
+            results = clickhouse_aggregate_for_customers(
+                organization_id=organization_id,
+                code=code,
+                external_customer_ids=external_customer_ids,
+                from_timestamp=from_timestamp,
+                to_timestamp=to_timestamp,
+                aggregation_type=aggregation_type,
+                field_name=str(metric.field_name) if metric.field_name else None,
+                expression=str(metric.expression) if metric.expression else None,
+                filters=filters,
+            )
+            return {
+                customer_id: _round_usage(metric, result) for customer_id, result in results.items()
+            }
+
+        query = self.db.query(Event).filter(
+            Event.organization_id == organization_id,
+            Event.external_customer_id.in_(external_customer_ids),
+            Event.code == code,
+            Event.timestamp >= from_timestamp,
+            Event.timestamp < to_timestamp,
+        )
+
+        if aggregation_type == AggregationType.COUNT and not filters:
+            counts: dict[str, int] = {
+                str(customer_id): int(count)
+                for customer_id, count in query.with_entities(
+                    Event.external_customer_id, func.count()
+                ).group_by(Event.external_customer_id)
+            }
+            for customer_id in external_customer_ids:
+                count = counts.get(customer_id, 0)
+                results[customer_id] = UsageResult(value=Decimal(count), events_count=count)
+        else:
+            events_by_customer: dict[str, list[Event]] = {
+                customer_id: [] for customer_id in external_customer_ids
+            }
+            for event in query.all():
+                if filters and not all(event.properties.get(k) == v for k, v in filters.items()):
+                    continue
+                events_by_customer[str(event.external_customer_id)].append(event)
+            for customer_id, events in events_by_customer.items():
+                results[customer_id] = self._compute_aggregation(
+                    aggregation_type=aggregation_type,
+                    metric=metric,
+                    events=events,
+                    events_count=len(events),
+                    code=code,
+                    from_timestamp=from_timestamp,
+                    to_timestamp=to_timestamp,
+                )
+
+        return {
+            customer_id: _round_usage(metric, result) for customer_id, result in results.items()
+        }
 
     def _compute_aggregation(
         self,
@@ -339,14 +763,8 @@ class UsageAggregationService:
                 raise ValueError(f"Metric '{code}' requires expression for CUSTOM aggregation")
             if not events:
                 return UsageResult(value=Decimal(0), events_count=0)
-            total = Decimal(0)
-            for event in events:
-                variables = {
-                    k: Decimal(str(v))
-                    for k, v in event.properties.items()
-                    if isinstance(v, (int, float, str)) and _is_numeric(v)
-                }
-                total += _evaluate_expression(str(metric.expression), variables)
+            compiled = compile_expression(str(metric.expression))
+            total, _ = compiled.sum_over(event.properties for event in events)  # type: ignore[misc]
             return UsageResult(value=total, events_count=events_count)
 
         else:
@@ -357,7 +775,7 @@ class UsageAggregationService:
         external_customer_id: str,
         from_timestamp: datetime,
         to_timestamp: datetime,
-        organization_id: UUID = DEFAULT_ORGANIZATION_ID,
+        organization_id: UUID,
     ) -> dict[str, Decimal]:
         """Get usage summary for all metrics for a customer.
 
@@ -365,7 +783,7 @@ class UsageAggregationService:
             external_customer_id: Customer to summarize for.
             from_timestamp: Start of period.
             to_timestamp: End of period.
-            organization_id: Organization to scope the metric lookup to.
+            organization_id: Organization owning the metrics and events.
 
         Returns:
             Dictionary mapping metric code to aggregated usage value.
@@ -374,6 +792,7 @@ class UsageAggregationService:
         codes = (
             self.db.query(Event.code)
             .filter(
+                Event.organization_id == organization_id,
                 Event.external_customer_id == external_customer_id,
                 Event.timestamp >= from_timestamp,
                 Event.timestamp < to_timestamp,
@@ -399,15 +818,83 @@ class UsageAggregationService:
         return summary
 
 
+def _round_usage(metric: BillableMetric, result: UsageResult) -> UsageResult:
+    """Apply the metric's rounding to an aggregated result."""
+    rounding_fn: str | None = str(metric.rounding_function) if metric.rounding_function else None
+    rounding_prec: int | None = (
+        int(metric.rounding_precision) if metric.rounding_precision is not None else None
+    )
+    return UsageResult(
+        value=_apply_rounding(result.value, rounding_fn, rounding_prec),
+        events_count=result.events_count,
+    )
+
+
+def _rollup_from_events(
+    aggregation_type: AggregationType,
+    metric: BillableMetric,
+    query: Query[Event],
+) -> UsageRollup:
+    """Build the rollup state for the events matched by ``query``.
+
+    Values follow ``_compute_aggregation``: SUM and MAX read missing fields
+    as 0, UNIQUE_COUNT ignores them.
+    """
+    if aggregation_type == AggregationType.COUNT:
+        count = int(query.with_entities(func.count()).scalar() or 0)
+        return UsageRollup(events_count=count)
+
+    field_name = _require_field_name(aggregation_type, metric)
+    rollup = UsageRollup()
+    unique_values: set[Any] = set()
+    properties: Iterable[tuple[dict[str, Any]]] = query.with_entities(Event.properties)
+    for (props,) in properties:
+        _add_to_rollup(rollup, unique_values, aggregation_type, field_name, props)
+    rollup.unique_values = list(unique_values)
+    return rollup
+
+
+def _require_field_name(aggregation_type: AggregationType, metric: BillableMetric) -> str:
+    if not metric.field_name:
+        raise ValueError(
+            f"Metric '{metric.code}' requires field_name for {aggregation_type.value.upper()}"
+            " aggregation"
+        )
+    return str(metric.field_name)
+
+
+def _add_to_rollup(
+    rollup: UsageRollup,
+    unique_values: set[Any],
+    aggregation_type: AggregationType,
+    field_name: str,
+    props: dict[str, Any],
+) -> None:
+    """Fold one event into a SUM, MAX or UNIQUE_COUNT rollup."""
+    rollup.events_count += 1
+    if aggregation_type == AggregationType.SUM:
+        rollup.sum_value += Decimal(str(props.get(field_name, 0)))
+    elif aggregation_type == AggregationType.MAX:
+        rollup.max_value = max(rollup.max_value, Decimal(str(props.get(field_name, 0))))
+    else:
+        value = props.get(field_name)
+        if value is not None:
+            unique_values.add(value)
+
+
+def _from_numeric(value: Any) -> Decimal:
+    """Read a stored NUMERIC without the column scale's trailing zeros."""
+    if value is None:
+        return Decimal(0)
+    number = Decimal(str(value)).normalize()
+    return number.quantize(Decimal(1)) if number.as_tuple().exponent > 0 else number  # type: ignore[operator]
+
+
+def _utc_naive(dt: datetime) -> datetime:
+    """Convert to a naive UTC datetime; naive values are taken as UTC."""
+    return dt.astimezone(UTC).replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
 def _strip_tz(dt: datetime) -> datetime:
     """Strip timezone info from a datetime for safe arithmetic with naive datetimes."""
     return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
-
-
-def _is_numeric(value: object) -> bool:
-    """Check if a value can be converted to Decimal."""
-    try:
-        Decimal(str(value))
-        return True
-    except Exception:
-        return False
@@ -66,6 +66,7 @@ class UsageAlertService:
                 code=metric_code,
                 from_timestamp=billing_period_start,
                 to_timestamp=billing_period_end,
+                organization_id=UUID(str(alert.organization_id)),
             )
 
             threshold = Decimal(str(alert.threshold_value))
@@ -147,6 +148,7 @@ class UsageAlertService:
             code=str(metric.code),
             from_timestamp=billing_period_start,
             to_timestamp=billing_period_end,
+            organization_id=UUID(str(alert.organization_id)),
         )
 
     def _record_trigger(
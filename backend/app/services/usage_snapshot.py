@@ -0,0 +1,391 @@
+"""Per-charge usage snapshot for a subscription and billing period.
+
+Current usage, invoice preview, usage thresholds and fee estimation all need
+the same per-charge units and amounts.  ``UsageSnapshotService`` computes them
+once and keeps the result for a short TTL, keyed by the customer's ingestion
+watermark (the latest ``events.created_at``) so newly ingested events are
+picked up on the next read.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.billable_metric import BillableMetric
+from app.models.billable_metric_filter import BillableMetricFilter
+from app.models.charge import Charge, ChargeModel
+from app.models.charge_filter import ChargeFilter
+from app.models.event import Event
+from app.models.subscription import Subscription
+from app.repositories.billable_metric_repository import BillableMetricRepository
+from app.repositories.charge_filter_repository import ChargeFilterRepository
+from app.repositories.charge_repository import ChargeRepository
+from app.services.charge_models.factory import charge_pricing_key, get_charge_calculator
+from app.services.events_query import compute_dynamic_amount
+from app.services.usage_aggregation import UsageAggregationService, UsageResult
+
+
+@dataclass(frozen=True)
+class ChargeUsageSnapshot:
+    """Usage and amount for one charge, or one filter of a charge.
+
+    Shared between callers through the cache: treat ``filters`` and
+    ``properties`` as read-only.
+    """
+
+    charge_id: UUID
+    charge_filter_id: UUID | None
+    charge_model: ChargeModel
+    metric_code: str
+    metric_name: str
+    aggregation_type: str
+    units: Decimal
+    events_count: int
+    amount: Decimal
+    properties: dict[str, Any] = field(default_factory=dict)
+    filters: dict[str, str] = field(default_factory=dict)
+    invoice_display_name: str | None = None
+
+
+@dataclass(frozen=True)
+class UsageSnapshot:
+    """Per-charge usage for a subscription over a billing period."""
+
+    subscription_id: UUID
+    external_customer_id: str
+    period_start: datetime
+    period_end: datetime
+    charges: tuple[ChargeUsageSnapshot, ...]
+
+    @property
+    def amount(self) -> Decimal:
+        """Total amount across all charges."""
+        return sum((c.amount for c in self.charges), Decimal(0))
+
+    def get_charge(
+        self, charge_id: UUID, charge_filter_id: UUID | None = None
+    ) -> ChargeUsageSnapshot | None:
+        """Find the entry for a charge (and filter), if it has one."""
+        for charge_usage in self.charges:
+            if (
+                charge_usage.charge_id == charge_id
+                and charge_usage.charge_filter_id == charge_filter_id
+            ):
+                return charge_usage
+        return None
+
+
+@dataclass(frozen=True)
+class _ChargeEntry:
+    """A charge, or one filter of a charge, resolved for aggregation."""
+
+    charge: Charge
+    charge_filter: ChargeFilter | None
+    metric: BillableMetric
+    properties: dict[str, Any]
+    filters: dict[str, str] | None
+
+
+_SNAPSHOT_CACHE_SIZE = 1024
+_snapshot_cache: OrderedDict[Hashable, tuple[float, UsageSnapshot]] = OrderedDict()
+_snapshot_cache_lock = threading.Lock()
+
+
+def clear_usage_snapshot_cache() -> None:
+    """Drop all cached snapshots. Used for testing."""
+    with _snapshot_cache_lock:
+        _snapshot_cache.clear()
+
+
+def _get_cached(key: Hashable) -> UsageSnapshot | None:
+    with _snapshot_cache_lock:
+        entry = _snapshot_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= time.monotonic():
+            del _snapshot_cache[key]
+            return None
+        _snapshot_cache.move_to_end(key)
+        return snapshot
+
+
+def _store(key: Hashable, snapshot: UsageSnapshot) -> None:
+    expires_at = time.monotonic() + settings.BXB_USAGE_SNAPSHOT_TTL_SECONDS
+    with _snapshot_cache_lock:
+        _snapshot_cache[key] = (expires_at, snapshot)
+        _snapshot_cache.move_to_end(key)
+        if len(_snapshot_cache) > _SNAPSHOT_CACHE_SIZE:
+            _snapshot_cache.popitem(last=False)
+
+
+def calculate_charge_amount(
+    db: Session,
+    charge_model: ChargeModel,
+    properties: dict[str, Any],
+    usage: Decimal,
+    external_customer_id: str,
+    organization_id: UUID,
+    metric_code: str,
+    period_start: datetime,
+    period_end: datetime,
+    filters: dict[str, str] | None = None,
+    pricing_key: Hashable | None = None,
+) -> Decimal:
+    """Calculate a charge's amount for aggregated usage.
+
+    Applies the charge model calculator (with STANDARD min/max clamping);
+    DYNAMIC charges sum ``price * quantity`` over the period's events.
+    """
+    calculator = get_charge_calculator(charge_model, pricing_key)
+    if not calculator:
+        return Decimal(0)
+
+    if charge_model == ChargeModel.STANDARD:
+        amount = calculator(units=usage, properties=properties)
+        min_price = Decimal(str(properties.get("min_price", 0)))
+        max_price = Decimal(str(properties.get("max_price", 0)))
+        if min_price and amount < min_price:
+            amount = min_price
+        if max_price and amount > max_price:
+            amount = max_price
+        return amount
+
+    if charge_model in (
+        ChargeModel.GRADUATED,
+        ChargeModel.VOLUME,
+        ChargeModel.PACKAGE,
+    ):
+        return calculator(units=usage, properties=properties)
+
+    if charge_model == ChargeModel.PERCENTAGE:
+        total_amount = Decimal(str(properties.get("base_amount", 0)))
+        event_count = int(properties.get("event_count", 0))
+        return calculator(
+            units=usage,
+            properties=properties,
+            total_amount=total_amount,
+            event_count=event_count,
+        )
+
+    if charge_model == ChargeModel.GRADUATED_PERCENTAGE:
+        usage_amount = Decimal(str(properties.get("base_amount", usage)))
+        return calculator(total_amount=usage_amount, properties=properties)
+
+    if charge_model == ChargeModel.CUSTOM:
+        return calculator(units=usage, properties=properties)
+
+    # DYNAMIC charge model
+    return compute_dynamic_amount(
+        db,
+        external_customer_id,
+        metric_code,
+        period_start,
+        period_end,
+        organization_id,
+        properties,
+        filters=filters,
+    )
+
+
+class UsageSnapshotService:
+    """Compute and cache per-charge usage for a subscription's billing period."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.charge_repo = ChargeRepository(db)
+        self.charge_filter_repo = ChargeFilterRepository(db)
+        self.metric_repo = BillableMetricRepository(db)
+        self.usage_service = UsageAggregationService(db)
+
+    def get_snapshot(
+        self,
+        subscription: Subscription,
+        external_customer_id: str,
+        period_start: datetime,
+        period_end: datetime | None = None,
+    ) -> UsageSnapshot:
+        """Get the usage snapshot for a subscription and period.
+
+        Args:
+            subscription: The subscription to compute usage for.
+            external_customer_id: The external customer ID for usage lookup.
+            period_start: Start of the billing period.
+            period_end: End of the billing period, or None for an open period
+                ending now (cached snapshots then end at their computation time).
+
+        Returns:
+            UsageSnapshot with one entry per charge or charge filter.
+        """
+        subscription_id = UUID(str(subscription.id))
+        organization_id = UUID(str(subscription.organization_id))
+        ttl = settings.BXB_USAGE_SNAPSHOT_TTL_SECONDS
+
+        key: Hashable = None
+        if ttl > 0:
+            key = (
+                subscription_id,
+                str(subscription.plan_id),
+                external_customer_id,
+                period_start,
+                period_end,
+                self._ingestion_watermark(organization_id, external_customer_id),
+            )
+            cached = _get_cached(key)
+            if cached is not None:
+                return cached
+
+        snapshot = self._compute_snapshot(
+            subscription_id=subscription_id,
+            plan_id=UUID(str(subscription.plan_id)),
+            organization_id=organization_id,
+            external_customer_id=external_customer_id,
+            period_start=period_start,
+            period_end=period_end if period_end is not None else datetime.now(),
+        )
+        if ttl > 0:
+            _store(key, snapshot)
+        return snapshot
+
+    def _ingestion_watermark(
+        self, organization_id: UUID, external_customer_id: str
+    ) -> datetime | None:
+        """Creation time of the customer's most recently ingested event."""
+        watermark: datetime | None = (
+            self.db.query(func.max(Event.created_at))
+            .filter(
+                Event.organization_id == organization_id,
+                Event.external_customer_id == external_customer_id,
+            )
+            .scalar()
+        )
+        return watermark
+
+    def _compute_snapshot(
+        self,
+        subscription_id: UUID,
+        plan_id: UUID,
+        organization_id: UUID,
+        external_customer_id: str,
+        period_start: datetime,
+        period_end: datetime,
+    ) -> UsageSnapshot:
+        # Resolve every charge (and charge filter) first, so their usage can be
+        # aggregated in one concurrent batch
+        entries: list[_ChargeEntry] = []
+        for charge in self.charge_repo.get_by_plan_id(plan_id):
+            metric = self.metric_repo.get_by_id(UUID(str(charge.billable_metric_id)))
+            if not metric:
+                continue
+
+            base_properties: dict[str, Any] = dict(charge.properties) if charge.properties else {}
+            charge_filters = self.charge_filter_repo.get_by_charge_id(UUID(str(charge.id)))
+            if not charge_filters:
+                entries.append(_ChargeEntry(charge, None, metric, base_properties, None))
+                continue
+
+            for cf in charge_filters:
+                filters = self._resolve_filters(cf)
+                if not filters:
+                    continue
+                filter_properties: dict[str, Any] = dict(cf.properties) if cf.properties else {}
+                entries.append(
+                    _ChargeEntry(
+                        charge, cf, metric, {**base_properties, **filter_properties}, filters
+                    )
+                )
+
+        usage_results = self.usage_service.aggregate_usage_many(
+            external_customer_id=external_customer_id,
+            requests=[(str(entry.metric.code), entry.filters) for entry in entries],
+            from_timestamp=period_start,
+            to_timestamp=period_end,
+            organization_id=organization_id,
+        )
+
+        return UsageSnapshot(
+            subscription_id=subscription_id,
+            external_customer_id=external_customer_id,
+            period_start=period_start,
+            period_end=period_end,
+            charges=tuple(
+                self._compute_charge_usage(
+                    entry,
+                    usage_result,
+                    external_customer_id=external_customer_id,
+                    organization_id=organization_id,
+                    period_start=period_start,
+                    period_end=period_end,
+                )
+                for entry, usage_result in zip(entries, usage_results, strict=True)
+            ),
+        )
+
+    def _resolve_filters(self, charge_filter: ChargeFilter) -> dict[str, str]:
+        """Map a charge filter's values to event property filters."""
+        filters: dict[str, str] = {}
+        for fv in self.charge_filter_repo.get_filter_values(UUID(str(charge_filter.id))):
+            bmf = (
+                self.db.query(BillableMetricFilter)
+                .filter(BillableMetricFilter.id == fv.billable_metric_filter_id)
+                .first()
+            )
+            if bmf is None:
+                continue
+            filters[str(bmf.key)] = str(fv.value)
+        return filters
+
+    def _compute_charge_usage(
+        self,
+        entry: _ChargeEntry,
+        usage_result: UsageResult,
+        external_customer_id: str,
+        organization_id: UUID,
+        period_start: datetime,
+        period_end: datetime,
+    ) -> ChargeUsageSnapshot:
+        charge, charge_filter, metric = entry.charge, entry.charge_filter, entry.metric
+        metric_code = str(metric.code)
+        charge_model = ChargeModel(charge.charge_model)
+        amount = calculate_charge_amount(
+            self.db,
+            charge_model=charge_model,
+            properties=entry.properties,
+            usage=usage_result.value,
+            external_customer_id=external_customer_id,
+            organization_id=organization_id,
+            metric_code=metric_code,
+            period_start=period_start,
+            period_end=period_end,
+            filters=entry.filters,
+            pricing_key=charge_pricing_key(charge, charge_filter),
+        )
+
+        invoice_display_name: str | None = None
+        if charge_filter is not None and charge_filter.invoice_display_name:
+            invoice_display_name = str(charge_filter.invoice_display_name)
+
+        return ChargeUsageSnapshot(
+            charge_id=UUID(str(charge.id)),
+            charge_filter_id=UUID(str(charge_filter.id)) if charge_filter is not None else None,
+            charge_model=charge_model,
+            metric_code=metric_code,
+            metric_name=str(metric.name),
+            aggregation_type=str(metric.aggregation_type),
+            units=usage_result.value,
+            events_count=usage_result.events_count,
+            amount=amount,
+            properties=entry.properties,
+            filters=entry.filters or {},
+            invoice_display_name=invoice_display_name,
+        )
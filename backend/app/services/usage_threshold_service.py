@@ -2,23 +2,19 @@
 
 from datetime import UTC, datetime
 from decimal import Decimal
-from typing import Any
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
 from app.models.applied_usage_threshold import AppliedUsageThreshold
-from app.models.charge import Charge, ChargeModel
 from app.models.subscription import SubscriptionStatus
 from app.models.usage_threshold import UsageThreshold
 from app.repositories.applied_usage_threshold_repository import (
     AppliedUsageThresholdRepository,
 )
-from app.repositories.charge_repository import ChargeRepository
 from app.repositories.subscription_repository import SubscriptionRepository
 from app.repositories.usage_threshold_repository import UsageThresholdRepository
-from app.services.charge_models.factory import get_charge_calculator
-from app.services.usage_aggregation import UsageAggregationService
+from app.services.usage_snapshot import UsageSnapshotService
 from app.services.webhook_service import WebhookService
 
 
@@ -30,8 +26,7 @@ class UsageThresholdService:
         self.subscription_repo = SubscriptionRepository(db)
         self.threshold_repo = UsageThresholdRepository(db)
         self.applied_repo = AppliedUsageThresholdRepository(db)
-        self.charge_repo = ChargeRepository(db)
-        self.usage_service = UsageAggregationService(db)
+        self.snapshot_service = UsageSnapshotService(db)
         self.webhook_service = WebhookService(db)
 
     def check_thresholds(
@@ -127,8 +122,8 @@ class UsageThresholdService:
     ) -> Decimal:
         """Calculate the projected invoice amount for the current billing period.
 
-        Reuses the same charge calculation logic as InvoiceGenerationService
-        to determine the total projected amount.
+        Reads the shared usage snapshot, which applies the same per-charge
+        (and per-filter) calculation as InvoiceGenerationService.
 
         Args:
             subscription_id: The subscription to calculate for.
@@ -143,20 +138,10 @@ class UsageThresholdService:
         if not subscription:
             raise ValueError(f"Subscription {subscription_id} not found")
 
-        plan_id = UUID(str(subscription.plan_id))
-        charges = self.charge_repo.get_by_plan_id(plan_id)
-
-        total = Decimal("0")
-        for charge in charges:
-            amount = self._calculate_charge_amount(
-                charge=charge,
-                external_customer_id=external_customer_id,
-                billing_period_start=billing_period_start,
-                billing_period_end=billing_period_end,
-            )
-            total += amount
-
-        return total
+        snapshot = self.snapshot_service.get_snapshot(
+            subscription, external_customer_id, billing_period_start, billing_period_end
+        )
+        return snapshot.amount
 
     def reset_recurring_thresholds(
         self,
@@ -222,102 +207,3 @@ class UsageThresholdService:
         all_thresholds = sub_thresholds + plan_thresholds
         all_thresholds.sort(key=lambda t: Decimal(str(t.amount_cents)))
         return all_thresholds
-
-    def _calculate_charge_amount(
-        self,
-        charge: Charge,
-        external_customer_id: str,
-        billing_period_start: datetime,
-        billing_period_end: datetime,
-    ) -> Decimal:
-        """Calculate the amount for a single charge.
-
-        Reuses the same logic as InvoiceGenerationService._calculate_charge_fee
-        but only returns the amount.
-
-        Args:
-            charge: The charge to calculate.
-            external_customer_id: The customer's external ID for usage lookup.
-            billing_period_start: Start of the billing period.
-            billing_period_end: End of the billing period.
-
-        Returns:
-            Calculated amount in cents.
-        """
-        charge_model = ChargeModel(charge.charge_model)
-        properties: dict[str, Any] = dict(charge.properties) if charge.properties else {}
-        min_price = Decimal(str(properties.get("min_price", 0)))
-        max_price = Decimal(str(properties.get("max_price", 0)))
-
-        # Get usage for the metric
-        from app.repositories.billable_metric_repository import (
-            BillableMetricRepository,
-        )
-
-        event_properties_list: list[dict[str, Any]] = []
-        metric_repo = BillableMetricRepository(self.db)
-        metric_id = UUID(str(charge.billable_metric_id))
-        metric = metric_repo.get_by_id(metric_id)
-        if not metric:
-            return Decimal("0")
-
-        metric_code = str(metric.code)
-        usage_result = self.usage_service.aggregate_usage_with_count(
-            external_customer_id=external_customer_id,
-            code=metric_code,
-            from_timestamp=billing_period_start,
-            to_timestamp=billing_period_end,
-        )
-        usage = usage_result.value
-
-        # For dynamic charges, fetch raw event properties
-        if charge_model == ChargeModel.DYNAMIC:
-            from app.services.events_query import fetch_event_properties
-
-            event_properties_list = fetch_event_properties(
-                self.db,
-                external_customer_id,
-                metric_code,
-                billing_period_start,
-                billing_period_end,
-            )
-
-        calculator = get_charge_calculator(charge_model)
-        assert calculator is not None  # All ChargeModel values have calculators
-
-        if charge_model == ChargeModel.STANDARD:
-            amount = calculator(units=usage, properties=properties)
-            if min_price and amount < min_price:
-                amount = min_price
-            if max_price and amount > max_price:
-                amount = max_price
-
-        elif charge_model in (
-            ChargeModel.GRADUATED,
-            ChargeModel.VOLUME,
-            ChargeModel.PACKAGE,
-        ):
-            amount = calculator(units=usage, properties=properties)
-
-        elif charge_model == ChargeModel.PERCENTAGE:
-            total_amount = Decimal(str(properties.get("base_amount", 0)))
-            event_count = int(properties.get("event_count", 0))
-            amount = calculator(
-                units=usage,
-                properties=properties,
-                total_amount=total_amount,
-                event_count=event_count,
-            )
-
-        elif charge_model == ChargeModel.GRADUATED_PERCENTAGE:
-            usage_amount = Decimal(str(properties.get("base_amount", usage)))
-            amount = calculator(total_amount=usage_amount, properties=properties)
-
-        elif charge_model == ChargeModel.CUSTOM:
-            amount = calculator(units=usage, properties=properties)
-
-        else:
-            # DYNAMIC (remaining case)
-            amount = calculator(events=event_properties_list, properties=properties)
-
-        return amount
@@ -0,0 +1,166 @@
+"""Wallet ledger: balances as of any time, from snapshots and transactions.
+
+Wallet transactions are append-only, so they form the wallets' ledger, while
+``Wallet.balance_cents`` is its current projection.  Reading a past balance
+from the ledger alone means summing the wallet's whole history.  Instead, a
+daily job records ``WalletBalanceSnapshot`` rows with each wallet's running
+totals as of midnight UTC, for the wallets with transactions since the
+previous run, and a balance as of any time is the wallet's latest snapshot
+plus the few transactions created since.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.wallet_balance_snapshot import WalletBalanceSnapshot
+from app.repositories.wallet_balance_snapshot_repository import WalletBalanceSnapshotRepository
+from app.repositories.wallet_repository import WalletRepository
+from app.repositories.wallet_transaction_repository import (
+    LedgerMovements,
+    WalletTransactionRepository,
+)
+
+# Wallets whose previous snapshots are loaded per query
+_WALLET_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class WalletLedgerBalance:
+    """A wallet's ledger totals as of a point in time."""
+
+    as_of: datetime
+    balance_cents: Decimal
+    credits_balance: Decimal
+    inbound_amount_cents: Decimal
+    outbound_amount_cents: Decimal
+
+    @classmethod
+    def from_snapshot(cls, snapshot: WalletBalanceSnapshot) -> "WalletLedgerBalance":
+        return cls(
+            as_of=snapshot.as_of,  # type: ignore[arg-type]
+            balance_cents=Decimal(str(snapshot.balance_cents)),
+            credits_balance=Decimal(str(snapshot.credits_balance)),
+            inbound_amount_cents=Decimal(str(snapshot.inbound_amount_cents)),
+            outbound_amount_cents=Decimal(str(snapshot.outbound_amount_cents)),
+        )
+
+    def advance(self, as_of: datetime, movements: LedgerMovements) -> "WalletLedgerBalance":
+        """The totals at ``as_of``, given the movements since these totals."""
+        return WalletLedgerBalance(
+            as_of=as_of,
+            balance_cents=self.balance_cents
+            + movements.inbound_amount_cents
+            - movements.outbound_amount_cents,
+            credits_balance=self.credits_balance
+            + movements.inbound_credits
+            - movements.outbound_credits,
+            inbound_amount_cents=self.inbound_amount_cents + movements.inbound_amount_cents,
+            outbound_amount_cents=self.outbound_amount_cents + movements.outbound_amount_cents,
+        )
+
+
+def _empty_balance(as_of: datetime) -> WalletLedgerBalance:
+    zero = Decimal("0")
+    return WalletLedgerBalance(as_of, zero, zero, zero, zero)
+
+
+@dataclass(frozen=True)
+class WalletBalanceHistory:
+    """A wallet's balances over a time range."""
+
+    opening: WalletLedgerBalance
+    closing: WalletLedgerBalance
+    # Snapshots taken within the range, oldest first, then the closing balance
+    points: list[WalletLedgerBalance]
+
+
+class WalletLedgerService:
+    """Service for wallet balances as of a point in time."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.snapshot_repo = WalletBalanceSnapshotRepository(db)
+        self.txn_repo = WalletTransactionRepository(db)
+
+    def balance_as_of(self, wallet_id: UUID, as_of: datetime) -> WalletLedgerBalance:
+        """A wallet's ledger totals over its transactions created before ``as_of``."""
+        snapshot = self.snapshot_repo.get_latest(wallet_id, as_of)
+        if snapshot is None:
+            return _empty_balance(as_of).advance(
+                as_of, self.txn_repo.ledger_movements(wallet_id, None, as_of)
+            )
+        return WalletLedgerBalance.from_snapshot(snapshot).advance(
+            as_of,
+            self.txn_repo.ledger_movements(wallet_id, snapshot.as_of, as_of),  # type: ignore[arg-type]
+        )
+
+    def balance_history(
+        self, wallet_id: UUID, start: datetime, end: datetime
+    ) -> WalletBalanceHistory:
+        """A wallet's balances from ``start`` to ``end``.
+
+        Between two points the balance is unchanged, since snapshots are only
+        taken of wallets with new transactions.
+
+        Raises:
+            ValueError: If ``start`` is not before ``end``.
+        """
+        if start >= end:
+            raise ValueError("start_date must be before end_date")
+        opening = self.balance_as_of(wallet_id, start)
+        closing = self.balance_as_of(wallet_id, end)
+        points = [
+            WalletLedgerBalance.from_snapshot(snapshot)
+            for snapshot in self.snapshot_repo.get_in_range(wallet_id, start, end)
+        ]
+        points.append(closing)
+        return WalletBalanceHistory(opening=opening, closing=closing, points=points)
+
+    def snapshot_balances(self, as_of: datetime) -> int:
+        """Snapshot, as of ``as_of``, the wallets with transactions since the last run.
+
+        Each snapshot is the wallet's previous snapshot plus the transactions
+        created since the previous run.  Wallets already snapshotted at
+        ``as_of`` are skipped, so a run can be repeated.
+
+        Returns:
+            Number of wallets snapshotted.
+        """
+        try:
+            since = self.snapshot_repo.get_last_as_of(as_of)
+            movements = self.txn_repo.ledger_movements_by_wallet(since, as_of)
+            wallet_ids = list(movements)
+            organization_ids = WalletRepository(self.db).get_organization_ids(wallet_ids)
+            snapshots: list[dict[str, Any]] = []
+            for i in range(0, len(wallet_ids), _WALLET_BATCH_SIZE):
+                batch = wallet_ids[i : i + _WALLET_BATCH_SIZE]
+                previous = self.snapshot_repo.get_latest_by_wallet_ids(batch, as_of)
+                for wallet_id in batch:
+                    snapshot = previous.get(wallet_id)
+                    balance = (
+                        WalletLedgerBalance.from_snapshot(snapshot)
+                        if snapshot is not None
+                        else _empty_balance(as_of)
+                    ).advance(as_of, movements[wallet_id])
+                    snapshots.append(
+                        {
+                            "organization_id": organization_ids[wallet_id],
+                            "wallet_id": wallet_id,
+                            "as_of": as_of,
+                            "balance_cents": balance.balance_cents,
+                            "credits_balance": balance.credits_balance,
+                            "inbound_amount_cents": balance.inbound_amount_cents,
+                            "outbound_amount_cents": balance.outbound_amount_cents,
+                        }
+                    )
+            count = self.snapshot_repo.bulk_create(snapshots)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return count
@@ -137,61 +137,72 @@ class WalletService:
     ) -> ConsumptionResult:
         """Priority-based consumption algorithm.
 
-        1. Get all active, non-expired wallets ordered by priority ASC, created_at ASC
+        1. Lock all active, non-expired wallets ordered by priority ASC, created_at ASC
         2. For each wallet: calculate max consumable = min(wallet.balance_cents, remaining_amount)
-        3. Deduct from wallet, create outbound transaction
+        3. Deduct from wallet, stage an outbound transaction (and a settlement for an invoice)
         4. Continue until amount fully consumed or no wallets remain
-        5. Return total consumed and remaining uncovered amount
+        5. Commit once and return total consumed and remaining uncovered amount
+
+        The wallets stay locked until the commit, so concurrent consumption for
+        the same customer is serialized instead of overwriting balances.  Any
+        failure rolls the whole consumption back.
         """
         remaining = Decimal(str(amount_cents))
         total_consumed = Decimal("0")
-
-        wallets = self.wallet_repo.get_active_by_customer_id(customer_id)
-
-        for wallet in wallets:
-            if remaining <= 0:
-                break
-
-            wallet_balance = Decimal(str(wallet.balance_cents))
-            if wallet_balance <= 0:
-                continue
-
-            consumable = min(wallet_balance, remaining)
-            rate = Decimal(str(wallet.rate_amount))
-            credits_consumed = consumable / rate if rate > 0 else Decimal("0")
-
-            # Deduct from wallet
-            self.wallet_repo.deduct_balance(wallet.id, credits_consumed, consumable)  # type: ignore[arg-type]
-
-            # Create outbound transaction
-            self.txn_repo.create(
-                WalletTransactionCreate(
-                    wallet_id=wallet.id,  # type: ignore[arg-type]
-                    customer_id=customer_id,
-                    transaction_type=TransactionType.OUTBOUND,
-                    transaction_status=TransactionTransactionStatus.INVOICED,
-                    source=TransactionSource.MANUAL,
-                    status=TransactionStatus.SETTLED,
-                    amount=credits_consumed,
-                    credit_amount=consumable,
-                    invoice_id=invoice_id,
-                )
-            )
-
-            # Record settlement if this is for an invoice
-            if invoice_id is not None:
-                settlement_repo = InvoiceSettlementRepository(self.db)
-                settlement_repo.create(
-                    InvoiceSettlementCreate(
+        transactions: list[WalletTransactionCreate] = []
+        settlements: list[InvoiceSettlementCreate] = []
+
+        try:
+            wallets = self.wallet_repo.lock_active_by_customer_id(customer_id)
+
+            for wallet in wallets:
+                if remaining <= 0:
+                    break
+
+                wallet_balance = Decimal(str(wallet.balance_cents))
+                if wallet_balance <= 0:
+                    continue
+
+                consumable = min(wallet_balance, remaining)
+                rate = Decimal(str(wallet.rate_amount))
+                credits_consumed = consumable / rate if rate > 0 else Decimal("0")
+
+                self.wallet_repo.mark_deducted(wallet, credits_consumed, consumable)
+
+                transactions.append(
+                    WalletTransactionCreate(
+                        wallet_id=wallet.id,  # type: ignore[arg-type]
+                        customer_id=customer_id,
+                        transaction_type=TransactionType.OUTBOUND,
+                        transaction_status=TransactionTransactionStatus.INVOICED,
+                        source=TransactionSource.MANUAL,
+                        status=TransactionStatus.SETTLED,
+                        amount=credits_consumed,
+                        credit_amount=consumable,
                         invoice_id=invoice_id,
-                        settlement_type=SettlementType.WALLET_CREDIT,
-                        source_id=wallet.id,  # type: ignore[arg-type]
-                        amount_cents=consumable,
                     )
                 )
 
-            total_consumed += consumable
-            remaining -= consumable
+                # Record settlement if this is for an invoice
+                if invoice_id is not None:
+                    settlements.append(
+                        InvoiceSettlementCreate(
+                            invoice_id=invoice_id,
+                            settlement_type=SettlementType.WALLET_CREDIT,
+                            source_id=wallet.id,  # type: ignore[arg-type]
+                            amount_cents=consumable,
+                        )
+                    )
+
+                total_consumed += consumable
+                remaining -= consumable
+
+            self.txn_repo.add_bulk(transactions)
+            InvoiceSettlementRepository(self.db).add_bulk(settlements)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
         return ConsumptionResult(
             total_consumed=total_consumed,
@@ -94,23 +94,37 @@ class WebhookService:
         Returns:
             List of created Webhook records.
         """
+        webhooks = self.stage_webhook(webhook_type, object_type, object_id, payload)
+        if webhooks:
+            self.db.commit()
+            for webhook in webhooks:
+                self.db.refresh(webhook)
+        return webhooks
+
+    def stage_webhook(
+        self,
+        webhook_type: str,
+        object_type: str | None = None,
+        object_id: UUID | None = None,
+        payload: dict[str, Any] | None = None,
+    ) -> list[Webhook]:
+        """Add webhook records for all active endpoints without committing.
+
+        Lets a change and the webhooks announcing it commit together.
+        """
         if payload is None:
             payload = {}
 
-        active_endpoints = self.endpoint_repo.get_active()
-        webhooks: list[Webhook] = []
-
-        for endpoint in active_endpoints:
-            webhook = self.webhook_repo.create(
+        return [
+            self.webhook_repo.add(
                 webhook_endpoint_id=endpoint.id,  # type: ignore[arg-type]
                 webhook_type=webhook_type,
                 object_type=object_type,
                 object_id=object_id,
                 payload=payload,
             )
-            webhooks.append(webhook)
-
-        return webhooks
+            for endpoint in self.endpoint_repo.get_active()
+        ]
 
     def deliver_webhook(self, webhook_id: UUID) -> bool:
         """Deliver a webhook to its endpoint.
@@ -89,3 +89,32 @@ async def enqueue_aggregate_daily_usage() -> Job:
 async def enqueue_check_usage_alerts(subscription_id: str) -> Job:
     """Enqueue a task to check usage alerts for a subscription."""
     return await enqueue_task("check_usage_alerts_task", subscription_id)
+
+
+async def enqueue_daily_usage_backfill_shard(shard_id: str, attempts: int) -> Job:
+    """Enqueue a task to recompute one day of a daily usage backfill.
+
+    The job ID is derived from the shard and its attempts, so enqueueing a
+    shard that is already queued does not run it twice, while a shard that
+    ran before (and whose job result arq still keeps) can be retried.
+    """
+    return await enqueue_task(
+        "run_daily_usage_backfill_shard_task",
+        shard_id,
+        _job_id=f"daily_usage_backfill_shard:{shard_id}:{attempts}",
+    )
+
+
+async def enqueue_render_invoice_pdf(invoice_id: str) -> Job:
+    """Enqueue a task to render and store an invoice's PDF."""
+    return await enqueue_task("render_invoice_pdf_task", invoice_id)
+
+
+async def enqueue_send_queued_emails() -> Job:
+    """Enqueue a task to send the queued invoice and credit note emails."""
+    return await enqueue_task("send_queued_emails_task")
+
+
+async def enqueue_process_payment_webhook_events() -> Job:
+    """Enqueue a task to apply the stored payment provider webhook events."""
+    return await enqueue_task("process_payment_webhook_events_task")
@@ -1,22 +1,35 @@
+import asyncio
 import logging
-from datetime import UTC, datetime
+import os
+import socket
+from datetime import UTC, datetime, timedelta
 from typing import Any
 from uuid import UUID
 
 from arq import cron
 
+from app.core.clickhouse import ensure_clickhouse_schema
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.subscription import Subscription, SubscriptionStatus
 from app.repositories.customer_repository import CustomerRepository
 from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.payment_webhook_event_repository import PaymentWebhookEventRepository
 from app.repositories.plan_repository import PlanRepository
 from app.repositories.subscription_repository import SubscriptionRepository
+from app.services.daily_usage_backfill_service import DailyUsageBackfillService
 from app.services.daily_usage_service import DailyUsageService
 from app.services.data_export_service import DataExportService
+from app.services.email_delivery import send_queued_emails
+from app.services.event_queue import EventQueueConsumer
+from app.services.invoice_pdf_service import InvoicePdfService
+from app.services.payment_webhook_inbox import process_pending_payment_webhook_events
+from app.services.smtp_pool import close_smtp_pool
 from app.services.subscription_dates import SubscriptionDatesService
 from app.services.subscription_lifecycle import SubscriptionLifecycleService
 from app.services.usage_alert_service import UsageAlertService
 from app.services.usage_threshold_service import UsageThresholdService
+from app.services.wallet_ledger_service import WalletLedgerService
 from app.services.webhook_service import WebhookService
 from app.tasks import redis_settings
 
@@ -296,9 +309,19 @@ async def check_usage_alerts_task(ctx: dict[str, Any], subscription_id: str) ->
         db.close()
 
 
+def _process_data_export(export_id: UUID) -> str:
+    db = SessionLocal()
+    try:
+        return str(DataExportService(db).process_export(export_id).status)
+    finally:
+        db.close()
+
+
 async def process_data_export_task(ctx: dict[str, Any], export_id: str) -> str:
     """Background task: process a data export and generate CSV file.
 
+    Runs in a thread, so a large export does not block the worker's event loop.
+
     Args:
         ctx: ARQ worker context.
         export_id: UUID string of the DataExport to process.
@@ -306,21 +329,17 @@ async def process_data_export_task(ctx: dict[str, Any], export_id: str) -> str:
     Returns:
         Status of the export after processing.
     """
-    db = SessionLocal()
-    try:
-        service = DataExportService(db)
-        result = service.process_export(UUID(export_id))
-        logger.info("Processed data export %s: status=%s", export_id, result.status)
-        return str(result.status)
-    finally:
-        db.close()
+    status = await asyncio.to_thread(_process_data_export, UUID(export_id))
+    logger.info("Processed data export %s: status=%s", export_id, status)
+    return status
 
 
 async def aggregate_daily_usage_task(ctx: dict[str, Any]) -> int:
     """Background task: pre-aggregate daily usage for all active subscriptions.
 
     Aggregates usage data for yesterday into daily_usages records for faster
-    period queries.
+    period queries, then recomputes earlier days that received late events
+    since the previous run.
 
     Runs daily at midnight.
     """
@@ -328,6 +347,10 @@ async def aggregate_daily_usage_task(ctx: dict[str, Any]) -> int:
     try:
         service = DailyUsageService(db)
         count = service.aggregate_daily_usage()
+        now = datetime.now(UTC)
+        count += service.refresh_late_daily_usage(
+            since=now - timedelta(days=2), before_date=now.date()
+        )
         if count > 0:
             logger.info("Aggregated %d daily usage records", count)
         return count
@@ -335,6 +358,99 @@ async def aggregate_daily_usage_task(ctx: dict[str, Any]) -> int:
         db.close()
 
 
+def _run_daily_usage_backfill_shard(shard_id: UUID) -> int:
+    db = SessionLocal()
+    try:
+        return DailyUsageBackfillService(db).run_shard(shard_id)
+    finally:
+        db.close()
+
+
+async def run_daily_usage_backfill_shard_task(ctx: dict[str, Any], shard_id: str) -> int:
+    """Background task: recompute one day of a daily usage backfill.
+
+    Runs in a thread, so a worker can process several shards concurrently.
+
+    Args:
+        ctx: ARQ worker context.
+        shard_id: UUID string of the DailyUsageBackfillShard to run.
+
+    Returns:
+        Number of daily usage records written.
+    """
+    count = await asyncio.to_thread(_run_daily_usage_backfill_shard, UUID(shard_id))
+    logger.info("Backfilled %d daily usage records for shard %s", count, shard_id)
+    return count
+
+
+def _render_invoice_pdf(invoice_id: UUID) -> bool:
+    db = SessionLocal()
+    try:
+        return InvoicePdfService(db).render(invoice_id) is not None
+    finally:
+        db.close()
+
+
+async def render_invoice_pdf_task(ctx: dict[str, Any], invoice_id: str) -> bool:
+    """Background task: render and store a finalized invoice's PDF.
+
+    Runs in a thread, so rendering does not block the worker's event loop.
+
+    Args:
+        ctx: ARQ worker context.
+        invoice_id: UUID string of the Invoice to render.
+
+    Returns:
+        True if a PDF is stored for the invoice.
+    """
+    return await asyncio.to_thread(_render_invoice_pdf, UUID(invoice_id))
+
+
+async def send_queued_emails_task(ctx: dict[str, Any]) -> int:
+    """Background task: send the due queued invoice and credit note emails.
+
+    Enqueued after emails are queued, and runs every minute to send retries.
+
+    Returns:
+        Number of emails sent.
+    """
+    count = await send_queued_emails()
+    if count > 0:
+        logger.info("Sent %d queued emails", count)
+    return count
+
+
+async def process_payment_webhook_events_task(ctx: dict[str, Any]) -> int:
+    """Background task: apply the stored payment provider webhook events.
+
+    Enqueued when an event is received, and runs every minute to retry
+    failed events. Runs in threads, so the worker's event loop is not blocked.
+
+    Returns:
+        Number of events processed, ignored or given up on.
+    """
+    count = await asyncio.to_thread(process_pending_payment_webhook_events)
+    if count > 0:
+        logger.info("Processed %d payment webhook events", count)
+    return count
+
+
+async def cleanup_payment_webhook_events_task(ctx: dict[str, Any]) -> int:
+    """Background task: delete finished payment webhook events past retention.
+
+    Runs daily.
+    """
+    db = SessionLocal()
+    try:
+        cutoff = datetime.now(UTC) - timedelta(days=settings.BXB_PAYMENT_WEBHOOK_RETENTION_DAYS)
+        count = PaymentWebhookEventRepository(db).delete_finished_before(cutoff)
+        if count > 0:
+            logger.info("Cleaned up %d payment webhook events", count)
+        return count
+    finally:
+        db.close()
+
+
 async def cleanup_idempotency_records_task(ctx: dict[str, Any]) -> int:
     """Background task: delete idempotency records older than 24 hours.
 
@@ -351,6 +467,49 @@ async def cleanup_idempotency_records_task(ctx: dict[str, Any]) -> int:
         db.close()
 
 
+async def snapshot_wallet_balances_task(ctx: dict[str, Any]) -> int:
+    """Background task: snapshot wallet balances as of midnight UTC.
+
+    Snapshots the wallets with transactions since the previous run. Runs
+    daily, after midnight, so transactions in flight at midnight are committed.
+    """
+    db = SessionLocal()
+    try:
+        as_of = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+        count = WalletLedgerService(db).snapshot_balances(as_of)
+        if count > 0:
+            logger.info("Snapshotted %d wallet balances", count)
+        return count
+    finally:
+        db.close()
+
+
+async def startup(ctx: dict[str, Any]) -> None:
+    """Ensure the ClickHouse schema and join the event ingest consumer group.
+
+    The consumer group is only joined when async ingestion is enabled.
+    """
+    await asyncio.to_thread(ensure_clickhouse_schema)
+    if settings.BXB_EVENT_INGESTION_MODE != "async":
+        return
+    consumer = EventQueueConsumer(ctx["redis"], f"{socket.gethostname()}-{os.getpid()}")
+    ctx["event_queue_consumer"] = consumer
+    ctx["event_queue_task"] = asyncio.create_task(consumer.run())
+
+
+async def shutdown(ctx: dict[str, Any]) -> None:
+    """Stop the event ingest consumer after its in-flight batch.
+
+    Also closes the pooled SMTP connections.
+    """
+    await close_smtp_pool()
+    consumer = ctx.get("event_queue_consumer")
+    if consumer is None:
+        return
+    consumer.stop()
+    await ctx["event_queue_task"]
+
+
 class WorkerSettings:
     functions = [
         retry_failed_webhooks_task,
@@ -361,7 +520,13 @@ class WorkerSettings:
         check_usage_alerts_task,
         process_data_export_task,
         aggregate_daily_usage_task,
+        run_daily_usage_backfill_shard_task,
+        render_invoice_pdf_task,
+        send_queued_emails_task,
+        process_payment_webhook_events_task,
+        cleanup_payment_webhook_events_task,
         cleanup_idempotency_records_task,
+        snapshot_wallet_balances_task,
     ]
     cron_jobs = [
         cron(
@@ -372,6 +537,12 @@ class WorkerSettings:
         cron(process_trial_expirations_task, minute={0}),  # hourly
         cron(generate_periodic_invoices_task, minute={0}),  # hourly
         cron(aggregate_daily_usage_task, hour=0, minute=30),  # daily at 00:30
+        cron(send_queued_emails_task),  # every minute
+        cron(process_payment_webhook_events_task),  # every minute
+        cron(cleanup_payment_webhook_events_task, hour=0, minute=15),  # daily at 00:15
         cron(cleanup_idempotency_records_task, hour=0, minute=0),  # daily at midnight
+        cron(snapshot_wallet_balances_task, hour=0, minute=45),  # daily at 00:45
     ]
     redis_settings = redis_settings
+    on_startup = startup
+    on_shutdown = shutdown
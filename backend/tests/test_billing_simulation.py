@@ -0,0 +1,89 @@
+"""Tests for the dry-run billing simulation."""
+
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.charge import Charge, ChargeModel
+from app.models.customer import Customer
+from app.models.event import Event
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.services.billing_simulation import SIMULATION_COLUMNS, BillingSimulationService
+from app.services.charge_models.factory import clear_compiled_pricing_cache
+from app.services.subscription_dates import SubscriptionDatesService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "BXB_BILLING_SIMULATION_WORKERS", 1)
+    clear_compiled_pricing_cache()
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        clear_compiled_pricing_cache()
+
+
+@pytest.fixture
+def charge(db):
+    metric = BillableMetric(
+        organization_id=DEFAULT_ORG_ID,
+        code="api_calls",
+        name="API Calls",
+        aggregation_type=AggregationType.COUNT.value,
+    )
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    plan = Plan(organization_id=DEFAULT_ORG_ID, code="basic", name="Basic", interval="monthly")
+    db.add_all([metric, customer, plan])
+    db.flush()
+    subscription = Subscription(
+        organization_id=DEFAULT_ORG_ID,
+        external_id="sub-1",
+        customer_id=customer.id,
+        plan_id=plan.id,
+        status=SubscriptionStatus.ACTIVE.value,
+    )
+    charge = Charge(
+        organization_id=DEFAULT_ORG_ID,
+        plan_id=plan.id,
+        billable_metric_id=metric.id,
+        charge_model=ChargeModel.GRADUATED.value,
+        properties={"tiers": [{"up_to": 10, "unit_price": "1"}]},
+    )
+    db.add_all([subscription, charge])
+    db.flush()
+    period_start, _ = SubscriptionDatesService().calculate_billing_period(subscription, "monthly")
+    db.add_all(
+        Event(
+            organization_id=DEFAULT_ORG_ID,
+            transaction_id=f"txn-{i}",
+            external_customer_id="cust-1",
+            code="api_calls",
+            timestamp=period_start + timedelta(seconds=i + 1),
+            properties={},
+        )
+        for i in range(4)
+    )
+    db.commit()
+    return charge
+
+
+def _simulated_amount(db, overrides):
+    rows = list(BillingSimulationService(db).simulate(DEFAULT_ORG_ID, charge_overrides=overrides))
+    assert len(rows) == 1
+    row = dict(zip(SIMULATION_COLUMNS, rows[0], strict=True))
+    return row["amount_cents"], row["simulated_amount_cents"]
+
+
+def test_runs_with_different_overrides_do_not_share_compiled_pricing(db, charge):
+    def tiers(unit_price):
+        return {str(charge.id): {"tiers": [{"up_to": 10, "unit_price": unit_price}]}}
+
+    assert _simulated_amount(db, tiers("2")) == ("4", "8")
+    assert _simulated_amount(db, tiers("3")) == ("4", "12")
+    assert _simulated_amount(db, None) == ("4", "4")
@@ -0,0 +1,149 @@
+"""Tests for bulk PDF rendering and the PDF export types."""
+
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+
+import pytest
+
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.data_export import ExportStatus, ExportType
+from app.models.invoice import Invoice, InvoiceStatus
+from app.services import bulk_pdf_rendering
+from app.services.bulk_pdf_rendering import RENDER_QUEUE_PER_PROCESS, BulkPdfRenderer
+from app.services.data_export_service import DataExportService
+from app.services.invoice_pdf_service import InvoicePdfService, store_invoice_pdf
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+PROCESSES = 2
+
+
+class InProcessExecutor:
+    """Stands in for the process pool, rendering on threads in this process.
+
+    Tracks how many submitted documents have not been written out yet.
+    """
+
+    instances: list["InProcessExecutor"] = []
+
+    def __init__(self, max_workers, mp_context=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.submitted = 0
+        InProcessExecutor.instances.append(self)
+
+    def submit(self, fn, document):
+        with self.lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        future = self.executor.submit(fn, document)
+        result = future.result
+
+        def written(timeout=None):
+            with self.lock:
+                self.in_flight -= 1
+            return result(timeout)
+
+        future.result = written  # type: ignore[method-assign]
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown()
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def renderer_stub(monkeypatch, tmp_path):
+    """Render documents in-process: later invoices finish first, "-0003" fails."""
+    InProcessExecutor.instances.clear()
+
+    def render_pdf(document):
+        number = int(document.html.split("INV-BULK-")[1][:4])
+        time.sleep(0.002 * (20 - number))
+        if number == 3:
+            raise RuntimeError("render failed")
+        return f"%PDF {number}".encode()
+
+    monkeypatch.setattr(settings, "BXB_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "BXB_PDF_RENDER_PROCESSES", PROCESSES)
+    monkeypatch.setattr(bulk_pdf_rendering, "ProcessPoolExecutor", InProcessExecutor)
+    monkeypatch.setattr(bulk_pdf_rendering, "render_pdf", render_pdf)
+
+
+def _invoices(db, count) -> list[Invoice]:
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    db.add(customer)
+    db.flush()
+    now = datetime.now(UTC)
+    invoices = [
+        Invoice(
+            organization_id=DEFAULT_ORG_ID,
+            customer_id=customer.id,
+            invoice_number=f"INV-BULK-{n:04d}",
+            status=InvoiceStatus.FINALIZED.value,
+            billing_period_start=now,
+            billing_period_end=now,
+        )
+        for n in range(1, count + 1)
+    ]
+    db.add_all(invoices)
+    db.commit()
+    return invoices
+
+
+def test_zip_keeps_invoice_order_with_bounded_queue_and_counted_failures(db, tmp_path):
+    invoices = _invoices(db, 16)
+    # Already stored, so written without rendering
+    stored = InvoicePdfService(db).document(invoices[4])
+    store_invoice_pdf(stored.content_key, b"%PDF stored")
+    progress = []
+
+    stats = BulkPdfRenderer(db).render_invoices(
+        invoices, tmp_path / "invoices.zip", on_progress=progress.append
+    )
+
+    assert (stats.rendered, stats.reused, stats.failed) == (14, 1, 1)
+    assert stats.written == 15
+    assert progress == list(range(1, 17))
+    with zipfile.ZipFile(tmp_path / "invoices.zip") as archive:
+        names = archive.namelist()
+        assert names == [
+            f"invoice_{invoice.invoice_number}.pdf"
+            for invoice in invoices
+            if invoice is not invoices[2]
+        ]
+        assert archive.read("invoice_INV-BULK-0005.pdf") == b"%PDF stored"
+        assert archive.read("invoice_INV-BULK-0016.pdf") == b"%PDF 16"
+
+    (executor,) = InProcessExecutor.instances
+    assert executor.submitted == 15
+    # One document may be queued while the oldest is written out
+    assert PROCESSES < executor.peak <= PROCESSES * RENDER_QUEUE_PER_PROCESS + 1
+
+
+def test_pdf_export_fails_when_any_document_fails_to_render(db):
+    _invoices(db, 4)
+    service = DataExportService(db)
+    export = service.create_export(DEFAULT_ORG_ID, ExportType.INVOICE_PDFS)
+
+    result = service.process_export(export.id)
+
+    assert result.status == ExportStatus.FAILED.value
+    assert result.error_message == "1 of 4 PDFs failed to render"
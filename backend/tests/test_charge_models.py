@@ -0,0 +1,264 @@
+"""Tests for compiled charge-model pricing."""
+
+import math
+import uuid
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from app.models.charge import Charge, ChargeModel
+from app.services.charge_models.factory import (
+    charge_pricing_key,
+    clear_compiled_pricing_cache,
+    get_charge_calculator,
+)
+
+# The calculators as they were before pricing was compiled, restated as the
+# reference the compiled pricing must reproduce.
+
+
+def _graduated(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    ranges = properties.get("graduated_ranges", [])
+    total = Decimal(0)
+    remaining = units
+    if ranges:
+        for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
+            if remaining <= 0:
+                break
+            from_value = Decimal(str(r.get("from_value", 0)))
+            to_value = r.get("to_value")
+            per_unit = Decimal(str(r.get("per_unit_amount", 0)))
+            flat = Decimal(str(r.get("flat_amount", 0)))
+            capacity = remaining if to_value is None else Decimal(str(to_value)) - from_value + 1
+            units_in_tier = min(remaining, capacity)
+            if units_in_tier <= 0:
+                continue
+            total += units_in_tier * per_unit + flat
+            remaining -= units_in_tier
+        return total
+
+    prev_limit = Decimal(0)
+    for tier in sorted(properties.get("tiers", []), key=lambda t: t.get("up_to", float("inf"))):
+        if remaining <= 0:
+            break
+        up_to = Decimal(str(tier.get("up_to", float("inf"))))
+        tier_usage = min(remaining, up_to - prev_limit)
+        if tier_usage <= 0:
+            break
+        total += tier_usage * Decimal(str(tier.get("unit_price", 0)))
+        remaining -= tier_usage
+        prev_limit = up_to
+    return total
+
+
+def _volume(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    ranges = properties.get("volume_ranges", [])
+    if ranges:
+        ordered = sorted(ranges, key=lambda x: x.get("from_value", 0))
+        match = next(
+            (
+                r
+                for r in ordered
+                if r.get("to_value") is None or units <= Decimal(str(r["to_value"]))
+            ),
+            ordered[-1],
+        )
+        return units * Decimal(str(match.get("per_unit_amount", 0))) + Decimal(
+            str(match.get("flat_amount", 0))
+        )
+
+    tiers = sorted(properties.get("tiers", []), key=lambda t: t.get("up_to", float("inf")))
+    if not tiers:
+        return Decimal(0)
+    match = next(
+        (t for t in tiers if units <= Decimal(str(t.get("up_to", float("inf"))))), tiers[-1]
+    )
+    return units * Decimal(str(match.get("unit_price", 0))) + Decimal(
+        str(match.get("flat_amount", 0))
+    )
+
+
+def _package(units: Decimal, properties: dict[str, Any]) -> Decimal:
+    amount = Decimal(str(properties.get("amount", properties.get("unit_price", 0))))
+    package_size = Decimal(str(properties.get("package_size", 1)))
+    billable = max(Decimal(0), units - Decimal(str(properties.get("free_units", 0))))
+    if billable == 0:
+        return Decimal(0)
+    return Decimal(math.ceil(billable / package_size)) * amount
+
+
+def _percentage(
+    units: Decimal, properties: dict[str, Any], total_amount: Decimal, event_count: int
+) -> Decimal:
+    rate = Decimal(str(properties.get("rate", properties.get("percentage", 0))))
+    fixed_amount = Decimal(str(properties.get("fixed_amount", 0)))
+    billable_events = max(0, event_count - int(properties.get("free_units_per_events", 0)))
+    total = total_amount * (rate / Decimal(100)) + Decimal(str(billable_events)) * fixed_amount
+    per_tx_min = properties.get("per_transaction_min_amount")
+    per_tx_max = properties.get("per_transaction_max_amount")
+    if per_tx_min is not None and total < Decimal(str(per_tx_min)):
+        total = Decimal(str(per_tx_min))
+    if per_tx_max is not None and total > Decimal(str(per_tx_max)):
+        total = Decimal(str(per_tx_max))
+    return total
+
+
+def _graduated_percentage(total_amount: Decimal, properties: dict[str, Any]) -> Decimal:
+    total = Decimal(0)
+    remaining = total_amount
+    ranges = properties.get("graduated_percentage_ranges", [])
+    for r in sorted(ranges, key=lambda x: x.get("from_value", 0)):
+        if remaining <= 0:
+            break
+        from_value = Decimal(str(r.get("from_value", 0)))
+        to_value = r.get("to_value")
+        if to_value is None:
+            portion = remaining
+        else:
+            portion = min(remaining, Decimal(str(to_value)) - from_value)
+        if portion <= 0:
+            continue
+        total += portion * (Decimal(str(r.get("rate", 0))) / Decimal(100)) + Decimal(
+            str(r.get("flat_amount", 0))
+        )
+        remaining -= portion
+    return total
+
+
+UNITS = [
+    Decimal(u)
+    for u in ("0", "0.5", "1", "9", "10", "10.5", "11", "99", "100", "100.5", "101", "250", "1e6")
+]
+
+PRICINGS: list[tuple[ChargeModel, dict[str, Any]]] = [
+    (
+        ChargeModel.GRADUATED,
+        {
+            "graduated_ranges": [
+                {"from_value": 11, "to_value": 100, "per_unit_amount": "2", "flat_amount": "5"},
+                {"from_value": 0, "to_value": 10, "per_unit_amount": "3", "flat_amount": "1"},
+                {"from_value": 101, "to_value": None, "per_unit_amount": "1"},
+            ]
+        },
+    ),
+    (
+        ChargeModel.GRADUATED,
+        {"graduated_ranges": [{"from_value": 0, "to_value": 10, "per_unit_amount": "3"}]},
+    ),
+    (
+        ChargeModel.GRADUATED,
+        {"tiers": [{"up_to": 100, "unit_price": "2"}, {"up_to": 10, "unit_price": "3"}]},
+    ),
+    (
+        ChargeModel.GRADUATED,
+        {"tiers": [{"up_to": 10, "unit_price": "3"}, {"unit_price": "0.5"}]},
+    ),
+    (
+        ChargeModel.VOLUME,
+        {
+            "volume_ranges": [
+                {"from_value": 0, "to_value": 10, "per_unit_amount": "3", "flat_amount": "1"},
+                {"from_value": 11, "to_value": 100, "per_unit_amount": "2"},
+            ]
+        },
+    ),
+    (
+        ChargeModel.VOLUME,
+        {
+            "volume_ranges": [
+                {"from_value": 0, "to_value": 10, "per_unit_amount": "3"},
+                {"from_value": 11, "to_value": None, "per_unit_amount": "1", "flat_amount": "7"},
+            ]
+        },
+    ),
+    (
+        ChargeModel.VOLUME,
+        {
+            "tiers": [
+                {"up_to": 100, "unit_price": "2", "flat_amount": "4"},
+                {"up_to": 10, "unit_price": "3"},
+            ]
+        },
+    ),
+    (ChargeModel.PACKAGE, {"amount": "25", "package_size": 10, "free_units": 1}),
+    (ChargeModel.PACKAGE, {"unit_price": "4", "package_size": "2.5"}),
+    (
+        ChargeModel.GRADUATED_PERCENTAGE,
+        {
+            "graduated_percentage_ranges": [
+                {"from_value": 0, "to_value": 10, "rate": "5", "flat_amount": "1"},
+                {"from_value": 10, "to_value": 100, "rate": "2.5"},
+                {"from_value": 100, "to_value": None, "rate": "1", "flat_amount": "3"},
+            ]
+        },
+    ),
+]
+
+_REFERENCE = {
+    ChargeModel.GRADUATED: _graduated,
+    ChargeModel.VOLUME: _volume,
+    ChargeModel.PACKAGE: _package,
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    clear_compiled_pricing_cache()
+    yield
+    clear_compiled_pricing_cache()
+
+
+@pytest.mark.parametrize(("model", "properties"), PRICINGS)
+def test_compiled_pricing_matches_the_previous_calculators(model, properties):
+    calculator = get_charge_calculator(model, ("charge", uuid.uuid4()))
+    assert calculator is not None
+
+    for units in UNITS:
+        if model == ChargeModel.GRADUATED_PERCENTAGE:
+            expected = _graduated_percentage(units, properties)
+            actual = calculator(total_amount=units, properties=properties)
+        else:
+            expected = _REFERENCE[model](units, properties)
+            actual = calculator(units=units, properties=properties)
+        assert actual == expected, units
+
+
+def test_compiled_percentage_matches_the_previous_calculator():
+    properties = {
+        "rate": "2.5",
+        "fixed_amount": "0.3",
+        "free_units_per_events": 2,
+        "per_transaction_min_amount": "1",
+        "per_transaction_max_amount": "50",
+    }
+    calculator = get_charge_calculator(ChargeModel.PERCENTAGE, ("charge", uuid.uuid4()))
+    assert calculator is not None
+
+    for total_amount in UNITS:
+        for event_count in (0, 2, 3, 100):
+            assert calculator(
+                units=Decimal(event_count),
+                properties=properties,
+                total_amount=total_amount,
+                event_count=event_count,
+            ) == _percentage(Decimal(event_count), properties, total_amount, event_count)
+
+
+def test_editing_a_charge_invalidates_its_compiled_pricing():
+    charge = Charge(id=uuid.uuid4(), updated_at=datetime(2026, 1, 1, tzinfo=UTC))
+    before = {"tiers": [{"up_to": 10, "unit_price": "3"}]}
+    after = {"tiers": [{"up_to": 10, "unit_price": "5"}]}
+
+    def price(properties):
+        calculator = get_charge_calculator(ChargeModel.GRADUATED, charge_pricing_key(charge))
+        assert calculator is not None
+        return calculator(units=Decimal(2), properties=properties)
+
+    assert price(before) == Decimal(6)
+    # Same key: the compiled pricing is reused
+    assert price(after) == Decimal(6)
+
+    charge.updated_at = charge.updated_at + timedelta(seconds=1)
+    assert price(after) == Decimal(10)
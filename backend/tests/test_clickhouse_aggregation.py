@@ -0,0 +1,146 @@
+"""Tests for the ClickHouse aggregation queries."""
+
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.clickhouse import CREATE_EVENTS_RAW_TABLE, MIGRATE_EVENTS_RAW_TABLE
+from app.models.billable_metric import AggregationType
+from app.services import clickhouse_aggregation
+from app.services.clickhouse_aggregation import clickhouse_aggregate_for_customers
+
+
+class FakeClickHouseClient:
+    """Records queries and answers each with canned result rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def query(self, sql, parameters=None):
+        self.queries.append((sql, parameters))
+        return SimpleNamespace(result_rows=self.rows)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    def install(rows):
+        client = FakeClickHouseClient(rows)
+        monkeypatch.setattr(clickhouse_aggregation, "get_clickhouse_client", lambda: client)
+        monkeypatch.setattr(clickhouse_aggregation, "daily_rollup_ready", lambda: True)
+        return client
+
+    return install
+
+
+def test_customers_are_aggregated_in_one_grouped_query(fake_client):
+    client = fake_client([("cust-a", Decimal("12.5"), 3)])
+
+    results = clickhouse_aggregate_for_customers(
+        organization_id=uuid4(),
+        code="api_calls",
+        external_customer_ids=["cust-a", "cust-b"],
+        from_timestamp=datetime(2026, 1, 1, 6),
+        to_timestamp=datetime(2026, 1, 4, 6),
+        aggregation_type=AggregationType.SUM,
+    )
+
+    assert len(client.queries) == 1
+    sql, params = client.queries[0]
+    assert "external_customer_id IN {cust_ids:Array(String)}" in sql
+    assert "FROM events_daily_aggregates" in sql
+    assert sql.rstrip().endswith("GROUP BY external_customer_id")
+    assert params["cust_ids"] == ["cust-a", "cust-b"]
+    assert results["cust-a"].value == Decimal("12.5")
+    assert results["cust-a"].events_count == 3
+    assert results["cust-b"].value == Decimal(0)
+    assert results["cust-b"].events_count == 0
+
+
+def test_weighted_sum_is_partitioned_by_customer(fake_client):
+    client = fake_client([("cust-a", 2, 7.5)])
+
+    results = clickhouse_aggregate_for_customers(
+        organization_id=uuid4(),
+        code="seats",
+        external_customer_ids=["cust-a"],
+        from_timestamp=datetime(2026, 1, 1),
+        to_timestamp=datetime(2026, 2, 1),
+        aggregation_type=AggregationType.WEIGHTED_SUM,
+    )
+
+    sql, params = client.queries[0]
+    assert "PARTITION BY external_customer_id" in sql
+    assert params["total_seconds"] == 31 * 86400
+    assert results["cust-a"].value == Decimal("7.5")
+    assert results["cust-a"].events_count == 2
+
+
+def test_unique_count_counts_only_events_with_the_field(fake_client):
+    client = fake_client([("cust-a", 2, 5)])
+
+    results = clickhouse_aggregate_for_customers(
+        organization_id=uuid4(),
+        code="active_users",
+        external_customer_ids=["cust-a"],
+        from_timestamp=datetime(2026, 1, 1, 6),
+        to_timestamp=datetime(2026, 1, 4, 6),
+        aggregation_type=AggregationType.UNIQUE_COUNT,
+    )
+
+    sql, _params = client.queries[0]
+    assert "countState(value) AS values_count" in sql
+    assert "countMerge(values_count)" in sql
+    assert "countMerge(events_count)" not in sql
+    assert results["cust-a"].value == 2
+    assert results["cust-a"].events_count == 5
+
+
+def test_rollup_is_not_read_before_its_backfill_completes(fake_client, monkeypatch):
+    client = fake_client([("cust-a", 4, 4)])
+    monkeypatch.setattr(clickhouse_aggregation, "daily_rollup_ready", lambda: False)
+
+    clickhouse_aggregate_for_customers(
+        organization_id=uuid4(),
+        code="api_calls",
+        external_customer_ids=["cust-a"],
+        from_timestamp=datetime(2026, 1, 1),
+        to_timestamp=datetime(2026, 2, 1),
+        aggregation_type=AggregationType.COUNT,
+    )
+
+    sql, _params = client.queries[0]
+    assert "events_daily_aggregates" not in sql
+
+
+def test_filters_read_the_indexed_property_map(fake_client):
+    client = fake_client([("cust-a", Decimal(4), 2)])
+
+    results = clickhouse_aggregate_for_customers(
+        organization_id=uuid4(),
+        code="api_calls",
+        external_customer_ids=["cust-a"],
+        from_timestamp=datetime(2026, 1, 1),
+        to_timestamp=datetime(2026, 2, 1),
+        aggregation_type=AggregationType.SUM,
+        field_name="bytes",
+        filters={"region": "eu", "tier": "pro"},
+    )
+
+    sql, params = client.queries[0]
+    assert "FROM events_raw" in sql
+    assert "JSONExtract" not in sql
+    assert "mapContains(properties_map, {fk0:String})" in sql
+    assert "properties_map[{fk1:String}] = {fv1:String}" in sql
+    assert {k: params[k] for k in ("fk0", "fv0", "fk1", "fv1")} == {
+        "fk0": "region",
+        "fv0": "eu",
+        "fk1": "tier",
+        "fv1": "pro",
+    }
+    assert results["cust-a"].value == Decimal(4)
+    assert "INDEX idx_properties_keys mapKeys(properties_map)" in CREATE_EVENTS_RAW_TABLE
+    assert any("ADD COLUMN IF NOT EXISTS properties_map" in s for s in MIGRATE_EVENTS_RAW_TABLE)
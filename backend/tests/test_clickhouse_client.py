@@ -0,0 +1,25 @@
+"""Tests for the pooled ClickHouse client."""
+
+import time
+
+import pytest
+from urllib3.exceptions import EmptyPoolError
+
+from app.core import clickhouse
+from app.core.config import settings
+
+
+def test_exhausted_pool_times_out_instead_of_blocking(monkeypatch):
+    monkeypatch.setattr(settings, "CLICKHOUSE_MAX_CONNECTIONS", 1)
+    monkeypatch.setattr(settings, "CLICKHOUSE_POOL_TIMEOUT_SECONDS", 0.2)
+    manager = clickhouse._pool_manager()
+    pool = manager.connection_from_url("http://clickhouse.invalid:8123")
+    busy = pool._get_conn()
+
+    started = time.monotonic()
+    with pytest.raises(EmptyPoolError):
+        manager.request("GET", "http://clickhouse.invalid:8123/ping")
+    assert time.monotonic() - started < 5
+
+    pool._put_conn(busy)
+    manager.clear()
@@ -0,0 +1,68 @@
+"""Tests for writing events to ClickHouse."""
+
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from app.core.clickhouse import EVENTS_RAW_TABLE
+from app.schemas.event import EventCreate
+from app.services import clickhouse_event_store
+from app.services.clickhouse_event_store import COLUMNS, insert_event, insert_events_batch
+
+ORG_ID = uuid.uuid4()
+OTHER_ORG_ID = uuid.uuid4()
+
+
+class FakeClickHouseClient:
+    """Holds inserted events_raw rows, answering the existing-rows lookup."""
+
+    def __init__(self):
+        self.rows = []
+        self.tokens = []
+
+    def query(self, sql, parameters=None):
+        assert f"FROM {EVENTS_RAW_TABLE}" in sql
+        rows = [
+            (row["code"], row["external_customer_id"], row["transaction_id"])
+            for row in self.rows
+            if row["organization_id"] == parameters["organization_id"]
+            and row["code"] in parameters["codes"]
+            and row["external_customer_id"] in parameters["customers"]
+            and row["transaction_id"] in parameters["transaction_ids"]
+        ]
+        return SimpleNamespace(result_rows=rows)
+
+    def insert(self, table, data, column_names, settings=None):
+        assert table == EVENTS_RAW_TABLE
+        assert column_names == COLUMNS
+        self.tokens.append(settings["insert_deduplication_token"])
+        self.rows.extend(dict(zip(column_names, row, strict=True)) for row in data)
+
+
+def _event(transaction_id):
+    return EventCreate(
+        transaction_id=transaction_id,
+        external_customer_id="cust-1",
+        code="api_calls",
+        timestamp=datetime(2026, 1, 1, tzinfo=UTC),
+        properties={"bytes": 10},
+    )
+
+
+def test_duplicate_inserts_reach_events_raw_once(monkeypatch):
+    client = FakeClickHouseClient()
+    monkeypatch.setattr(clickhouse_event_store, "get_clickhouse_client", lambda: client)
+
+    insert_events_batch([_event("txn-1"), _event("txn-2"), _event("txn-1")], ORG_ID)
+    insert_events_batch([_event("txn-2"), _event("txn-3")], ORG_ID)
+    insert_event(_event("txn-3"), ORG_ID)
+    insert_event(_event("txn-1"), OTHER_ORG_ID)
+
+    assert [(row["organization_id"], row["transaction_id"]) for row in client.rows] == [
+        (str(ORG_ID), "txn-1"),
+        (str(ORG_ID), "txn-2"),
+        (str(ORG_ID), "txn-3"),
+        (str(OTHER_ORG_ID), "txn-1"),
+    ]
+    # Each block carries its own token, so a server-side retry of one is dropped
+    assert len(set(client.tokens)) == 3
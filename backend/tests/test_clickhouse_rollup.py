@@ -0,0 +1,122 @@
+"""Tests for the one-off ClickHouse daily rollup migration."""
+
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import clickhouse
+from app.core.clickhouse import (
+    EVENTS_DAILY_BACKFILL_TABLE,
+    EVENTS_DAILY_VIEW,
+    SCHEMA_MIGRATIONS_TABLE,
+    _ensure_daily_rollup,
+)
+
+CUTOFF = datetime(2026, 3, 1, 12, 0, 2, tzinfo=UTC)
+
+
+class FakeClickHouseClient:
+    """Tracks the migration row and view, answering the migration's queries."""
+
+    def __init__(self, migration=None, view_exists=False):
+        self.migration = migration
+        self.view_exists = view_exists
+        self.commands = []
+        self.recorded = []
+
+    def command(self, sql, parameters=None):
+        self.commands.append(sql)
+        if sql.startswith("EXISTS TABLE"):
+            return int(self.view_exists)
+        if sql.startswith("CREATE MATERIALIZED VIEW"):
+            self.view_exists = True
+        return None
+
+    def query(self, sql, parameters=None):
+        if SCHEMA_MIGRATIONS_TABLE in sql:
+            rows = [self.migration] if self.migration else []
+        elif "INTERVAL 2 SECOND" in sql:
+            rows = [(CUTOFF,)]
+        else:
+            rows = [(0,)]
+        return SimpleNamespace(result_rows=rows)
+
+    def insert(self, table, data, column_names):
+        assert table == SCHEMA_MIGRATIONS_TABLE
+        _name, cutoff, completed = data[0]
+        self.migration = (cutoff, completed)
+        self.recorded.append((cutoff, completed, self.view_exists))
+
+
+class FakeLock:
+    def __init__(self, available):
+        self.available = available
+        self.released = False
+
+    def acquire(self, blocking=True):
+        return self.available
+
+    def release(self):
+        self.released = True
+
+
+@pytest.fixture
+def lock(monkeypatch):
+    lock = FakeLock(available=True)
+    redis_client = SimpleNamespace(lock=lambda name, timeout: lock)
+    monkeypatch.setattr(clickhouse.redis.Redis, "from_url", lambda url: redis_client)
+    return lock
+
+
+def _backfill_inserts(client):
+    return [
+        sql
+        for sql in client.commands
+        if sql.startswith(f"INSERT INTO {EVENTS_DAILY_BACKFILL_TABLE}")
+    ]
+
+
+def test_backfill_records_cutoff_before_view_and_completes(lock):
+    client = FakeClickHouseClient()
+
+    _ensure_daily_rollup(client)
+
+    # Cutoff was recorded while the view did not exist yet, completion after
+    assert client.recorded == [(CUTOFF, 0, False), (CUTOFF, 1, True)]
+    assert (
+        "created_at < toDateTime64('2026-03-01 12:00:02', 3, 'UTC')" in _backfill_inserts(client)[0]
+    )
+    assert any("ATTACH PARTITION" in sql for sql in client.commands)
+    assert lock.released
+
+
+def test_interrupted_backfill_resumes_with_recorded_cutoff(lock):
+    recorded_cutoff = datetime(2026, 2, 1, 8, 30, 0, tzinfo=UTC)
+    client = FakeClickHouseClient(migration=(recorded_cutoff, 0), view_exists=True)
+
+    _ensure_daily_rollup(client)
+
+    assert f"TRUNCATE TABLE {EVENTS_DAILY_BACKFILL_TABLE}" in client.commands
+    assert "'2026-02-01 08:30:00'" in _backfill_inserts(client)[0]
+    assert client.recorded == [(recorded_cutoff, 1, True)]
+
+
+def test_backfill_is_skipped_while_another_process_holds_the_lock(lock):
+    lock.available = False
+    client = FakeClickHouseClient()
+
+    _ensure_daily_rollup(client)
+
+    assert not any(EVENTS_DAILY_VIEW in sql for sql in client.commands)
+    assert client.recorded == []
+
+
+def test_completed_backfill_is_not_repeated(lock):
+    lock.available = False
+    client = FakeClickHouseClient(migration=(CUTOFF, 1), view_exists=True)
+
+    _ensure_daily_rollup(client)
+
+    assert _backfill_inserts(client) == []
+    assert client.recorded == []
@@ -0,0 +1,153 @@
+"""Tests for sharded daily usage backfills."""
+
+from datetime import UTC, datetime, time, timedelta
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.main import app
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.charge import Charge, ChargeModel
+from app.models.customer import Customer
+from app.models.daily_usage import DailyUsage
+from app.models.daily_usage_backfill import (
+    BackfillStatus,
+    DailyUsageBackfill,
+    DailyUsageBackfillShard,
+)
+from app.models.event import Event
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.routers import daily_usage_backfills
+from app.services.daily_usage_backfill_service import DailyUsageBackfillService
+from app.services.daily_usage_service import DailyUsageService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+DAYS = [datetime.now(UTC).date() - timedelta(days=n) for n in (5, 4, 3)]
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    jobs = []
+
+    async def enqueue(shard_id, attempts):
+        jobs.append((UUID(shard_id), attempts))
+
+    monkeypatch.setattr(daily_usage_backfills, "enqueue_daily_usage_backfill_shard", enqueue)
+    return jobs
+
+
+@pytest.fixture
+def subscription(db):
+    metric = BillableMetric(
+        organization_id=DEFAULT_ORG_ID,
+        code="storage",
+        name="Storage",
+        aggregation_type=AggregationType.SUM.value,
+        field_name="gb",
+    )
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    plan = Plan(organization_id=DEFAULT_ORG_ID, code="basic", name="Basic", interval="monthly")
+    db.add_all([metric, customer, plan])
+    db.flush()
+    db.add_all(
+        [
+            Charge(
+                organization_id=DEFAULT_ORG_ID,
+                plan_id=plan.id,
+                billable_metric_id=metric.id,
+                charge_model=ChargeModel.STANDARD.value,
+                properties={"amount": "1"},
+            ),
+            Subscription(
+                organization_id=DEFAULT_ORG_ID,
+                external_id="sub-1",
+                customer_id=customer.id,
+                plan_id=plan.id,
+                status=SubscriptionStatus.ACTIVE.value,
+            ),
+        ]
+    )
+    db.add_all(
+        Event(
+            organization_id=DEFAULT_ORG_ID,
+            transaction_id=f"txn-{i}",
+            external_customer_id="cust-1",
+            code="storage",
+            timestamp=datetime.combine(day, time(12)),
+            properties={"gb": i + 1},
+        )
+        for i, day in enumerate(DAYS)
+    )
+    db.commit()
+
+
+def _backfill(db, backfill_id) -> DailyUsageBackfill:
+    db.expire_all()
+    return db.query(DailyUsageBackfill).filter(DailyUsageBackfill.id == backfill_id).one()
+
+
+def test_backfill_shards_run_once_and_failed_days_resume(db, subscription, enqueued, monkeypatch):
+    client = TestClient(app)
+    response = client.post(
+        "/v1/daily_usage_backfills/",
+        json={"start_date": DAYS[0].isoformat(), "end_date": DAYS[-1].isoformat()},
+    )
+    assert response.status_code == 201
+    backfill_id = UUID(response.json()["id"])
+    shards = db.query(DailyUsageBackfillShard).order_by(DailyUsageBackfillShard.usage_date).all()
+    assert enqueued == [(shard.id, 0) for shard in shards]
+    first, second, third = (shard.id for shard in shards)
+    service = DailyUsageBackfillService(db)
+
+    # A duplicate job for a completed shard writes nothing
+    assert service.run_shard(first) == 1
+    assert service.run_shard(first) == 0
+    assert db.query(DailyUsage).count() == 1
+    # Finishing an already finished shard is not counted again
+    assert not service.repo.finish_shard(service.repo.get_shard(first), record_count=5)
+    backfill = _backfill(db, backfill_id)
+    assert (backfill.completed_days, backfill.record_count) == (1, 1)
+
+    aggregate_organization = DailyUsageService.aggregate_organization
+
+    def fail_on_second_day(self, organization_id, target_date, *args, **kwargs):
+        if target_date == DAYS[1]:
+            raise RuntimeError("database unavailable")
+        return aggregate_organization(self, organization_id, target_date, *args, **kwargs)
+
+    monkeypatch.setattr(DailyUsageService, "aggregate_organization", fail_on_second_day)
+    assert service.run_shard(second) == 0
+    assert service.run_shard(third) == 1
+    backfill = _backfill(db, backfill_id)
+    assert backfill.status == BackfillStatus.FAILED.value
+    assert (backfill.completed_days, backfill.failed_days) == (2, 1)
+
+    monkeypatch.setattr(DailyUsageService, "aggregate_organization", aggregate_organization)
+    enqueued.clear()
+    response = client.post(f"/v1/daily_usage_backfills/{backfill_id}/resume")
+    assert response.status_code == 200
+    assert response.json()["status"] == BackfillStatus.PROCESSING.value
+    # Only the failed day is retried, under a new job id
+    assert enqueued == [(second, 1)]
+
+    assert service.run_shard(second) == 1
+    backfill = _backfill(db, backfill_id)
+    assert backfill.status == BackfillStatus.COMPLETED.value
+    assert (backfill.completed_days, backfill.failed_days, backfill.record_count) == (3, 0, 3)
+    assert sorted(Decimal(row.usage_value) for row in db.query(DailyUsage)) == [
+        Decimal(1),
+        Decimal(2),
+        Decimal(3),
+    ]
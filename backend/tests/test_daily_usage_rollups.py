@@ -0,0 +1,164 @@
+"""Tests for reading usage from daily rollups."""
+
+from datetime import UTC, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.customer import Customer
+from app.models.daily_usage import DailyUsage
+from app.models.event import Event
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.repositories.billable_metric_repository import BillableMetricRepository
+from app.schemas.billable_metric import BillableMetricUpdate
+from app.services.daily_usage_service import DailyUsageService
+from app.services.usage_aggregation import UsageAggregationService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+DAY = datetime.now(UTC).date() - timedelta(days=3)
+DAY_START = datetime.combine(DAY, time.min)
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def metric(db):
+    metric = BillableMetric(
+        organization_id=DEFAULT_ORG_ID,
+        code="storage",
+        name="Storage",
+        aggregation_type=AggregationType.SUM.value,
+        field_name="gb",
+    )
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    plan = Plan(organization_id=DEFAULT_ORG_ID, code="basic", name="Basic", interval="monthly")
+    db.add_all([metric, customer, plan])
+    db.flush()
+    subscription = Subscription(
+        organization_id=DEFAULT_ORG_ID,
+        external_id="sub-1",
+        customer_id=customer.id,
+        plan_id=plan.id,
+        status=SubscriptionStatus.ACTIVE.value,
+    )
+    db.add(subscription)
+    db.flush()
+    db.add(
+        DailyUsage(
+            subscription_id=subscription.id,
+            billable_metric_id=metric.id,
+            external_customer_id="cust-1",
+            usage_date=DAY,
+            usage_value=Decimal(10),
+            events_count=1,
+            sum_value=Decimal(10),
+            rollup_watermark=DailyUsageService(db).rollup_watermark(),
+        )
+    )
+    _add_event(db, "txn-rolled-up", {"gb": 10, "tb": 1}, created_ago=timedelta(hours=1))
+    db.commit()
+    return metric
+
+
+def _add_event(db, transaction_id, properties, created_ago):
+    created_at = DailyUsageService(db).database_now() - created_ago
+    db.add(
+        Event(
+            organization_id=DEFAULT_ORG_ID,
+            transaction_id=transaction_id,
+            external_customer_id="cust-1",
+            code="storage",
+            timestamp=DAY_START + timedelta(hours=12),
+            properties=properties,
+            created_at=created_at,
+        )
+    )
+
+
+def _usage(db):
+    return UsageAggregationService(db).aggregate_usage_with_count(
+        external_customer_id="cust-1",
+        code="storage",
+        from_timestamp=DAY_START,
+        to_timestamp=DAY_START + timedelta(days=2),
+        organization_id=DEFAULT_ORG_ID,
+    )
+
+
+def test_rolled_up_day_is_used(db, metric):
+    # Differ from the raw events so reading the rollup is observable
+    db.query(DailyUsage).update({DailyUsage.sum_value: Decimal(12)})
+    db.commit()
+
+    assert _usage(db).value == Decimal(12)
+
+
+def test_event_committed_during_the_rollup_counts_as_late(db, metric):
+    # Stamped before the rollup ran, but committed after it read the day
+    _add_event(db, "txn-in-flight", {"gb": 5}, created_ago=timedelta(seconds=10))
+    db.commit()
+
+    result = _usage(db)
+
+    assert result.value == Decimal(15)
+    assert result.events_count == 2
+
+
+def test_field_name_change_invalidates_rollups(db, metric):
+    BillableMetricRepository(db).update(
+        metric.id, BillableMetricUpdate(field_name="tb"), DEFAULT_ORG_ID
+    )
+
+    row = db.query(DailyUsage).one()
+    assert row.rollup_watermark is None
+    assert row.sum_value is None
+    assert _usage(db).value == Decimal(1)
+
+
+def test_late_events_recompute_their_day_once(db, metric, monkeypatch):
+    service = DailyUsageService(db)
+    aggregated = []
+    aggregate_day = UsageAggregationService.aggregate_day
+
+    def record_aggregate_day(self, **kwargs):
+        aggregated.append((kwargs["external_customer_id"], kwargs["usage_date"]))
+        return aggregate_day(self, **kwargs)
+
+    monkeypatch.setattr(UsageAggregationService, "aggregate_day", record_aggregate_day)
+
+    def refresh():
+        now = service.database_now()
+        return service.refresh_late_daily_usage(
+            since=now - timedelta(days=2), before_date=now.date()
+        )
+
+    # The rolled-up event was ingested on time
+    assert refresh() == 0
+    assert aggregated == []
+
+    _add_event(db, "txn-late-1", {"gb": 5}, created_ago=timedelta(0))
+    _add_event(db, "txn-late-2", {"gb": 2}, created_ago=timedelta(0))
+    db.commit()
+    # The next run, once the late events are past the watermark lag
+    later = service.database_now() + timedelta(
+        seconds=settings.BXB_DAILY_USAGE_WATERMARK_LAG_SECONDS + 1
+    )
+    monkeypatch.setattr(service, "database_now", lambda: later)
+
+    assert refresh() == 1
+    assert aggregated == [("cust-1", DAY)]
+    db.expire_all()
+    assert db.query(DailyUsage).one().sum_value == Decimal(17)
+
+    assert refresh() == 0
+    assert len(aggregated) == 1
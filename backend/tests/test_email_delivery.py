@@ -0,0 +1,48 @@
+"""Tests for claiming queued outbound emails."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from app.models.outbound_email import (
+    OutboundEmail,
+    OutboundEmailDocumentType,
+    OutboundEmailStatus,
+)
+from app.repositories.outbound_email_repository import OutboundEmailRepository
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+def _email(status: OutboundEmailStatus, attempts: int) -> OutboundEmail:
+    return OutboundEmail(
+        organization_id=DEFAULT_ORG_ID,
+        document_type=OutboundEmailDocumentType.INVOICE.value,
+        document_id=uuid.uuid4(),
+        status=status.value,
+        attempts=attempts,
+        next_attempt_at=datetime.now(UTC) - timedelta(minutes=1),
+    )
+
+
+def test_expired_leases_count_as_attempts_until_the_email_fails():
+    db = _TestSessionLocal()
+    try:
+        # A worker died while holding these; their leases have expired
+        lost = _email(OutboundEmailStatus.SENDING, attempts=2)
+        exhausted = _email(OutboundEmailStatus.SENDING, attempts=3)
+        db.add_all([lost, exhausted])
+        db.commit()
+
+        claimed = OutboundEmailRepository(db).claim_due(
+            limit=10, lease=timedelta(minutes=10), max_attempts=3
+        )
+
+        assert [email.id for email in claimed] == [lost.id]
+        db.refresh(lost)
+        db.refresh(exhausted)
+        assert lost.attempts == 3
+        assert lost.status == OutboundEmailStatus.SENDING.value
+        assert exhausted.status == OutboundEmailStatus.FAILED.value
+        assert exhausted.attempts == 3
+        assert exhausted.last_error
+    finally:
+        db.close()
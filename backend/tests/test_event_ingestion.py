@@ -0,0 +1,135 @@
+"""Tests for streamed and batched event ingestion."""
+
+import gzip
+import json
+import uuid
+from datetime import UTC, datetime
+
+from starlette.testclient import TestClient
+
+from app.main import app
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.event import Event
+from app.models.organization import Organization
+from app.repositories.event_repository import EventRepository
+from app.schemas.event import EventCreate
+from app.services.usage_aggregation import UsageAggregationService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+def _event(transaction_id: str) -> dict[str, str]:
+    return {
+        "transaction_id": transaction_id,
+        "external_customer_id": "cust-1",
+        "code": "api_calls",
+        "timestamp": "2026-01-15T10:00:00Z",
+    }
+
+
+def test_stream_reads_every_gzip_member():
+    """A body of concatenated gzip members is ingested in full."""
+    db = _TestSessionLocal()
+    db.add(
+        BillableMetric(
+            code="api_calls", name="API Calls", aggregation_type=AggregationType.COUNT.value
+        )
+    )
+    db.commit()
+    members = [
+        gzip.compress(
+            ("\n".join(json.dumps(_event(f"gz-{m}-{i}")) for i in range(2)) + "\n").encode()
+        )
+        for m in range(3)
+    ]
+
+    response = TestClient(app).post(
+        "/v1/events/stream",
+        content=b"".join(members),
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 201
+    assert response.json()["ingested"] == 6
+    assert db.query(Event).count() == 6
+
+
+def test_ingest_batch_counts_concurrently_inserted_event_as_duplicate(monkeypatch):
+    """An event inserted by another request after the duplicate check is not an error."""
+    db = _TestSessionLocal()
+    repo = EventRepository(db)
+    events = [EventCreate(**_event(f"race-{i}")) for i in range(3)]
+    insert_rows = EventRepository._insert_rows
+
+    def insert_after_concurrent_request(self, events_data, organization_id):
+        if len(events_data) > 1:
+            other = _TestSessionLocal()
+            other.add(
+                Event(
+                    transaction_id="race-1",
+                    external_customer_id="cust-1",
+                    code="api_calls",
+                    timestamp=datetime(2026, 1, 15, tzinfo=UTC),
+                    organization_id=DEFAULT_ORG_ID,
+                )
+            )
+            other.commit()
+            other.close()
+        insert_rows(self, events_data, organization_id)
+
+    monkeypatch.setattr(EventRepository, "_insert_rows", insert_after_concurrent_request)
+
+    assert repo.ingest_batch(events, DEFAULT_ORG_ID) == (2, 1)
+    assert db.query(Event).filter(Event.transaction_id.like("race-%")).count() == 3
+
+
+def test_transaction_ids_are_deduplicated_and_aggregated_per_organization():
+    """Organizations may reuse a transaction_id, and only aggregate their own events."""
+    db = _TestSessionLocal()
+    other_org_id = uuid.uuid4()
+    db.add(Organization(id=other_org_id, name="Other", slug="other"))
+    db.add(
+        BillableMetric(
+            code="api_calls", name="API Calls", aggregation_type=AggregationType.COUNT.value
+        )
+    )
+    db.commit()
+    repo = EventRepository(db)
+
+    _, ingested, duplicates = repo.create_batch(
+        [EventCreate(**_event("shared")), EventCreate(**_event("own"))], DEFAULT_ORG_ID
+    )
+    assert (ingested, duplicates) == (2, 0)
+    _, ingested, duplicates = repo.create_batch(
+        [EventCreate(**_event("shared")), EventCreate(**_event("shared"))], other_org_id
+    )
+    assert (ingested, duplicates) == (1, 1)
+
+    usage = UsageAggregationService(db)
+    period = (datetime(2026, 1, 1, tzinfo=UTC), datetime(2026, 2, 1, tzinfo=UTC))
+    assert usage.aggregate_usage("cust-1", "api_calls", *period, DEFAULT_ORG_ID) == 2
+    assert db.query(Event).filter(Event.organization_id == other_org_id).count() == 1
+
+
+def test_event_body_is_validated_from_the_raw_bytes():
+    """Invalid bodies keep FastAPI's 422 shape; valid ones are ingested."""
+    db = _TestSessionLocal()
+    db.add(
+        BillableMetric(
+            code="api_calls", name="API Calls", aggregation_type=AggregationType.COUNT.value
+        )
+    )
+    db.commit()
+    client = TestClient(app)
+
+    invalid = client.post("/v1/events/", json={**_event("bad"), "timestamp": "yesterday"})
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"][0]["loc"] == ["body", "timestamp"]
+    assert client.post("/v1/events/", content=b"{").status_code == 422
+
+    created = client.post(
+        "/v1/events/", json={**_event("good"), "properties": {"region": "eu", "n": 1.5}}
+    )
+    assert created.status_code == 201
+    assert created.json()["transaction_id"] == "good"
+    assert created.json()["properties"] == {"region": "eu", "n": 1.5}
+    assert EventCreate(**_event("x"), properties={"n": 1}).properties_json() == '{"n":1}'
@@ -0,0 +1,128 @@
+"""Tests for the queue-backed event ingest consumer."""
+
+from uuid import UUID
+
+import pytest
+
+from app.core.config import settings
+from app.models.event import Event
+from app.repositories.event_repository import EventRepository
+from app.schemas.event import EventCreate
+from app.services import event_queue
+from app.services.event_queue import DEAD_LETTER_KEY, EventQueueConsumer
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+class _Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [
+            await getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls
+        ]
+
+
+class FakeStreamClient:
+    """Single-consumer stand-in for the Redis stream commands the consumer uses."""
+
+    def __init__(self, entries, reclaimed=False):
+        self.entries = dict(entries)
+        self.reclaimed = reclaimed
+        self.deliveries = dict.fromkeys(self.entries, 1)
+        self.acked = []
+        self.dead_letters = []
+
+    def pipeline(self, transaction=False):
+        return _Pipeline(self)
+
+    async def xautoclaim(self, *args, **kwargs):
+        if not self.reclaimed:
+            return ["0-0", [], []]
+        for entry_id in self.entries:
+            self.deliveries[entry_id] += 1
+        return ["0-0", list(self.entries.items()), []]
+
+    async def xreadgroup(self, *args, **kwargs):
+        return [[event_queue.STREAM_KEY, list(self.entries.items())]] if self.entries else []
+
+    async def xpending_range(self, name, groupname, min, max, count):
+        return [{"message_id": min, "times_delivered": self.deliveries[min]}]
+
+    async def xack(self, name, groupname, *entry_ids):
+        self.acked.extend(entry_ids)
+
+    async def xdel(self, name, *entry_ids):
+        for entry_id in entry_ids:
+            self.entries.pop(entry_id, None)
+
+    async def xadd(self, name, fields):
+        assert name == DEAD_LETTER_KEY
+        self.dead_letters.append(fields)
+
+    async def enqueue_job(self, *args):
+        return None
+
+
+def _entry(entry_id: str, transaction_id: str):
+    event = EventCreate(
+        transaction_id=transaction_id,
+        external_customer_id="cust-1",
+        code="api_calls",
+        timestamp="2026-01-15T10:00:00Z",
+    )
+    return entry_id, {
+        b"organization_id": str(DEFAULT_ORG_ID).encode(),
+        b"event": event.model_dump_json().encode(),
+    }
+
+
+@pytest.fixture
+def poison_event(monkeypatch):
+    """Make writing the event with transaction_id ``poison`` fail."""
+    monkeypatch.setattr(event_queue, "SessionLocal", _TestSessionLocal)
+    ingest_batch = EventRepository.ingest_batch
+
+    def failing_ingest_batch(self, events, organization_id: UUID):
+        if any(e.transaction_id == "poison" for e in events):
+            raise RuntimeError("cannot write")
+        return ingest_batch(self, events, organization_id)
+
+    monkeypatch.setattr(EventRepository, "ingest_batch", failing_ingest_batch)
+
+
+async def test_failing_entry_does_not_block_the_batch(poison_event):
+    """Entries written one by one after a batch failure; the failing one stays pending."""
+    client = FakeStreamClient(
+        [_entry("1-0", "ok-1"), _entry("2-0", "poison"), _entry("3-0", "ok-2")]
+    )
+
+    assert await EventQueueConsumer(client, "test").process_once() == 2
+
+    assert client.acked == ["1-0", "3-0"]
+    assert list(client.entries) == ["2-0"]
+    db = _TestSessionLocal()
+    assert {e.transaction_id for e in db.query(Event)} == {"ok-1", "ok-2"}
+
+
+async def test_exhausted_entry_is_dead_lettered(poison_event, monkeypatch):
+    """A reclaimed entry past the delivery limit moves to the dead-letter stream."""
+    monkeypatch.setattr(settings, "BXB_EVENT_QUEUE_MAX_DELIVERIES", 3)
+    client = FakeStreamClient([_entry("2-0", "poison")], reclaimed=True)
+    client.deliveries["2-0"] = 3
+
+    assert await EventQueueConsumer(client, "test").process_once() == 0
+
+    assert client.acked == ["2-0"]
+    assert not client.entries
+    assert client.dead_letters[0]["entry_id"] == "2-0"
@@ -0,0 +1,50 @@
+"""Tests for compiled expressions and their ClickHouse translation."""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.core.clickhouse import get_clickhouse_client
+from app.core.config import settings
+from app.services.expression import compile_expression
+
+EXPRESSION = "price * quantity + fee - 0.5"
+
+# Values with more fractional digits than the old 12-digit scale kept
+ROWS = [
+    {"price": "0.0000000000001", "quantity": 3, "fee": "0"},
+    {"price": "123456.123456789012345", "quantity": "7", "fee": 0.25},
+    {"price": 19.99, "quantity": "0.333333333333333", "fee": "0.00000000000000000001"},
+]
+
+
+def test_sql_keeps_the_decimal_value_scale_and_leaves_division_to_python():
+    sql, params = compile_expression(EXPRESSION).to_clickhouse_sql()
+
+    assert params == {"expr0": "price", "expr1": "quantity", "expr2": "fee"}
+    assert "toDecimal256OrNull(" in sql
+    assert ", 26)" in sql
+    assert ", 12)" not in sql
+    # Products are not rescaled, so they stay exact
+    assert "toDecimal256((" not in sql
+    assert compile_expression("bytes / 1000").to_clickhouse_sql() is None
+    assert compile_expression("(a + b) * (c / 2)").to_clickhouse_sql() is None
+
+
+@pytest.mark.skipif(not settings.clickhouse_enabled, reason="needs CLICKHOUSE_URL")
+def test_clickhouse_sum_matches_python_evaluation():
+    compiled = compile_expression(EXPRESSION)
+    sql, params = compiled.to_clickhouse_sql()
+    client = get_clickhouse_client()
+    assert client is not None
+
+    row = client.query(
+        f"SELECT sum(v), count(), countIf(isNull(v)) FROM (SELECT {sql} AS v"
+        " FROM (SELECT arrayJoin({rows:Array(String)}) AS properties))",
+        parameters={**params, "rows": [json.dumps(r) for r in ROWS]},
+    ).result_rows[0]
+
+    total, events_count = compiled.sum_over(ROWS)
+    assert (int(row[1]), int(row[2])) == (events_count, 0)
+    assert Decimal(str(row[0])) == total
@@ -0,0 +1,90 @@
+"""Tests for the Redis idempotency store's key reservations."""
+
+from types import SimpleNamespace
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.core import idempotency
+from app.core.config import settings
+from app.main import app
+
+
+class FakeRedis:
+    """In-memory stand-in for the few Redis commands the store uses."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def eval(self, script, numkeys, key, token):
+        # Compare-and-delete, as in idempotency._RELEASE_SCRIPT
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(settings, "BXB_IDEMPOTENCY_BACKEND", "redis")
+    monkeypatch.setattr(settings, "BXB_IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(idempotency, "get_redis_client", lambda: fake)
+    return fake
+
+
+def _create_feature(client: TestClient, code: str, key: str):
+    return client.post(
+        "/v1/features/",
+        json={"code": code, "name": "Seats", "feature_type": "boolean"},
+        headers={"Idempotency-Key": key},
+    )
+
+
+def test_failed_request_releases_reservation(redis):
+    """A request that fails without a recorded response can be retried at once."""
+    client = TestClient(app)
+    assert _create_feature(client, "seats", "key-1").status_code == 201
+
+    # Fails with 409: the code exists. The key must not stay reserved.
+    response = _create_feature(client, "seats", "key-2")
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"]
+    assert not any(key.endswith(":key-2") for key in redis.data)
+
+    retry = _create_feature(client, "seats-2", "key-2")
+    assert retry.status_code == 201
+    assert "Idempotency-Replayed" not in retry.headers
+
+
+def test_recorded_response_is_replayed(redis):
+    """A completed request's response is kept and replayed for the same key."""
+    client = TestClient(app)
+    first = _create_feature(client, "storage", "key-3")
+    assert first.status_code == 201
+
+    replay = _create_feature(client, "storage", "key-3")
+    assert replay.status_code == 201
+    assert replay.headers["Idempotency-Replayed"] == "true"
+    assert replay.json()["id"] == first.json()["id"]
+
+
+async def test_release_keeps_another_requests_reservation(redis):
+    """Releasing only deletes the key while it holds this request's reservation."""
+    redis.data["bxb:key"] = idempotency._PENDING + b"other-request"
+    request = SimpleNamespace(
+        state=SimpleNamespace(idempotency_reservation=("bxb:key", idempotency._PENDING + b"mine"))
+    )
+
+    await idempotency.release_idempotency_reservation(request)  # type: ignore[arg-type]
+
+    assert redis.data["bxb:key"] == idempotency._PENDING + b"other-request"
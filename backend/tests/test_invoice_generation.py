@@ -0,0 +1,224 @@
+"""Tests for generating subscription invoices."""
+
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.applied_coupon import AppliedCoupon, AppliedCouponStatus
+from app.models.applied_tax import AppliedTax
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.charge import Charge, ChargeModel
+from app.models.coupon import Coupon, CouponFrequency, CouponType
+from app.models.customer import Customer
+from app.models.event import Event
+from app.models.fee import Fee
+from app.models.invoice import Invoice
+from app.models.organization import Organization
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.models.tax import Tax
+from app.services.coupon_service import CouponApplicationService
+from app.services.invoice_generation import InvoiceGenerationService
+from app.services.invoice_numbering import clear_invoice_number_blocks
+from app.services.tax_service import TaxCalculationService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+PERIOD_START = datetime(2026, 1, 1, tzinfo=UTC)
+PERIOD_END = datetime(2026, 2, 1, tzinfo=UTC)
+
+
+@dataclass
+class Billing:
+    organization_id: uuid.UUID
+    customer: Customer
+    plan: Plan
+    charge: Charge
+    subscription: Subscription
+
+
+@pytest.fixture
+def db():
+    clear_invoice_number_blocks()
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _billing(db, organization_id=DEFAULT_ORG_ID, events=3) -> Billing:
+    """A customer subscribed to a plan charging 100 per API call."""
+    suffix = uuid.uuid4().hex[:8]
+    metric = BillableMetric(
+        organization_id=organization_id,
+        code=f"api_calls_{suffix}",
+        name="API Calls",
+        aggregation_type=AggregationType.COUNT.value,
+    )
+    customer = Customer(
+        organization_id=organization_id, external_id=f"cust-{suffix}", name="Customer"
+    )
+    plan = Plan(
+        organization_id=organization_id, code=f"plan-{suffix}", name="Plan", interval="monthly"
+    )
+    db.add_all([metric, customer, plan])
+    db.flush()
+    charge = Charge(
+        organization_id=organization_id,
+        plan_id=plan.id,
+        billable_metric_id=metric.id,
+        charge_model=ChargeModel.STANDARD.value,
+        properties={"amount": "100"},
+    )
+    subscription = Subscription(
+        organization_id=organization_id,
+        external_id=f"sub-{suffix}",
+        customer_id=customer.id,
+        plan_id=plan.id,
+        status=SubscriptionStatus.ACTIVE.value,
+    )
+    db.add_all([charge, subscription])
+    db.add_all(
+        Event(
+            organization_id=organization_id,
+            transaction_id=f"txn-{suffix}-{i}",
+            external_customer_id=customer.external_id,
+            code=metric.code,
+            timestamp=PERIOD_START + timedelta(days=i + 1),
+            properties={},
+        )
+        for i in range(events)
+    )
+    db.commit()
+    return Billing(organization_id, customer, plan, charge, subscription)
+
+
+def _tax(db, code, rate, organization_id=DEFAULT_ORG_ID, org_default=False) -> Tax:
+    tax = Tax(
+        organization_id=organization_id,
+        code=code,
+        name=code,
+        rate=Decimal(rate),
+        applied_to_organization=org_default,
+    )
+    db.add(tax)
+    db.flush()
+    return tax
+
+
+def _apply_tax(db, tax, taxable_type, taxable_id) -> None:
+    db.add(AppliedTax(tax_id=tax.id, taxable_type=taxable_type, taxable_id=taxable_id))
+    db.flush()
+
+
+def _apply_coupon(db, billing, amount_cents) -> AppliedCoupon:
+    coupon = Coupon(
+        organization_id=billing.organization_id,
+        code=f"coupon-{uuid.uuid4().hex[:8]}",
+        name="Coupon",
+        coupon_type=CouponType.FIXED_AMOUNT.value,
+        amount_cents=Decimal(amount_cents),
+        amount_currency="USD",
+        frequency=CouponFrequency.ONCE.value,
+    )
+    db.add(coupon)
+    db.flush()
+    applied = AppliedCoupon(
+        organization_id=billing.organization_id,
+        coupon_id=coupon.id,
+        customer_id=billing.customer.id,
+        amount_cents=Decimal(amount_cents),
+        amount_currency="USD",
+        frequency=CouponFrequency.ONCE.value,
+    )
+    db.add(applied)
+    db.commit()
+    return applied
+
+
+def _generate(db, billing) -> Invoice:
+    return InvoiceGenerationService(db).generate_invoice(
+        subscription_id=billing.subscription.id,
+        billing_period_start=PERIOD_START,
+        billing_period_end=PERIOD_END,
+        external_customer_id=str(billing.customer.external_id),
+    )
+
+
+def test_invoice_is_written_with_its_fees_taxes_and_coupon_usage(db):
+    billing = _billing(db)
+    _apply_tax(db, _tax(db, "vat", "0.1"), "customer", billing.customer.id)
+    applied_coupon = _apply_coupon(db, billing, 50)
+
+    invoice = _generate(db, billing)
+
+    assert invoice.subtotal_cents == Decimal(300)
+    assert invoice.coupons_amount_cents == Decimal(50)
+    assert invoice.tax_amount_cents == Decimal(30)
+    assert invoice.total_cents == Decimal(280)
+    fee = db.query(Fee).filter(Fee.invoice_id == invoice.id).one()
+    assert fee.taxes_amount_cents == Decimal(30)
+    assert fee.total_amount_cents == Decimal(330)
+    applied_tax = db.query(AppliedTax).filter(AppliedTax.taxable_type == "fee").one()
+    assert applied_tax.taxable_id == fee.id
+    assert applied_tax.tax_amount_cents == Decimal(30)
+    db.refresh(applied_coupon)
+    assert applied_coupon.status == AppliedCouponStatus.TERMINATED.value
+
+
+def test_failure_while_writing_leaves_no_invoice_behind(db, monkeypatch):
+    billing = _billing(db)
+    _apply_tax(db, _tax(db, "vat", "0.1"), "customer", billing.customer.id)
+    applied_coupon = _apply_coupon(db, billing, 50)
+    stage_consumption = CouponApplicationService.stage_applied_coupon_consumption
+
+    def stage_then_fail(self, applied_coupon_ids):
+        stage_consumption(self, applied_coupon_ids)
+        self.db.flush()
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(
+        CouponApplicationService, "stage_applied_coupon_consumption", stage_then_fail
+    )
+
+    with pytest.raises(RuntimeError):
+        _generate(db, billing)
+
+    assert db.query(Invoice).count() == 0
+    assert db.query(Fee).count() == 0
+    assert db.query(AppliedTax).filter(AppliedTax.taxable_type == "fee").count() == 0
+    db.refresh(applied_coupon)
+    assert applied_coupon.status == AppliedCouponStatus.ACTIVE.value
+
+
+def test_taxes_resolve_charge_then_plan_then_customer_then_subscription_org(db):
+    other_org_id = uuid.uuid4()
+    db.add(Organization(id=other_org_id, name="Other", slug="other"))
+    billing = _billing(db, other_org_id)
+    _tax(db, "default-org", "0.5", DEFAULT_ORG_ID, org_default=True)
+    org_tax = _tax(db, "other-org", "0.2", other_org_id, org_default=True)
+    db.commit()
+
+    # Only the subscription organization's defaults apply
+    assert _generate(db, billing).tax_amount_cents == Decimal(60)
+
+    def resolve():
+        resolver = TaxCalculationService(db).build_tax_resolver(
+            customer_id=billing.customer.id,
+            plan_id=billing.plan.id,
+            charge_ids=[billing.charge.id],
+            organization_id=other_org_id,
+        )
+        return [tax.code for tax in resolver.get_applicable_taxes(billing.charge.id)]
+
+    assert resolve() == [org_tax.code]
+    for level, taxable_id in (
+        ("customer", billing.customer.id),
+        ("plan", billing.plan.id),
+        ("charge", billing.charge.id),
+    ):
+        _apply_tax(db, _tax(db, level, "0.1", other_org_id), level, taxable_id)
+        assert resolve() == [level]
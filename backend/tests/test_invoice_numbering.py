@@ -0,0 +1,83 @@
+"""Tests for per-organization invoice numbering."""
+
+import uuid
+from datetime import UTC, datetime
+
+from app.models.customer import Customer
+from app.models.invoice import Invoice
+from app.models.organization import Organization
+from app.repositories.invoice_repository import InvoiceRepository
+from app.schemas.invoice import InvoiceCreate
+from app.services.invoice_numbering import InvoiceNumberAllocator, clear_invoice_number_blocks
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+def test_each_organization_numbers_its_invoices_independently():
+    clear_invoice_number_blocks()
+    db = _TestSessionLocal()
+    try:
+        other_org_id = uuid.uuid4()
+        db.add(Organization(id=other_org_id, name="Other", slug="other"))
+        customers = {
+            org_id: Customer(organization_id=org_id, external_id=f"cust-{org_id}", name="C")
+            for org_id in (DEFAULT_ORG_ID, other_org_id)
+        }
+        db.add_all(customers.values())
+        db.commit()
+
+        repo = InvoiceRepository(db)
+        now = datetime.now(UTC)
+        invoices = {
+            org_id: [
+                repo.create(
+                    InvoiceCreate(
+                        customer_id=customer.id,
+                        billing_period_start=now,
+                        billing_period_end=now,
+                    ),
+                    org_id,
+                )
+                for _ in range(2)
+            ]
+            for org_id, customer in customers.items()
+        }
+
+        prefix = str(invoices[DEFAULT_ORG_ID][0].invoice_number).removesuffix("0001")
+        assert prefix.startswith("INV-")
+        for org_invoices in invoices.values():
+            assert [i.invoice_number for i in org_invoices] == [f"{prefix}0001", f"{prefix}0002"]
+
+        found = repo.get_by_invoice_number(f"{prefix}0001", other_org_id)
+        assert found is not None
+        assert found.id == invoices[other_org_id][0].id
+        assert repo.get_by_invoice_number(f"{prefix}0003", DEFAULT_ORG_ID) is None
+    finally:
+        db.close()
+
+
+def test_counter_continues_after_the_numerically_largest_invoice():
+    clear_invoice_number_blocks()
+    db = _TestSessionLocal()
+    try:
+        customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="C")
+        db.add(customer)
+        db.flush()
+        prefix = f"INV-{datetime.now().strftime('%Y%m%d')}-"
+        now = datetime.now(UTC)
+        db.add_all(
+            Invoice(
+                organization_id=DEFAULT_ORG_ID,
+                customer_id=customer.id,
+                invoice_number=f"{prefix}{suffix}",
+                billing_period_start=now,
+                billing_period_end=now,
+            )
+            for suffix in ("0999", "9999", "10000", "draft")
+        )
+        db.commit()
+
+        allocator = InvoiceNumberAllocator(db)
+        assert allocator.next_invoice_number(DEFAULT_ORG_ID) == f"{prefix}10001"
+        assert allocator.next_invoice_number(DEFAULT_ORG_ID) == f"{prefix}10002"
+    finally:
+        db.close()
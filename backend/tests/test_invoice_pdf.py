@@ -0,0 +1,94 @@
+"""Tests for invoice PDFs stored by content key."""
+
+from datetime import UTC, datetime
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.customer import Customer
+from app.models.invoice import Invoice, InvoiceStatus
+from app.services.invoice_pdf_service import InvoicePdfService, invoice_pdf_path
+from app.services.pdf_service import PdfService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def renders(monkeypatch, tmp_path):
+    """Store PDFs under a temporary data path and render them as stand-in bytes."""
+    rendered = []
+
+    def render(self, document):
+        rendered.append(document.content_key)
+        return f"%PDF {document.content_key}".encode()
+
+    monkeypatch.setattr(settings, "BXB_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr(PdfService, "render", render)
+    return rendered
+
+
+@pytest.fixture
+def invoice(db):
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    db.add(customer)
+    db.flush()
+    now = datetime.now(UTC)
+    invoice = Invoice(
+        organization_id=DEFAULT_ORG_ID,
+        customer_id=customer.id,
+        invoice_number="INV-PDF-0001",
+        status=InvoiceStatus.DRAFT.value,
+        billing_period_start=now,
+        billing_period_end=now,
+        subtotal_cents=100,
+        total_cents=100,
+    )
+    db.add(invoice)
+    db.commit()
+    return invoice
+
+
+def test_pdf_is_rendered_once_per_invoice_version(db, invoice, renders):
+    client = TestClient(app)
+    url = f"/v1/invoices/{invoice.id}/download_pdf"
+
+    assert InvoicePdfService(db).render(invoice.id) is None
+    assert client.post(url).status_code == 400
+
+    invoice.status = InvoiceStatus.FINALIZED.value
+    db.commit()
+    first = client.post(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    content_key = etag.strip('"')
+    assert first.content == f"%PDF {content_key}".encode()
+    assert invoice_pdf_path(content_key).exists()
+
+    # Served from storage, and revalidated without a body
+    assert client.post(url).headers["etag"] == etag
+    not_modified = client.post(url, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert len(renders) == 1
+
+    invoice.status = InvoiceStatus.PAID.value
+    db.commit()
+    changed = client.post(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert renders == [content_key, changed.headers["etag"].strip('"')]
+    # Rendering ahead of reads reuses the stored version
+    pdf = InvoicePdfService(db).render(invoice.id)
+    assert pdf is not None
+    assert pdf.etag == changed.headers["etag"]
+    assert len(renders) == 2
@@ -0,0 +1,171 @@
+"""Tests for applying stored payment webhook events."""
+
+import json
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models.customer import Customer
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_settlement import InvoiceSettlement
+from app.models.payment import Payment, PaymentProvider, PaymentStatus
+from app.models.payment_webhook_event import PaymentWebhookEvent, PaymentWebhookEventStatus
+from app.services import payment_webhook_inbox
+from app.services.payment_webhook_inbox import (
+    PaymentWebhookInbox,
+    process_pending_payment_webhook_events,
+)
+from app.services.webhook_service import WebhookService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def payment(db):
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    db.add(customer)
+    db.flush()
+    now = datetime.now(UTC)
+    invoice = Invoice(
+        organization_id=DEFAULT_ORG_ID,
+        invoice_number="INV-1",
+        customer_id=customer.id,
+        status=InvoiceStatus.FINALIZED.value,
+        billing_period_start=now,
+        billing_period_end=now,
+        total_cents=Decimal(1000),
+    )
+    db.add(invoice)
+    db.flush()
+    payment = Payment(
+        organization_id=DEFAULT_ORG_ID,
+        invoice_id=invoice.id,
+        customer_id=customer.id,
+        amount_cents=Decimal(1000),
+        provider=PaymentProvider.UCP.value,
+        provider_checkout_id="co_1",
+    )
+    db.add(payment)
+    db.commit()
+    return payment
+
+
+def _receive(db, event_id, status, checkout_id="co_1"):
+    payload = {
+        "id": event_id,
+        "type": f"checkout.{status}",
+        "data": {"checkout_id": checkout_id, "order_id": f"ord_{event_id}", "status": status},
+    }
+    return PaymentWebhookInbox(db).receive(
+        PaymentProvider.UCP, json.dumps(payload).encode(), payload
+    )
+
+
+def _event_statuses(db):
+    db.expire_all()
+    events = db.query(PaymentWebhookEvent).order_by(PaymentWebhookEvent.event_id)
+    return [(event.event_id, event.status) for event in events]
+
+
+def test_events_are_ordered_by_the_local_payment(db, payment):
+    received = _receive(db, "evt-1", "completed")
+    # Carries another provider reference, but names our payment
+    payload = {
+        "id": "evt-2",
+        "data": {"id": "ord_2", "status": "failed", "metadata": {"payment_id": str(payment.id)}},
+    }
+    repeated = PaymentWebhookInbox(db).receive(
+        PaymentProvider.UCP, json.dumps(payload).encode(), payload
+    )
+
+    assert received.ordering_key == f"payment:{payment.id}"
+    assert repeated.ordering_key == received.ordering_key
+
+
+def test_failed_event_leaves_no_partial_changes_and_blocks_later_events(db, payment, monkeypatch):
+    key = _receive(db, "evt-1", "completed").ordering_key
+    _receive(db, "evt-2", "canceled")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("webhook delivery unavailable")
+
+    monkeypatch.setattr(WebhookService, "stage_webhook", fail)
+    assert PaymentWebhookInbox(db).process_ordering_key(key) == 0
+
+    db.refresh(payment)
+    assert payment.status == PaymentStatus.PENDING.value
+    assert db.query(InvoiceSettlement).count() == 0
+    assert _event_statuses(db) == [
+        ("evt-1", PaymentWebhookEventStatus.PENDING.value),
+        ("evt-2", PaymentWebhookEventStatus.PENDING.value),
+    ]
+
+    monkeypatch.undo()
+    db.query(PaymentWebhookEvent).update({PaymentWebhookEvent.next_attempt_at: datetime.now(UTC)})
+    db.commit()
+    assert PaymentWebhookInbox(db).process_ordering_key(key) == 2
+
+    db.refresh(payment)
+    # The cancellation arrived after the success, and is applied after it
+    assert payment.status == PaymentStatus.CANCELED.value
+    assert db.query(InvoiceSettlement).count() == 1
+    invoice = db.get(Invoice, payment.invoice_id)
+    assert invoice.status == InvoiceStatus.PAID.value
+
+
+def test_succeeded_payment_without_settlement_is_settled(db, payment):
+    payment.status = PaymentStatus.SUCCEEDED.value
+    db.commit()
+    key = _receive(db, "evt-1", "completed").ordering_key
+
+    assert PaymentWebhookInbox(db).process_ordering_key(key) == 1
+
+    assert _event_statuses(db) == [("evt-1", PaymentWebhookEventStatus.PROCESSED.value)]
+    settlement = db.query(InvoiceSettlement).one()
+    assert settlement.source_id == payment.id
+    assert db.get(Invoice, payment.invoice_id).status == InvoiceStatus.PAID.value
+
+
+def test_payment_waiting_for_a_retry_does_not_hold_up_other_payments(db, payment, monkeypatch):
+    other = Payment(
+        organization_id=DEFAULT_ORG_ID,
+        invoice_id=payment.invoice_id,
+        customer_id=payment.customer_id,
+        amount_cents=Decimal(1000),
+        provider=PaymentProvider.UCP.value,
+        provider_checkout_id="co_2",
+    )
+    db.add(other)
+    db.commit()
+    retrying = _receive(db, "evt-1", "completed")
+    _receive(db, "evt-2", "canceled")
+    _receive(db, "evt-3", "failed", checkout_id="co_2")
+    # The first payment's earliest event failed and waits for its retry
+    db.query(PaymentWebhookEvent).filter(PaymentWebhookEvent.event_id == "evt-1").update(
+        {PaymentWebhookEvent.next_attempt_at: datetime.now(UTC) + timedelta(minutes=2)}
+    )
+    db.commit()
+    monkeypatch.setattr(payment_webhook_inbox, "SessionLocal", _TestSessionLocal)
+    monkeypatch.setattr(payment_webhook_inbox, "_ORDERING_KEY_BATCH_SIZE", 1)
+    monkeypatch.setattr(settings, "BXB_PAYMENT_WEBHOOK_WORKERS", 1)
+
+    assert process_pending_payment_webhook_events() == 1
+
+    assert _event_statuses(db) == [
+        ("evt-1", PaymentWebhookEventStatus.PENDING.value),
+        ("evt-2", PaymentWebhookEventStatus.PENDING.value),
+        ("evt-3", PaymentWebhookEventStatus.PROCESSED.value),
+    ]
+    db.refresh(other)
+    assert other.status == PaymentStatus.FAILED.value
+    assert retrying.ordering_key not in PaymentWebhookInbox(db).repo.get_pending_ordering_keys(10)
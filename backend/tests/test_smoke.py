@@ -145,6 +145,38 @@ def test_ingest_event(client: TestClient, billable_metric):
     assert "id" in data
 
 
+def test_ingest_event_stream(client: TestClient, billable_metric):
+    """POST /v1/events/stream ingests gzip NDJSON and returns a summary."""
+    import gzip
+    import json
+
+    lines = [
+        json.dumps(
+            {
+                "transaction_id": f"smoke-stream-{i}",
+                "external_customer_id": "smoke-cust-001",
+                "code": "api_calls",
+                "timestamp": "2026-01-15T10:00:00Z",
+            }
+        )
+        for i in range(3)
+    ]
+    lines.append("not json")
+    body = gzip.compress(("\n".join(lines) + "\n").encode())
+
+    response = client.post(
+        "/v1/events/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["received"] == 4
+    assert data["ingested"] == 3
+    assert data["rejected"] == 1
+    assert data["rejections"][0]["line"] == 4
+
+
 def test_create_invoice(client: TestClient):
     """POST /v1/invoices/one_off creates a one-off invoice."""
     customer = client.post(
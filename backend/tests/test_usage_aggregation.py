@@ -0,0 +1,307 @@
+"""Tests for usage aggregation across metrics and customers."""
+
+import threading
+import time
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.charge import Charge, ChargeModel
+from app.models.customer import Customer
+from app.models.daily_usage import DailyUsage
+from app.models.event import Event
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.services import clickhouse_aggregation
+from app.services.daily_usage_service import DailyUsageService
+from app.services.usage_aggregation import UsageAggregationService, UsageResult
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+PERIOD_START = datetime(2026, 1, 1, tzinfo=UTC)
+PERIOD_END = datetime(2026, 2, 1, tzinfo=UTC)
+DAY = date(2026, 1, 10)
+DAY_START = datetime(2026, 1, 10)
+CUSTOMERS = ["cust-a", "cust-b", "cust-c"]
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def metrics(db):
+    db.add_all(
+        [
+            BillableMetric(
+                organization_id=DEFAULT_ORG_ID,
+                code="bytes",
+                name="Bytes",
+                aggregation_type=AggregationType.SUM.value,
+                field_name="bytes",
+            ),
+            BillableMetric(
+                organization_id=DEFAULT_ORG_ID,
+                code="api_calls",
+                name="API Calls",
+                aggregation_type=AggregationType.COUNT.value,
+            ),
+        ]
+    )
+    for i, (code, region, amount) in enumerate(
+        [
+            ("bytes", "eu", 10),
+            ("bytes", "eu", 5),
+            ("bytes", "us", 7),
+            ("api_calls", "eu", None),
+            ("api_calls", "us", None),
+            ("api_calls", "us", None),
+        ]
+    ):
+        properties: dict[str, object] = {"region": region}
+        if amount is not None:
+            properties["bytes"] = amount
+        db.add(
+            Event(
+                organization_id=DEFAULT_ORG_ID,
+                transaction_id=f"txn-{i}",
+                external_customer_id="cust-1",
+                code=code,
+                timestamp=PERIOD_START + timedelta(days=i + 1),
+                properties=properties,
+            )
+        )
+    db.commit()
+
+
+REQUESTS: list[tuple[str, dict[str, str] | None]] = [
+    ("bytes", None),
+    ("bytes", {"region": "eu"}),
+    ("api_calls", None),
+    ("api_calls", {"region": "us"}),
+    ("bytes", {"region": "us"}),
+    ("api_calls", {"region": "eu"}),
+]
+
+
+def _aggregate_each(service):
+    return [
+        service.aggregate_usage_with_count(
+            external_customer_id="cust-1",
+            code=code,
+            from_timestamp=PERIOD_START,
+            to_timestamp=PERIOD_END,
+            organization_id=DEFAULT_ORG_ID,
+            filters=filters,
+        )
+        for code, filters in REQUESTS
+    ]
+
+
+def _aggregate_many(service):
+    return service.aggregate_usage_many(
+        external_customer_id="cust-1",
+        requests=REQUESTS,
+        from_timestamp=PERIOD_START,
+        to_timestamp=PERIOD_END,
+        organization_id=DEFAULT_ORG_ID,
+    )
+
+
+def test_concurrent_aggregation_returns_sequential_results_in_request_order(
+    db, metrics, monkeypatch
+):
+    service = UsageAggregationService(db)
+    sequential = _aggregate_each(service)
+    assert [r.value for r in sequential] == [
+        Decimal(22),
+        Decimal(15),
+        Decimal(3),
+        Decimal(2),
+        Decimal(7),
+        Decimal(1),
+    ]
+    assert [
+        service.aggregate_usage(
+            external_customer_id="cust-1",
+            code=code,
+            from_timestamp=PERIOD_START,
+            to_timestamp=PERIOD_END,
+            organization_id=DEFAULT_ORG_ID,
+            filters=filters,
+        )
+        for code, filters in REQUESTS
+    ] == [r.value for r in sequential]
+    assert _aggregate_many(service) == sequential
+
+    # Served by a stand-in ClickHouse whose earlier requests finish last
+    expected = {
+        (code, tuple(sorted((filters or {}).items()))): result
+        for (code, filters), result in zip(REQUESTS, sequential, strict=True)
+    }
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def clickhouse_aggregate(code, filters, **_kwargs) -> UsageResult:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        key = (code, tuple(sorted((filters or {}).items())))
+        time.sleep(0.01 * (len(REQUESTS) - list(expected).index(key)))
+        with lock:
+            in_flight -= 1
+        return expected[key]
+
+    monkeypatch.setattr(settings, "CLICKHOUSE_URL", "http://clickhouse:8123")
+    monkeypatch.setattr(settings, "BXB_USAGE_AGGREGATION_CONCURRENCY", 3)
+    monkeypatch.setattr(clickhouse_aggregation, "clickhouse_aggregate", clickhouse_aggregate)
+
+    assert _aggregate_many(service) == sequential
+    assert peak == 3
+
+
+@pytest.fixture
+def daily_metrics(db):
+    metrics = [
+        BillableMetric(
+            organization_id=DEFAULT_ORG_ID,
+            code=code,
+            name=code,
+            aggregation_type=aggregation_type.value,
+            field_name=field_name,
+        )
+        for code, aggregation_type, field_name in [
+            ("calls", AggregationType.COUNT, None),
+            ("gb", AggregationType.SUM, "gb"),
+            ("peak_gb", AggregationType.MAX, "gb"),
+            ("users", AggregationType.UNIQUE_COUNT, "user"),
+            ("latest_gb", AggregationType.LATEST, "gb"),
+        ]
+    ]
+    plan = Plan(organization_id=DEFAULT_ORG_ID, code="basic", name="Basic", interval="monthly")
+    db.add_all([*metrics, plan])
+    db.flush()
+    db.add_all(
+        Charge(
+            organization_id=DEFAULT_ORG_ID,
+            plan_id=plan.id,
+            billable_metric_id=metric.id,
+            charge_model=ChargeModel.STANDARD.value,
+            properties={"amount": "1"},
+        )
+        for metric in metrics
+    )
+    for external_id in CUSTOMERS:
+        customer = Customer(organization_id=DEFAULT_ORG_ID, external_id=external_id, name="C")
+        db.add(customer)
+        db.flush()
+        db.add(
+            Subscription(
+                organization_id=DEFAULT_ORG_ID,
+                external_id=f"sub-{external_id}",
+                customer_id=customer.id,
+                plan_id=plan.id,
+                status=SubscriptionStatus.ACTIVE.value,
+            )
+        )
+
+    for i, (external_id, hour, gb, user) in enumerate(
+        [
+            ("cust-a", 1, "2.5", "u1"),
+            ("cust-a", 5, "7", "u2"),
+            ("cust-a", 9, "1", "u1"),
+            ("cust-b", 3, "4", "u3"),
+            # Outside the day
+            ("cust-a", 24, "100", "u9"),
+            ("cust-b", -1, "100", "u9"),
+        ]
+    ):
+        for code in ("calls", "gb", "peak_gb", "users", "latest_gb"):
+            _add_day_event(db, f"txn-{code}-{i}", external_id, code, hour, gb, user)
+    db.commit()
+    return metrics
+
+
+def _add_day_event(db, transaction_id, external_id, code, hour, gb, user):
+    db.add(
+        Event(
+            organization_id=DEFAULT_ORG_ID,
+            transaction_id=transaction_id,
+            external_customer_id=external_id,
+            code=code,
+            timestamp=DAY_START + timedelta(hours=hour),
+            properties={"gb": gb, "user": user},
+        )
+    )
+
+
+def _comparable(aggregated):
+    result, rollup = aggregated
+    if rollup is None:
+        return result, None
+    return result, (
+        rollup.events_count,
+        rollup.sum_value,
+        rollup.max_value,
+        sorted(rollup.unique_values),
+    )
+
+
+def test_set_based_day_matches_per_customer_aggregation(db, daily_metrics):
+    service = UsageAggregationService(db)
+    targets = {(str(m.code), external_id) for m in daily_metrics for external_id in CUSTOMERS}
+
+    results = service.aggregate_day_for_customers(daily_metrics, targets, DAY, DEFAULT_ORG_ID)
+
+    assert set(results) == targets
+    for metric in daily_metrics:
+        for external_id in CUSTOMERS:
+            expected = service.aggregate_day(
+                external_customer_id=external_id,
+                metric=metric,
+                usage_date=DAY,
+                organization_id=DEFAULT_ORG_ID,
+            )
+            assert _comparable(results[(str(metric.code), external_id)]) == _comparable(expected), (
+                metric.code,
+                external_id,
+            )
+    assert results[("gb", "cust-a")][0].value == Decimal("10.5")
+    assert results[("users", "cust-a")][0].value == Decimal(2)
+    assert results[("calls", "cust-c")][0].events_count == 0
+
+
+def test_rerunning_the_daily_rollup_updates_records_in_place(db, daily_metrics, monkeypatch):
+    monkeypatch.setattr(settings, "BXB_DAILY_USAGE_WORKERS", 1)
+    service = DailyUsageService(db)
+    expected_records = len(daily_metrics) * len(CUSTOMERS)
+
+    def run():
+        return service.aggregate_daily_usage(target_date=DAY, organization_ids=[DEFAULT_ORG_ID])
+
+    assert run() == expected_records
+    assert db.query(DailyUsage).count() == expected_records
+
+    _add_day_event(db, "txn-calls-late", "cust-a", "calls", 12, "1", "u1")
+    db.commit()
+
+    assert run() == expected_records
+    assert db.query(DailyUsage).count() == expected_records
+    db.expire_all()
+    calls = (
+        db.query(DailyUsage)
+        .join(BillableMetric, BillableMetric.id == DailyUsage.billable_metric_id)
+        .filter(BillableMetric.code == "calls", DailyUsage.external_customer_id == "cust-a")
+        .one()
+    )
+    assert calls.usage_value == Decimal(4)
+    assert calls.events_count == 4
@@ -0,0 +1,102 @@
+"""Tests for the shared per-charge usage snapshot."""
+
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models.billable_metric import AggregationType, BillableMetric
+from app.models.charge import Charge, ChargeModel
+from app.models.customer import Customer
+from app.models.event import Event
+from app.models.plan import Plan
+from app.models.subscription import Subscription, SubscriptionStatus
+from app.services.usage_snapshot import UsageSnapshotService, clear_usage_snapshot_cache
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+PERIOD_START = datetime(2026, 1, 1, tzinfo=UTC)
+PERIOD_END = datetime(2026, 2, 1, tzinfo=UTC)
+INGESTED_AT = datetime(2026, 1, 20, tzinfo=UTC)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "BXB_USAGE_SNAPSHOT_TTL_SECONDS", 60)
+    clear_usage_snapshot_cache()
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        clear_usage_snapshot_cache()
+
+
+@pytest.fixture
+def subscription(db):
+    metric = BillableMetric(
+        organization_id=DEFAULT_ORG_ID,
+        code="api_calls",
+        name="API Calls",
+        aggregation_type=AggregationType.COUNT.value,
+    )
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    plan = Plan(organization_id=DEFAULT_ORG_ID, code="basic", name="Basic", interval="monthly")
+    db.add_all([metric, customer, plan])
+    db.flush()
+    subscription = Subscription(
+        organization_id=DEFAULT_ORG_ID,
+        external_id="sub-1",
+        customer_id=customer.id,
+        plan_id=plan.id,
+        status=SubscriptionStatus.ACTIVE.value,
+    )
+    db.add_all(
+        [
+            subscription,
+            Charge(
+                organization_id=DEFAULT_ORG_ID,
+                plan_id=plan.id,
+                billable_metric_id=metric.id,
+                charge_model=ChargeModel.STANDARD.value,
+                properties={"amount": "2"},
+            ),
+        ]
+    )
+    for i in range(3):
+        _add_event(db, f"txn-{i}", created_at=INGESTED_AT)
+    db.commit()
+    return subscription
+
+
+def _add_event(db, transaction_id, created_at):
+    db.add(
+        Event(
+            organization_id=DEFAULT_ORG_ID,
+            transaction_id=transaction_id,
+            external_customer_id="cust-1",
+            code="api_calls",
+            timestamp=PERIOD_START + timedelta(days=1),
+            properties={},
+            created_at=created_at,
+        )
+    )
+
+
+def _snapshot(db, subscription):
+    return UsageSnapshotService(db).get_snapshot(subscription, "cust-1", PERIOD_START, PERIOD_END)
+
+
+def test_new_event_past_the_ingestion_watermark_invalidates_the_snapshot(db, subscription):
+    first = _snapshot(db, subscription)
+    assert first.charges[0].units == Decimal(3)
+    assert first.amount == Decimal(6)
+    assert _snapshot(db, subscription) is first
+
+    _add_event(db, "txn-late", created_at=INGESTED_AT + timedelta(seconds=1))
+    db.commit()
+
+    refreshed = _snapshot(db, subscription)
+    assert refreshed is not first
+    assert refreshed.charges[0].units == Decimal(4)
+    assert refreshed.amount == Decimal(8)
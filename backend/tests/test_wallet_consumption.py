@@ -0,0 +1,100 @@
+"""Tests for consuming prepaid wallet credits."""
+
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.customer import Customer
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_settlement import InvoiceSettlement
+from app.models.wallet import Wallet
+from app.models.wallet_transaction import WalletTransaction
+from app.repositories.invoice_settlement_repository import InvoiceSettlementRepository
+from app.services.wallet_service import WalletService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def invoice(db):
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    db.add(customer)
+    db.flush()
+    now = datetime.now(UTC)
+    invoice = Invoice(
+        organization_id=DEFAULT_ORG_ID,
+        invoice_number="INV-1",
+        customer_id=customer.id,
+        status=InvoiceStatus.FINALIZED.value,
+        billing_period_start=now,
+        billing_period_end=now,
+        total_cents=Decimal(1000),
+    )
+    db.add(invoice)
+    db.commit()
+    return invoice
+
+
+@pytest.fixture
+def wallets(db, invoice):
+    wallets = [
+        Wallet(
+            organization_id=DEFAULT_ORG_ID,
+            customer_id=invoice.customer_id,
+            code=code,
+            priority=priority,
+            balance_cents=Decimal(balance),
+            credits_balance=Decimal(balance),
+        )
+        for code, priority, balance in (("second", 2, 800), ("first", 1, 300))
+    ]
+    db.add_all(wallets)
+    db.commit()
+    return {str(wallet.code): wallet for wallet in wallets}
+
+
+def test_credits_are_consumed_by_priority(db, invoice, wallets):
+    result = WalletService(db).consume_credits(
+        invoice.customer_id,
+        Decimal(500),
+        invoice_id=invoice.id,
+    )
+
+    assert result.total_consumed == Decimal(500)
+    assert result.remaining_amount == Decimal(0)
+    db.expire_all()
+    assert wallets["first"].balance_cents == Decimal(0)
+    assert wallets["second"].balance_cents == Decimal(600)
+    assert wallets["second"].consumed_amount_cents == Decimal(200)
+    consumed = {txn.wallet_id: txn.credit_amount for txn in db.query(WalletTransaction).all()}
+    assert consumed == {wallets["first"].id: Decimal(300), wallets["second"].id: Decimal(200)}
+    settled = {s.source_id: s.amount_cents for s in db.query(InvoiceSettlement).all()}
+    assert settled == consumed
+
+
+def test_failed_consumption_leaves_wallets_untouched(db, invoice, wallets, monkeypatch):
+    def fail(self, settlements):
+        raise RuntimeError("settlements unavailable")
+
+    monkeypatch.setattr(InvoiceSettlementRepository, "add_bulk", fail)
+
+    with pytest.raises(RuntimeError):
+        WalletService(db).consume_credits(
+            invoice.customer_id,
+            Decimal(500),
+            invoice_id=invoice.id,
+        )
+
+    db.expire_all()
+    assert wallets["first"].balance_cents == Decimal(300)
+    assert wallets["second"].balance_cents == Decimal(800)
+    assert db.query(WalletTransaction).count() == 0
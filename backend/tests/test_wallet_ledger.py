@@ -0,0 +1,116 @@
+"""Tests for wallet balances read from snapshots and the transaction ledger."""
+
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models.customer import Customer
+from app.models.wallet import Wallet
+from app.models.wallet_balance_snapshot import WalletBalanceSnapshot
+from app.models.wallet_transaction import WalletTransaction
+from app.services.wallet_ledger_service import WalletLedgerService
+from app.services.wallet_service import WalletService
+from tests.conftest import DEFAULT_ORG_ID, _TestSessionLocal
+
+DAY_1 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def db():
+    session = _TestSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def wallets(db):
+    customer = Customer(organization_id=DEFAULT_ORG_ID, external_id="cust-1", name="Customer")
+    db.add(customer)
+    db.flush()
+    wallets = [
+        Wallet(organization_id=DEFAULT_ORG_ID, customer_id=customer.id, code=code, priority=p)
+        for code, p in (("main", 1), ("spare", 2))
+    ]
+    db.add_all(wallets)
+    db.commit()
+    return wallets
+
+
+def _at(db, created_at, operation):
+    """Run a wallet operation, dating the transactions it creates."""
+    before = {txn_id for (txn_id,) in db.query(WalletTransaction.id)}
+    operation()
+    db.query(WalletTransaction).filter(WalletTransaction.id.notin_(before)).update(
+        {WalletTransaction.created_at: created_at}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _summed_ledger(db, wallet, as_of):
+    """A wallet's balance and credits, summed over its whole ledger."""
+    balance = credits = Decimal(0)
+    for txn in db.query(WalletTransaction).filter(WalletTransaction.wallet_id == wallet.id):
+        if txn.created_at.replace(tzinfo=UTC) >= as_of:
+            continue
+        sign = 1 if txn.transaction_type == "inbound" else -1
+        balance += sign * Decimal(str(txn.credit_amount))
+        credits += sign * Decimal(str(txn.amount))
+    return balance, credits
+
+
+def test_snapshot_plus_tail_equals_the_summed_ledger(db, wallets):
+    main, spare = wallets
+    wallet_service = WalletService(db)
+    ledger = WalletLedgerService(db)
+
+    _at(
+        db, DAY_1 + timedelta(hours=10), lambda: wallet_service.top_up_wallet(main.id, Decimal(100))
+    )
+    _at(
+        db, DAY_1 + timedelta(hours=11), lambda: wallet_service.top_up_wallet(spare.id, Decimal(50))
+    )
+    assert ledger.snapshot_balances(DAY_1 + timedelta(days=1)) == 2
+
+    day_2 = DAY_1 + timedelta(days=1)
+    _at(
+        db,
+        day_2 + timedelta(hours=9),
+        lambda: wallet_service.consume_credits(main.customer_id, Decimal(30)),
+    )
+    _at(
+        db,
+        day_2 + timedelta(hours=15),
+        lambda: wallet_service.transfer_credits(main.id, spare.id, Decimal(20)),
+    )
+    assert ledger.snapshot_balances(day_2 + timedelta(days=1)) == 2
+    # Repeating a run leaves the snapshots taken at the same time
+    ledger.snapshot_balances(day_2 + timedelta(days=1))
+    assert db.query(WalletBalanceSnapshot).count() == 4
+
+    day_3 = day_2 + timedelta(days=1)
+    _at(db, day_3 + timedelta(hours=8), lambda: wallet_service.top_up_wallet(main.id, Decimal(5)))
+
+    for as_of in (
+        DAY_1,
+        DAY_1 + timedelta(hours=10, minutes=30),
+        day_2,
+        day_2 + timedelta(hours=12),
+        day_3,
+        day_3 + timedelta(hours=12),
+    ):
+        for wallet in wallets:
+            balance = ledger.balance_as_of(wallet.id, as_of)
+            assert (balance.balance_cents, balance.credits_balance) == _summed_ledger(
+                db, wallet, as_of
+            ), (wallet.code, as_of)
+
+    db.expire_all()
+    assert ledger.balance_as_of(main.id, day_3 + timedelta(hours=12)).balance_cents == Decimal(55)
+    assert ledger.balance_as_of(spare.id, day_3 + timedelta(hours=12)).balance_cents == Decimal(70)
+    for wallet in wallets:
+        current = ledger.balance_as_of(wallet.id, day_3 + timedelta(days=1))
+        assert current.balance_cents == wallet.balance_cents
+        assert current.credits_balance == wallet.credits_balance